@@ -7,10 +7,18 @@ from .settings import *
 
 __all__ = [
     'DATABASE_CONFIG',
+    'DATABASE_PRAGMA_CONFIG',
     'SYSTEM_CONFIG',
     'PAGINATION_CONFIG',
     'PRODUCT_CATEGORIES',
+    'VIEW_COUNTER_CONFIG',
+    'ORDER_STATS_CONFIG',
+    'AUDIT_LOG_CONFIG',
+    'ADMIN_CACHE_CONFIG',
     'AUCTION_CONFIG',
     'MESSAGE_CONFIG',
+    'OUTBOX_CONFIG',
+    'EVENT_BUS_CONFIG',
+    'FLASH_SALE_CONFIG',
     'SECURITY_CONFIG'
 ]
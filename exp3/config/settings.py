@@ -6,7 +6,20 @@ Configuration file for the Anime Shopping Mall System.
 # 数据库配置
 DATABASE_CONFIG = {
     'db_path': 'anime_mall.db',
-    'timeout': 30
+    'timeout': 30,
+    'pool_size': 5,       # 连接池最大连接数
+    'pool_timeout': 10,   # 获取连接的最长等待时间(秒)
+    'migration_chunk_size': 5000  # 迁移时分批复制的行数
+}
+
+# SQLite 性能参数(每个连接建立时应用)
+# busy_timeout 未在此配置,取自 DATABASE_CONFIG['timeout']
+DATABASE_PRAGMA_CONFIG = {
+    'journal_mode': 'WAL',         # 读写并发:写入不阻塞读取
+    'synchronous': 'NORMAL',       # WAL 模式下兼顾安全与写入速度
+    'mmap_size': 268435456,        # 256MB 内存映射读取
+    'cache_size': -20000,          # 负数表示 KiB,约 20MB 页缓存
+    'temp_store': 'MEMORY'         # 临时表/排序使用内存
 }
 
 # 系统配置
@@ -37,11 +50,42 @@ PRODUCT_CATEGORIES = [
     '其他'
 ]
 
+# 商品浏览计数配置(内存累计,后台批量写入)
+VIEW_COUNTER_CONFIG = {
+    'enabled': True,
+    'shards': 16,             # 分片数,降低并发浏览时的锁竞争
+    'flush_interval': 5.0,    # 定时刷新间隔(秒)
+    'flush_threshold': 1000   # 累计未写入次数达到该值时提前刷新
+}
+
+# 订单统计配置
+ORDER_STATS_CONFIG = {
+    'use_stats_table': True   # 从触发器维护的 order_stats 表读取;关闭时实时 GROUP BY 统计
+}
+
+# 管理员操作日志配置(有界队列 + 后台批量写入)
+AUDIT_LOG_CONFIG = {
+    'async': True,           # False 时每条日志同步写入(测试用)
+    'batch_size': 200,       # 每批 executemany 的最大条数,积压达到该值时提前写入
+    'flush_interval': 1.0,   # 定时写入间隔(秒)
+    'max_queue': 10000       # 队列容量,写满时记录日志的调用方等待
+}
+
+# 管理员身份缓存配置(verify_admin)
+ADMIN_CACHE_CONFIG = {
+    'ttl': 30.0,        # 缓存有效期(秒),0 表示不缓存;角色变更与封禁时立即失效
+    'max_size': 1024    # 最大缓存条数,超出时淘汰最久未使用的条目
+}
+
 # 拍卖配置
 AUCTION_CONFIG = {
     'min_duration_hours': 1,
     'max_duration_hours': 168,  # 7天
-    'default_bid_increment': 1.0
+    'default_bid_increment': 1.0,
+    'bid_lock_stripes': 64,     # 出价分段锁数量,同一拍卖的出价在进程内串行
+    'expiry_scheduler': True,   # 启动时运行拍卖到期调度器(按结束时间自动结束拍卖)
+    'expiry_batch_size': 200,   # 同时到期的拍卖每批结束的数量
+    'expiry_retry_delay': 5.0   # 结束失败后的重试间隔(秒)
 }
 
 # 消息配置
@@ -50,6 +94,27 @@ MESSAGE_CONFIG = {
     'supported_types': ['text', 'voice', 'image', 'emoji']
 }
 
+# 服务消息发件箱配置(与订单状态变化同一事务写入,后台批量投递)
+OUTBOX_CONFIG = {
+    'async': True,           # False 时提交后立即在调用方线程投递(测试用)
+    'batch_size': 200,       # 每批投递的最大条数
+    'flush_interval': 1.0,   # 定时补投间隔(秒),新消息提交后立即唤醒投递
+    'max_attempts': 5        # 单条消息的最大投递次数,超过后留在 outbox 待人工处理
+}
+
+# 事件总线配置(消息、出价的实时信息流)
+EVENT_BUS_CONFIG = {
+    'max_queue': 256,               # 每个订阅者的队列容量
+    'drop_policy': 'drop_oldest'    # 队列已满时: drop_oldest / drop_newest / disconnect
+}
+
+# 限时抢购配置(库存预先转入内存名额,抢购订单批量写入)
+FLASH_SALE_CONFIG = {
+    'per_buyer_limit': 1,    # 每个买家最多抢购的数量
+    'batch_size': 200,       # 每批写入的抢购订单数
+    'flush_interval': 0.2    # 定时写入间隔(秒),待写入订单达到 batch_size 时提前唤醒
+}
+
 # 安全配置
 SECURITY_CONFIG = {
     'password_min_length': 6,
@@ -0,0 +1,156 @@
+"""
+Connection Pool - 数据库连接池
+复用已初始化的 SQLite 连接,避免每条语句都重新建立/关闭连接
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from utils.exceptions import DatabaseConnectionError
+
+
+class ConnectionPool:
+    """
+    有界连接池
+
+    - 最多同时持有 max_size 个连接,超出时调用方阻塞等待
+    - 每个连接只在创建时执行一次初始化回调(PRAGMA 等)
+    - 连接可跨线程归还/复用(check_same_thread=False),但同一时刻只被一个线程持有
+    """
+
+    def __init__(self, db_path: str, max_size: int = 5, timeout: float = 10.0,
+                 setup: Optional[Callable[[sqlite3.Connection], None]] = None):
+        """
+        初始化连接池
+
+        Args:
+            db_path: 数据库文件路径
+            max_size: 最大连接数
+            timeout: 获取连接的最长等待时间(秒)
+            setup: 新连接的初始化回调
+        """
+        if max_size < 1:
+            raise ValueError("连接池大小必须大于 0")
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._setup = setup
+        self._idle: List[sqlite3.Connection] = []
+        self._created = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+        # 统计信息
+        self._hits = 0
+        self._misses = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建并初始化一个新连接"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 使用Row对象,支持按列名访问
+        if self._setup:
+            self._setup(conn)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        从池中获取一个连接
+
+        Returns:
+            sqlite3.Connection: 数据库连接
+
+        Raises:
+            DatabaseConnectionError: 连接池已关闭或等待超时
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise DatabaseConnectionError("连接池已关闭")
+                if self._idle:
+                    self._hits += 1
+                    self._in_use += 1
+                    return self._idle.pop()
+                if self._created < self.max_size:
+                    # 先占位,在锁外建立连接
+                    self._created += 1
+                    self._misses += 1
+                    self._in_use += 1
+                    break
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise DatabaseConnectionError(
+                        f"等待数据库连接超时({self.timeout}s)"
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            return self._create_connection()
+        except Exception as e:
+            with self._cond:
+                self._created -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise DatabaseConnectionError(str(e))
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        """
+        归还连接
+
+        Args:
+            conn: 之前通过 acquire 获取的连接
+            discard: 是否丢弃该连接(例如连接已损坏)
+        """
+        if not discard:
+            try:
+                # 保证归还的连接上没有未结束的事务
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._created -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """关闭连接池及所有空闲连接(使用中的连接在归还时关闭)"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._created -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        """
+        获取连接池统计信息
+
+        Returns:
+            Dict: 包含 size/max_size/idle/in_use/hits/misses/waits/timeouts
+        """
+        with self._cond:
+            return {
+                'size': self._created,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'hits': self._hits,
+                'misses': self._misses,
+                'waits': self._waits,
+                'timeouts': self._timeouts
+            }
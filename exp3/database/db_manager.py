@@ -5,9 +5,13 @@ Database Manager - 数据库管理器
 
 import sqlite3
 import os
+import threading
 from typing import Optional, List, Dict, Any
 from contextlib import contextmanager
 
+from config.settings import DATABASE_CONFIG, DATABASE_PRAGMA_CONFIG
+from .connection_pool import ConnectionPool
+
 
 class DatabaseManager:
     """
@@ -15,12 +19,13 @@ class DatabaseManager:
     使用SQLite作为数据库(可根据需要更换为MySQL/PostgreSQL等)
     """
     
-    def __init__(self, db_path: str = "anime_mall.db"):
+    def __init__(self, db_path: str = "anime_mall.db", pool_size: int = None):
         """
         初始化数据库管理器
         
         Args:
             db_path: 数据库文件路径
+            pool_size: 连接池大小(默认取 DATABASE_CONFIG['pool_size'])
         """
         # 如果是相对路径，将其放在 exp3 目录下
         if not os.path.isabs(db_path):
@@ -29,246 +34,213 @@ class DatabaseManager:
             db_path = os.path.join(base_dir, db_path)
         
         self.db_path = db_path
+        self.pool = ConnectionPool(
+            db_path,
+            max_size=pool_size or DATABASE_CONFIG.get('pool_size', 5),
+            timeout=DATABASE_CONFIG.get('pool_timeout', 10),
+            setup=self._setup_connection
+        )
+        # 记录每个线程当前持有的连接,嵌套调用时复用同一连接
+        self._local = threading.local()
+        # 关闭前需要执行的回调(如刷新后台写缓冲)
+        self._close_hooks = []
         self.init_database()
     
+    # 允许通过配置设置的 PRAGMA(PRAGMA 不支持参数绑定,只接受白名单内的名称)
+    _PRAGMA_NAMES = ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+    
+    def _setup_connection(self, conn: sqlite3.Connection) -> None:
+        """
+        新连接的初始化(每个连接只执行一次)
+        
+        Args:
+            conn: 新建立的数据库连接
+        """
+        conn.execute("PRAGMA foreign_keys = ON;")
+        for name, value in self._pragma_profile().items():
+            conn.execute(f"PRAGMA {name} = {value};").fetchall()
+    
+    @staticmethod
+    def _pragma_profile() -> Dict[str, Any]:
+        """
+        合并性能参数配置与等待超时
+        
+        Returns:
+            Dict[str, Any]: 需要应用的 PRAGMA 名称与取值
+        """
+        profile = {k: v for k, v in DATABASE_PRAGMA_CONFIG.items()
+                   if k in DatabaseManager._PRAGMA_NAMES}
+        profile['busy_timeout'] = int(DATABASE_CONFIG.get('timeout', 30) * 1000)
+        return profile
+    
+    def get_pragma_settings(self) -> Dict[str, Any]:
+        """
+        读取连接上实际生效的 PRAGMA 设置
+        
+        (例如不支持 WAL 的文件系统上 journal_mode 可能退回 delete)
+        
+        Returns:
+            Dict[str, Any]: PRAGMA 名称到实际取值的映射
+        """
+        settings = {}
+        with self.get_connection() as conn:
+            for name in ['foreign_keys'] + list(self._pragma_profile()):
+                row = conn.execute(f"PRAGMA {name};").fetchone()
+                settings[name] = row[0] if row else None
+        return settings
+    
     @contextmanager
     def get_connection(self):
         """
         获取数据库连接(上下文管理器)
         
+        连接从连接池中获取,退出时提交并归还;同一线程内嵌套调用
+        会复用外层连接,由最外层统一提交或回滚。
+        
         Yields:
             sqlite3.Connection: 数据库连接对象
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("PRAGMA foreign_keys = ON;")
-        conn.row_factory = sqlite3.Row  # 使用Row对象,支持按列名访问
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+        
+        conn = self.pool.acquire()
+        self._local.conn = conn
+        self._local.after_commit = []
+        broken = False
         try:
             yield conn
             conn.commit()
         except Exception as e:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                broken = True  # 连接已不可用,归还时丢弃
             raise e
         finally:
-            conn.close()
+            callbacks, self._local.after_commit = self._local.after_commit, []
+            self._local.conn = None
+            self.pool.release(conn, discard=broken)
+        # 提交成功后(连接已归还)执行回调
+        for callback in callbacks:
+            self._run_callback(callback)
     
-    def init_database(self) -> None:
+    @contextmanager
+    def transaction(self):
         """
-        初始化数据库表结构
+        显式事务(上下文管理器)
+        
+        最外层以 BEGIN IMMEDIATE 开启事务,退出时一次性提交;
+        在已有事务/连接内嵌套调用时使用 SAVEPOINT,异常只回滚嵌套部分。
+        事务内通过 execute_* 执行的语句都在同一连接上,共享一次提交。
+        
+        Yields:
+            sqlite3.Connection: 数据库连接对象
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 用户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    role TEXT DEFAULT 'user',
-                    is_verified BOOLEAN DEFAULT 0,
-                    profile TEXT,
-                    shop_name TEXT,
-                    rating REAL DEFAULT 5.0,
-                    total_sales INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 检查是否存在用户，如果不存在则创建超级管理员
-            cursor.execute("SELECT COUNT(*) as count FROM users")
-            user_count = cursor.fetchone()[0]
-            
-            if user_count == 0:
-                # 创建默认超级管理员账户 (密码使用哈希存储)
-                # 为避免循环导入，在函数内部导入Helper
-                from utils.helpers import Helper
-                pwd_hashed = Helper.hash_password('admin123')
-                cursor.execute("""
-                    INSERT INTO users (username, password, email, role, is_verified)
-                    VALUES (?, ?, ?, ?, ?)
-                """, ('superadmin', pwd_hashed, 'admin@animemall.com', 'superadmin', 1))
-                print("✓ 已创建默认超级管理员账户 (username: superadmin)")
-            else:
-                # 如果已经有用户，检查是否存在名为 superadmin 的账户且密码为明文，若是则将其哈希化
-                cursor.execute("SELECT password FROM users WHERE username=?", ('superadmin',))
-                row = cursor.fetchone()
-                if row:
-                    stored_pw = row[0]
-                    # 简单判断是否已经是sha256 hex字符串
-                    def looks_hashed(s: str) -> bool:
-                        if not isinstance(s, str):
-                            return False
-                        s = s.strip().lower()
-                        if len(s) != 64:
-                            return False
-                        try:
-                            int(s, 16)
-                            return True
-                        except ValueError:
-                            return False
-
-                    if not looks_hashed(stored_pw):
-                        from utils.helpers import Helper
-                        new_hashed = Helper.hash_password(stored_pw)
-                        cursor.execute("UPDATE users SET password=? WHERE username=?", (new_hashed, 'superadmin'))
-                        print("✓ 已将现有 superadmin 密码哈希化")
-            
-            # 商品表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS products (
-                    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    seller_id INTEGER NOT NULL,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    price REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    images TEXT,
-                    stock INTEGER DEFAULT 1,
-                    status TEXT DEFAULT 'available',
-                    auctionable BOOLEAN DEFAULT 0,
-                    view_count INTEGER DEFAULT 0,
-                    favorite_count INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (seller_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # 订单表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS orders (
-                    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    buyer_id INTEGER NOT NULL,
-                    seller_id INTEGER NOT NULL,
-                    product_id INTEGER NOT NULL,
-                    quantity INTEGER DEFAULT 1,
-                    total_price REAL NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    shipping_address TEXT NOT NULL,
-                    tracking_number TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    paid_at TIMESTAMP,
-                    shipped_at TIMESTAMP,
-                    completed_at TIMESTAMP,
-                    refund_reject_reason TEXT,
-                    cancel_reject_reason TEXT,
-                    FOREIGN KEY (buyer_id) REFERENCES users(user_id),
-                    FOREIGN KEY (seller_id) REFERENCES users(user_id),
-                    FOREIGN KEY (product_id) REFERENCES products(product_id)
-                )
-            ''')
-            
-            # 拍卖表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS auctions (
-                    auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER UNIQUE NOT NULL,
-                    seller_id INTEGER NOT NULL,
-                    start_price REAL NOT NULL,
-                    current_bid REAL NOT NULL,
-                    current_bidder_id INTEGER,
-                    bid_increment REAL DEFAULT 1.0,
-                    start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    end_time TIMESTAMP NOT NULL,
-                    status TEXT DEFAULT 'active',
-                    FOREIGN KEY (product_id) REFERENCES products(product_id),
-                    FOREIGN KEY (seller_id) REFERENCES users(user_id),
-                    FOREIGN KEY (current_bidder_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # 出价历史表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bid_history (
-                    bid_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    auction_id INTEGER NOT NULL,
-                    bidder_id INTEGER NOT NULL,
-                    bid_amount REAL NOT NULL,
-                    bid_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (auction_id) REFERENCES auctions(auction_id),
-                    FOREIGN KEY (bidder_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # 消息表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS messages (
-                    msg_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sender_id INTEGER NOT NULL,
-                    receiver_id INTEGER NOT NULL,
-                    content TEXT NOT NULL,
-                    msg_type TEXT DEFAULT 'text',
-                    status TEXT DEFAULT 'sent',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    read_at TIMESTAMP,
-                    FOREIGN KEY (sender_id) REFERENCES users(user_id),
-                    FOREIGN KEY (receiver_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # 举报表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS reports (
-                    report_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    reporter_id INTEGER NOT NULL,
-                    target_id INTEGER NOT NULL,
-                    target_type TEXT NOT NULL,
-                    report_type TEXT NOT NULL,
-                    reason TEXT NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    admin_id INTEGER,
-                    result TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    reviewed_at TIMESTAMP,
-                    FOREIGN KEY (reporter_id) REFERENCES users(user_id),
-                    FOREIGN KEY (admin_id) REFERENCES admins(admin_id)
-                )
-            ''')
-            
-            # 管理员表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS admins (
-                    admin_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    email TEXT UNIQUE NOT NULL,
-                    role TEXT DEFAULT 'admin',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 关注关系表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS follows (
-                    follower_id INTEGER NOT NULL,
-                    following_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (follower_id, following_id),
-                    FOREIGN KEY (follower_id) REFERENCES users(user_id),
-                    FOREIGN KEY (following_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # 收藏表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS favorites (
-                    user_id INTEGER NOT NULL,
-                    product_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (user_id, product_id),
-                    FOREIGN KEY (user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (product_id) REFERENCES products(product_id)
-                )
-            ''')
+        if getattr(self._local, 'conn', None) is None:
+            with self.get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                yield conn
+            return
+        
+        conn = self._local.conn
+        depth = getattr(self._local, 'savepoints', 0) + 1
+        self._local.savepoints = depth
+        savepoint = f"sp_{depth}"
+        # 回滚到保存点时同时丢弃嵌套部分注册的提交后回调
+        callbacks = len(self._local.after_commit)
+        conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield conn
+            conn.execute(f"RELEASE {savepoint}")
+        except Exception:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            del self._local.after_commit[callbacks:]
+            raise
+        finally:
+            self._local.savepoints = depth - 1
+    
+    def get_pool_stats(self) -> Dict:
+        """
+        获取连接池统计信息
+        
+        Returns:
+            Dict: 连接池统计(命中、等待、使用中等)
+        """
+        return self.pool.stats()
+    
+    def after_commit(self, callback) -> None:
+        """
+        注册提交后回调(如发布事件)
+        
+        当前线程持有连接(事务或 get_connection 块内)时,在最外层提交成功后执行,
+        回滚时丢弃(嵌套事务回滚到保存点时只丢弃其中注册的回调);否则立即执行。
+        
+        Args:
+            callback: 无参数的可调用对象
+        """
+        if getattr(self._local, 'conn', None) is None:
+            self._run_callback(callback)
+        else:
+            self._local.after_commit.append(callback)
+    
+    @staticmethod
+    def _run_callback(callback) -> None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"提交后回调执行失败: {str(e)}")
+    
+    def on_close(self, callback) -> None:
+        """
+        注册关闭回调,在 close() 释放连接池之前按注册的逆序执行
+        
+        Args:
+            callback: 无参数的可调用对象
+        """
+        self._close_hooks.append(callback)
+    
+    def close(self) -> None:
+        """
+        关闭数据库管理器: 执行关闭回调后释放连接池中的连接
+        """
+        while self._close_hooks:
+            callback = self._close_hooks.pop()
+            try:
+                callback()
+            except Exception as e:
+                print(f"数据库关闭回调执行失败: {str(e)}")
+        self.pool.close()
+    
+    def init_database(self) -> List[int]:
+        """
+        初始化/升级数据库表结构
+        
+        通过 MigrationRunner 按版本执行 database/migrations 下的迁移;
+        数据库已是最新版本时不执行任何 DDL。
+        
+        Returns:
+            List[int]: 本次执行的迁移版本号
+        """
+        from .migrator import MigrationRunner
+        return MigrationRunner(self).migrate()
+    
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        """
+        获取查询的执行计划
+        
+        Args:
+            query: SQL语句
+            params: 查询参数
             
-            # 数据库迁移：添加 cancel_reject_reason 字段（如果不存在）
-            cursor.execute("PRAGMA table_info(orders)")
-            columns = [row[1] for row in cursor.fetchall()]
-            if 'cancel_reject_reason' not in columns:
-                cursor.execute("ALTER TABLE orders ADD COLUMN cancel_reject_reason TEXT")
-                print("✓ 已添加 cancel_reject_reason 字段到 orders 表")
+        Returns:
+            List[str]: 执行计划中每一步的描述(如 "SEARCH orders USING INDEX ...")
+        """
+        with self.get_connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            return [row['detail'] for row in rows]
     
     def execute_query(self, query: str, params: tuple = ()) -> List[Dict]:
         """
@@ -331,3 +303,19 @@ class DatabaseManager:
             int: 受影响的行数
         """
         return self.execute_update(query, params)
+    
+    def execute_many(self, query: str, seq_of_params) -> int:
+        """
+        批量执行同一语句(单连接、单次提交)
+        
+        Args:
+            query: SQL语句
+            seq_of_params: 参数序列
+            
+        Returns:
+            int: 受影响的总行数
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(query, seq_of_params)
+            return cursor.rowcount
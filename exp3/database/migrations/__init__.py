@@ -0,0 +1,8 @@
+"""
+Schema migrations - 数据库迁移
+
+每个迁移模块命名为 mNNNN_<描述>.py,并提供:
+    VERSION (int): 版本号,严格递增
+    DESCRIPTION (str): 迁移说明
+    upgrade(conn): 执行迁移(由 MigrationRunner 负责事务与版本记录)
+"""
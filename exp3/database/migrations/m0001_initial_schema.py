@@ -0,0 +1,164 @@
+"""
+初始表结构
+"""
+
+VERSION = 1
+DESCRIPTION = "initial schema"
+
+# 表名 -> 列定义(供后续重建表的迁移复用)
+TABLE_SCHEMAS = {
+    # 用户表
+    'users': '''
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        role TEXT DEFAULT 'user',
+        is_verified BOOLEAN DEFAULT 0,
+        profile TEXT,
+        shop_name TEXT,
+        rating REAL DEFAULT 5.0,
+        total_sales INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ''',
+    # 商品表
+    'products': '''
+        product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        seller_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        price REAL NOT NULL,
+        category TEXT NOT NULL,
+        images TEXT,
+        stock INTEGER DEFAULT 1,
+        status TEXT DEFAULT 'available',
+        auctionable BOOLEAN DEFAULT 0,
+        view_count INTEGER DEFAULT 0,
+        favorite_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (seller_id) REFERENCES users(user_id)
+    ''',
+    # 订单表
+    'orders': '''
+        order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        buyer_id INTEGER NOT NULL,
+        seller_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER DEFAULT 1,
+        total_price REAL NOT NULL,
+        status TEXT DEFAULT 'pending',
+        shipping_address TEXT NOT NULL,
+        tracking_number TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        paid_at TIMESTAMP,
+        shipped_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        refund_reject_reason TEXT,
+        cancel_reject_reason TEXT,
+        FOREIGN KEY (buyer_id) REFERENCES users(user_id),
+        FOREIGN KEY (seller_id) REFERENCES users(user_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id)
+    ''',
+    # 拍卖表
+    'auctions': '''
+        auction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER UNIQUE NOT NULL,
+        seller_id INTEGER NOT NULL,
+        start_price REAL NOT NULL,
+        current_bid REAL NOT NULL,
+        current_bidder_id INTEGER,
+        bid_increment REAL DEFAULT 1.0,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        end_time TIMESTAMP NOT NULL,
+        status TEXT DEFAULT 'active',
+        FOREIGN KEY (product_id) REFERENCES products(product_id),
+        FOREIGN KEY (seller_id) REFERENCES users(user_id),
+        FOREIGN KEY (current_bidder_id) REFERENCES users(user_id)
+    ''',
+    # 出价历史表
+    'bid_history': '''
+        bid_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        auction_id INTEGER NOT NULL,
+        bidder_id INTEGER NOT NULL,
+        bid_amount REAL NOT NULL,
+        bid_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (auction_id) REFERENCES auctions(auction_id),
+        FOREIGN KEY (bidder_id) REFERENCES users(user_id)
+    ''',
+    # 消息表
+    'messages': '''
+        msg_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sender_id INTEGER NOT NULL,
+        receiver_id INTEGER NOT NULL,
+        content TEXT NOT NULL,
+        msg_type TEXT DEFAULT 'text',
+        status TEXT DEFAULT 'sent',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        read_at TIMESTAMP,
+        FOREIGN KEY (sender_id) REFERENCES users(user_id),
+        FOREIGN KEY (receiver_id) REFERENCES users(user_id)
+    ''',
+    # 举报表
+    'reports': '''
+        report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        reporter_id INTEGER NOT NULL,
+        target_id INTEGER NOT NULL,
+        target_type TEXT NOT NULL,
+        report_type TEXT NOT NULL,
+        reason TEXT NOT NULL,
+        status TEXT DEFAULT 'pending',
+        admin_id INTEGER,
+        result TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        reviewed_at TIMESTAMP,
+        FOREIGN KEY (reporter_id) REFERENCES users(user_id),
+        FOREIGN KEY (admin_id) REFERENCES admins(admin_id)
+    ''',
+    # 管理员表
+    'admins': '''
+        admin_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        role TEXT DEFAULT 'admin',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ''',
+    # 关注关系表
+    'follows': '''
+        follower_id INTEGER NOT NULL,
+        following_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (follower_id, following_id),
+        FOREIGN KEY (follower_id) REFERENCES users(user_id),
+        FOREIGN KEY (following_id) REFERENCES users(user_id)
+    ''',
+    # 收藏表
+    'favorites': '''
+        user_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, product_id),
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        FOREIGN KEY (product_id) REFERENCES products(product_id)
+    ''',
+}
+
+
+def create_table(conn, table: str, name: str = None) -> None:
+    """
+    按 TABLE_SCHEMAS 创建表(已存在则跳过)
+
+    Args:
+        conn: 数据库连接
+        table: TABLE_SCHEMAS 中的表名
+        name: 实际创建的表名(重建表时使用临时名称)
+    """
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {name or table} ({TABLE_SCHEMAS[table]})")
+
+
+def upgrade(conn) -> None:
+    """创建全部基础表(兼容已存在的旧数据库)"""
+    for table in TABLE_SCHEMAS:
+        create_table(conn, table)
@@ -0,0 +1,82 @@
+"""
+移除 sellers 表,将卖家信息合并到 users 表
+
+products / orders / auctions 的 seller_id 由 sellers.seller_id 改为 users.user_id。
+大表按主键分批复制到 <表名>_new,每批单独提交,避免迁移期间长时间持有写锁;
+全部复制完成后在一个短事务中替换旧表并删除 sellers 表。
+中断后重新启动会从已复制的位置继续。
+"""
+
+from database.migrator import table_exists, column_names, copy_in_chunks
+from database.migrations.m0001_initial_schema import create_table
+
+VERSION = 2
+DESCRIPTION = "merge sellers into users"
+
+# 需要重建的表: (表名, 主键)
+REBUILD_TABLES = [
+    ('products', 'product_id'),
+    ('orders', 'order_id'),
+    ('auctions', 'auction_id'),
+]
+
+
+def _copy_with_user_seller_id(conn, table: str, key: str) -> None:
+    """将表复制到 <表名>_new,seller_id 映射为卖家对应的 user_id"""
+    new_table = f"{table}_new"
+    create_table(conn, table, name=new_table)
+    conn.commit()
+
+    # 只复制新旧表共有的列(旧库可能缺少后来新增的列)
+    old_columns = set(column_names(conn, table))
+    columns = [c for c in column_names(conn, new_table) if c in old_columns]
+    exprs = [
+        "COALESCE(s.user_id, t.seller_id)" if c == 'seller_id' else f"t.{c}"
+        for c in columns
+    ]
+    copied = copy_in_chunks(
+        conn, new_table, key, columns, exprs,
+        source=f"{table} t LEFT JOIN sellers s ON t.seller_id = s.seller_id",
+        source_key=f"t.{key}"
+    )
+
+    print(f"  ✓ {table} 表已复制 {copied} 行")
+
+
+def upgrade(conn) -> None:
+    """执行迁移(不存在 sellers 表时跳过)"""
+    if not table_exists(conn, 'sellers'):
+        return
+
+    # 1. 为 users 表添加卖家字段
+    columns = column_names(conn, 'users')
+    if 'shop_name' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN shop_name TEXT")
+    if 'rating' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN rating REAL DEFAULT 5.0")
+    if 'total_sales' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN total_sales INTEGER DEFAULT 0")
+
+    # 2. 迁移卖家信息
+    conn.execute("""
+        UPDATE users
+        SET (shop_name, rating, total_sales, role) = (
+            SELECT s.shop_name, s.rating, s.total_sales, 'seller'
+            FROM sellers s WHERE s.user_id = users.user_id
+        )
+        WHERE user_id IN (SELECT user_id FROM sellers)
+    """)
+    conn.commit()
+
+    # 3. 分批复制引用卖家的表
+    tables = [table for table, _ in REBUILD_TABLES if table_exists(conn, table)]
+    for table, key in REBUILD_TABLES:
+        if table in tables:
+            _copy_with_user_seller_id(conn, table, key)
+
+    # 4. 短事务内替换旧表并删除 sellers 表(执行器在同一事务中记录版本)
+    conn.execute("BEGIN IMMEDIATE")
+    for table in tables:
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    conn.execute("DROP TABLE sellers")
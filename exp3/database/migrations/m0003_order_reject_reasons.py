@@ -0,0 +1,17 @@
+"""
+为 orders 表补充取消/退款拒绝原因字段(旧数据库兼容)
+"""
+
+from database.migrator import column_names
+
+VERSION = 3
+DESCRIPTION = "add orders.cancel_reject_reason / refund_reject_reason"
+
+
+def upgrade(conn) -> None:
+    """添加缺失的字段"""
+    columns = column_names(conn, 'orders')
+    for column in ('refund_reject_reason', 'cancel_reject_reason'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE orders ADD COLUMN {column} TEXT")
+            print(f"✓ 已添加 {column} 字段到 orders 表")
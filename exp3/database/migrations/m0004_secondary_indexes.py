@@ -0,0 +1,39 @@
+"""
+二级索引(主键以外的查询索引)
+"""
+
+VERSION = 4
+DESCRIPTION = "secondary indexes for hot service queries"
+
+# 对应各服务中的高频 WHERE / ORDER BY
+INDEXES = [
+    # 商品: 可售列表按时间/分类/价格排序、卖家商品管理
+    "CREATE INDEX IF NOT EXISTS idx_products_status_created ON products(status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_products_status_category_created ON products(status, category, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_products_status_category_price ON products(status, category, price)",
+    "CREATE INDEX IF NOT EXISTS idx_products_seller_created ON products(seller_id, created_at)",
+    # 订单: 买家/卖家订单列表与按状态统计
+    "CREATE INDEX IF NOT EXISTS idx_orders_buyer_created ON orders(buyer_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_buyer_status ON orders(buyer_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_seller_created ON orders(seller_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_seller_status ON orders(seller_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_product ON orders(product_id)",
+    # 消息: 会话记录、未读统计、最近联系人
+    "CREATE INDEX IF NOT EXISTS idx_messages_sender_receiver_created ON messages(sender_id, receiver_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_messages_receiver_sender_status ON messages(receiver_id, sender_id, status)",
+    # 收藏: 用户收藏列表按收藏时间排序
+    "CREATE INDEX IF NOT EXISTS idx_favorites_user_created ON favorites(user_id, created_at)",
+    # 举报: 待审核队列
+    "CREATE INDEX IF NOT EXISTS idx_reports_status_created ON reports(status, created_at)",
+    # 用户: 后台用户列表与每日新增统计
+    "CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at)",
+    # 拍卖: 进行中拍卖按结束时间、出价历史
+    "CREATE INDEX IF NOT EXISTS idx_auctions_status_end ON auctions(status, end_time)",
+    "CREATE INDEX IF NOT EXISTS idx_bid_history_auction_time ON bid_history(auction_id, bid_time)",
+]
+
+
+def upgrade(conn) -> None:
+    """创建索引"""
+    for index_ddl in INDEXES:
+        conn.execute(index_ddl)
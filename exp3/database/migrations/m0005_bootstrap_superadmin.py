@@ -0,0 +1,43 @@
+"""
+创建默认超级管理员,并将旧版本中明文存储的 superadmin 密码哈希化
+"""
+
+VERSION = 5
+DESCRIPTION = "bootstrap superadmin account"
+
+
+def _looks_hashed(s: str) -> bool:
+    """简单判断是否已经是sha256 hex字符串"""
+    if not isinstance(s, str):
+        return False
+    s = s.strip().lower()
+    if len(s) != 64:
+        return False
+    try:
+        int(s, 16)
+        return True
+    except ValueError:
+        return False
+
+
+def upgrade(conn) -> None:
+    """检查是否存在用户,不存在则创建超级管理员"""
+    # 为避免循环导入，在函数内部导入Helper
+    from utils.helpers import Helper
+
+    user_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    if user_count == 0:
+        # 创建默认超级管理员账户 (密码使用哈希存储)
+        conn.execute("""
+            INSERT INTO users (username, password, email, role, is_verified)
+            VALUES (?, ?, ?, ?, ?)
+        """, ('superadmin', Helper.hash_password('admin123'), 'admin@animemall.com', 'superadmin', 1))
+        print("✓ 已创建默认超级管理员账户 (username: superadmin)")
+        return
+
+    # 如果已经有用户，检查 superadmin 的密码是否为明文，若是则将其哈希化
+    row = conn.execute("SELECT password FROM users WHERE username=?", ('superadmin',)).fetchone()
+    if row and not _looks_hashed(row[0]):
+        conn.execute("UPDATE users SET password=? WHERE username=?",
+                     (Helper.hash_password(row[0]), 'superadmin'))
+        print("✓ 已将现有 superadmin 密码哈希化")
@@ -0,0 +1,53 @@
+"""
+商品全文检索索引(FTS5, trigram 分词)
+
+products_fts 为外部内容表(content='products'),由触发器与 products 保持同步;
+trigram 分词按字符切分,中日文标题(如"明日方舟")无需额外分词器。
+当前 SQLite 未编译 FTS5 或不支持 trigram 时跳过,搜索退回 LIKE。
+"""
+
+import sqlite3
+
+VERSION = 6
+DESCRIPTION = "products full-text search index (fts5 trigram)"
+
+TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, title, description)
+        VALUES (new.product_id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, title, description)
+        VALUES ('delete', old.product_id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF title, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, title, description)
+        VALUES ('delete', old.product_id, old.title, old.description);
+        INSERT INTO products_fts(rowid, title, description)
+        VALUES (new.product_id, new.title, new.description);
+    END
+    """,
+]
+
+
+def upgrade(conn) -> None:
+    """创建全文索引、同步触发器并为已有商品建立索引"""
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                title, description,
+                content='products', content_rowid='product_id',
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠ 当前 SQLite 不支持 FTS5 trigram({e}),商品搜索将使用 LIKE")
+        return
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+    conn.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
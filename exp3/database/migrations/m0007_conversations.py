@@ -0,0 +1,112 @@
+"""
+会话汇总表 conversations
+
+每个用户与每个联系人一行(双向各一行),记录最后一条消息和未读数,
+最近联系人列表只需按 (user_id, last_at) 索引读取 limit 行。
+由 messages 上的触发器维护,与发送/已读/删除消息处于同一事务。
+未读指状态为 sent/delivered 的消息。
+"""
+
+VERSION = 7
+DESCRIPTION = "conversations summary table maintained by message triggers"
+
+TRIGGERS = [
+    # 新消息: 更新双方的最后一条消息;接收方未读数 +1
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_msg_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO conversations (user_id, peer_id, last_msg_id, last_at, unread_count)
+        VALUES (new.sender_id, new.receiver_id, new.msg_id, new.created_at, 0),
+               (new.receiver_id, new.sender_id, new.msg_id, new.created_at,
+                new.status IN ('sent', 'delivered'))
+        ON CONFLICT (user_id, peer_id) DO UPDATE SET
+            last_msg_id = CASE WHEN (excluded.last_at, excluded.last_msg_id) > (last_at, last_msg_id)
+                               THEN excluded.last_msg_id ELSE last_msg_id END,
+            last_at = CASE WHEN (excluded.last_at, excluded.last_msg_id) > (last_at, last_msg_id)
+                           THEN excluded.last_at ELSE last_at END,
+            unread_count = unread_count + excluded.unread_count;
+    END
+    """,
+    # 已读状态变化: 调整接收方未读数
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_msg_au AFTER UPDATE OF status ON messages
+    WHEN (old.status IN ('sent', 'delivered')) <> (new.status IN ('sent', 'delivered')) BEGIN
+        UPDATE conversations
+        SET unread_count = unread_count + (new.status IN ('sent', 'delivered'))
+                                        - (old.status IN ('sent', 'delivered'))
+        WHERE user_id = new.receiver_id AND peer_id = new.sender_id;
+    END
+    """,
+    # 删除消息: 扣减未读数;删除的是最后一条时回退到上一条,会话清空则删除汇总行
+    """
+    CREATE TRIGGER IF NOT EXISTS conversations_msg_ad AFTER DELETE ON messages BEGIN
+        UPDATE conversations SET unread_count = unread_count - 1
+        WHERE user_id = old.receiver_id AND peer_id = old.sender_id
+          AND old.status IN ('sent', 'delivered');
+        UPDATE conversations SET (last_msg_id, last_at) = (
+            SELECT msg_id, created_at FROM (
+                SELECT * FROM (
+                    SELECT msg_id, created_at FROM messages
+                    WHERE sender_id = old.sender_id AND receiver_id = old.receiver_id
+                    ORDER BY created_at DESC, msg_id DESC LIMIT 1
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT msg_id, created_at FROM messages
+                    WHERE sender_id = old.receiver_id AND receiver_id = old.sender_id
+                    ORDER BY created_at DESC, msg_id DESC LIMIT 1
+                )
+            ) ORDER BY created_at DESC, msg_id DESC LIMIT 1
+        )
+        WHERE ((user_id = old.sender_id AND peer_id = old.receiver_id)
+               OR (user_id = old.receiver_id AND peer_id = old.sender_id))
+          AND last_msg_id = old.msg_id;
+        DELETE FROM conversations
+        WHERE ((user_id = old.sender_id AND peer_id = old.receiver_id)
+               OR (user_id = old.receiver_id AND peer_id = old.sender_id))
+          AND last_msg_id IS NULL;
+    END
+    """,
+]
+
+
+def upgrade(conn) -> None:
+    """创建会话表与触发器,并根据已有消息回填"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS conversations (
+            user_id INTEGER NOT NULL,
+            peer_id INTEGER NOT NULL,
+            last_msg_id INTEGER,
+            last_at TIMESTAMP,
+            unread_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, peer_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (peer_id) REFERENCES users(user_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_conversations_user_last "
+        "ON conversations(user_id, last_at, last_msg_id)"
+    )
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+
+    # 回填: 每个 (用户, 联系人) 取最后一条消息并统计未读数
+    conn.execute("""
+        INSERT OR REPLACE INTO conversations (user_id, peer_id, last_msg_id, last_at, unread_count)
+        SELECT user_id, peer_id, msg_id, created_at, unread FROM (
+            SELECT user_id, peer_id, msg_id, created_at,
+                   SUM(unread) OVER (PARTITION BY user_id, peer_id) AS unread,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY user_id, peer_id ORDER BY created_at DESC, msg_id DESC
+                   ) AS rn
+            FROM (
+                SELECT sender_id AS user_id, receiver_id AS peer_id, msg_id, created_at,
+                       0 AS unread
+                FROM messages
+                UNION ALL
+                SELECT receiver_id, sender_id, msg_id, created_at,
+                       status IN ('sent', 'delivered')
+                FROM messages
+            )
+        ) WHERE rn = 1
+    """)
@@ -0,0 +1,80 @@
+"""
+用户订单统计表 order_stats
+
+按 (用户, 角色, 订单状态) 汇总订单数与金额,由 orders 上的触发器在下单、
+状态流转、删除订单的同一事务中增量维护,统计面板读取时与历史订单量无关。
+"""
+
+VERSION = 8
+DESCRIPTION = "per-user order statistics maintained by order triggers"
+
+# 订单的买家/卖家两行统计: (用户列, 角色)
+_SIDES = (('buyer_id', 'buyer'), ('seller_id', 'seller'))
+
+
+def _add(ref: str) -> str:
+    """把 ref(new/old) 订单计入统计的语句"""
+    rows = ',\n               '.join(
+        f"({ref}.{column}, '{role}', {ref}.status, 1, {ref}.total_price)"
+        for column, role in _SIDES
+    )
+    return f"""
+        INSERT INTO order_stats (user_id, role, status, order_count, total_amount)
+        VALUES {rows}
+        ON CONFLICT (user_id, role, status) DO UPDATE SET
+            order_count = order_count + 1,
+            total_amount = total_amount + excluded.total_amount;"""
+
+
+def _remove(ref: str) -> str:
+    """把 ref(new/old) 订单从统计中扣除的语句"""
+    return ''.join(
+        f"""
+        UPDATE order_stats
+        SET order_count = order_count - 1, total_amount = total_amount - {ref}.total_price
+        WHERE user_id = {ref}.{column} AND role = '{role}' AND status = {ref}.status;"""
+        for column, role in _SIDES
+    )
+
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS order_stats_ai AFTER INSERT ON orders BEGIN{_add('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS order_stats_au
+    AFTER UPDATE OF status, total_price, buyer_id, seller_id ON orders
+    WHEN old.status IS NOT new.status OR old.total_price IS NOT new.total_price
+      OR old.buyer_id IS NOT new.buyer_id OR old.seller_id IS NOT new.seller_id BEGIN{_remove('old')}{_add('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS order_stats_ad AFTER DELETE ON orders BEGIN{_remove('old')}
+    END
+    """,
+]
+
+
+def upgrade(conn) -> None:
+    """创建统计表与触发器,并根据已有订单回填"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS order_stats (
+            user_id INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            status TEXT NOT NULL,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, role, status)
+        ) WITHOUT ROWID
+    """)
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+
+    conn.execute("DELETE FROM order_stats")
+    for column, role in _SIDES:
+        conn.execute(f"""
+            INSERT INTO order_stats (user_id, role, status, order_count, total_amount)
+            SELECT {column}, '{role}', status, COUNT(*), COALESCE(SUM(total_price), 0)
+            FROM orders GROUP BY {column}, status
+        """)
@@ -0,0 +1,104 @@
+"""
+平台统计汇总表
+
+- platform_counters: 用户/商品/订单总数与待处理举报数,每项一行
+- daily_counters: 按天(UTC,与 CURRENT_TIMESTAMP 一致)统计新增用户/商品/订单
+
+均由触发器在对应写操作的同一事务中增量维护,后台统计面板与按天趋势只需主键查询。
+"""
+
+VERSION = 9
+DESCRIPTION = "platform counters and daily buckets maintained by triggers"
+
+# 计入总数与每日新增的表: 计数名 -> 表名
+COUNTED_TABLES = {
+    'users': 'users',
+    'products': 'products',
+    'orders': 'orders',
+}
+
+
+def _bump(name: str, delta: str) -> str:
+    """累加 platform_counters 中某一项"""
+    return f"""
+        INSERT INTO platform_counters (name, value) VALUES ('{name}', {delta})
+        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;"""
+
+
+def _bump_day(metric: str, day: str, delta: str) -> str:
+    """累加 daily_counters 中某天的计数"""
+    return f"""
+        INSERT INTO daily_counters (metric, day, value) VALUES ('{metric}', DATE({day}), {delta})
+        ON CONFLICT (metric, day) DO UPDATE SET value = value + excluded.value;"""
+
+
+def _triggers():
+    triggers = []
+    for name, table in COUNTED_TABLES.items():
+        triggers.append(f"""
+            CREATE TRIGGER IF NOT EXISTS counters_{table}_ai AFTER INSERT ON {table} BEGIN
+                {_bump(name, '1')}{_bump_day(name, 'new.created_at', '1')}
+            END
+        """)
+        triggers.append(f"""
+            CREATE TRIGGER IF NOT EXISTS counters_{table}_ad AFTER DELETE ON {table} BEGIN
+                {_bump(name, '-1')}{_bump_day(name, 'old.created_at', '-1')}
+            END
+        """)
+    # 待处理举报数随举报状态变化
+    triggers.append(f"""
+        CREATE TRIGGER IF NOT EXISTS counters_reports_ai AFTER INSERT ON reports
+        WHEN new.status = 'pending' BEGIN{_bump('pending_reports', '1')}
+        END
+    """)
+    triggers.append(f"""
+        CREATE TRIGGER IF NOT EXISTS counters_reports_au AFTER UPDATE OF status ON reports
+        WHEN (old.status IS 'pending') <> (new.status IS 'pending') BEGIN
+            {_bump('pending_reports', "(new.status IS 'pending') - (old.status IS 'pending')")}
+        END
+    """)
+    triggers.append(f"""
+        CREATE TRIGGER IF NOT EXISTS counters_reports_ad AFTER DELETE ON reports
+        WHEN old.status = 'pending' BEGIN{_bump('pending_reports', '-1')}
+        END
+    """)
+    return triggers
+
+
+TRIGGERS = _triggers()
+
+
+def upgrade(conn) -> None:
+    """创建汇总表与触发器,并根据已有数据回填"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS platform_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_counters (
+            metric TEXT NOT NULL,
+            day TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (metric, day)
+        ) WITHOUT ROWID
+    """)
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+
+    conn.execute("DELETE FROM platform_counters")
+    conn.execute("DELETE FROM daily_counters")
+    for name, table in COUNTED_TABLES.items():
+        conn.execute(
+            f"INSERT INTO platform_counters (name, value) SELECT '{name}', COUNT(*) FROM {table}"
+        )
+        conn.execute(f"""
+            INSERT INTO daily_counters (metric, day, value)
+            SELECT '{name}', DATE(created_at), COUNT(*) FROM {table}
+            WHERE created_at IS NOT NULL GROUP BY DATE(created_at)
+        """)
+    conn.execute(
+        "INSERT INTO platform_counters (name, value) "
+        "SELECT 'pending_reports', COUNT(*) FROM reports WHERE status = 'pending'"
+    )
@@ -0,0 +1,26 @@
+"""
+管理员操作日志表 admin_logs
+
+此前由 AdminService 在每次记录日志时执行 CREATE TABLE IF NOT EXISTS,
+改为迁移时创建一次;旧数据库中已存在的表保持不变。
+"""
+
+VERSION = 10
+DESCRIPTION = "admin_logs audit table"
+
+
+def upgrade(conn) -> None:
+    """创建日志表与按管理员/时间查询的索引"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS admin_logs (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER NOT NULL,
+            action_type TEXT NOT NULL,
+            details TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (admin_id) REFERENCES users(user_id)
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_admin_logs_admin_created ON admin_logs(admin_id, created_at)"
+    )
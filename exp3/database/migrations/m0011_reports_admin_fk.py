@@ -0,0 +1,59 @@
+"""
+reports.admin_id 改为引用 users 表
+
+管理员已合并到 users 表(role 为 admin/superadmin),但旧库中 reports.admin_id
+仍引用 admins 表,开启外键约束后审核举报写入 admin_id 会失败。
+重建 reports 表并恢复其索引与计数触发器。
+"""
+
+from database.migrator import table_exists, column_names
+from database.migrations.m0004_secondary_indexes import INDEXES
+from database.migrations.m0009_platform_counters import TRIGGERS
+
+VERSION = 11
+DESCRIPTION = "reports.admin_id references users"
+
+# 重建后的 reports 表(m0001 中的初始结构保持不变)
+REPORTS_SCHEMA = '''
+    report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    reporter_id INTEGER NOT NULL,
+    target_id INTEGER NOT NULL,
+    target_type TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    status TEXT DEFAULT 'pending',
+    admin_id INTEGER,
+    result TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    reviewed_at TIMESTAMP,
+    FOREIGN KEY (reporter_id) REFERENCES users(user_id),
+    FOREIGN KEY (admin_id) REFERENCES users(user_id)
+'''
+
+
+def _admin_fk_target(conn) -> str:
+    """reports.admin_id 外键引用的表名"""
+    for row in conn.execute("PRAGMA foreign_key_list(reports)").fetchall():
+        if row[3] == 'admin_id':
+            return row[2]
+    return ''
+
+
+def upgrade(conn) -> None:
+    """外键已指向 users 时跳过"""
+    if not table_exists(conn, 'reports') or _admin_fk_target(conn) == 'users':
+        return
+
+    conn.execute(f"CREATE TABLE IF NOT EXISTS reports_new ({REPORTS_SCHEMA})")
+    old_columns = set(column_names(conn, 'reports'))
+    columns = ', '.join(c for c in column_names(conn, 'reports_new') if c in old_columns)
+    conn.execute(f"INSERT INTO reports_new ({columns}) SELECT {columns} FROM reports")
+    conn.execute("DROP TABLE reports")
+    conn.execute("ALTER TABLE reports_new RENAME TO reports")
+
+    for index_ddl in INDEXES:
+        if ' ON reports(' in index_ddl:
+            conn.execute(index_ddl)
+    for trigger in TRIGGERS:
+        if ' ON reports' in trigger:
+            conn.execute(trigger)
@@ -0,0 +1,13 @@
+"""
+出价历史按出价者查询的索引(用户参与的拍卖列表)
+"""
+
+VERSION = 12
+DESCRIPTION = "bid_history bidder index"
+
+
+def upgrade(conn) -> None:
+    """创建索引"""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_bid_history_bidder_auction ON bid_history(bidder_id, auction_id)"
+    )
@@ -0,0 +1,21 @@
+"""
+代理出价: auctions 记录当前领先者的最高出价,bid_history 标记代理自动出价
+"""
+
+from database.migrator import column_names
+
+VERSION = 13
+DESCRIPTION = "add auctions.max_bid / bid_history.is_proxy"
+
+_COLUMNS = (
+    ('auctions', 'max_bid', 'REAL'),
+    ('bid_history', 'is_proxy', 'INTEGER DEFAULT 0'),
+)
+
+
+def upgrade(conn) -> None:
+    """添加缺失的字段"""
+    for table, column, definition in _COLUMNS:
+        if column not in column_names(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            print(f"✓ 已添加 {column} 字段到 {table} 表")
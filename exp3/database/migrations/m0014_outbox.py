@@ -0,0 +1,25 @@
+"""
+服务消息发件箱 outbox
+
+订单状态变化与待发送的服务消息在同一事务中写入,由 OutboxDispatcher
+批量投递到 messages 后删除;投递失败的行记录次数与错误原因。
+"""
+
+VERSION = 14
+DESCRIPTION = "outbox table for transactional service messages"
+
+
+def upgrade(conn) -> None:
+    """创建发件箱表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            outbox_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_id INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            msg_type TEXT NOT NULL DEFAULT 'service',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT
+        )
+    """)
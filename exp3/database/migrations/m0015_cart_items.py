@@ -0,0 +1,23 @@
+"""
+购物车 cart_items
+
+每个用户每个商品一行,重复加入时累加数量;结算时在一个事务中为全部商品下单并清空。
+"""
+
+VERSION = 15
+DESCRIPTION = "cart_items table"
+
+
+def upgrade(conn) -> None:
+    """创建购物车表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cart_items (
+            user_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1 CHECK (quantity > 0),
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, product_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (product_id) REFERENCES products(product_id)
+        )
+    """)
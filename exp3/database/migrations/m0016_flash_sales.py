@@ -0,0 +1,33 @@
+"""
+限时抢购 flash_sales
+
+开始抢购时把商品库存转入 reserved(products.stock 清零,普通下单不再能购买),
+抢购订单批量写入时在同一事务中累加 sold;结束时把 reserved - sold 归还库存。
+进程重启后可按 reserved - sold 恢复剩余名额。
+"""
+
+VERSION = 16
+DESCRIPTION = "flash_sales table"
+
+
+def upgrade(conn) -> None:
+    """创建限时抢购表"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS flash_sales (
+            sale_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            product_id INTEGER NOT NULL,
+            price REAL NOT NULL,
+            reserved INTEGER NOT NULL,
+            sold INTEGER NOT NULL DEFAULT 0 CHECK (sold <= reserved),
+            per_buyer_limit INTEGER NOT NULL DEFAULT 1,
+            status TEXT NOT NULL DEFAULT 'active',
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ended_at TIMESTAMP,
+            FOREIGN KEY (product_id) REFERENCES products(product_id)
+        )
+    """)
+    # 每个商品同时最多一场进行中的抢购
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_flash_sales_active
+        ON flash_sales(product_id) WHERE status = 'active'
+    """)
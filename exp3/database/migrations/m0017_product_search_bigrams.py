@@ -0,0 +1,80 @@
+"""
+商品两字中日韩词检索索引(FTS5 二元分词)
+
+trigram 索引无法匹配少于3个字符的词,而"原神"、"胡桃"等两字 IP/角色名是最常见的搜索词。
+products_bigram 为无内容表(content=''),触发器把标题与描述中相邻的两个中日韩字符
+作为一个词写入(unicode61 分词),两字词检索走 MATCH 而不是 LIKE 全表扫描。
+相邻字符由 fts_positions(1..MAX_POSITION)枚举,超出该长度的部分不建立二元索引。
+"""
+
+import sqlite3
+
+VERSION = 17
+DESCRIPTION = "products bigram index for 2-character CJK terms"
+
+MAX_POSITION = 5000
+
+# 中日韩字符: 假名与中日韩统一表意文字、韩文音节、兼容表意文字
+_CJK = ("(unicode({c}) BETWEEN 0x3040 AND 0x9FFF OR unicode({c}) BETWEEN 0xAC00 AND 0xD7AF "
+        "OR unicode({c}) BETWEEN 0xF900 AND 0xFAFF)")
+
+
+def _grams(column: str) -> str:
+    """生成 column 中全部相邻中日韩字符对(空格分隔)的 SQL 表达式"""
+    first = _CJK.format(c=f"substr({column}, n, 1)")
+    second = _CJK.format(c=f"substr({column}, n + 1, 1)")
+    return (f"(SELECT group_concat(substr({column}, n, 2), ' ') FROM fts_positions "
+            f"WHERE n < length({column}) AND {first} AND {second})")
+
+
+def _row(prefix: str) -> str:
+    return f"{_grams(prefix + '.title')}, {_grams(prefix + '.description')}"
+
+
+TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_bigram_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_bigram(rowid, title, description)
+        VALUES (new.product_id, {_row('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_bigram_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_bigram(products_bigram, rowid, title, description)
+        VALUES ('delete', old.product_id, {_row('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_bigram_au AFTER UPDATE OF title, description ON products BEGIN
+        INSERT INTO products_bigram(products_bigram, rowid, title, description)
+        VALUES ('delete', old.product_id, {_row('old')});
+        INSERT INTO products_bigram(rowid, title, description)
+        VALUES (new.product_id, {_row('new')});
+    END
+    """,
+]
+
+
+def upgrade(conn) -> None:
+    """创建二元索引、位置表与同步触发器,并为已有商品建立索引"""
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_bigram USING fts5(
+                title, description, content='', tokenize='unicode61'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"⚠ 当前 SQLite 不支持 FTS5({e}),两字词搜索将使用 LIKE")
+        return
+    conn.execute("CREATE TABLE IF NOT EXISTS fts_positions (n INTEGER PRIMARY KEY)")
+    conn.executemany(
+        "INSERT OR IGNORE INTO fts_positions (n) VALUES (?)", [(n,) for n in range(1, MAX_POSITION + 1)]
+    )
+    for trigger in TRIGGERS:
+        conn.execute(trigger)
+    # 重复执行时先清空再重建(无内容表只能通过 delete-all 清空)
+    conn.execute("INSERT INTO products_bigram(products_bigram) VALUES ('delete-all')")
+    conn.execute(f"""
+        INSERT INTO products_bigram(rowid, title, description)
+        SELECT p.product_id, {_row('p')} FROM products p
+    """)
@@ -0,0 +1,14 @@
+"""
+发件箱待投递行索引
+
+OutboxDispatcher 按 attempts < max_attempts 取待投递行;没有索引时每次轮询都要
+按 outbox_id 扫描整张表,包括已放弃重试、留待人工处理的行。
+"""
+
+VERSION = 18
+DESCRIPTION = "outbox index for pending rows"
+
+
+def upgrade(conn) -> None:
+    """创建 attempts 索引(覆盖 outbox_id)"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_attempts ON outbox(attempts)")
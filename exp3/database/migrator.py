@@ -0,0 +1,187 @@
+"""
+Migration Runner - 数据库迁移执行器
+基于 schema_version 表按版本顺序执行 database/migrations 下的迁移模块
+"""
+
+import importlib
+import pkgutil
+import sqlite3
+from typing import List, Optional
+
+from config.settings import DATABASE_CONFIG
+
+
+def table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    """
+    判断表是否存在
+
+    Args:
+        conn: 数据库连接
+        table: 表名
+
+    Returns:
+        bool: 是否存在
+    """
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)
+    ).fetchone()
+    return row is not None
+
+
+def column_names(conn: sqlite3.Connection, table: str) -> List[str]:
+    """
+    获取表的列名列表
+
+    Args:
+        conn: 数据库连接
+        table: 表名
+
+    Returns:
+        List[str]: 列名
+    """
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def copy_in_chunks(conn: sqlite3.Connection, target: str, target_key: str,
+                   columns: List[str], select_exprs: List[str], source: str,
+                   source_key: str, chunk_size: Optional[int] = None) -> int:
+    """
+    按主键分批复制数据,每批单独提交,避免长时间持有写锁
+
+    复制从目标表当前最大主键之后继续,因此中断后重新执行可以续传。
+
+    Args:
+        conn: 数据库连接
+        target: 目标表
+        target_key: 目标表主键列
+        columns: 目标表列名
+        select_exprs: 与 columns 一一对应的源查询表达式
+        source: FROM 子句(可包含 JOIN)
+        source_key: 源表主键表达式(如 p.product_id)
+        chunk_size: 每批行数(默认取 DATABASE_CONFIG['migration_chunk_size'])
+
+    Returns:
+        int: 复制的总行数
+    """
+    chunk_size = chunk_size or DATABASE_CONFIG.get('migration_chunk_size', 5000)
+    last_key = conn.execute(f"SELECT COALESCE(MAX({target_key}), 0) FROM {target}").fetchone()[0]
+    insert_sql = (
+        f"INSERT INTO {target} ({', '.join(columns)}) "
+        f"SELECT {', '.join(select_exprs)} FROM {source} "
+        f"WHERE {source_key} > ? ORDER BY {source_key} LIMIT ?"
+    )
+    total = 0
+    while True:
+        copied = conn.execute(insert_sql, (last_key, chunk_size)).rowcount
+        conn.commit()
+        total += copied
+        if copied < chunk_size:
+            return total
+        last_key = conn.execute(f"SELECT MAX({target_key}) FROM {target}").fetchone()[0]
+
+
+class MigrationRunner:
+    """
+    迁移执行器
+
+    - schema_version 记录已执行的版本
+    - 数据库已是最新版本时只执行一条查询,不运行任何 DDL
+    - 每个迁移在独立事务中执行,执行期间关闭外键检查以便重建表
+    """
+
+    def __init__(self, db_manager, package: str = 'database.migrations'):
+        """
+        初始化迁移执行器
+
+        Args:
+            db_manager: 数据库管理器实例
+            package: 迁移模块所在的包
+        """
+        self.db = db_manager
+        self.package = package
+        self._migrations = None
+
+    @property
+    def migrations(self) -> List:
+        """按版本号排序的迁移模块列表"""
+        if self._migrations is None:
+            pkg = importlib.import_module(self.package)
+            modules = [
+                importlib.import_module(f"{self.package}.{info.name}")
+                for info in pkgutil.iter_modules(pkg.__path__)
+                if info.name.startswith('m')
+            ]
+            modules.sort(key=lambda m: m.VERSION)
+            versions = [m.VERSION for m in modules]
+            if len(set(versions)) != len(versions):
+                raise ValueError(f"迁移版本号重复: {versions}")
+            self._migrations = modules
+        return self._migrations
+
+    @property
+    def latest_version(self) -> int:
+        """最新的迁移版本号"""
+        return self.migrations[-1].VERSION if self.migrations else 0
+
+    def current_version(self, conn: sqlite3.Connection) -> int:
+        """
+        获取数据库当前版本(schema_version 不存在时视为 0)
+
+        Args:
+            conn: 数据库连接
+
+        Returns:
+            int: 当前版本号
+        """
+        try:
+            row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row[0] or 0
+
+    def migrate(self) -> List[int]:
+        """
+        执行所有未应用的迁移
+
+        Returns:
+            List[int]: 本次执行的迁移版本号
+        """
+        with self.db.get_connection() as conn:
+            current = self.current_version(conn)
+            # 快速路径: 已是最新版本
+            if current >= self.latest_version:
+                return []
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+
+            applied = []
+            # PRAGMA foreign_keys 不能在事务中修改
+            conn.execute("PRAGMA foreign_keys = OFF")
+            try:
+                for migration in self.migrations:
+                    if migration.VERSION <= current:
+                        continue
+                    conn.execute("BEGIN IMMEDIATE")
+                    migration.upgrade(conn)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                        (migration.VERSION, migration.DESCRIPTION)
+                    )
+                    conn.commit()
+                    applied.append(migration.VERSION)
+                violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+                if violations:
+                    print(f"⚠ 迁移后存在 {len(violations)} 条外键不一致记录")
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.execute("PRAGMA foreign_keys = ON")
+            return applied
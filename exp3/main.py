@@ -8,26 +8,37 @@ Anime Shopping Mall System - Main Entry Point
 
 import sys
 import json
+import asyncio
 from database import DatabaseManager
 from services import (
-    UserService, ProductService, OrderService,
+    UserService, ProductService, OrderService, CartService,
     AuctionService, MessageService, ReportService
 )
+from services.auction_scheduler import start_expiry_scheduler
+from services.event_bus import get_event_bus, conversation_topic
+from services.outbox import get_outbox_dispatcher
+from services.flash_sale import start_flash_sale, get_flash_sale, end_flash_sale
 from models import User, Product, Order, Auction, Message, Report, Admin
 from utils import Validator, Helper
-from config import SYSTEM_CONFIG, PRODUCT_CATEGORIES
+from config import SYSTEM_CONFIG, PRODUCT_CATEGORIES, AUCTION_CONFIG
 from config.i18n import get_i18n, t, set_language
 
 
 class AnimeShoppingMall:
     """二次元网络商场系统主类"""
     
-    def __init__(self):
-        """初始化系统"""
-        self.db_manager = DatabaseManager()
+    def __init__(self, db_manager: DatabaseManager = None):
+        """
+        初始化系统
+        
+        Args:
+            db_manager: 数据库管理器(默认使用配置中的数据库)
+        """
+        self.db_manager = db_manager or DatabaseManager()
         self.user_service = UserService(self.db_manager)
         self.product_service = ProductService(self.db_manager)
         self.order_service = OrderService(self.db_manager)
+        self.cart_service = CartService(self.db_manager, self.order_service)
         self.auction_service = AuctionService(self.db_manager)
         self.message_service = MessageService(self.db_manager)
         self.report_service = ReportService(self.db_manager)
@@ -198,16 +209,17 @@ class AnimeShoppingMall:
     
     def show_all_products(self):
         """显示所有商品"""
-        page = 1
         per_page = 10
+        cursors = [None]  # 已浏览各页的起始游标
         
         while True:
+            page = len(cursors)
             print(f"\n{'='*50}")
             print(f"{t('feature.all_products')} - {t('common.page')} {page}")
             print(f"{'='*50}")
             
-            offset = (page - 1) * per_page
-            products = self.product_service.search_products(limit=per_page, offset=offset)
+            result = self.product_service.search_products_page(limit=per_page, after=cursors[-1])
+            products = result['items']
             
             if not products:
                 print(t('product.no_products'))
@@ -222,7 +234,8 @@ class AnimeShoppingMall:
             
             print(f"\n{'='*50}")
             print(f"1-{len(products)}: {t('common.view_details')}")
-            print(f"N: {t('common.next_page')}")
+            if result['next_cursor']:
+                print(f"N: {t('common.next_page')}")
             if page > 1:
                 print(f"P: {t('common.previous_page')}")
             print(f"0: {t('common.back')}")
@@ -231,10 +244,10 @@ class AnimeShoppingMall:
             
             if action == '0':
                 break
-            elif action == 'N':
-                page += 1
+            elif action == 'N' and result['next_cursor']:
+                cursors.append(result['next_cursor'])
             elif action == 'P' and page > 1:
-                page -= 1
+                cursors.pop()
             elif action.isdigit() and 1 <= int(action) <= len(products):
                 self.show_product_detail(products[int(action) - 1]['product_id'])
     
@@ -267,11 +280,12 @@ class AnimeShoppingMall:
     
     def show_category_products(self, category):
         """显示指定分类的商品"""
-        page = 1
         per_page = 10
         sort_by = 'newest'
+        cursors = [None]  # 已浏览各页的起始游标
         
         while True:
+            page = len(cursors)
             print(f"\n{'='*50}")
             print(f"{t('product.category')}: {category} - {t('common.page')} {page}")
             print(f"{'='*50}")
@@ -286,13 +300,13 @@ class AnimeShoppingMall:
                 print(t('product.most_popular'))
             print(f"{'='*50}")
             
-            offset = (page - 1) * per_page
-            products = self.product_service.get_products_by_category(
+            result = self.product_service.get_products_by_category_page(
                 category=category,
                 limit=per_page,
-                offset=offset,
+                after=cursors[-1],
                 sort_by=sort_by
             )
+            products = result['items']
             
             if not products:
                 print(t('product.no_products'))
@@ -306,7 +320,8 @@ class AnimeShoppingMall:
             print(f"\n{'='*50}")
             print(f"1-{len(products)}: {t('common.view_details')}")
             print(f"S: {t('product.change_sort')}")
-            print(f"N: {t('common.next_page')}")
+            if result['next_cursor']:
+                print(f"N: {t('common.next_page')}")
             if page > 1:
                 print(f"P: {t('common.previous_page')}")
             print(f"0: {t('common.back')}")
@@ -315,13 +330,13 @@ class AnimeShoppingMall:
             
             if action == '0':
                 break
-            elif action == 'N':
-                page += 1
+            elif action == 'N' and result['next_cursor']:
+                cursors.append(result['next_cursor'])
             elif action == 'P' and page > 1:
-                page -= 1
+                cursors.pop()
             elif action == 'S':
                 sort_by = self.select_sort_order()
-                page = 1  # 重置到第一页
+                cursors = [None]  # 重置到第一页
             elif action.isdigit() and 1 <= int(action) <= len(products):
                 self.show_product_detail(products[int(action) - 1]['product_id'])
     
@@ -381,6 +396,7 @@ class AnimeShoppingMall:
                 print(f"1. {t('favorite.add_to_favorites')}")
                 print(f"2. {t('order.buy_now')}")
                 print(f"3. 💬 {t('message.contact_seller')}")  # 新增：联系卖家
+                print(f"4. 🛒 {t('cart.add_to_cart')}")
                 print(f"0. {t('common.back')}")
                 
                 action = input(f"\n{t('common.please_select')}: ").strip()
@@ -401,6 +417,8 @@ class AnimeShoppingMall:
                     else:
                         # 直接打开与卖家的会话
                         self._conversation_menu(self.current_user['user_id'], seller_user_id)
+                elif action == '4':
+                    self._add_to_cart_flow(product.product_id)
             else:
                 input(f"\n{t('common.press_enter')}")
                 
@@ -440,8 +458,8 @@ class AnimeShoppingMall:
     
     def show_search_results(self, keyword=None, category=None, min_price=None, max_price=None):
         """显示搜索结果"""
-        page = 1
         per_page = 10
+        cursors = [None]  # 已浏览各页的起始游标
         
         # 构建搜索条件描述
         conditions = []
@@ -455,21 +473,22 @@ class AnimeShoppingMall:
             conditions.append(f"{t('product.max_price')}: ¥{max_price}")
         
         while True:
+            page = len(cursors)
             print(f"\n{'='*50}")
             print(f"{t('product.search_results')} - {t('common.page')} {page}")
             if conditions:
                 print(f"{t('product.search_conditions')}: {', '.join(conditions)}")
             print(f"{'='*50}")
             
-            offset = (page - 1) * per_page
-            products = self.product_service.search_products(
+            result = self.product_service.search_products_page(
                 keyword=keyword,
                 category=category,
                 min_price=min_price,
                 max_price=max_price,
                 limit=per_page,
-                offset=offset
+                after=cursors[-1]
             )
+            products = result['items']
             
             if not products:
                 print(t('product.no_results'))
@@ -488,7 +507,8 @@ class AnimeShoppingMall:
             print(f"\n{'='*50}")
             print(f"1-{len(products)}: {t('common.view_details')}")
             print(f"S: {t('product.new_search')}")
-            print(f"N: {t('common.next_page')}")
+            if result['next_cursor']:
+                print(f"N: {t('common.next_page')}")
             if page > 1:
                 print(f"P: {t('common.previous_page')}")
             print(f"0: {t('common.back')}")
@@ -497,10 +517,10 @@ class AnimeShoppingMall:
             
             if action == '0':
                 break
-            elif action == 'N':
-                page += 1
+            elif action == 'N' and result['next_cursor']:
+                cursors.append(result['next_cursor'])
             elif action == 'P' and page > 1:
-                page -= 1
+                cursors.pop()
             elif action == 'S':
                 self.search_products_menu()
                 break
@@ -650,6 +670,7 @@ class AnimeShoppingMall:
             print(f"{'='*50}")
             print(f"1. {t('order.orders')}")
             print(f"2. {t('order.statistics')}")
+            print(f"3. 🛒 {t('cart.cart')}")
             print(f"0. {t('common.back')}")
 
             choice = input(f"\n{t('common.please_select')}: ").strip()
@@ -657,6 +678,8 @@ class AnimeShoppingMall:
                 break
             elif choice == '1':
                 self._buyer_orders_list(user_id)
+            elif choice == '3':
+                self._cart_menu(user_id)
             elif choice == '2':
                 stats = self.order_service.get_order_statistics(user_id, is_seller=False)
                 print(f"\n{t('order.statistics')}: ")
@@ -796,6 +819,16 @@ class AnimeShoppingMall:
             if not product:
                 print(t('product.not_found'))
                 return
+        sale = get_flash_sale(self.db_manager, product_id)
+        if sale is not None:
+            # 限时抢购: 内存中判定是否抢到,订单稍后批量生成
+            address = input(f"{t('order.shipping_address')}: ").strip()
+            if not address:
+                print(t('common.cancelled'))
+                return
+            ok = sale.admit(self.current_user['user_id'], address)
+            print(t('order.flash_sale_admitted') if ok else t('order.flash_sale_rejected'))
+            return
         try:
             qty_input = input(f"{t('order.quantity')}: ").strip()
             quantity = int(qty_input or '1')
@@ -824,6 +857,66 @@ class AnimeShoppingMall:
         else:
             print(t('order.create_failed'))
     
+    def _add_to_cart_flow(self, product_id: int):
+        try:
+            quantity = int(input(f"{t('order.quantity')}: ").strip() or '1')
+        except ValueError:
+            print(t('product.stock_invalid_format'))
+            return
+        ok = self.cart_service.add_item(self.current_user['user_id'], product_id, quantity)
+        print(t('cart.added') if ok else t('cart.add_failed'))
+
+    def _cart_menu(self, user_id: int):
+        """购物车: 修改数量、一次结算全部商品"""
+        while True:
+            cart = self.cart_service.get_cart(user_id)
+            items = cart['items']
+            print(f"\n{'='*50}")
+            print(f"--- 🛒 {t('cart.cart')} ---")
+            print(f"{'='*50}")
+            if not items:
+                print(t('cart.empty'))
+                input(f"\n{t('common.press_enter')}")
+                return
+            for i, item in enumerate(items, 1):
+                flag = '' if item['available'] else f"  ({t('cart.unavailable')})"
+                print(f"{i}. {item['title']}  ¥{item['price']:.2f} x{item['quantity']} = ¥{item['subtotal']:.2f}{flag}")
+            print(f"\n{t('cart.total')}: ¥{cart['total_price']:.2f}")
+            print(f"\n1-{len(items)}: {t('cart.enter_quantity')}")
+            print(f"C. {t('cart.checkout')}")
+            print(f"0. {t('common.back')}")
+            sel = input(f"\n{t('common.please_select')}: ").strip()
+            if sel == '0':
+                return
+            if sel.upper() == 'C':
+                self._checkout_flow(user_id)
+                return
+            if sel.isdigit() and 1 <= int(sel) <= len(items):
+                try:
+                    quantity = int(input(f"{t('cart.enter_quantity')}: ").strip())
+                except ValueError:
+                    print(t('product.stock_invalid_format'))
+                    continue
+                self.cart_service.update_quantity(user_id, items[int(sel)-1]['product_id'], quantity)
+            else:
+                print(t('common.invalid_choice'))
+
+    def _checkout_flow(self, user_id: int):
+        address = input(f"{t('order.shipping_address')}: ").strip()
+        if not address:
+            print(t('common.cancelled'))
+            return
+        result = self.cart_service.checkout(user_id, address)
+        if not result:
+            print(t('cart.checkout_failed'))
+            return
+        order_ids = result['order_ids']
+        print(t('cart.checkout_success', count=len(order_ids), total=result['total_price'],
+                order_ids=', '.join(f'#{oid}' for oid in order_ids)))
+        if input(t('cart.pay_all')).strip().lower() == 'y':
+            paid = self.order_service.transition_orders('pay', order_ids)
+            print(t('order.pay_success') if len(paid) == len(order_ids) else t('order.pay_failed'))
+
     def messages_menu(self):
         """消息菜单 - Telegram风格联系人列表"""
         if not self.current_user:
@@ -856,37 +949,8 @@ class AnimeShoppingMall:
 
     def _contacts_list_menu(self, user_id: int):
         """联系人列表 - Telegram风格"""
-    def _contacts_list_menu(self, user_id: int):
-        """联系人列表 - Telegram风格"""
-        rows = self.message_service.get_user_messages(user_id, limit=50)
-        
-        # 构建联系人列表（按最后消息时间排序）
-        contacts = []
-        for row in rows:
-            peer_id = row['receiver_id'] if row['sender_id'] == user_id else row['sender_id']
-            peer = self._get_user_by_id(peer_id)
-            if not peer:
-                continue
-            
-            peer_name = peer['username']
-            unread_from_peer = self._get_unread_from_peer(user_id, peer_id)
-            
-            # 检查是否是卖家
-            seller_info = self.db_manager.execute_query(
-                "SELECT shop_name FROM users WHERE user_id = ?",
-                (peer_id,)
-            )
-            is_seller = len(seller_info) > 0
-            shop_name = seller_info[0]['shop_name'] if is_seller else None
-            
-            contacts.append({
-                'peer_id': peer_id,
-                'peer_name': peer_name,
-                'shop_name': shop_name,
-                'is_seller': is_seller,
-                'last': row,
-                'unread': unread_from_peer,
-            })
+        # 按最后消息时间排序,联系人名称/店铺/未读数一次查询取回
+        contacts = self.message_service.get_contacts_overview(user_id, limit=50)
 
         while True:
             print(f"\n{'='*50}")
@@ -904,28 +968,7 @@ class AnimeShoppingMall:
                     # 跳转到搜索用户
                     self._search_users_and_chat(user_id)
                     # 刷新联系人列表
-                    rows = self.message_service.get_user_messages(user_id, limit=50)
-                    contacts = []
-                    for row in rows:
-                        peer_id = row['receiver_id'] if row['sender_id'] == user_id else row['sender_id']
-                        peer = self._get_user_by_id(peer_id)
-                        if not peer:
-                            continue
-                        peer_name = peer['username']
-                        unread_from_peer = self._get_unread_from_peer(user_id, peer_id)
-                        seller_info = self.db_manager.execute_query(
-                            "SELECT shop_name FROM users WHERE user_id = ?", (peer_id,)
-                        )
-                        is_seller = len(seller_info) > 0
-                        shop_name = seller_info[0]['shop_name'] if is_seller else None
-                        contacts.append({
-                            'peer_id': peer_id,
-                            'peer_name': peer_name,
-                            'shop_name': shop_name,
-                            'is_seller': is_seller,
-                            'last': row,
-                            'unread': unread_from_peer,
-                        })
+                    contacts = self.message_service.get_contacts_overview(user_id, limit=50)
                 continue
             
             for i, c in enumerate(contacts, 1):
@@ -960,28 +1003,7 @@ class AnimeShoppingMall:
             if sel.isdigit() and 1 <= int(sel) <= len(contacts):
                 self._conversation_menu(user_id, contacts[int(sel)-1]['peer_id'])
                 # 刷新联系人列表
-                rows = self.message_service.get_user_messages(user_id, limit=50)
-                contacts = []
-                for row in rows:
-                    peer_id = row['receiver_id'] if row['sender_id'] == user_id else row['sender_id']
-                    peer = self._get_user_by_id(peer_id)
-                    if not peer:
-                        continue
-                    peer_name = peer['username']
-                    unread_from_peer = self._get_unread_from_peer(user_id, peer_id)
-                    seller_info = self.db_manager.execute_query(
-                        "SELECT shop_name FROM users WHERE user_id = ?", (peer_id,)
-                    )
-                    is_seller = len(seller_info) > 0
-                    shop_name = seller_info[0]['shop_name'] if is_seller else None
-                    contacts.append({
-                        'peer_id': peer_id,
-                        'peer_name': peer_name,
-                        'shop_name': shop_name,
-                        'is_seller': is_seller,
-                        'last': row,
-                        'unread': unread_from_peer,
-                    })
+                contacts = self.message_service.get_contacts_overview(user_id, limit=50)
             else:
                 print(t('common.invalid_choice'))
 
@@ -1059,27 +1081,13 @@ class AnimeShoppingMall:
                     read_tag = '' if mine or status == 'read' else f"({t('message.unread_tag')})"
                     ts = r.get('created_at', '')
                     
-                    # 处理服务消息的翻译
-                    msg_type = r.get('msg_type', 'text')
-                    if msg_type == 'service':
-                        try:
-                            # 解析 JSON 格式的服务消息
-                            msg_data = json.loads(r['content'])
-                            translation_key = msg_data.get('key', '')
-                            params = msg_data.get('params', {})
-                            # 使用翻译键和参数获取本地化消息
-                            content = t(translation_key, **params)
-                        except (json.JSONDecodeError, KeyError):
-                            # 如果解析失败,显示原始内容(兼容旧格式)
-                            content = r['content']
-                    else:
-                        content = r['content']
-                    
+                    content = self._message_content(r)
                     print(f"{sender}: {content}  {read_tag}  [{ts}]  ({t('message.message_id_label')}: {r['msg_id']})")
 
             print(f"\n1. {t('message.send_message')}")
             print(f"2. {t('message.delete_message')}")
             print(f"3. {t('message.refresh_conversation')}")
+            print(f"4. {t('message.watch_conversation')}")
             print(f"0. {t('common.back')}")
 
             act = input(f"\n{t('common.please_select')}: ").strip()
@@ -1104,9 +1112,48 @@ class AnimeShoppingMall:
                 # 刷新会话，重新标记为已读
                 self.message_service.mark_conversation_as_read(user_id, other_user_id)
                 continue
+            elif act == '4':
+                self._watch_conversation(user_id, other_user_id, other_name)
             else:
                 print(t('common.invalid_choice'))
 
+    @staticmethod
+    def _message_content(r: dict) -> str:
+        """消息的显示内容(服务消息按翻译键本地化)"""
+        if r.get('msg_type', 'text') != 'service':
+            return r['content']
+        try:
+            # 解析 JSON 格式的服务消息
+            msg_data = json.loads(r['content'])
+            translation_key = msg_data.get('key', '')
+            params = msg_data.get('params', {})
+            # 使用翻译键和参数获取本地化消息
+            return t(translation_key, **params)
+        except (json.JSONDecodeError, KeyError):
+            # 如果解析失败,显示原始内容(兼容旧格式)
+            return r['content']
+
+    def _watch_conversation(self, user_id: int, other_user_id: int, other_name: str):
+        """实时查看会话: 订阅事件总线,新消息到达时立即显示(不轮询数据库),Ctrl+C 返回"""
+        bus = get_event_bus(self.db_manager)
+
+        async def watch():
+            with bus.subscribe(conversation_topic(user_id, other_user_id)) as feed:
+                async for event in feed:
+                    msg = event['data']
+                    mine = msg['sender_id'] == user_id
+                    sender = t('message.me_label') if mine else other_name
+                    print(f"{sender}: {self._message_content(msg)}  "
+                          f"({t('message.message_id_label')}: {msg['msg_id']})")
+                    if not mine:
+                        self.message_service.mark_as_read(msg['msg_id'], user_id)
+
+        print(t('message.watch_hint'))
+        try:
+            asyncio.run(watch())
+        except KeyboardInterrupt:
+            pass
+
     def _send_message_flow(self, user_id: int):
         to_username = input(f"{t('message.receiver_username')}: ").strip()
         if not to_username:
@@ -1137,11 +1184,10 @@ class AnimeShoppingMall:
             return
         print(f"\n{'='*50}")
         print(t('message.search_found', count=len(rows)))
+        names = self._get_usernames({r['sender_id'] for r in rows} | {r['receiver_id'] for r in rows})
         for r in rows:
-            s = self._get_user_by_id(r['sender_id'])
-            sname = s['username'] if s else f"User#{r['sender_id']}"
-            rv = self._get_user_by_id(r['receiver_id'])
-            rname = rv['username'] if rv else f"User#{r['receiver_id']}"
+            sname = names.get(r['sender_id'], f"User#{r['sender_id']}")
+            rname = names.get(r['receiver_id'], f"User#{r['receiver_id']}")
             ts = r.get('created_at','')
             content = r['content']
             print(f"[{r['msg_id']}] {sname} -> {rname}: {content} [{ts}]")
@@ -1154,12 +1200,16 @@ class AnimeShoppingMall:
         rows = self.db_manager.execute_query("SELECT user_id, username FROM users WHERE username=?", (username,))
         return rows[0] if rows else None
 
-    def _get_unread_from_peer(self, me: int, peer: int) -> int:
+    def _get_usernames(self, user_ids) -> dict:
+        """批量查询用户名,返回 {user_id: username}"""
+        ids = list(user_ids)
+        if not ids:
+            return {}
+        placeholders = ','.join('?' for _ in ids)
         rows = self.db_manager.execute_query(
-            "SELECT COUNT(*) AS cnt FROM messages WHERE receiver_id=? AND sender_id=? AND status <> 'read'",
-            (me, peer)
+            f"SELECT user_id, username FROM users WHERE user_id IN ({placeholders})", tuple(ids)
         )
-        return int(rows[0]['cnt']) if rows else 0
+        return {r['user_id']: r['username'] for r in rows}
     
     def profile_menu(self):
         """个人中心菜单"""
@@ -1188,6 +1238,7 @@ class AnimeShoppingMall:
             print(f"2. {t('seller.manage_products')}")
             print(f"3. {t('auction.auction')}")
             print(f"4. {t('seller.manage_orders')}")
+            print(f"5. ⚡ {t('seller.flash_sale')}")
             print(f"0. {t('common.back')}")
             
             choice = input(f"\n{t('common.please_select')}: ").strip()
@@ -1202,9 +1253,32 @@ class AnimeShoppingMall:
                 print(t('system.feature_not_implemented'))
             elif choice == '4':
                 self.manage_orders_menu(self.current_user['user_id'])
+            elif choice == '5':
+                self._flash_sale_menu(self.current_user['user_id'])
             else:
                 print(t('common.invalid_choice'))
 
+    def _flash_sale_menu(self, seller_id: int):
+        """开始/查看/结束商品的限时抢购"""
+        pid = input(f"{t('seller.enter_product_id')}: ").strip()
+        product = self.product_service.get_product_by_id(int(pid), increment_view=False) if pid.isdigit() else None
+        if not product or product.seller_id != seller_id:
+            print(t('product.not_found'))
+            return
+        sale = get_flash_sale(self.db_manager, product.product_id)
+        if sale is None:
+            limit = input(f"{t('seller.flash_sale_limit')} (1): ").strip()
+            sale = start_flash_sale(self.db_manager, product.product_id, int(limit) if limit.isdigit() else None)
+            print(t('seller.flash_sale_started', reserved=sale.reserved) if sale
+                  else t('seller.flash_sale_start_failed'))
+            return
+        print(t('seller.flash_sale_status', **sale.stats()))
+        print(f"1. {t('seller.flash_sale_end')}")
+        print(f"0. {t('common.back')}")
+        if input(f"\n{t('common.please_select')}: ").strip() == '1':
+            unsold = end_flash_sale(self.db_manager, product.product_id)
+            print(t('seller.flash_sale_ended', unsold=unsold or 0))
+
     def manage_orders_menu(self, seller_id: int):
         while True:
             rows = self.order_service.get_orders_by_seller(seller_id)
@@ -1221,15 +1295,36 @@ class AnimeShoppingMall:
                 print(f"{i}. [#{o['order_id']}] Buyer#{o['buyer_id']} P#{o['product_id']} x{o['quantity']}  ¥{o['total_price']:.2f}  {self._display_order_status(o['status'])}")
                 print(f"   {o.get('created_at','')}")
             print(f"\n1-{len(rows)}: {t('common.view_details')}")
+            print(f"I. {t('order.bulk_ship_import')}")
             print(f"0. {t('common.back')}")
             sel = input(f"\n{t('common.please_select')}: ").strip()
             if sel == '0':
                 break
-            if sel.isdigit() and 1 <= int(sel) <= len(rows):
+            if sel.upper() == 'I':
+                self._bulk_ship_import(seller_id)
+            elif sel.isdigit() and 1 <= int(sel) <= len(rows):
                 self._seller_order_detail(rows[int(sel)-1], seller_id)
             else:
                 print(t('common.invalid_choice'))
 
+    def _bulk_ship_import(self, seller_id: int, max_errors: int = 20):
+        """导入快递公司发货清单(CSV),显示每行的错误"""
+        path = input(f"{t('order.enter_csv_path')}: ").strip().strip('"')
+        if not path:
+            print(t('common.cancelled'))
+            return
+        try:
+            report = self.order_service.import_shipments_csv(seller_id, path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"{t('common.failed')}: {e}")
+            return
+        errors = report['errors']
+        print(t('order.bulk_ship_result', total=report['total'], shipped=report['shipped'], failed=len(errors)))
+        for error in errors[:max_errors]:
+            print("  " + t('order.bulk_ship_error', **error))
+        if len(errors) > max_errors:
+            print(f"  ... (+{len(errors) - max_errors})")
+
     def _seller_order_detail(self, order_row: dict, seller_id: int):
         o = order_row
         print(f"\n{'='*50}")
@@ -1546,15 +1641,28 @@ class AnimeShoppingMall:
     
     def run(self):
         """运行系统"""
+        if AUCTION_CONFIG.get('expiry_scheduler', True):
+            # 从数据库加载进行中的拍卖,停机期间已到期的立即结束,其余按结束时间自动结束
+            start_expiry_scheduler(self.db_manager)
+        # 投递上次运行未投递完的服务消息
+        get_outbox_dispatcher(self.db_manager).notify()
+        # 恢复上次运行未结束的限时抢购(名额与每人已购数量从数据库重建)
+        for sale in self.db_manager.execute_query("SELECT product_id FROM flash_sales WHERE status = 'active'"):
+            start_flash_sale(self.db_manager, sale['product_id'])
         self.display_banner()
         print(f"\n{t('system.welcome_message')}")
         print(t('system.system_info'))
         print(t('system.framework_complete'))
         self.main_menu()
+    
+    def shutdown(self):
+        """关闭系统: 写入缓冲数据并释放数据库连接"""
+        self.db_manager.close()
 
 
 def main():
     """主函数"""
+    app = None
     try:
         app = AnimeShoppingMall()
         app.run()
@@ -1565,6 +1673,9 @@ def main():
         if SYSTEM_CONFIG['debug']:
             import traceback
             traceback.print_exc()
+    finally:
+        if app is not None:
+            app.shutdown()
 
 
 if __name__ == "__main__":
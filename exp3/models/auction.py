@@ -15,6 +15,59 @@ class AuctionStatus(Enum):
     CANCELLED = "cancelled"  # 已取消
 
 
+def resolve_bid(start_price: float, current_bid: float, leader_id: Optional[int],
+                leader_max: Optional[float], bid_increment: float, bidder_id: int,
+                bid_amount: Optional[float] = None,
+                max_amount: Optional[float] = None) -> Optional[Dict]:
+    """
+    计算一次出价(普通出价或代理出价)的结果,不修改任何状态
+
+    代理出价只需比较双方的最高出价: 最高出价更高者领先,当前价为
+    另一方最高出价+加价幅度(不超过领先者的最高出价),最高出价相同时先出价者领先。
+    无论双方最高出价相差多少个加价幅度,都只需常数次运算,也只产生常数条出价记录。
+
+    Args:
+        start_price: 起拍价
+        current_bid: 当前价格
+        leader_id: 当前领先者ID(无出价时为None)
+        leader_max: 当前领先者的最高出价(None表示与当前价格相同)
+        bid_increment: 最小加价幅度
+        bidder_id: 出价者ID
+        bid_amount: 出价金额(仅设置代理出价时为None,按最低有效出价出价)
+        max_amount: 代理出价的最高金额(普通出价为None)
+
+    Returns:
+        Optional[Dict]: 出价无效时返回None,否则返回
+            leader_id(领先者)、current_bid(当前价格)、leader_max(领先者的最高出价)、
+            outbid(出价者是否被代理出价超过)、bids(需要记录的出价: (出价者, 金额, 是否代理出价))
+    """
+    minimum = start_price if leader_id is None else round(current_bid + bid_increment, 2)
+    bid = minimum if bid_amount is None else round(bid_amount, 2)
+    ceiling = bid if max_amount is None else round(max_amount, 2)
+    if bid < minimum or ceiling < bid:
+        return None
+    is_proxy = max_amount is not None
+    if leader_id is None:
+        return {'leader_id': bidder_id, 'current_bid': bid, 'leader_max': ceiling,
+                'outbid': False, 'bids': [(bidder_id, bid, is_proxy)]}
+
+    leader_ceiling = current_bid if leader_max is None else max(leader_max, current_bid)
+    if bidder_id == leader_id:
+        # 领先者只能提高自己的最高出价,当前价格不变
+        if bid_amount is not None or ceiling <= leader_ceiling:
+            return None
+        return {'leader_id': leader_id, 'current_bid': current_bid, 'leader_max': ceiling,
+                'outbid': False, 'bids': []}
+    if ceiling > leader_ceiling:
+        price = max(bid, min(ceiling, round(leader_ceiling + bid_increment, 2)))
+        return {'leader_id': bidder_id, 'current_bid': price, 'leader_max': ceiling,
+                'outbid': False, 'bids': [(bidder_id, price, is_proxy)]}
+    # 领先者的代理出价足以应对: 出价者按最高出价记录,领先者自动加价
+    price = min(leader_ceiling, round(ceiling + bid_increment, 2))
+    return {'leader_id': leader_id, 'current_bid': price, 'leader_max': leader_ceiling,
+            'outbid': True, 'bids': [(bidder_id, ceiling, is_proxy), (leader_id, price, True)]}
+
+
 class Auction:
     """
     拍卖类
@@ -26,6 +79,7 @@ class Auction:
         start_price (float): 起拍价
         current_bid (float): 当前出价
         current_bidder_id (int): 当前最高出价者ID
+        max_bid (float): 当前最高出价者的最高出价(代理出价上限,不公开)
         bid_increment (float): 最小加价幅度
         start_time (datetime): 开始时间
         end_time (datetime): 结束时间
@@ -51,28 +105,58 @@ class Auction:
         self.start_price: float = start_price
         self.current_bid: float = start_price
         self.current_bidder_id: Optional[int] = None
+        self.max_bid: Optional[float] = None
         self.bid_increment: float = bid_increment
         self.start_time: datetime = datetime.now()
         self.end_time: datetime = self.start_time + timedelta(hours=duration_hours)
         self.status: AuctionStatus = AuctionStatus.ACTIVE
         self.bid_history: List[Dict] = []
     
-    def place_bid(self, bidder_id: int, bid_amount: float) -> bool:
+    def resolve_bid(self, bidder_id: int, bid_amount: Optional[float] = None,
+                    max_amount: Optional[float] = None) -> Optional[Dict]:
         """
-        出价
+        计算出价结果(不修改拍卖状态)
         
         Args:
             bidder_id: 出价者ID
-            bid_amount: 出价金额
+            bid_amount: 出价金额(仅设置代理出价时为None)
+            max_amount: 代理出价的最高金额
             
         Returns:
-            bool: 出价是否成功
+            Optional[Dict]: 出价结果,拍卖未进行中、卖家出价或出价无效时返回None
+        """
+        if not self.is_active() or bidder_id == self.seller_id:
+            return None
+        return resolve_bid(
+            self.start_price, self.current_bid, self.current_bidder_id, self.max_bid,
+            self.bid_increment, bidder_id, bid_amount, max_amount
+        )
+    
+    def place_bid(self, bidder_id: int, bid_amount: Optional[float] = None,
+                  max_amount: Optional[float] = None) -> bool:
         """
-        # TODO: 实现出价逻辑
-        # 验证出价是否有效(高于当前价格+最小加价幅度)
-        # 记录出价历史
-        # 更新当前最高出价
-        pass
+        出价(普通出价或代理出价)
+        
+        Args:
+            bidder_id: 出价者ID
+            bid_amount: 出价金额(仅设置代理出价时为None)
+            max_amount: 代理出价的最高金额
+            
+        Returns:
+            bool: 出价后出价者是否领先
+        """
+        outcome = self.resolve_bid(bidder_id, bid_amount, max_amount)
+        if outcome is None:
+            return False
+        self.current_bid = outcome['current_bid']
+        self.current_bidder_id = outcome['leader_id']
+        self.max_bid = outcome['leader_max']
+        now = datetime.now()
+        self.bid_history.extend(
+            {'bidder_id': bidder, 'bid_amount': amount, 'is_proxy': is_proxy, 'bid_time': now}
+            for bidder, amount, is_proxy in outcome['bids']
+        )
+        return not outcome['outbid']
     
     def get_bid_history(self) -> List[Dict]:
         """
@@ -81,8 +165,7 @@ class Auction:
         Returns:
             List[Dict]: 出价历史列表
         """
-        # TODO: 实现获取出价历史逻辑
-        pass
+        return list(self.bid_history)
     
     def check_status(self) -> AuctionStatus:
         """
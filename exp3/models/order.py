@@ -3,7 +3,7 @@ Order model - 订单模型
 管理订单流程和状态
 """
 
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,91 @@ class OrderStatus(Enum):
     REFUND_REQUESTED = "refund_requested"  # 退款申请中
     REFUND_REJECTED = "refund_rejected"    # 退款被拒绝
     REFUNDED = "refunded"        # 已退款
+    
+    def allowed_actions(self) -> List[str]:
+        """
+        当前状态下可以执行的状态流转
+        
+        Returns:
+            List[str]: 流转名称列表(见 ORDER_TRANSITIONS)
+        """
+        return [name for name, tr in ORDER_TRANSITIONS.items() if self in tr.sources]
+
+
+class OrderTransition:
+    """
+    订单状态流转定义
+    
+    Attributes:
+        name (str): 流转名称
+        sources (Tuple[OrderStatus]): 允许流转的原状态
+        target (OrderStatus): 目标状态
+        actor (str): 执行者角色(buyer/seller),None 表示不校验执行者
+        timestamp (str): 流转时记录时间的字段
+        columns (Dict[str, str]): 参数名 -> 同时更新的订单字段
+        message (str): 发送给对方的服务消息翻译键
+        message_params (Tuple[str]): 服务消息中除 order_id 外使用的参数名
+        notify (str): 接收服务消息的一方(buyer/seller),发送者为另一方
+        restock (bool): 流转后是否归还商品库存
+    """
+    
+    def __init__(self, name: str, sources: Tuple[OrderStatus, ...], target: OrderStatus,
+                 actor: Optional[str] = None, timestamp: Optional[str] = None,
+                 columns: Optional[Dict[str, str]] = None, message: Optional[str] = None,
+                 message_params: Tuple[str, ...] = (), notify: str = 'seller',
+                 restock: bool = False):
+        self.name = name
+        self.sources = sources
+        self.target = target
+        self.actor = actor
+        self.timestamp = timestamp
+        self.columns = columns or {}
+        self.message = message
+        self.message_params = message_params
+        self.notify = notify
+        self.restock = restock
+    
+    def source_values(self) -> List[str]:
+        """允许的原状态(数据库中的取值)"""
+        return [status.value for status in self.sources]
+    
+    def __repr__(self) -> str:
+        sources = '/'.join(s.value for s in self.sources)
+        return f"<OrderTransition({self.name}: {sources} -> {self.target.value})>"
+
+
+# 订单状态机: 每个流转对应一条带状态/执行者条件的 UPDATE
+ORDER_TRANSITIONS: Dict[str, OrderTransition] = {
+    tr.name: tr for tr in (
+        OrderTransition('pay', (OrderStatus.PENDING,), OrderStatus.PAID,
+                        timestamp='paid_at', message='order.service_order_paid'),
+        OrderTransition('ship', (OrderStatus.PAID,), OrderStatus.SHIPPED, actor='seller',
+                        timestamp='shipped_at', columns={'tracking_number': 'tracking_number'},
+                        message='order.service_order_shipped', message_params=('tracking_number',),
+                        notify='buyer'),
+        OrderTransition('confirm_receipt', (OrderStatus.SHIPPED,), OrderStatus.COMPLETED, actor='buyer',
+                        timestamp='completed_at', message='order.service_order_completed'),
+        OrderTransition('request_cancel', (OrderStatus.PENDING, OrderStatus.PAID, OrderStatus.SHIPPED),
+                        OrderStatus.CANCEL_REQUESTED, actor='buyer',
+                        message='order.service_cancel_requested', message_params=('reason',)),
+        OrderTransition('approve_cancel', (OrderStatus.CANCEL_REQUESTED,), OrderStatus.CANCELLED,
+                        actor='seller', message='order.service_cancel_approved', notify='buyer',
+                        restock=True),
+        OrderTransition('reject_cancel', (OrderStatus.CANCEL_REQUESTED,), OrderStatus.CANCEL_REJECTED,
+                        actor='seller', columns={'reason': 'cancel_reject_reason'},
+                        message='order.service_cancel_rejected', message_params=('reason_text',),
+                        notify='buyer'),
+        OrderTransition('request_refund', (OrderStatus.PAID, OrderStatus.SHIPPED, OrderStatus.COMPLETED),
+                        OrderStatus.REFUND_REQUESTED, actor='buyer',
+                        message='order.service_refund_requested', message_params=('reason',)),
+        OrderTransition('approve_refund', (OrderStatus.REFUND_REQUESTED,), OrderStatus.REFUNDED,
+                        actor='seller', message='order.service_refund_approved', notify='buyer'),
+        OrderTransition('reject_refund', (OrderStatus.REFUND_REQUESTED,), OrderStatus.REFUND_REJECTED,
+                        actor='seller', columns={'reason': 'refund_reject_reason'},
+                        message='order.service_refund_rejected', message_params=('reason_text',),
+                        notify='buyer'),
+    )
+}
 
 
 class Order:
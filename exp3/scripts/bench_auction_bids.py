@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+拍卖出价并发性能: 出价引擎 vs 逐条读取-校验-写入
+Contention benchmark for AuctionService.place_bid
+
+多个线程在拍卖结束前集中出价: 每个出价者按自己最后看到的价格加价出价,
+因此大量出价在到达时已经过期。分别测试单个热门拍卖与多个拍卖。
+
+用法:
+    python scripts/bench_auction_bids.py [线程数] [每线程出价次数] [拍卖数]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import AuctionService
+from temp_paths import temp_path
+
+
+def naive_place_bid(db, auction_id: int, bidder_id: int, amount: float) -> bool:
+    """对照组: 不做进程内串行,每次出价都开启写事务,先查询再校验再写入"""
+    with db.transaction() as conn:
+        row = conn.execute(
+            "SELECT current_bid, current_bidder_id, bid_increment, start_price, seller_id, status "
+            "FROM auctions WHERE auction_id = ?", (auction_id,)
+        ).fetchone()
+        if row is None or row['status'] != 'active' or bidder_id in (row['seller_id'], row['current_bidder_id']):
+            return False
+        minimum = row['start_price'] if row['current_bidder_id'] is None \
+            else round(row['current_bid'] + row['bid_increment'], 2)
+        if amount < minimum:
+            return False
+        conn.execute(
+            "UPDATE auctions SET current_bid = ?, current_bidder_id = ? WHERE auction_id = ?",
+            (amount, bidder_id, auction_id)
+        )
+        conn.execute(
+            "INSERT INTO bid_history (auction_id, bidder_id, bid_amount) VALUES (?, ?, ?)",
+            (auction_id, bidder_id, amount)
+        )
+        return True
+
+
+def setup(threads: int, auctions: int):
+    db = DatabaseManager(temp_path('bench_auction.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('ab_s', 'x', 'ab_s@x.com', 'seller')"
+    )
+    bidders = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+            (f'ab_b{i}', f'ab_b{i}@x.com')
+        )
+        for i in range(threads)
+    ]
+    service = AuctionService(db)
+    auction_ids = []
+    for i in range(auctions):
+        product = db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, ?, 1.0, '原神', 1)",
+            (seller, f'限定手办 #{i}')
+        )
+        auction_ids.append(service.create_auction(seller, product, 10.0, 24, bid_increment=1.0))
+    return db, service, bidders, auction_ids
+
+
+def run(place_bid, bidders, auction_ids, bids_per_thread: int) -> dict:
+    """每个线程随机选择拍卖,以最后看到的价格+1出价;自己领先时跳过(让出CPU)"""
+    seen = {a: 10.0 for a in auction_ids}  # 出价者看到的价格(可能已过期)
+    leaders = {}
+    counts = {'accepted': 0, 'rejected': 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(bidders))
+
+    def worker(bidder_id):
+        rng = random.Random(bidder_id)
+        accepted = rejected = 0
+        barrier.wait()
+        for _ in range(bids_per_thread):
+            auction_id = rng.choice(auction_ids)
+            if leaders.get(auction_id) == bidder_id:
+                time.sleep(0)
+                continue
+            amount = seen[auction_id] + 1.0
+            if place_bid(auction_id, bidder_id, amount):
+                accepted += 1
+                seen[auction_id] = max(seen[auction_id], amount)
+                leaders[auction_id] = bidder_id
+            else:
+                rejected += 1
+                seen[auction_id] += 1.0  # 被拒后按更高价格重试
+        with lock:
+            counts['accepted'] += accepted
+            counts['rejected'] += rejected
+
+    workers = [threading.Thread(target=worker, args=(b,)) for b in bidders]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    total = counts['accepted'] + counts['rejected']
+    return dict(counts, elapsed=elapsed, bids_per_sec=total / elapsed if elapsed else 0.0)
+
+
+def check_consistency(db, auction_ids) -> None:
+    """每个拍卖的当前价等于出价历史中的最高价,且出价历史严格递增"""
+    for auction_id in auction_ids:
+        amounts = [r['bid_amount'] for r in db.execute_query(
+            "SELECT bid_amount FROM bid_history WHERE auction_id = ? ORDER BY bid_id", (auction_id,)
+        )]
+        current = db.execute_query(
+            "SELECT current_bid FROM auctions WHERE auction_id = ?", (auction_id,)
+        )[0]['current_bid']
+        assert amounts == sorted(set(amounts)), f"拍卖 {auction_id} 出价未严格递增"
+        assert not amounts or amounts[-1] == current
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    many = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print(f"\n线程数: {threads}, 每线程出价: {per_thread}")
+    print(f"{'场景':<14} {'实现':<10} {'成功':>8} {'被拒':>8} {'耗时(s)':>9} {'出价/秒':>10}")
+    for label, auctions in (('1 个热门拍卖', 1), (f'{many} 个拍卖', many)):
+        for impl in ('naive', 'engine'):
+            db, service, bidders, auction_ids = setup(threads, auctions)
+            if impl == 'engine':
+                place_bid = service.place_bid
+            else:
+                def place_bid(a, b, amount, _db=db):
+                    return naive_place_bid(_db, a, b, amount)
+            result = run(place_bid, bidders, auction_ids, per_thread)
+            check_consistency(db, auction_ids)
+            print(f"{label:<14} {impl:<10} {result['accepted']:>8} {result['rejected']:>8} "
+                  f"{result['elapsed']:>9.2f} {result['bids_per_sec']:>10.0f}")
+            if impl == 'engine':
+                print(f"{'':<14} {'':<10} 引擎统计: {service.get_bid_engine_stats()}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+拍卖到期调度性能: 最小堆调度器 vs 定时轮询
+Benchmark AuctionExpiryScheduler with many open auctions
+
+生成大量进行中的拍卖,结束时间分布在接下来的若干秒内,
+测量启动建堆耗时、入堆耗时,以及所有拍卖到期后被结束的延迟;
+并与按固定间隔调用 check_expired_auctions 的轮询方式对比每次轮询的开销。
+
+用法:
+    python scripts/bench_auction_expiry.py [拍卖数量] [到期窗口秒数]   # 默认 100000 30
+"""
+
+import heapq
+import os
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import AuctionService
+from services.auction_scheduler import AuctionExpiryScheduler
+from temp_paths import temp_path
+
+LEAD_SECONDS = 5  # 第一批拍卖在启动后多少秒到期
+
+
+def seed(db, total: int, window: int, batch: int = 20000) -> None:
+    """批量生成商品与进行中的拍卖,生成完成后结束时间均匀分布在 [LEAD, LEAD + window) 秒内"""
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('ae_s', 'x', 'ae_s@x.com', 'seller')"
+    )
+    for start in range(0, total, batch):
+        rows = range(start, min(start + batch, total))
+        db.execute_many(
+            "INSERT INTO products (product_id, seller_id, title, price, category, status, auctionable) "
+            "VALUES (?, ?, ?, 1.0, '原神', 'in_auction', 1)",
+            [(i + 1, seller, f'拍品 #{i}') for i in rows]
+        )
+        db.execute_many(
+            "INSERT INTO auctions (product_id, seller_id, start_price, current_bid, end_time) "
+            "VALUES (?, ?, 10.0, 10.0, DATETIME('now', '+1 day'))",
+            [(i + 1, seller) for i in rows]
+        )
+    # 生成耗时较长,最后统一设置结束时间
+    db.execute_update(
+        "UPDATE auctions SET end_time = DATETIME('now', '+' || (? + auction_id % ?) || ' seconds')",
+        (LEAD_SECONDS, window)
+    )
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    window = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    db = DatabaseManager(temp_path('bench_auction_expiry.db'))
+    seed(db, total, window)
+    service = AuctionService(db)
+    print(f"\n进行中的拍卖: {total:,}, 到期窗口: {window}s")
+
+    # 轮询方式: 每次轮询都要查询到期拍卖(尚无到期时也要执行)
+    start = time.perf_counter()
+    for _ in range(5):
+        assert service.check_expired_auctions() == 0
+    print(f"轮询 check_expired_auctions (无到期): {(time.perf_counter() - start) * 1000 / 5:.2f} ms/次")
+
+    # 入堆开销
+    heap = []
+    start = time.perf_counter()
+    for i in range(total):
+        heapq.heappush(heap, (time.time() + i % 3600, i))
+    elapsed = time.perf_counter() - start
+    print(f"入堆 {total:,} 次: {elapsed * 1000:.1f} ms ({elapsed * 1e6 / total:.2f} µs/次)")
+
+    scheduler = AuctionExpiryScheduler(db, service)
+    start = time.perf_counter()
+    loaded = scheduler.load()
+    print(f"启动建堆: {loaded:,} 个拍卖, {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    scheduler.start()
+    deadline = time.time() + LEAD_SECONDS + window + 60
+    while scheduler.stats()['ended'] < total and time.time() < deadline:
+        time.sleep(0.1)
+    stats = scheduler.stats()
+    elapsed = time.perf_counter() - started
+    scheduler.close()
+    remaining = db.execute_query("SELECT COUNT(*) AS c FROM auctions WHERE status = 'active'")[0]['c']
+    print(f"已结束: {stats['ended']:,}, 批次: {stats['batches']}, 重新入堆: {stats['rescheduled']}, "
+          f"剩余进行中: {remaining}")
+    print(f"总耗时: {elapsed:.1f} s, 最大结束延迟: {stats['max_lag'] * 1000:.1f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+批量发货导入性能
+Benchmark OrderService.import_shipments_csv on a large courier manifest
+
+生成大量已支付订单与对应的发货清单(含少量错误行),测量导入耗时,
+并与逐单调用 ship_order 的方式对比(抽样)。
+
+用法:
+    python scripts/bench_bulk_ship.py [订单数量]   # 默认 50000
+"""
+
+import os
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService
+from services.outbox import OutboxDispatcher
+from temp_paths import temp_path
+
+SAMPLE = 500  # 逐单发货的抽样数量
+
+
+def seed(db, total: int):
+    """批量生成已支付订单,返回卖家ID"""
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('bk_s', 'x', 'bk_s@x.com', 'seller')"
+    )
+    buyer = db.execute_insert("INSERT INTO users (username, password, email) VALUES ('bk_b', 'x', 'bk_b@x.com')")
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '手办', 10.0, 0, '原神')",
+        (seller,)
+    )
+    db.execute_many(
+        "INSERT INTO orders (order_id, buyer_id, seller_id, product_id, quantity, total_price, status, "
+        "shipping_address, created_at) VALUES (?, ?, ?, ?, 1, 10.0, 'paid', 'addr', '2024-01-01T00:00:00')",
+        [(i, buyer, seller, product) for i in range(1, total + SAMPLE + 1)]
+    )
+    return seller
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    db = DatabaseManager(temp_path('bench_bulk_ship.db'))
+    seller = seed(db, total)
+    dispatcher = OutboxDispatcher(db, synchronous=False, flush_interval=60)
+    service = OrderService(db, outbox=dispatcher)
+
+    path = temp_path('manifest.csv')
+    with open(path, 'w', newline='') as f:
+        f.write("order_id,tracking_number\n")
+        for i in range(1, total + 1):
+            # 每 1000 行混入一行重复订单与一行不存在的订单
+            if i % 1000 == 0:
+                f.write(f"{i - 1},DUP{i}\n{10 ** 9 + i},NONE{i}\n")
+            f.write(f"{i},SF{i:010d}\n")
+    print(f"\n已支付订单: {total + SAMPLE:,}, 清单: {os.path.getsize(path) / 1024:.0f} KB")
+
+    start = time.perf_counter()
+    report = service.import_shipments_csv(seller, path)
+    elapsed = time.perf_counter() - start
+    print(f"import_shipments_csv: {report['total']:,} 行, 发货 {report['shipped']:,}, "
+          f"错误 {len(report['errors'])}, 耗时 {elapsed:.2f} s")
+    assert report['shipped'] == total
+
+    start = time.perf_counter()
+    for order_id in range(total + 1, total + SAMPLE + 1):
+        assert service.ship_order(order_id, seller, f'SF{order_id:010d}')
+    per_order = (time.perf_counter() - start) / SAMPLE
+    print(f"逐单 ship_order: {per_order * 1000:.2f} ms/单, 估算 {total:,} 单需 {per_order * total:.1f} s")
+
+    start = time.perf_counter()
+    dispatcher.close()
+    print(f"投递服务消息: {dispatcher.stats()['delivered']:,} 条, {time.perf_counter() - start:.2f} s")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+限时抢购压测: 内存名额 vs 直接下单
+Load test FlashSale admission against concurrent create_order
+
+大量买家在多个线程中同时抢购一件限量商品(默认库存 500、5000 个买家、32 个线程),
+分别测量直接调用 OrderService.create_order 与 FlashSale.admit 的吞吐量,
+并校验订单数量、每人购买数量与剩余库存,证明没有超卖。
+
+用法:
+    python scripts/bench_flash_sale.py [库存] [买家数量] [线程数]   # 默认 500 5000 32
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService
+from services.flash_sale import FlashSale
+from temp_paths import temp_path
+
+
+def seed(db, stock: int, buyers: int):
+    """创建卖家、买家与限量商品,返回 (买家ID列表, 商品ID)"""
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('fl_s', 'x', 'fl_s@x.com', 'seller')"
+    )
+    db.execute_many(
+        "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+        [(f'fl_b{i}', f'fl_b{i}@x.com') for i in range(buyers)]
+    )
+    buyer_ids = [r['user_id'] for r in db.execute_query(
+        "SELECT user_id FROM users WHERE username LIKE 'fl_b%' ORDER BY user_id"
+    )]
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '限定手办', 499.0, ?, '原神')",
+        (seller, stock)
+    )
+    return buyer_ids, product
+
+
+def rush(buyers, threads: int, attempt):
+    """所有线程同时开始,每个买家抢购一次;返回 (抢到的买家, 耗时)"""
+    winners = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(chunk):
+        barrier.wait()
+        won = [buyer for buyer in chunk if attempt(buyer)]
+        winners.extend(won)
+
+    workers = [threading.Thread(target=worker, args=(buyers[i::threads],)) for i in range(threads)]
+    for th in workers:
+        th.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for th in workers:
+        th.join()
+    return winners, time.perf_counter() - start
+
+
+def verify(db, product: int, stock: int, winners) -> None:
+    """订单与抢到的买家一致、每人一件、总数不超过库存"""
+    orders = db.execute_query("SELECT buyer_id, quantity FROM orders WHERE product_id = ?", (product,))
+    sold = sum(o['quantity'] for o in orders)
+    buyers = [o['buyer_id'] for o in orders]
+    left = db.execute_query("SELECT stock FROM products WHERE product_id = ?", (product,))[0]['stock']
+    assert sold == len(winners) <= stock, (sold, len(winners), stock)
+    assert len(set(buyers)) == len(buyers) and sorted(buyers) == sorted(winners)
+    assert sold + left == stock, (sold, left, stock)
+    print(f"  校验: 订单 {len(orders)}, 售出 {sold}, 剩余库存 {left}, 无超卖 ✓")
+
+
+def main():
+    stock = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 32
+    print(f"\n库存: {stock}, 买家: {total:,}, 线程: {threads}")
+
+    # 1. 直接下单: 每次请求都要获取 SQLite 写锁
+    db = DatabaseManager(temp_path('bench_flash_direct.db'))
+    buyers, product = seed(db, stock, total)
+    service = OrderService(db)
+    winners, elapsed = rush(buyers, threads, lambda b: service.create_order(b, product, 1, 'addr') is not None)
+    print(f"create_order: {total / elapsed:,.0f} 请求/s, 抢到 {len(winners)} "
+          f"({len(winners) / elapsed:,.0f} 单/s), 耗时 {elapsed:.2f} s")
+    verify(db, product, stock, winners)
+    db.close()
+
+    # 2. 限时抢购: 内存判定,订单批量写入
+    db = DatabaseManager(temp_path('bench_flash_sale.db'))
+    buyers, product = seed(db, stock, total)
+    sale = FlashSale(db, product)
+    assert sale.start()
+    winners, elapsed = rush(buyers, threads, lambda b: sale.admit(b, 'addr'))
+    start = time.perf_counter()
+    sale.close()  # 等待剩余订单写入
+    drained = time.perf_counter() - start
+    stats = sale.stats()
+    print(f"FlashSale.admit: {total / elapsed:,.0f} 请求/s, 抢到 {len(winners)} "
+          f"({len(winners) / elapsed:,.0f} 单/s), 耗时 {elapsed * 1000:.1f} ms")
+    print(f"  批量写入: {stats['persisted']} 单, {stats['batches']} 批, 关闭时剩余写入 {drained * 1000:.1f} ms")
+    unsold = sale.end()
+    verify(db, product, stock, winners)
+    assert unsold == stock - len(winners)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+分页性能对比: OFFSET vs 游标(keyset)
+Benchmark deep-page latency of get_products_by_category (OFFSET) vs
+get_products_by_category_page (cursor)
+
+用法:
+    python scripts/bench_pagination.py [商品数量]   # 默认 200000
+"""
+
+import os
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService
+from utils.pagination import encode_cursor
+from temp_paths import temp_path
+
+CATEGORY = '原神'
+PER_PAGE = 10
+REPEAT = 20
+
+
+def seed(db, total: int, batch: int = 20000) -> None:
+    """批量生成同一分类的商品,创建时间逐秒递增"""
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('bench_p', 'x', 'bench_p@x.com', 'seller')"
+    )
+    for start in range(0, total, batch):
+        db.execute_many(
+            "INSERT INTO products (seller_id, title, description, price, category, created_at) "
+            "VALUES (?, ?, '', ?, ?, DATETIME('2020-01-01', ? || ' seconds'))",
+            [(seller, f"商品 #{i}", float(i % 997), CATEGORY, i)
+             for i in range(start, min(start + batch, total))]
+        )
+
+
+def timed(fn) -> float:
+    """返回平均耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    db = DatabaseManager(temp_path('bench_pagination.db'))
+    seed(db, total)
+    service = ProductService(db)
+
+    print(f"\n商品数量: {total:,}")
+    print(f"{'页码':>8} {'OFFSET (ms)':>12} {'游标 (ms)':>12}")
+    for page in (1, 100, 1000, total // PER_PAGE // 2, total // PER_PAGE - 1):
+        offset = (page - 1) * PER_PAGE
+        # 直接取上一页最后一行的排序键作为游标(相当于一路翻页过来)
+        after = None
+        if offset:
+            row = db.execute_query(
+                "SELECT created_at, product_id FROM products WHERE category = ? AND status = 'available' "
+                "ORDER BY created_at DESC, product_id DESC LIMIT 1 OFFSET ?",
+                (CATEGORY, offset - 1)
+            )[0]
+            after = encode_cursor([row['created_at'], row['product_id']])
+        offset_ms = timed(lambda: service.get_products_by_category(CATEGORY, limit=PER_PAGE, offset=offset))
+        cursor_ms = timed(lambda: service.get_products_by_category_page(CATEGORY, limit=PER_PAGE, after=after))
+        print(f"{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
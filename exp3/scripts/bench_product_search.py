@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+商品搜索性能对比: LIKE 全表扫描 vs FTS5 全文索引
+Benchmark ProductService.search_products (LIKE vs FTS5 + BM25)
+
+用法:
+    python scripts/bench_product_search.py [商品数量 ...]   # 默认 100000 1000000
+"""
+
+import os
+import random
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService
+from config.settings import PRODUCT_CATEGORIES
+from temp_paths import temp_path
+
+CHARACTERS = ['阿米娅', '胡桃', '雷电将军', '流萤', '初音未来', '灵梦', '魔理沙', '阿尔托莉雅', '星野', '钟离']
+ITEMS = ['手办', '立牌', '抱枕', '徽章', '挂件', '色纸', '亚克力砖', 'figure', 'acrylic stand', 'plush']
+# 常见词(约10%商品命中)、两字词(二元索引)、稀有词(少量命中)与无结果的词
+KEYWORDS = ['明日方舟', '阿尔托莉雅 手办', 'acrylic', '胡桃', '胡桃 抱枕', '金属挂画', '挂画',
+            'limited edition', '不存在的商品', '不在']
+RARE_TITLES = ['原神 雷电将军 金属挂画 限定', 'Fate limited edition Saber 1/7']
+REPEAT = 20
+
+
+def seed(db, total: int, batch: int = 20000) -> None:
+    """批量生成商品数据"""
+    rng = random.Random(42)
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('bench_s', 'x', 'bench_s@x.com', 'seller')"
+    )
+    for start in range(0, total, batch):
+        rows = []
+        for _ in range(min(batch, total - start)):
+            category = rng.choice(PRODUCT_CATEGORIES)
+            title = f"{category} {rng.choice(CHARACTERS)} {rng.choice(ITEMS)} #{rng.randint(1, 99999)}"
+            rows.append((seller, title, f"{category} 周边,正版授权", rng.uniform(5, 999), category))
+        db.execute_many(
+            "INSERT INTO products (seller_id, title, description, price, category) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    db.execute_many(
+        "INSERT INTO products (seller_id, title, description, price, category) VALUES (?, ?, '', 1999, '其他')",
+        [(seller, title) for title in RARE_TITLES]
+    )
+
+
+def timed(fn) -> float:
+    """返回平均耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+
+def run(total: int) -> None:
+    db = DatabaseManager(temp_path('search_bench.db'))
+    start = time.perf_counter()
+    seed(db, total)
+    print(f"\n商品数量: {total:,} (生成+建索引 {time.perf_counter() - start:.1f}s)")
+
+    fts_service = ProductService(db)
+    like_service = ProductService(db)
+    like_service._fts_available = False  # 强制使用 LIKE 路径作为对照
+
+    print(f"{'关键词':<18}{'结果数':>8}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'加速比':>10}")
+    for keyword in KEYWORDS:
+        hits = len(fts_service.search_products(keyword=keyword, limit=20))
+        like_ms = timed(lambda: like_service.search_products(keyword=keyword, limit=20))
+        fts_ms = timed(lambda: fts_service.search_products(keyword=keyword, limit=20))
+        print(f"{keyword:<18}{hits:>8}{like_ms:>12.2f}{fts_ms:>12.2f}{like_ms / fts_ms:>9.1f}x")
+    db.close()
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,13 @@
+"""
+pytest 配置: 每个测试结束后删除其创建的临时数据库目录
+"""
+
+import pytest
+
+from temp_paths import remove_temp_dirs
+
+
+@pytest.fixture(autouse=True)
+def _remove_temp_dirs():
+    yield
+    remove_temp_dirs()
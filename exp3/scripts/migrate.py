@@ -0,0 +1,41 @@
+"""
+数据库迁移脚本：执行 database/migrations 下尚未应用的迁移
+
+用法:
+    python scripts/migrate.py            # 升级到最新版本
+    python scripts/migrate.py --status   # 仅查看当前版本
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from database.migrator import MigrationRunner
+
+
+def main():
+    # DatabaseManager 初始化时即会执行迁移
+    db = DatabaseManager()
+    runner = MigrationRunner(db)
+    with db.get_connection() as conn:
+        current = runner.current_version(conn)
+        rows = conn.execute(
+            "SELECT version, description, applied_at FROM schema_version ORDER BY version"
+        ).fetchall()
+
+    print(f"数据库: {db.db_path}")
+    print(f"当前版本: {current} / 最新版本: {runner.latest_version}")
+    if '--status' in sys.argv:
+        for row in rows:
+            print(f"  v{row['version']:04d}  {row['applied_at']}  {row['description']}")
+    db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+测试与基准脚本使用的临时文件路径
+每个路径位于独立的临时目录中,统一删除(含 SQLite 的 -wal/-shm 文件):
+pytest 下每个测试结束后删除(见 conftest.py),直接运行脚本时在进程退出时删除
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from typing import List
+
+_dirs: List[str] = []
+_dirs_lock = threading.Lock()
+
+
+def temp_path(filename: str) -> str:
+    """
+    在新的临时目录中生成文件路径
+
+    Args:
+        filename: 文件名(如 'order_test.db')
+
+    Returns:
+        str: 文件的完整路径(文件本身不会被创建)
+    """
+    directory = tempfile.mkdtemp(prefix='exp3_')
+    with _dirs_lock:
+        _dirs.append(directory)
+    return os.path.join(directory, filename)
+
+
+def remove_temp_dirs() -> None:
+    """删除 temp_path() 创建的全部临时目录"""
+    with _dirs_lock:
+        dirs, _dirs[:] = list(_dirs), []
+    for directory in dirs:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+atexit.register(remove_temp_dirs)
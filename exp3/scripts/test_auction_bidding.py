@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+测试拍卖出价引擎
+Test AuctionService bidding, settlement and per-auction serialization
+"""
+
+import json
+import os
+import sys
+import threading
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from models.auction import AuctionStatus
+from services import AuctionService
+from services.outbox import get_outbox_dispatcher
+from temp_paths import temp_path
+
+
+def _setup(bidders=3):
+    """创建卖家、若干出价者与一件支持拍卖的商品"""
+    db = DatabaseManager(temp_path('auction_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('au_s', 'x', 'au_s@x.com', 'seller')"
+    )
+    users = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+            (f'au_b{i}', f'au_b{i}@x.com')
+        )
+        for i in range(bidders)
+    ]
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, auctionable) "
+        "VALUES (?, '限定手办', 100.0, '原神', 1)",
+        (seller,)
+    )
+    return db, AuctionService(db), seller, users, product
+
+
+def _expire(db, auction_id):
+    db.execute_update(
+        "UPDATE auctions SET end_time = DATETIME('now', '-1 second') WHERE auction_id = ?", (auction_id,)
+    )
+
+
+def test_create_auction_validation():
+    """只有卖家自己的、可售且支持拍卖的商品才能创建拍卖"""
+    db, service, seller, users, product = _setup()
+    assert service.create_auction(users[0], product, 50.0, 24) is None
+    assert service.create_auction(seller, product, 50.0, 0) is None
+    auction_id = service.create_auction(seller, product, 50.0, 24, bid_increment=5.0)
+    assert auction_id
+    assert service.create_auction(seller, product, 50.0, 24) is None
+    auction = service.get_auction_by_product(product)
+    assert auction.auction_id == auction_id and auction.status == AuctionStatus.ACTIVE
+    assert auction.current_bid == 50.0 and auction.is_active()
+    status = db.execute_query("SELECT status FROM products WHERE product_id = ?", (product,))[0]['status']
+    assert status == 'in_auction'
+    assert [a['auction_id'] for a in service.get_active_auctions()] == [auction_id]
+    db.close()
+
+
+def test_bid_rules():
+    """首次出价不低于起拍价,之后不低于当前价+加价幅度;卖家与当前领先者不能出价"""
+    db, service, seller, users, product = _setup()
+    auction_id = service.create_auction(seller, product, 50.0, 24, bid_increment=5.0)
+    assert not service.place_bid(auction_id, users[0], 49.99)
+    assert service.place_bid(auction_id, users[0], 50.0)
+    assert not service.place_bid(auction_id, users[0], 80.0)  # 已领先
+    assert not service.place_bid(auction_id, seller, 80.0)
+    assert not service.place_bid(auction_id, users[1], 54.99)
+    assert service.place_bid(auction_id, users[1], 55.0)
+    assert not service.place_bid(auction_id, users[2], 55.0)
+    assert not service.place_bid(999, users[2], 1000.0)
+
+    history = service.get_bid_history(auction_id)
+    assert [(h['bidder_id'], h['bid_amount']) for h in history] == [(users[1], 55.0), (users[0], 50.0)]
+    auction = service.get_auction_by_id(auction_id)
+    assert (auction.current_bid, auction.current_bidder_id) == (55.0, users[1])
+    mine = service.get_user_bids(users[0])
+    assert len(mine) == 1 and mine[0]['my_max_bid'] == 50.0 and not mine[0]['is_leading']
+    stats = service.get_bid_engine_stats()
+    assert stats['accepted'] == 2 and stats['fast_rejected'] >= 1
+    db.close()
+
+
+def test_concurrent_bids_are_serialized():
+    """多线程按各自读到的价格出价: 成交价格严格递增,出价历史与当前价一致"""
+    threads, rounds = 8, 30
+    db, service, seller, users, product = _setup(bidders=threads)
+    auction_id = service.create_auction(seller, product, 10.0, 24, bid_increment=1.0)
+    accepted = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def bidder(user_id):
+        barrier.wait()
+        for _ in range(rounds):
+            current = service.get_auction_by_id(auction_id)
+            amount = current.current_bid + (current.bid_increment if current.current_bidder_id else 0)
+            if service.place_bid(auction_id, user_id, amount):
+                with lock:
+                    accepted.append(amount)
+
+    workers = [threading.Thread(target=bidder, args=(u,)) for u in users]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    history = service.get_bid_history(auction_id)
+    amounts = [h['bid_amount'] for h in reversed(history)]
+    assert amounts == sorted(set(amounts)), "出价必须严格递增"
+    assert len(history) == len(accepted)
+    assert all(b - a >= 1.0 for a, b in zip(amounts, amounts[1:]))
+    auction = service.get_auction_by_id(auction_id)
+    assert auction.current_bid == max(accepted) == amounts[-1]
+    assert auction.current_bidder_id == history[0]['bidder_id']
+    db.close()
+
+
+def test_end_auction_creates_order_for_winner():
+    """到期结束: 中标者获得订单与通知,之后不能再出价"""
+    db, service, seller, users, product = _setup()
+    auction_id = service.create_auction(seller, product, 50.0, 24)
+    assert service.place_bid(auction_id, users[0], 50.0)
+    assert service.place_bid(auction_id, users[1], 60.0)
+    assert not service.end_auction(auction_id)  # 尚未到期
+
+    _expire(db, auction_id)
+    assert not service.place_bid(auction_id, users[0], 100.0)
+    assert service.end_auction(auction_id)
+    assert not service.end_auction(auction_id)
+
+    auction = service.get_auction_by_id(auction_id)
+    assert auction.status == AuctionStatus.ENDED
+    orders = db.execute_query("SELECT buyer_id, seller_id, total_price, status FROM orders")
+    assert [tuple(o.values()) for o in orders] == [(users[1], seller, 60.0, 'pending')]
+    product_row = db.execute_query("SELECT stock, status FROM products WHERE product_id = ?", (product,))[0]
+    assert (product_row['stock'], product_row['status']) == (0, 'sold_out')
+    get_outbox_dispatcher(db).dispatch()
+    message = db.execute_query("SELECT receiver_id, content, msg_type FROM messages")[0]
+    assert message['receiver_id'] == users[1] and message['msg_type'] == 'service'
+    assert json.loads(message['content'])['key'] == 'auction.service_auction_won'
+    db.close()
+
+
+def test_unsold_auction_and_cancel():
+    """流拍后商品恢复可售;有出价的拍卖不能取消"""
+    db, service, seller, users, product = _setup()
+    auction_id = service.create_auction(seller, product, 50.0, 24)
+    _expire(db, auction_id)
+    assert service.check_expired_auctions() == 1
+    status = db.execute_query("SELECT status FROM products WHERE product_id = ?", (product,))[0]['status']
+    assert status == 'available'
+    assert not db.execute_query("SELECT 1 FROM orders")
+
+    other = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, 'p2', 1.0, '原神', 1)",
+        (seller,)
+    )
+    auction_id = service.create_auction(seller, other, 10.0, 24)
+    assert service.place_bid(auction_id, users[0], 10.0)
+    assert not service.cancel_auction(auction_id, seller, 'changed mind')
+    third = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, 'p3', 1.0, '原神', 1)",
+        (seller,)
+    )
+    auction_id = service.create_auction(seller, third, 10.0, 24)
+    assert not service.cancel_auction(auction_id, users[0], 'not mine')
+    assert service.cancel_auction(auction_id, seller, 'changed mind')
+    assert service.get_auction_by_id(auction_id).status == AuctionStatus.CANCELLED
+    db.close()
+
+
+if __name__ == "__main__":
+    test_create_auction_validation()
+    test_bid_rules()
+    test_concurrent_bids_are_serialized()
+    test_end_auction_creates_order_for_winner()
+    test_unsold_auction_and_cancel()
+    print("✅ 拍卖出价测试通过")
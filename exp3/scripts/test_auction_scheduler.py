@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+测试拍卖到期调度器
+Test AuctionExpiryScheduler (heap keyed on end_time, batched settlement)
+"""
+
+import os
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import AuctionService
+from services.auction_scheduler import AuctionExpiryScheduler, start_expiry_scheduler
+from temp_paths import temp_path
+
+
+def _setup(auctions=5):
+    """创建卖家、出价者与若干进行中的拍卖"""
+    db = DatabaseManager(temp_path('auction_scheduler_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('as_s', 'x', 'as_s@x.com', 'seller')"
+    )
+    bidder = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('as_b', 'x', 'as_b@x.com')"
+    )
+    service = AuctionService(db)
+    ids = []
+    for i in range(auctions):
+        product = db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, ?, 1.0, '原神', 1)",
+            (seller, f'p{i}')
+        )
+        ids.append(service.create_auction(seller, product, 10.0, 24))
+    return db, service, bidder, ids
+
+
+def _set_end(db, auction_id, modifier):
+    db.execute_update(
+        "UPDATE auctions SET end_time = DATETIME('now', ?) WHERE auction_id = ?", (modifier, auction_id)
+    )
+
+
+def _status(db, auction_id):
+    return db.execute_query("SELECT status FROM auctions WHERE auction_id = ?", (auction_id,))[0]['status']
+
+
+def test_load_and_settle_due_in_batches():
+    """启动时从数据库建堆,已到期的拍卖按批结束,其余留在堆中"""
+    db, service, bidder, ids = _setup(5)
+    for auction_id, offset in zip(ids[:3], ('-30 seconds', '-20 seconds', '-10 seconds')):
+        _set_end(db, auction_id, offset)
+    assert service.place_bid(ids[3], bidder, 10.0)
+    scheduler = AuctionExpiryScheduler(db, service, batch_size=2)
+    assert scheduler.load() == 5
+    assert scheduler.run_due() == 3
+    stats = scheduler.stats()
+    assert (stats['ended'], stats['batches'], stats['scheduled']) == (3, 2, 2)
+    assert [_status(db, a) for a in ids] == ['ended'] * 3 + ['active'] * 2
+    db.close()
+
+
+def test_not_due_and_cancelled_entries():
+    """提前唤醒时未到期的拍卖重新入堆;已取消的拍卖直接出堆"""
+    db, service, _, ids = _setup(2)
+    scheduler = AuctionExpiryScheduler(db, service)
+    scheduler.load()
+    assert service.cancel_auction(ids[1], 1, 'test') is False  # 非卖家
+    seller = db.execute_query("SELECT seller_id FROM auctions WHERE auction_id = ?", (ids[1],))[0]['seller_id']
+    assert service.cancel_auction(ids[1], seller, 'test')
+    # 模拟时钟提前: 两个条目都被弹出,但都不会被结束
+    assert scheduler.run_due(now=time.time() + 48 * 3600) == 0
+    stats = scheduler.stats()
+    assert stats['scheduled'] == 1 and stats['rescheduled'] == 1
+    assert _status(db, ids[0]) == 'active'
+    db.close()
+
+
+def test_worker_ends_auction_at_close():
+    """后台线程在结束时间到达时结束拍卖,新建拍卖自动登记"""
+    db, service, bidder, ids = _setup(1)
+    scheduler = start_expiry_scheduler(db)
+    assert scheduler.stats()['scheduled'] == 1
+    seller = db.execute_query("SELECT seller_id FROM auctions WHERE auction_id = ?", (ids[0],))[0]['seller_id']
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, 'late', 1.0, '原神', 1)",
+        (seller,)
+    )
+    assert service.create_auction(seller, product, 10.0, 24)
+    assert scheduler.stats()['scheduled'] == 2
+
+    assert service.place_bid(ids[0], bidder, 10.0)
+    _set_end(db, ids[0], '+1 second')
+    end_time = db.execute_query("SELECT end_time FROM auctions WHERE auction_id = ?", (ids[0],))[0]['end_time']
+    scheduler.schedule(ids[0], end_time)
+    deadline = time.time() + 5
+    while _status(db, ids[0]) != 'ended' and time.time() < deadline:
+        time.sleep(0.02)
+    assert _status(db, ids[0]) == 'ended'
+    assert scheduler.stats()['max_lag'] < 1.0
+    orders = db.execute_query("SELECT buyer_id, total_price FROM orders")
+    assert [(o['buyer_id'], o['total_price']) for o in orders] == [(bidder, 10.0)]
+    db.close()
+    assert scheduler._thread is None  # 关闭数据库时停止
+
+
+if __name__ == "__main__":
+    test_load_and_settle_due_in_batches()
+    test_not_due_and_cancelled_entries()
+    test_worker_ends_auction_at_close()
+    print("✅ 拍卖到期调度器测试通过")
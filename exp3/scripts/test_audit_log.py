@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试管理员操作日志写入器
+Test the batched admin audit log writer
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import UnitOfWork
+from services.admin_service import AdminService
+from services.audit_log import AuditLogWriter, get_audit_log_writer
+from temp_paths import temp_path
+
+
+def _log_count(db):
+    return db.execute_query("SELECT COUNT(*) AS c FROM admin_logs")[0]['c']
+
+
+def test_synchronous_mode_writes_immediately():
+    """同步模式下记录即写入"""
+    db = DatabaseManager(temp_path('audit_log_test.db'))
+    writer = AuditLogWriter(db, synchronous=True)
+    writer.record(1, 'test', 'sync entry')
+    rows = db.execute_query("SELECT admin_id, action_type, details, created_at FROM admin_logs")
+    assert [(r['admin_id'], r['action_type'], r['details']) for r in rows] == [(1, 'test', 'sync entry')]
+    assert rows[0]['created_at']
+    db.close()
+
+
+def test_async_mode_batches_writes():
+    """异步模式合并为少量批次写入,flush 后全部可见"""
+    db = DatabaseManager(temp_path('audit_log_test.db'))
+    writer = AuditLogWriter(db, batch_size=50, flush_interval=30, synchronous=False)
+    for i in range(120):
+        writer.record(1, 'bulk', f'entry {i}')
+    writer.flush()
+    stats = writer.stats()
+    assert _log_count(db) == 120
+    assert stats['written'] == 120 and stats['pending'] == 0
+    assert stats['batches'] <= 5, stats
+    # 写入顺序与记录顺序一致
+    details = [r['details'] for r in db.execute_query("SELECT details FROM admin_logs ORDER BY log_id")]
+    assert details == [f'entry {i}' for i in range(120)]
+    writer.close()
+    db.close()
+
+
+def test_failed_batch_retries_entries():
+    """整批写入失败时逐条重试,只有本身无法写入的日志被跳过"""
+    db = DatabaseManager(temp_path('audit_log_test.db'))
+    writer = AuditLogWriter(db, batch_size=50, flush_interval=30, synchronous=False)
+    for i in range(10):
+        writer.record(99999 if i == 4 else 1, 'retry', f'entry {i}')  # 管理员不存在,外键约束失败
+    writer.flush()
+    stats = writer.stats()
+    assert (stats['written'], stats['failures'], stats['pending']) == (9, 1, 0)
+    details = [r['details'] for r in db.execute_query("SELECT details FROM admin_logs ORDER BY log_id")]
+    assert details == [f'entry {i}' for i in range(10) if i != 4]
+    writer.close()
+    db.close()
+
+
+def test_close_flushes_pending_entries():
+    """关闭数据库时写入尚未写入的日志"""
+    path = temp_path('audit_log_test.db')
+    db = DatabaseManager(path)
+    writer = get_audit_log_writer(db)
+    writer.flush_interval = 30
+    writer.synchronous = False
+    for i in range(30):
+        writer.record(1, 'shutdown', f'entry {i}')
+    db.close()
+    reopened = DatabaseManager(path)
+    assert _log_count(reopened) == 30
+    reopened.close()
+
+
+def test_admin_action_does_not_run_ddl():
+    """管理员操作记录日志时不再执行 CREATE TABLE"""
+    db = DatabaseManager(temp_path('audit_log_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('al_s', 'x', 'al_s@x.com')"
+    )
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category) VALUES (?, 'fake', 1.0, '其他')",
+        (seller,)
+    )
+    admin = AdminService(db, audit_log=AuditLogWriter(db, synchronous=True))
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        assert admin.remove_product(1, product, 'counterfeit')
+        conn.set_trace_callback(None)
+    assert not [s for s in statements if s.lstrip().upper().startswith('CREATE')]
+    rows = db.execute_query("SELECT action_type FROM admin_logs")
+    assert [r['action_type'] for r in rows] == ['remove_product']
+    db.close()
+
+
+def test_unit_of_work_uses_database_writer():
+    """在工作单元上创建的管理员服务使用数据库共享的写入器,工作单元结束后日志仍能写入"""
+    db = DatabaseManager(temp_path('audit_log_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('al_u', 'x', 'al_u@x.com')"
+    )
+    products = [db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category) VALUES (?, ?, 1.0, '其他')",
+        (seller, f'fake {i}')
+    ) for i in range(3)]
+    writer = get_audit_log_writer(db)
+    writer.synchronous = False
+    with UnitOfWork(db) as uow:
+        admin = AdminService(uow)
+        assert admin.audit_log is writer
+        assert set(admin.remove_products(1, products, 'counterfeit').values()) == {'removed'}
+    writer.flush()
+    rows = db.execute_query("SELECT action_type FROM admin_logs")
+    assert [r['action_type'] for r in rows] == ['remove_product'] * 3
+    assert writer.stats()['failures'] == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_synchronous_mode_writes_immediately()
+    test_async_mode_batches_writes()
+    test_failed_batch_retries_entries()
+    test_close_flushes_pending_entries()
+    test_admin_action_does_not_run_ddl()
+    test_unit_of_work_uses_database_writer()
+    print("✅ 管理员日志写入器测试通过")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+测试批量管理操作
+Test AdminService.remove_products / ban_users / review_reports
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services.admin_service import AdminService
+from services.audit_log import AuditLogWriter
+from utils.exceptions import PermissionDeniedError
+from temp_paths import temp_path
+
+
+def _setup():
+    """创建测试数据库: superadmin(user_id=1)、普通管理员、卖家和若干商品"""
+    db = DatabaseManager(temp_path('bulk_moderation_test.db'))
+    admin = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('bm_admin', 'x', 'bm_a@x.com', 'admin')"
+    )
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('bm_seller', 'x', 'bm_s@x.com')"
+    )
+    products = [
+        db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category) VALUES (?, ?, 1.0, '其他')",
+            (seller, f'fake {i}')
+        )
+        for i in range(5)
+    ]
+    service = AdminService(db, audit_log=AuditLogWriter(db, synchronous=True))
+    return db, service, admin, seller, products
+
+
+def _trace(db, func):
+    """执行 func 并返回期间执行的 SQL 语句"""
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        result = func()
+        conn.set_trace_callback(None)
+    return result, statements
+
+
+def _log_actions(db):
+    return [r['action_type'] for r in db.execute_query("SELECT action_type FROM admin_logs")]
+
+
+def test_remove_products_outcomes():
+    """批量下架返回每个商品的结果,已下架与不存在的商品不受影响"""
+    db, service, admin, _, products = _setup()
+    service.remove_product(admin, products[0], 'earlier')
+    outcomes = service.remove_products(admin, [products[0], products[1], products[2], 999, products[1]], 'wave')
+    assert outcomes == {
+        products[0]: 'already_removed',
+        products[1]: 'removed',
+        products[2]: 'removed',
+        999: 'not_found',
+    }
+    rows = db.execute_query("SELECT product_id, status FROM products ORDER BY product_id")
+    assert [r['status'] for r in rows] == ['removed', 'removed', 'removed', 'available', 'available']
+    assert _log_actions(db) == ['remove_product'] * 3
+    db.close()
+
+
+def test_remove_products_single_transaction():
+    """权限校验一次,一条 IN 查询校验,一个事务内一条 UPDATE"""
+    db, service, admin, _, products = _setup()
+    outcomes, statements = _trace(db, lambda: service.remove_products(admin, products, 'wave'))
+    assert set(outcomes.values()) == {'removed'}
+    # 外层连接已打开,事务以 SAVEPOINT 形式出现;其后是提交后写入的日志
+    sql = [s.lstrip().split()[0].upper() for s in statements]
+    assert sql[:5] == ['SELECT', 'SAVEPOINT', 'SELECT', 'UPDATE', 'RELEASE'], statements
+    assert 'UPDATE' not in sql[5:], statements
+    db.close()
+
+
+def test_ban_users_respects_admin_roles():
+    """普通管理员不能封禁管理员,超级管理员可以"""
+    db, service, admin, seller, _ = _setup()
+    outcomes = service.ban_users(admin, [seller, 1, 12345], duration_days=0, reason='spam "bot"')
+    assert outcomes == {seller: 'banned', 1: 'forbidden', 12345: 'not_found'}
+    profile = json.loads(db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile'])
+    assert profile == {'banned': True, 'ban_until': None, 'ban_reason': 'spam "bot"'}
+    assert service.ban_users(1, [admin]) == {admin: 'banned'}
+    db.close()
+
+
+def test_review_reports_applies_targets():
+    """通过的举报按目标类型下架商品、封禁用户;已审核的举报不重复处理"""
+    db, service, admin, seller, products = _setup()
+    reporter = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('bm_reporter', 'x', 'bm_r@x.com')"
+    )
+    report_sql = (
+        "INSERT INTO reports (reporter_id, target_id, target_type, report_type, reason) "
+        "VALUES (?, ?, ?, 'fake', 'counterfeit')"
+    )
+    reports = [db.execute_insert(report_sql, (reporter, pid, 'product')) for pid in products[:3]]
+    reports.append(db.execute_insert(report_sql, (reporter, seller, 'user')))
+    assert service.review_report(admin, reports[0], False, 'not fake')
+
+    outcomes = service.review_reports(admin, reports + [777], True, 'confirmed')
+    assert outcomes == {
+        reports[0]: 'already_reviewed',
+        reports[1]: 'approved',
+        reports[2]: 'approved',
+        reports[3]: 'approved',
+        777: 'not_found',
+    }
+    rows = db.execute_query("SELECT report_id, status, admin_id FROM reports ORDER BY report_id")
+    assert [(r['status'], r['admin_id']) for r in rows] == [('rejected', admin)] + [('approved', admin)] * 3
+    statuses = [r['status'] for r in db.execute_query("SELECT status FROM products ORDER BY product_id")]
+    assert statuses == ['available', 'removed', 'removed', 'available', 'available']
+    profile = db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile']
+    assert json.loads(profile)['banned'] is True
+    assert service.get_statistics(admin)['pending_reports'] == 0
+    db.close()
+
+
+def test_ban_profile_format():
+    """封禁信息为合法 JSON: 限时封禁记录截止时间,永久封禁的 ban_until 为 null(而不是字符串 "None")"""
+    db, service, admin, seller, _ = _setup()
+    assert service.ban_user(admin, seller, duration_days=7, reason="it's fake")
+    raw = db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile']
+    profile = json.loads(raw)
+    assert set(profile) == {'banned', 'ban_until', 'ban_reason'}
+    assert profile['banned'] is True and profile['ban_reason'] == "it's fake"
+    remaining = datetime.fromisoformat(profile['ban_until']) - datetime.now()
+    assert timedelta(days=6) < remaining <= timedelta(days=7)
+    assert service.ban_user(admin, seller, duration_days=0, reason='forever')
+    raw = db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile']
+    assert '"ban_until": null' in raw and json.loads(raw)['ban_until'] is None
+    db.close()
+
+
+def test_approved_report_dispatches_on_target_type():
+    """通过的举报按 target_type 处理;report_type 只是举报原因分类,不决定处理对象"""
+    db, service, admin, seller, products = _setup()
+    reporter = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('bm_reporter', 'x', 'bm_r@x.com')"
+    )
+    report_sql = (
+        "INSERT INTO reports (reporter_id, target_id, target_type, report_type, reason) "
+        "VALUES (?, ?, ?, ?, 'reason')"
+    )
+    # 原因分类恰好为 user 的商品举报: 下架商品,不封禁 ID 相同的用户
+    product_report = db.execute_insert(report_sql, (reporter, seller, 'product', 'user'))
+    assert service.review_report(admin, product_report, True, 'confirmed')
+    statuses = {r['product_id']: r['status'] for r in db.execute_query("SELECT product_id, status FROM products")}
+    assert statuses[seller] == 'removed'
+    profile = db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile']
+    assert not (profile and json.loads(profile).get('banned'))
+    # 原因分类为 fraud 的用户举报: 封禁用户
+    user_report = db.execute_insert(report_sql, (reporter, seller, 'user', 'fraud'))
+    assert service.review_reports(admin, [user_report], True, 'confirmed') == {user_report: 'approved'}
+    profile = json.loads(db.execute_query("SELECT profile FROM users WHERE user_id = ?", (seller,))[0]['profile'])
+    assert profile == {'banned': True, 'ban_until': None, 'ban_reason': '违规行为'}
+    db.close()
+
+
+def test_bulk_requires_admin():
+    """非管理员调用批量接口时抛出权限异常"""
+    db, service, _, seller, products = _setup()
+    try:
+        service.remove_products(seller, products)
+        raise AssertionError("expected PermissionDeniedError")
+    except PermissionDeniedError:
+        pass
+    assert db.execute_query("SELECT COUNT(*) AS c FROM products WHERE status = 'removed'")[0]['c'] == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_remove_products_outcomes()
+    test_remove_products_single_transaction()
+    test_ban_users_respects_admin_roles()
+    test_review_reports_applies_targets()
+    test_ban_profile_format()
+    test_approved_report_dispatches_on_target_type()
+    test_bulk_requires_admin()
+    print("✅ 批量管理操作测试通过")
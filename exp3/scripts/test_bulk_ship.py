@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试批量发货与发货清单导入
+Test OrderService.ship_orders_bulk / import_shipments_csv
+"""
+
+import io
+import json
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService
+from services.outbox import OutboxDispatcher
+from temp_paths import temp_path
+
+
+def _setup(paid=4):
+    """创建两个卖家、买家,以及卖家1的若干已支付订单和一个待支付订单、卖家2的一个已支付订单"""
+    db = DatabaseManager(temp_path('bulk_ship_test.db'))
+    sellers = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email, role) VALUES (?, 'x', ?, 'seller')",
+            (f'bs_s{i}', f'bs_s{i}@x.com')
+        )
+        for i in range(2)
+    ]
+    buyer = db.execute_insert("INSERT INTO users (username, password, email) VALUES ('bs_b', 'x', 'bs_b@x.com')")
+    products = [
+        db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '手办', 10.0, 100, '原神')",
+            (seller,)
+        )
+        for seller in sellers
+    ]
+    service = OrderService(db, outbox=OutboxDispatcher(db, synchronous=True))
+    paid_ids = [service.create_order(buyer, products[0], 1, 'addr') for _ in range(paid)]
+    for order_id in paid_ids:
+        assert service.pay_order(order_id, 'alipay')
+    pending = service.create_order(buyer, products[0], 1, 'addr')
+    other = service.create_order(buyer, products[1], 1, 'addr')
+    assert service.pay_order(other, 'alipay')
+    return db, service, sellers[0], buyer, paid_ids, pending, other
+
+
+def test_ship_orders_bulk():
+    """一次校验归属与状态,每个订单返回处理结果;有效订单写入各自的物流单号"""
+    db, service, seller, buyer, paid, pending, other = _setup()
+    outcomes = service.ship_orders_bulk(seller, [
+        (paid[0], 'SF001'), (paid[1], ' SF002 '), (paid[1], 'SF-dup'), (paid[2], ''),
+        (pending, 'SF003'), (other, 'SF004'), (99999, 'SF005')
+    ])
+    assert outcomes == {
+        paid[0]: 'shipped', paid[1]: 'shipped', paid[2]: 'missing_tracking',
+        pending: 'invalid_status', other: 'not_owner', 99999: 'not_found'
+    }
+    rows = db.execute_query("SELECT order_id, status, tracking_number FROM orders WHERE status = 'shipped'")
+    assert {r['order_id']: r['tracking_number'] for r in rows} == {paid[0]: 'SF001', paid[1]: 'SF002'}
+    shipped = db.execute_query(
+        "SELECT content FROM messages WHERE receiver_id = ? ORDER BY msg_id", (buyer,)
+    )
+    assert [json.loads(r['content'])['params']['tracking_number'] for r in shipped] == ['SF001', 'SF002']
+    # 已发货的订单再次导入
+    assert service.ship_orders_bulk(seller, [(paid[0], 'SF009')]) == {paid[0]: 'invalid_status'}
+    assert service.ship_orders_bulk(seller, []) == {}
+    db.close()
+
+
+def test_import_csv_report():
+    """逐行读取 CSV(可带表头),错误按文件行号报告"""
+    db, service, seller, _, paid, pending, other = _setup()
+    manifest = io.StringIO(
+        "order_id,tracking_number\n"
+        f"{paid[0]},YT100\n"
+        "\n"
+        f"#{paid[1]},YT101,extra\n"
+        "abc,YT102\n"
+        f"{paid[0]},YT103\n"
+        f"{pending},YT104\n"
+        f"{other}\n"
+        f"{paid[3]},YT105\n"
+    )
+    report = service.import_shipments_csv(seller, manifest)
+    assert report['total'] == 7 and report['shipped'] == 3
+    assert [(e['line'], e['error']) for e in report['errors']] == [
+        (5, 'invalid_row'), (6, 'duplicate'), (7, 'invalid_status'), (8, 'invalid_row')
+    ]
+    assert report['errors'][0]['order_id'] == 'abc'
+    db.close()
+
+
+def test_import_csv_file():
+    """从文件路径导入(兼容带 BOM 的 UTF-8)"""
+    db, service, seller, _, paid, _, _ = _setup(2)
+    path = temp_path('manifest.csv')
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(f"{paid[0]},中通001\r\n{paid[1]},中通002\r\n")
+    report = service.import_shipments_csv(seller, path)
+    assert (report['total'], report['shipped'], report['errors']) == (2, 2, [])
+    tracking = db.execute_query("SELECT tracking_number FROM orders WHERE order_id = ?", (paid[1],))[0]
+    assert tracking['tracking_number'] == '中通002'
+    db.close()
+
+
+if __name__ == "__main__":
+    test_ship_orders_bulk()
+    test_import_csv_report()
+    test_import_csv_file()
+    print("✅ 批量发货测试通过")
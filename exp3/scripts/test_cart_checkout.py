@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试购物车与一次结算
+Test CartService (cart_items) and single-transaction checkout
+"""
+
+import json
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import CartService, OrderService
+from services.outbox import OutboxDispatcher
+from temp_paths import temp_path
+
+
+def _setup():
+    """两个卖家: 卖家1 三个商品,卖家2 一个商品"""
+    db = DatabaseManager(temp_path('cart_test.db'))
+    sellers = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email, role) VALUES (?, 'x', ?, 'seller')",
+            (f'ct_s{i}', f'ct_s{i}@x.com')
+        )
+        for i in range(2)
+    ]
+    buyer = db.execute_insert("INSERT INTO users (username, password, email) VALUES ('ct_b', 'x', 'ct_b@x.com')")
+    products = [
+        db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, ?, ?, 3, '原神')",
+            (seller, f'p{i}', price)
+        )
+        for i, (seller, price) in enumerate([(sellers[0], 10.0), (sellers[0], 20.0), (sellers[0], 5.0),
+                                             (sellers[1], 8.0)])
+    ]
+    orders = OrderService(db, outbox=OutboxDispatcher(db, synchronous=True))
+    return db, CartService(db, orders), sellers, buyer, products
+
+
+def _cart(service, buyer):
+    return {item['product_id']: item['quantity'] for item in service.get_cart(buyer)['items']}
+
+
+def _stock(db, product_id):
+    return db.execute_query("SELECT stock, status FROM products WHERE product_id = ?", (product_id,))[0]
+
+
+def test_cart_items():
+    """重复加入累加数量;不可售或自己的商品不能加入;数量为 0 时移除"""
+    db, service, sellers, buyer, products = _setup()
+    assert service.add_item(buyer, products[0], 1)
+    assert service.add_item(buyer, products[0], 2)
+    assert service.add_item(buyer, products[1])
+    assert service.add_item(buyer, 99999) is False
+    assert service.add_item(sellers[0], products[0]) is False
+    assert service.add_item(buyer, products[2], 0) is False
+    assert _cart(service, buyer) == {products[0]: 3, products[1]: 1}
+    assert service.update_quantity(buyer, products[1], 4)
+    cart = service.get_cart(buyer)
+    assert [item['available'] for item in cart['items']] == [True, False]  # 库存只有 3
+    assert cart['total_price'] == 30.0
+    assert service.update_quantity(buyer, products[1], 0)
+    assert _cart(service, buyer) == {products[0]: 3}
+    assert service.clear(buyer) == 1 and service.get_cart(buyer)['count'] == 0
+    db.close()
+
+
+def test_checkout_groups_by_seller():
+    """一次结算: 每个商品一个订单,库存全部扣减,每个卖家一条服务消息,购物车清空"""
+    db, service, sellers, buyer, products = _setup()
+    for product_id, quantity in zip(products, (3, 1, 2, 1)):
+        assert service.add_item(buyer, product_id, quantity)
+    result = service.checkout(buyer, 'addr')
+    assert len(result['order_ids']) == 4 and result['total_price'] == 30.0 + 20.0 + 10.0 + 8.0
+    orders = db.execute_query(
+        "SELECT order_id, seller_id, product_id, quantity, total_price FROM orders ORDER BY order_id"
+    )
+    assert [o['order_id'] for o in orders] == result['order_ids']
+    assert [(o['product_id'], o['quantity']) for o in orders] == list(zip(products, (3, 1, 2, 1)))
+    assert _stock(db, products[0])['status'] == 'sold_out' and _stock(db, products[2])['stock'] == 1
+    assert _cart(service, buyer) == {}
+
+    messages = db.execute_query("SELECT receiver_id, content FROM messages ORDER BY msg_id")
+    assert [m['receiver_id'] for m in messages] == sellers
+    first, second = (json.loads(m['content']) for m in messages)
+    assert first['key'] == 'order.service_orders_created' and first['params']['count'] == 3
+    assert first['params']['order_ids'] == ', '.join(f'#{oid}' for oid in result['order_ids'][:3])
+    assert second == {'key': 'order.service_order_created', 'params': {'order_id': result['order_ids'][3]}}
+
+    assert service.checkout(buyer, 'addr') is None  # 购物车为空
+    db.close()
+
+
+def test_checkout_all_or_nothing():
+    """任一商品库存不足时不创建订单、不扣减库存,购物车保持不变"""
+    db, service, _, buyer, products = _setup()
+    assert service.add_item(buyer, products[0], 2)
+    assert service.add_item(buyer, products[3], 3)
+    db.execute_update("UPDATE products SET stock = 2 WHERE product_id = ?", (products[3],))
+    assert service.checkout(buyer, 'addr') is None
+    assert db.execute_query("SELECT COUNT(*) AS c FROM orders")[0]['c'] == 0
+    assert db.execute_query("SELECT COUNT(*) AS c FROM outbox")[0]['c'] == 0
+    assert _stock(db, products[0])['stock'] == 3
+    assert _cart(service, buyer) == {products[0]: 2, products[3]: 3}
+    assert service.update_quantity(buyer, products[3], 2)
+    assert len(service.checkout(buyer, 'addr')['order_ids']) == 2
+    db.close()
+
+
+if __name__ == "__main__":
+    test_cart_items()
+    test_checkout_groups_by_seller()
+    test_checkout_all_or_nothing()
+    print("✅ 购物车结算测试通过")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+并发下单测试: 多线程同时抢购同一商品,验证库存不会变为负数
+Concurrent checkout harness for OrderService.create_order
+
+用法:
+    python scripts/test_concurrent_orders.py [线程数] [每线程下单次数] [初始库存]
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService
+from temp_paths import temp_path
+
+
+def run_checkout_race(threads: int, orders_per_thread: int, stock: int) -> dict:
+    """
+    启动 threads 个线程并发下单
+
+    Returns:
+        dict: 成功/失败数量、剩余库存、耗时与吞吐量
+    """
+    db = DatabaseManager(temp_path('race_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('race_s', 'x', 'race_s@x.com', 'seller')"
+    )
+    buyers = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+            (f"race_b{i}", f"race_b{i}@x.com")
+        )
+        for i in range(threads)
+    ]
+    product_id = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, stock) VALUES (?, '原神 限定手办', 499.0, '原神', ?)",
+        (seller, stock)
+    )
+    service = OrderService(db)
+    results = {'ok': 0, 'rejected': 0, 'errors': []}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def buyer_loop(buyer_id):
+        barrier.wait()
+        for _ in range(orders_per_thread):
+            try:
+                order_id = service.create_order(buyer_id, product_id, 1, 'addr')
+            except Exception as e:
+                with lock:
+                    results['errors'].append(e)
+                continue
+            with lock:
+                results['ok' if order_id else 'rejected'] += 1
+
+    workers = [threading.Thread(target=buyer_loop, args=(b,)) for b in buyers]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    product = db.execute_query("SELECT stock, status FROM products WHERE product_id=?", (product_id,))[0]
+    order_count = db.execute_query(
+        "SELECT COUNT(*) AS c, COALESCE(SUM(quantity), 0) AS q FROM orders WHERE product_id=?", (product_id,)
+    )[0]
+    db.close()
+    return {
+        'ok': results['ok'],
+        'rejected': results['rejected'],
+        'errors': results['errors'],
+        'stock_left': product['stock'],
+        'status': product['status'],
+        'orders': order_count['c'],
+        'quantity_sold': order_count['q'],
+        'elapsed': elapsed,
+        'orders_per_sec': (results['ok'] + results['rejected']) / elapsed if elapsed else 0.0
+    }
+
+
+def test_no_oversell_under_concurrency():
+    """8 个线程抢购库存为 50 的商品,恰好成交 50 单"""
+    result = run_checkout_race(threads=8, orders_per_thread=10, stock=50)
+    print(f"result: {result}")
+    assert not result['errors'], result['errors']
+    assert result['stock_left'] == 0
+    assert result['status'] == 'sold_out'
+    assert result['ok'] == 50 and result['orders'] == 50 and result['quantity_sold'] == 50
+    assert result['rejected'] == 30
+
+
+if __name__ == "__main__":
+    n_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    initial_stock = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    r = run_checkout_race(n_threads, per_thread, initial_stock)
+    print(f"线程数: {n_threads}, 下单尝试: {n_threads * per_thread}, 初始库存: {initial_stock}")
+    print(f"成功: {r['ok']}, 库存不足被拒: {r['rejected']}, 异常: {len(r['errors'])}")
+    print(f"剩余库存: {r['stock_left']} ({r['status']}), 订单数: {r['orders']}")
+    print(f"耗时: {r['elapsed']:.3f}s, 吞吐量: {r['orders_per_sec']:.1f} orders/sec")
+    assert r['stock_left'] >= 0 and r['quantity_sold'] == initial_stock - r['stock_left']
+    print("✅ 未出现超卖")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+测试数据库连接池
+Test DatabaseManager connection pool
+"""
+
+import os
+import sys
+import threading
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from temp_paths import temp_path
+
+
+def _temp_db(pool_size=None):
+    """在临时目录中创建独立的测试数据库"""
+    return DatabaseManager(temp_path('pool_test.db'), pool_size=pool_size)
+
+
+def test_connections_are_reused():
+    """多次查询应复用同一个连接"""
+    db = _temp_db(pool_size=2)
+    for _ in range(20):
+        db.execute_query("SELECT COUNT(*) AS c FROM users")
+    stats = db.get_pool_stats()
+    print(f"pool stats: {stats}")
+    assert stats['size'] == 1, "串行访问只应创建一个连接"
+    assert stats['hits'] >= 20, "后续查询应命中空闲连接"
+    assert stats['in_use'] == 0
+    db.close()
+
+
+def test_pragma_applied_once_per_connection():
+    """PRAGMA 在连接创建时设置,复用的连接仍然生效"""
+    db = _temp_db()
+    for _ in range(3):
+        rows = db.execute_query("PRAGMA foreign_keys")
+        assert rows[0]['foreign_keys'] == 1
+    db.close()
+
+
+def test_nested_get_connection_reuses_outer():
+    """同一线程内嵌套调用复用外层连接,且由外层统一提交"""
+    db = _temp_db(pool_size=1)
+    with db.get_connection() as outer:
+        with db.get_connection() as inner:
+            assert inner is outer
+        # 嵌套的 execute_* 也不会因池大小为1而死锁
+        db.execute_query("SELECT 1")
+    assert db.get_pool_stats()['in_use'] == 0
+    db.close()
+
+
+def test_rollback_on_error():
+    """异常时回滚,连接仍归还池中"""
+    db = _temp_db()
+    try:
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password, email) VALUES ('rb', 'x', 'rb@x.com')"
+            )
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    rows = db.execute_query("SELECT * FROM users WHERE username='rb'")
+    assert rows == []
+    assert db.get_pool_stats()['in_use'] == 0
+    db.close()
+
+
+def test_bounded_under_threads():
+    """多线程并发时连接数不超过上限,且会记录等待"""
+    db = _temp_db(pool_size=2)
+    barrier = threading.Barrier(6)
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            for _ in range(30):
+                db.execute_query("SELECT COUNT(*) AS c FROM users")
+        except Exception as e:  # pragma: no cover - 仅用于收集线程异常
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    stats = db.get_pool_stats()
+    print(f"pool stats: {stats}")
+    assert not errors, errors
+    assert stats['size'] <= 2
+    assert stats['in_use'] == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_pragma_applied_once_per_connection()
+    test_nested_get_connection_reuses_outer()
+    test_rollback_on_error()
+    test_bounded_under_threads()
+    print("✅ 连接池测试通过")
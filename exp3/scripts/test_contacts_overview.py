@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+测试联系人列表查询次数
+Test that the contacts list runs a constant number of queries (no N+1)
+"""
+
+import os
+import sys
+from unittest import mock
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import MessageService
+from main import AnimeShoppingMall
+from temp_paths import temp_path
+
+CHECKED_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def _setup(contacts):
+    """创建一个用户及若干联系人(偶数号为卖家),每个联系人发来两条消息"""
+    db = DatabaseManager(temp_path('contacts_test.db'))
+    me = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('me', 'x', 'me@x.com')"
+    )
+    peers = []
+    for i in range(contacts):
+        peers.append(db.execute_insert(
+            "INSERT INTO users (username, password, email, shop_name) VALUES (?, 'x', ?, ?)",
+            (f'peer{i}', f'peer{i}@x.com', f'Shop{i}' if i % 2 == 0 else None)
+        ))
+    db.execute_many(
+        "INSERT INTO messages (sender_id, receiver_id, content) VALUES (?, ?, ?)",
+        [(peer, me, f'hello {n}') for peer in peers for n in range(2)]
+    )
+    return db, me, peers
+
+
+def _count_queries(db, fn):
+    """统计 fn 执行期间的 SQL 语句数"""
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        try:
+            fn()
+        finally:
+            conn.set_trace_callback(None)
+    return len([s for s in statements if s.lstrip().upper().startswith(CHECKED_PREFIXES)])
+
+
+def test_contacts_overview_single_query():
+    """联系人概览只执行一条查询,并带出名称、店铺和未读数"""
+    db, me, peers = _setup(30)
+    service = MessageService(db)
+    overview = []
+    assert _count_queries(db, lambda: overview.extend(service.get_contacts_overview(me))) == 1
+    assert len(overview) == 30
+    latest = overview[0]
+    assert latest['peer_id'] == peers[-1] and latest['peer_name'] == 'peer29'
+    assert latest['unread'] == 2 and latest['last']['content'] == 'hello 1'
+    assert overview[1]['is_seller'] and overview[1]['shop_name'] == 'Shop28'
+    assert not latest['is_seller']
+    db.close()
+
+
+def test_cli_contacts_list_query_count_is_constant():
+    """CLI 联系人列表的查询次数与联系人数量无关"""
+    counts = []
+    for contacts in (3, 40):
+        db, me, _ = _setup(contacts)
+        app = AnimeShoppingMall(db)
+        with mock.patch('builtins.input', return_value='0'), mock.patch('builtins.print'):
+            counts.append(_count_queries(db, lambda: app._contacts_list_menu(me)))
+        db.close()
+    assert counts[0] == counts[1] == 1, counts
+
+
+if __name__ == "__main__":
+    test_contacts_overview_single_query()
+    test_cli_contacts_list_query_count_is_constant()
+    print("✅ 联系人列表查询次数测试通过")
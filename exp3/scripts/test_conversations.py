@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+测试会话汇总表 conversations
+Test the trigger-maintained conversations table and the contacts list
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from database.migrator import MigrationRunner
+from services import MessageService
+from temp_paths import temp_path
+
+
+def _setup(users=3):
+    """创建测试数据库和若干用户"""
+    db = DatabaseManager(temp_path('conversation_test.db'))
+    ids = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+            (f'cv_user{i}', f'cv{i}@x.com')
+        )
+        for i in range(users)
+    ]
+    return db, MessageService(db), ids
+
+
+def _conversation(db, user_id, peer_id):
+    rows = db.execute_query(
+        "SELECT * FROM conversations WHERE user_id=? AND peer_id=?", (user_id, peer_id)
+    )
+    return rows[0] if rows else None
+
+
+def test_send_and_read_update_both_sides():
+    """发送消息更新双方会话;已读操作扣减未读数"""
+    db, service, (a, b, _) = _setup()
+    service.send_message(a, b, 'hi')
+    last = service.send_message(a, b, 'are you there?')
+    assert _conversation(db, a, b)['unread_count'] == 0
+    assert _conversation(db, b, a)['unread_count'] == 2
+    assert _conversation(db, b, a)['last_msg_id'] == last
+    assert service.get_unread_count(b) == 2
+
+    assert service.mark_as_read(last, b)
+    assert _conversation(db, b, a)['unread_count'] == 1
+    # 重复标记已读不会重复扣减
+    service.mark_as_read(last, b)
+    assert service.mark_conversation_as_read(b, a)
+    assert _conversation(db, b, a)['unread_count'] == 0
+    assert service.get_unread_count(b) == 0
+    db.close()
+
+
+def test_contacts_list_is_not_limited_by_message_window():
+    """联系人列表不受消息数量影响,按最后消息时间排序并附带未读数"""
+    db, service, (a, b, c) = _setup()
+    service.send_message(c, a, 'old contact')
+    db.execute_many(
+        "INSERT INTO messages (sender_id, receiver_id, content) VALUES (?, ?, ?)",
+        [(b, a, f'spam {i}') for i in range(1200)]
+    )
+    contacts = service.get_user_messages(a, limit=10)
+    assert [r['peer_id'] for r in contacts] == [b, c]
+    assert [r['unread_count'] for r in contacts] == [1200, 1]
+    assert contacts[0]['content'] == 'spam 1199'
+    assert len(service.get_user_messages(a, limit=1)) == 1
+    db.close()
+
+
+def test_delete_falls_back_to_previous_message():
+    """删除最后一条消息时回退到上一条;会话清空后删除汇总行"""
+    db, service, (a, b, _) = _setup()
+    first = service.send_message(a, b, 'first')
+    second = service.send_message(b, a, 'second')
+    assert service.delete_message(second, a)
+    assert _conversation(db, a, b)['last_msg_id'] == first
+    assert _conversation(db, b, a)['last_msg_id'] == first
+    assert _conversation(db, a, b)['unread_count'] == 0
+    assert service.delete_message(first, b)
+    assert _conversation(db, a, b) is None and _conversation(db, b, a) is None
+    db.close()
+
+
+def test_migration_backfills_existing_messages():
+    """迁移根据已有消息回填会话表"""
+    db, service, (a, b, c) = _setup()
+    with db.get_connection() as conn:
+        conn.executescript("""
+            DROP TRIGGER conversations_msg_ai;
+            DROP TRIGGER conversations_msg_au;
+            DROP TRIGGER conversations_msg_ad;
+            DROP TABLE conversations;
+            DELETE FROM schema_version WHERE version >= 7;
+        """)
+    db.execute_many(
+        "INSERT INTO messages (sender_id, receiver_id, content, status) VALUES (?, ?, ?, ?)",
+        [(a, b, 'm1', 'read'), (b, a, 'm2', 'sent'), (c, a, 'm3', 'sent'), (b, a, 'm4', 'delivered')]
+    )
+    assert 7 in MigrationRunner(db).migrate()
+    contacts = service.get_user_messages(a)
+    assert [(r['peer_id'], r['content'], r['unread_count']) for r in contacts] == [
+        (b, 'm4', 2), (c, 'm3', 1)
+    ]
+    assert _conversation(db, b, a)['unread_count'] == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_send_and_read_update_both_sides()
+    test_contacts_list_is_not_limited_by_message_window()
+    test_delete_falls_back_to_previous_message()
+    test_migration_backfills_existing_messages()
+    print("✅ 会话汇总表测试通过")
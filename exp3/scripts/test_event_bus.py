@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+测试进程内事件总线
+Test EventBus delivery, drop policies and publish-after-commit from services
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import AuctionService, MessageService, OrderService, UnitOfWork
+from services.event_bus import (
+    EventBus, get_event_bus, auction_topic, conversation_topic, user_topic,
+    DROP_NEWEST, DISCONNECT
+)
+from temp_paths import temp_path
+
+
+def _setup():
+    db = DatabaseManager(temp_path('event_bus_test.db'))
+    ids = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email, role) VALUES (?, 'x', ?, ?)",
+            (f'eb_{i}', f'eb_{i}@x.com', role)
+        )
+        for i, role in enumerate(('seller', 'user', 'user'))
+    ]
+    return db, ids
+
+
+def test_delivery_across_threads():
+    """其他线程发布的事件送达订阅者;同时订阅多个主题只收到一次;无订阅者时不送达"""
+    bus = EventBus(max_queue=16)
+
+    async def main():
+        feed = bus.subscribe('a', 'b')
+        publishers = [threading.Thread(target=bus.publish, args=('ping', {'n': n}, 'a', 'b')) for n in range(5)]
+        for p in publishers:
+            p.start()
+        received = [await feed.get(timeout=2) for _ in range(5)]
+        assert await feed.get(timeout=0.05) is None
+        assert sorted(e['data']['n'] for e in received) == list(range(5))
+        assert bus.publish('ping', {}, 'c') == 0
+        feed.close()
+        assert bus.stats()['subscriptions'] == 0
+        for p in publishers:
+            p.join()
+
+    asyncio.run(main())
+
+
+def test_drop_policies():
+    """队列已满: drop_oldest 保留最新,drop_newest 保留最早,disconnect 关闭订阅"""
+    bus = EventBus(max_queue=3)
+
+    async def main():
+        oldest = bus.subscribe('t')
+        newest = bus.subscribe('t', policy=DROP_NEWEST)
+        cut = bus.subscribe('t', policy=DISCONNECT)
+        for n in range(5):
+            bus.publish('tick', {'n': n}, 't')
+        assert [(await oldest.get())['data']['n'] for _ in range(3)] == [2, 3, 4]
+        assert [(await newest.get())['data']['n'] for _ in range(3)] == [0, 1, 2]
+        assert oldest.dropped == newest.dropped == 2
+        assert cut.closed and cut.dropped == 1
+        assert [e['data']['n'] async for e in cut] == [0, 1, 2]
+        assert bus.stats()['subscriptions'] == 2
+
+    asyncio.run(main())
+
+
+def test_services_publish_after_commit():
+    """消息、服务消息(含拍卖中标通知)与出价在提交后发布;工作单元回滚时不发布;关闭数据库时订阅结束"""
+    db, (seller, buyer, other) = _setup()
+    bus = get_event_bus(db)
+    messages = MessageService(db)
+
+    async def main():
+        chat = bus.subscribe(conversation_topic(buyer, seller))
+        inbox = bus.subscribe(user_topic(seller))
+        msg_id = messages.send_message(buyer, seller, 'hello')
+        event = await chat.get(timeout=1)
+        assert event['type'] == 'message' and event['data']['msg_id'] == msg_id
+        assert (await inbox.get(timeout=1))['seq'] == event['seq']
+
+        with UnitOfWork(db) as uow:
+            uow.messages.send_message(seller, buyer, 'rolled back')
+            assert chat.pending() == 0  # 提交前不发布
+            uow.rollback()
+        with UnitOfWork(db) as uow:
+            uow.messages.send_message(seller, buyer, 'committed')
+            assert chat.pending() == 0
+        assert (await chat.get(timeout=1))['data']['content'] == 'committed'
+
+        product = db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, stock, category, auctionable) "
+            "VALUES (?, 'p', 5.0, 3, '原神', 0)", (seller,)
+        )
+        order_id = OrderService(db).create_order(buyer, product, 1, 'addr')
+        event = await inbox.get(timeout=1)
+        assert event['data']['msg_type'] == 'service' and str(order_id) in event['data']['content']
+        assert (await chat.get(timeout=1))['seq'] == event['seq']
+
+        auctions = AuctionService(db)
+        lot = db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, 'lot', 1.0, '原神', 1)",
+            (seller,)
+        )
+        auction_id = auctions.create_auction(seller, lot, 10.0, 24)
+        feed = bus.subscribe(auction_topic(auction_id))
+        auctions.place_proxy_bid(auction_id, buyer, 50.0)
+        assert not auctions.place_bid(auction_id, other, 20.0)
+        first, second = await feed.get(timeout=1), await feed.get(timeout=1)
+        assert first['data']['current_bid'] == 10.0 and second['data']['current_bid'] == 21.0
+        assert second['data']['leader_id'] == buyer and 'max_bid' not in second['data']
+        # 结算的中标通知经发件箱投递,会话订阅者可以收到
+        db.execute_update(
+            "UPDATE auctions SET end_time = DATETIME('now', '-1 second') WHERE auction_id = ?", (auction_id,)
+        )
+        assert auctions.end_auction(auction_id)
+        event = await chat.get(timeout=2)
+        assert event['data']['msg_type'] == 'service' and 'auction.service_auction_won' in event['data']['content']
+
+        db.close()
+        assert await chat.get(timeout=1) is None and chat.closed
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    test_delivery_across_threads()
+    test_drop_policies()
+    test_services_publish_after_commit()
+    print("✅ 事件总线测试通过")
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+测试限时抢购
+Test FlashSale (in-memory stock tokens, batched order persistence)
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService
+from services.flash_sale import FlashSale, start_flash_sale, get_flash_sale, end_flash_sale
+from services.outbox import OutboxDispatcher
+from temp_paths import temp_path
+
+
+def _setup(stock=5, buyers=10):
+    db = DatabaseManager(temp_path('flash_sale_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('fs_s', 'x', 'fs_s@x.com', 'seller')"
+    )
+    db.execute_many(
+        "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)",
+        [(f'fs_b{i}', f'fs_b{i}@x.com') for i in range(buyers)]
+    )
+    buyer_ids = [r['user_id'] for r in db.execute_query(
+        "SELECT user_id FROM users WHERE username LIKE 'fs_b%' ORDER BY user_id"
+    )]
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '限定手办', 99.0, ?, '原神')",
+        (seller, stock)
+    )
+    return db, seller, buyer_ids, product
+
+
+def _product(db, product_id):
+    return db.execute_query("SELECT stock, status FROM products WHERE product_id = ?", (product_id,))[0]
+
+
+def _orders(db):
+    return db.execute_query("SELECT buyer_id, quantity, total_price FROM orders ORDER BY order_id")
+
+
+def test_admit_and_persist():
+    """库存转入名额;内存判定限购与剩余名额;批量写入订单并通知买家;结束时归还剩余库存"""
+    db, seller, buyers, product = _setup(stock=5)
+    sale = FlashSale(db, product, per_buyer_limit=2, batch_size=3, flush_interval=60,
+                     outbox=OutboxDispatcher(db, synchronous=True))
+    assert sale.start()
+    assert _product(db, product) == {'stock': 0, 'status': 'sold_out'}
+    assert OrderService(db).create_order(buyers[0], product, 1, 'addr') is None  # 普通下单已无库存
+
+    assert sale.admit(buyers[0], 'addr', 2)
+    assert sale.admit(buyers[0], 'addr') is False      # 超过限购
+    assert sale.admit(seller, 'addr') is False         # 卖家自己
+    assert sale.admit(buyers[1], '') is False          # 缺少地址
+    assert sale.admit(buyers[1], 'addr')
+    assert sale.remaining() == 2 and _orders(db) == []  # 判定不访问数据库
+
+    created = sale.flush()
+    assert len(created) == 2
+    assert [(o['buyer_id'], o['quantity'], o['total_price']) for o in _orders(db)] == [
+        (buyers[0], 2, 198.0), (buyers[1], 1, 99.0)
+    ]
+    won = db.execute_query("SELECT receiver_id FROM messages WHERE sender_id = ? ORDER BY msg_id", (seller,))
+    assert [m['receiver_id'] for m in won] == buyers[:2]
+    assert db.execute_query("SELECT sold FROM flash_sales")[0]['sold'] == 3
+
+    assert sale.end() == 2
+    assert _product(db, product) == {'stock': 2, 'status': 'available'}
+    assert sale.admit(buyers[2], 'addr') is False
+    db.close()
+
+
+def test_concurrent_no_oversell():
+    """多线程同时抢购: 抢到的数量恰好等于库存,每人最多一件"""
+    db, _, buyers, product = _setup(stock=50, buyers=200)
+    sale = FlashSale(db, product, batch_size=16, flush_interval=0.01)
+    assert sale.start()
+    results = []
+
+    def worker(chunk):
+        for buyer in chunk:
+            for _ in range(3):  # 同一买家重复抢购
+                results.append((buyer, sale.admit(buyer, 'addr')))
+
+    threads = [threading.Thread(target=worker, args=(buyers[i::8],)) for i in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    sale.close()
+    winners = [buyer for buyer, ok in results if ok]
+    assert len(winners) == 50 and len(set(winners)) == 50
+    orders = _orders(db)
+    assert len(orders) == 50 and sorted(o['buyer_id'] for o in orders) == sorted(winners)
+    stats = sale.stats()
+    assert (stats['persisted'], stats['pending'], stats['remaining']) == (50, 0, 0)
+    assert stats['batches'] >= 4
+    db.close()
+
+
+def test_failed_orders_release_tokens():
+    """整批写入失败时逐条写入,无法写入的订单撤销并归还名额"""
+    db, _, buyers, product = _setup(stock=3)
+    sale = FlashSale(db, product, batch_size=10, flush_interval=60)
+    assert sale.start()
+    assert sale.admit(buyers[0], 'addr')
+    assert sale.admit(99999, 'addr')  # 买家不存在,外键约束失败
+    assert sale.admit(buyers[1], 'addr')
+    assert len(sale.flush()) == 2
+    stats = sale.stats()
+    assert (stats['failures'], stats['released'], stats['remaining']) == (1, 1, 1)
+    assert sale.admit(buyers[2], 'addr')
+    sale.close()
+    assert len(_orders(db)) == 3
+    db.close()
+
+
+def test_registry_and_resume():
+    """共享抢购随数据库关闭写入剩余订单;重新开始时按 reserved - sold 与已购记录恢复"""
+    db, _, buyers, product = _setup(stock=3)
+    sale = start_flash_sale(db, product)
+    assert get_flash_sale(db, product) is sale and start_flash_sale(db, product) is sale
+    assert sale.admit(buyers[0], 'addr')
+    path = db.db_path
+    db.close()
+    assert get_flash_sale(db, product) is None
+
+    db = DatabaseManager(path)
+    assert len(_orders(db)) == 1
+    sale = start_flash_sale(db, product)
+    assert sale.remaining() == 2
+    assert sale.admit(buyers[0], 'addr') is False  # 恢复每人已购数量
+    assert sale.admit(buyers[1], 'addr')
+    assert end_flash_sale(db, product) == 1
+    assert get_flash_sale(db, product) is None
+    assert _product(db, product) == {'stock': 1, 'status': 'available'}
+    assert start_flash_sale(db, 99999) is None
+    db.close()
+
+
+def test_restart_after_close():
+    """close() 后再次 start(),后台线程重新启动并写入订单"""
+    db, _, buyers, product = _setup(stock=3)
+    sale = FlashSale(db, product, batch_size=1, flush_interval=0.01)
+    assert sale.start()
+    assert sale.admit(buyers[0], 'addr')
+    sale.close()
+    assert sale.start()
+    assert sale.admit(buyers[1], 'addr')
+    deadline = time.time() + 5
+    while len(_orders(db)) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert [o['buyer_id'] for o in _orders(db)] == buyers[:2]
+    sale.close()
+    db.close()
+
+
+def test_cancel_returns_quota():
+    """抢购期间取消订单: 数量归还到抢购名额,商品库存保持为 0,普通下单仍无法购买"""
+    db, seller, buyers, product = _setup(stock=3)
+    orders = OrderService(db)
+    before = orders.create_order(buyers[2], product, 1, 'addr')  # 抢购开始前的普通订单
+    sale = start_flash_sale(db, product, per_buyer_limit=1)
+    assert sale.reserved == 2
+    assert sale.admit(buyers[0], 'addr')
+    during = sale.flush()[0]
+    for order_id, buyer in ((before, buyers[2]), (during, buyers[0])):
+        assert orders.transition_orders('request_cancel', [order_id], buyer) == [order_id]
+        assert orders.transition_orders('approve_cancel', [order_id], seller) == [order_id]
+    assert _product(db, product) == {'stock': 0, 'status': 'sold_out'}
+    assert orders.create_order(buyers[3], product, 1, 'addr') is None
+    assert db.execute_query("SELECT reserved, sold FROM flash_sales")[0] == {'reserved': 4, 'sold': 1}
+    assert sale.remaining() == 3 and sale.stats()['reserved'] == 4
+    assert sale.admit(buyers[0], 'addr')  # 取消的抢购订单不再计入限购
+    assert sale.admit(buyers[2], 'addr') and sale.admit(buyers[2], 'addr') is False
+    assert end_flash_sale(db, product) == 1
+    assert _product(db, product) == {'stock': 1, 'status': 'available'}
+    db.close()
+
+
+if __name__ == "__main__":
+    test_admit_and_persist()
+    test_concurrent_no_oversell()
+    test_failed_orders_release_tokens()
+    test_registry_and_resume()
+    test_restart_after_close()
+    test_cancel_returns_quota()
+    print("✅ 限时抢购测试通过")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+测试管理员身份缓存
+Test IdentityCache and its use in AdminService.verify_admin
+"""
+
+import os
+import sys
+import time
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services.admin_service import AdminService
+from services.audit_log import AuditLogWriter
+from services.identity_cache import IdentityCache
+from utils.exceptions import PermissionDeniedError
+from temp_paths import temp_path
+
+
+def _setup(cache=None):
+    """创建测试数据库: superadmin(user_id=1) 与一个普通管理员"""
+    db = DatabaseManager(temp_path('identity_cache_test.db'))
+    admin = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('ic_admin', 'x', 'ic_a@x.com', 'admin')"
+    )
+    service = AdminService(db, audit_log=AuditLogWriter(db, synchronous=True), identity_cache=cache)
+    return db, service, admin
+
+
+def _count_queries(db, func):
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        func()
+        conn.set_trace_callback(None)
+    return len(statements)
+
+
+def test_verify_admin_hits_cache():
+    """重复校验只查询一次数据库,命中次数可见"""
+    db, service, admin = _setup()
+    assert _count_queries(db, lambda: [service.verify_admin(admin) for _ in range(100)]) == 1
+    stats = service.get_identity_cache_stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (99, 1, 1)
+    # 返回副本,调用方修改不影响缓存
+    service.verify_admin(admin)['role'] = 'user'
+    assert service.verify_admin(admin)['role'] == 'admin'
+    db.close()
+
+
+def test_role_change_invalidates():
+    """设置角色后立即失效,被降级的管理员不能再执行管理操作"""
+    db, service, admin = _setup()
+    other = AdminService(db, audit_log=service.audit_log)
+    assert other.verify_admin(admin)['role'] == 'admin'
+    assert service.set_user_role(1, admin, 'user')
+    try:
+        other.verify_admin(admin)
+        raise AssertionError("expected PermissionDeniedError")
+    except PermissionDeniedError:
+        pass
+    assert service.get_identity_cache_stats()['invalidations'] >= 1
+    db.close()
+
+
+def test_ban_invalidates():
+    """封禁(单个与批量)后缓存失效"""
+    db, service, admin = _setup()
+    service.verify_admin(admin)
+    assert service.ban_user(1, admin, reason='abuse')
+    assert service.identity_cache.stats()['size'] == 1  # 只剩 superadmin
+    service.verify_admin(admin)
+    assert service.ban_users(1, [admin]) == {admin: 'banned'}
+    assert service.identity_cache.get(admin) is None
+    db.close()
+
+
+def test_invalidate_after_commit():
+    """事务中封禁时,提交前读到的旧身份不会写回缓存;回滚时不失效"""
+    db, service, admin = _setup()
+    cache = service.identity_cache
+    with db.transaction():
+        assert service.ban_users(1, [admin]) == {admin: 'banned'}
+        # 模拟并发的 verify_admin: 提交前读到旧行并写回缓存
+        cache.put(admin, {'user_id': admin, 'role': 'admin'}, cache.generation())
+    assert cache.get(admin) is None
+    invalidations = cache.stats()['invalidations']
+    try:
+        with db.transaction():
+            service.set_user_role(1, admin, 'user')
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert cache.stats()['invalidations'] == invalidations
+    db.close()
+
+
+def test_ttl_and_size_bound():
+    """过期条目不再命中;超过容量时淘汰最久未使用的条目"""
+    cache = IdentityCache(ttl=0.05, max_size=2)
+    generation = cache.generation()
+    cache.put(1, {'role': 'admin'}, generation)
+    cache.put(2, {'role': 'admin'}, generation)
+    assert cache.get(1) is not None
+    cache.put(3, {'role': 'admin'}, generation)
+    assert cache.get(2) is None and cache.get(1) is not None
+    assert cache.stats()['evictions'] == 1
+    time.sleep(0.06)
+    assert cache.get(1) is None and cache.stats()['size'] == 1
+
+
+def test_stale_put_is_dropped():
+    """查询期间发生失效时,不写回查询到的旧数据"""
+    cache = IdentityCache(ttl=30, max_size=10)
+    generation = cache.generation()
+    cache.invalidate(7)
+    cache.put(7, {'role': 'admin'}, generation)
+    assert cache.get(7) is None
+
+
+def test_cache_disabled_with_zero_ttl():
+    """ttl 为 0 时每次都查询数据库"""
+    db, service, admin = _setup(cache=IdentityCache(ttl=0))
+    assert _count_queries(db, lambda: [service.verify_admin(admin) for _ in range(3)]) == 3
+    db.close()
+
+
+if __name__ == "__main__":
+    test_verify_admin_hits_cache()
+    test_role_change_invalidates()
+    test_ban_invalidates()
+    test_invalidate_after_commit()
+    test_ttl_and_size_bound()
+    test_stale_put_is_dropped()
+    test_cache_disabled_with_zero_ttl()
+    print("✅ 管理员身份缓存测试通过")
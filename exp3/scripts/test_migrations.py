@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+测试数据库迁移
+Test versioned schema migrations
+"""
+
+import os
+import sqlite3
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from database.migrator import MigrationRunner, copy_in_chunks
+from temp_paths import temp_path
+
+
+def test_fresh_database_reaches_latest_version():
+    """新数据库执行全部迁移,再次初始化走快速路径"""
+    db = DatabaseManager(temp_path('migration_test.db'))
+    runner = MigrationRunner(db)
+    with db.get_connection() as conn:
+        assert runner.current_version(conn) == runner.latest_version
+    # 再次执行时不应有任何迁移,也不执行 DDL
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        assert db.init_database() == []
+        conn.set_trace_callback(None)
+    assert len(statements) == 1 and statements[0].startswith('SELECT MAX(version)')
+    users = db.execute_query("SELECT username FROM users")
+    assert [u['username'] for u in users] == ['superadmin']
+    db.close()
+
+
+def _create_legacy_database(path):
+    """创建旧版(sellers 表)结构的数据库"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL, password TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL, role TEXT DEFAULT 'user',
+            is_verified BOOLEAN DEFAULT 0, profile TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE sellers (
+            seller_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+            shop_name TEXT, rating REAL, total_sales INTEGER
+        );
+        CREATE TABLE products (
+            product_id INTEGER PRIMARY KEY AUTOINCREMENT, seller_id INTEGER NOT NULL,
+            title TEXT NOT NULL, description TEXT, price REAL NOT NULL,
+            category TEXT NOT NULL, images TEXT, stock INTEGER DEFAULT 1,
+            status TEXT DEFAULT 'available', auctionable BOOLEAN DEFAULT 0,
+            view_count INTEGER DEFAULT 0, favorite_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO users (username, password, email) VALUES ('superadmin', 'admin123', 'a@x.com');
+        INSERT INTO users (username, password, email) VALUES ('shop_owner', 'x', 's@x.com');
+        INSERT INTO sellers (seller_id, user_id, shop_name, rating, total_sales) VALUES (7, 2, 'Shop', 4.5, 3);
+    """)
+    conn.executemany(
+        "INSERT INTO products (seller_id, title, price, category) VALUES (7, ?, 1.0, '其他')",
+        [(f"p{i}",) for i in range(25)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _create_release_1_database(path):
+    """创建与首个发布版本(迁移 1)结构相同的数据库,不经过迁移代码"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL, email TEXT UNIQUE NOT NULL, role TEXT DEFAULT 'user',
+            is_verified BOOLEAN DEFAULT 0, profile TEXT, shop_name TEXT, rating REAL DEFAULT 5.0,
+            total_sales INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE products (
+            product_id INTEGER PRIMARY KEY AUTOINCREMENT, seller_id INTEGER NOT NULL,
+            title TEXT NOT NULL, description TEXT, price REAL NOT NULL, category TEXT NOT NULL,
+            images TEXT, stock INTEGER DEFAULT 1, status TEXT DEFAULT 'available',
+            auctionable BOOLEAN DEFAULT 0, view_count INTEGER DEFAULT 0, favorite_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (seller_id) REFERENCES users(user_id)
+        );
+        CREATE TABLE orders (
+            order_id INTEGER PRIMARY KEY AUTOINCREMENT, buyer_id INTEGER NOT NULL,
+            seller_id INTEGER NOT NULL, product_id INTEGER NOT NULL, quantity INTEGER DEFAULT 1,
+            total_price REAL NOT NULL, status TEXT DEFAULT 'pending', shipping_address TEXT NOT NULL,
+            tracking_number TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, paid_at TIMESTAMP,
+            shipped_at TIMESTAMP, completed_at TIMESTAMP, refund_reject_reason TEXT, cancel_reject_reason TEXT,
+            FOREIGN KEY (buyer_id) REFERENCES users(user_id),
+            FOREIGN KEY (seller_id) REFERENCES users(user_id),
+            FOREIGN KEY (product_id) REFERENCES products(product_id)
+        );
+        CREATE TABLE auctions (
+            auction_id INTEGER PRIMARY KEY AUTOINCREMENT, product_id INTEGER UNIQUE NOT NULL,
+            seller_id INTEGER NOT NULL, start_price REAL NOT NULL, current_bid REAL NOT NULL,
+            current_bidder_id INTEGER, bid_increment REAL DEFAULT 1.0,
+            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP, end_time TIMESTAMP NOT NULL,
+            status TEXT DEFAULT 'active',
+            FOREIGN KEY (product_id) REFERENCES products(product_id),
+            FOREIGN KEY (seller_id) REFERENCES users(user_id),
+            FOREIGN KEY (current_bidder_id) REFERENCES users(user_id)
+        );
+        CREATE TABLE bid_history (
+            bid_id INTEGER PRIMARY KEY AUTOINCREMENT, auction_id INTEGER NOT NULL,
+            bidder_id INTEGER NOT NULL, bid_amount REAL NOT NULL,
+            bid_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (auction_id) REFERENCES auctions(auction_id),
+            FOREIGN KEY (bidder_id) REFERENCES users(user_id)
+        );
+        CREATE TABLE messages (
+            msg_id INTEGER PRIMARY KEY AUTOINCREMENT, sender_id INTEGER NOT NULL,
+            receiver_id INTEGER NOT NULL, content TEXT NOT NULL, msg_type TEXT DEFAULT 'text',
+            status TEXT DEFAULT 'sent', created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, read_at TIMESTAMP,
+            FOREIGN KEY (sender_id) REFERENCES users(user_id),
+            FOREIGN KEY (receiver_id) REFERENCES users(user_id)
+        );
+        CREATE TABLE reports (
+            report_id INTEGER PRIMARY KEY AUTOINCREMENT, reporter_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL, target_type TEXT NOT NULL, report_type TEXT NOT NULL,
+            reason TEXT NOT NULL, status TEXT DEFAULT 'pending', admin_id INTEGER, result TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, reviewed_at TIMESTAMP,
+            FOREIGN KEY (reporter_id) REFERENCES users(user_id),
+            FOREIGN KEY (admin_id) REFERENCES admins(admin_id)
+        );
+        CREATE TABLE admins (
+            admin_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL, email TEXT UNIQUE NOT NULL, role TEXT DEFAULT 'admin',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE follows (
+            follower_id INTEGER NOT NULL, following_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (follower_id, following_id),
+            FOREIGN KEY (follower_id) REFERENCES users(user_id),
+            FOREIGN KEY (following_id) REFERENCES users(user_id)
+        );
+        CREATE TABLE favorites (
+            user_id INTEGER NOT NULL, product_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, product_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (product_id) REFERENCES products(product_id)
+        );
+    """)
+    conn.close()
+
+
+def _schema(db):
+    """表/索引/触发器名称,以及每张表的列定义(不计列顺序)与外键"""
+    with db.get_connection() as conn:
+        objects = {
+            (row['type'], row['name']) for row in conn.execute(
+                "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+            )
+        }
+        tables = sorted(name for kind, name in objects if kind == 'table')
+        columns = {
+            table: {tuple(row)[1:] for row in conn.execute(f"PRAGMA table_info({table})")}
+            for table in tables
+        }
+        foreign_keys = {
+            table: {tuple(row)[2:5] for row in conn.execute(f"PRAGMA foreign_key_list({table})")}
+            for table in tables
+        }
+    return objects, columns, foreign_keys
+
+
+def test_legacy_sellers_schema_is_migrated():
+    """旧版 sellers 表结构的数据库应被升级,seller_id 改为 user_id"""
+    path = temp_path('migration_test.db')
+    _create_legacy_database(path)
+    db = DatabaseManager(path)
+    tables = {r['name'] for r in db.execute_query("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert 'sellers' not in tables and 'products_new' not in tables
+    seller_ids = {r['seller_id'] for r in db.execute_query("SELECT seller_id FROM products")}
+    assert seller_ids == {2}
+    assert db.execute_query("SELECT COUNT(*) AS c FROM products")[0]['c'] == 25
+    owner = db.execute_query("SELECT role, shop_name FROM users WHERE user_id=2")[0]
+    assert owner == {'role': 'seller', 'shop_name': 'Shop'}
+    admin_pw = db.execute_query("SELECT password FROM users WHERE username='superadmin'")[0]['password']
+    assert len(admin_pw) == 64, "明文密码应被哈希化"
+    db.close()
+
+
+def test_upgraded_schema_matches_fresh():
+    """
+    旧库升级后的表结构与新建数据库一致
+
+    已发布的迁移(如 m0001)被原地修改而没有对应的新迁移时,
+    新建数据库与升级后的数据库结构不同,此测试失败。
+    """
+    fresh = DatabaseManager(temp_path('fresh.db'))
+    upgraded_dbs = []
+    for create in (_create_release_1_database, _create_legacy_database):
+        path = temp_path('upgraded.db')
+        create(path)
+        upgraded_dbs.append(DatabaseManager(path))
+    fresh_objects, fresh_columns, fresh_fks = _schema(fresh)
+    for upgraded in upgraded_dbs:
+        objects, columns, fks = _schema(upgraded)
+        assert objects == fresh_objects, objects ^ fresh_objects
+        for table in fresh_columns:
+            assert columns[table] == fresh_columns[table], (table, columns[table] ^ fresh_columns[table])
+            assert fks[table] == fresh_fks[table], (table, fks[table] ^ fresh_fks[table])
+        upgraded.close()
+    assert ('users', 'admin_id', 'user_id') in fresh_fks['reports']
+    fresh.close()
+
+
+def test_copy_in_chunks_resumes():
+    """分批复制按批提交,并可从已复制的位置继续"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE src (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.execute("CREATE TABLE dst (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.executemany("INSERT INTO src VALUES (?, ?)", [(i, str(i)) for i in range(1, 101)])
+    conn.execute("INSERT INTO dst VALUES (1, '1'), (2, '2')")  # 模拟中断前已复制的部分
+    conn.commit()
+    copied = copy_in_chunks(conn, 'dst', 'id', ['id', 'v'], ['id', 'v'],
+                            source='src', source_key='id', chunk_size=30)
+    assert copied == 98
+    assert conn.execute("SELECT COUNT(*) FROM dst").fetchone()[0] == 100
+
+
+if __name__ == "__main__":
+    test_fresh_database_reaches_latest_version()
+    test_legacy_sellers_schema_is_migrated()
+    test_upgraded_schema_matches_fresh()
+    test_copy_in_chunks_resumes()
+    print("✅ 迁移测试通过")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试订单统计
+Test OrderService.get_order_statistics (order_stats rollup vs GROUP BY)
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from config.settings import ORDER_STATS_CONFIG
+from services import OrderService
+from temp_paths import temp_path
+
+
+def _setup():
+    """创建买家、卖家、商品,并让订单经过几种状态流转"""
+    db = DatabaseManager(temp_path('order_stats_test.db'))
+    buyer = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('os_buyer', 'x', 'os_b@x.com')"
+    )
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role, shop_name) "
+        "VALUES ('os_seller', 'x', 'os_s@x.com', 'seller', 'OS Shop')"
+    )
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, description, price, category, stock) "
+        "VALUES (?, '统计商品', 'desc', 19.9, '原神', 100)",
+        (seller,)
+    )
+    service = OrderService(db)
+    orders = [service.create_order(buyer, product, 1, 'addr') for _ in range(5)]
+    service.pay_order(orders[0], 'confirm')
+    service.ship_order(orders[0], seller, 'TRACK-1')
+    service.confirm_receipt(orders[0], buyer)
+    service.pay_order(orders[1], 'confirm')
+    service.request_cancel_order(orders[2], buyer, 'changed mind')
+    service.approve_cancel(orders[2], seller)
+    db.execute_delete("DELETE FROM orders WHERE order_id = ?", (orders[4],))
+    return db, service, buyer, seller
+
+
+def _stats(service, user_id, is_seller, use_table):
+    original = ORDER_STATS_CONFIG['use_stats_table']
+    ORDER_STATS_CONFIG['use_stats_table'] = use_table
+    try:
+        return service.get_order_statistics(user_id, is_seller=is_seller)
+    finally:
+        ORDER_STATS_CONFIG['use_stats_table'] = original
+
+
+def test_statistics_follow_transitions():
+    """统计表与实时 GROUP BY 结果一致,且反映状态流转与删除"""
+    db, service, buyer, seller = _setup()
+    for user_id, is_seller in ((buyer, False), (seller, True)):
+        from_table = _stats(service, user_id, is_seller, True)
+        assert from_table == _stats(service, user_id, is_seller, False)
+    stats = _stats(service, seller, True, True)
+    assert stats['total_orders'] == 4
+    assert stats['total_revenue'] == round(19.9 * 4, 2)
+    by_status = stats['by_status']
+    assert (by_status['completed'], by_status['paid'], by_status['cancelled'], by_status['pending']) == (1, 1, 1, 1)
+    assert sum(by_status.values()) == 4
+    db.close()
+
+
+def test_amounts_rounded_to_cents():
+    """金额取整到分: 浮点累加误差不会出现在结果中,两种统计方式一致"""
+    db, service, buyer, seller = _setup()
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, stock) VALUES (?, 'cheap', 0.1, '原神', 10)",
+        (seller,)
+    )
+    db.execute_update("DELETE FROM orders")
+    service.create_order(buyer, product, 1, 'addr')
+    service.create_order(buyer, product, 2, 'addr')  # 0.1 + 0.2
+    assert 0.1 + 0.2 != 0.3
+    for use_table in (True, False):
+        assert _stats(service, buyer, False, use_table)['total_spent'] == 0.3
+    db.close()
+
+
+def test_statistics_single_query():
+    """无论哪种方式,统计都只执行一条查询"""
+    db, service, buyer, _ = _setup()
+    for use_table in (True, False):
+        statements = []
+        with db.get_connection() as conn:
+            conn.set_trace_callback(statements.append)
+            _stats(service, buyer, False, use_table)
+            conn.set_trace_callback(None)
+        assert len(statements) == 1, statements
+    db.close()
+
+
+if __name__ == "__main__":
+    test_statistics_follow_transitions()
+    test_amounts_rounded_to_cents()
+    test_statistics_single_query()
+    print("✅ 订单统计测试通过")
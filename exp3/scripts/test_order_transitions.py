@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试订单状态流转表
+Test table-driven order transitions (guarded single-statement UPDATE ... RETURNING, bulk)
+"""
+
+import json
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from models.order import OrderStatus, ORDER_TRANSITIONS
+from services import OrderService
+from services.outbox import OutboxDispatcher
+from temp_paths import temp_path
+
+
+def _setup(orders=3, stock=500):
+    """创建买卖双方、商品与若干待支付订单(同步投递服务消息)"""
+    db = DatabaseManager(temp_path('order_transitions_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('ot_s', 'x', 'ot_s@x.com', 'seller')"
+    )
+    buyer = db.execute_insert("INSERT INTO users (username, password, email) VALUES ('ot_b', 'x', 'ot_b@x.com')")
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '手办', 10.0, ?, '原神')",
+        (seller, stock)
+    )
+    service = OrderService(db, outbox=OutboxDispatcher(db, synchronous=True))
+    ids = [service.create_order(buyer, product, 1, 'addr') for _ in range(orders)]
+    return db, service, seller, buyer, product, ids
+
+
+def _statuses(db, ids):
+    rows = db.execute_query(
+        f"SELECT order_id, status FROM orders WHERE order_id IN ({', '.join('?' * len(ids))})", tuple(ids)
+    )
+    return {row['order_id']: row['status'] for row in rows}
+
+
+def _service_keys(db, receiver):
+    rows = db.execute_query(
+        "SELECT content FROM messages WHERE receiver_id = ? ORDER BY msg_id", (receiver,)
+    )
+    return [json.loads(row['content'])['key'] for row in rows]
+
+
+def test_transition_table():
+    """流转表覆盖全部动作;可执行的动作由当前状态推导"""
+    assert set(ORDER_TRANSITIONS) == {
+        'pay', 'ship', 'confirm_receipt', 'request_cancel', 'approve_cancel',
+        'reject_cancel', 'request_refund', 'approve_refund', 'reject_refund'
+    }
+    assert OrderStatus.PENDING.allowed_actions() == ['pay', 'request_cancel']
+    assert OrderStatus.REFUNDED.allowed_actions() == []
+
+
+def test_guards():
+    """状态不符或执行者不是订单的买家/卖家时不更新,也不发送服务消息"""
+    db, service, seller, buyer, _, (order_id, *_) = _setup(1)
+    assert service.ship_order(order_id, seller, 'SF1') is False   # 未支付
+    assert service.pay_order(order_id, 'alipay')
+    assert service.pay_order(order_id, 'alipay') is False         # 不会重复支付
+    assert service.ship_order(order_id, buyer, 'SF1') is False    # 非卖家
+    assert service.ship_order(order_id, seller, 'SF1')
+    assert service.confirm_receipt(order_id, seller) is False     # 非买家
+    assert service.confirm_receipt(order_id, buyer)
+    assert service.request_refund(order_id, buyer, '不想要了')
+    assert service.reject_refund(order_id, seller, '已拆封')
+    order = db.execute_query("SELECT * FROM orders WHERE order_id = ?", (order_id,))[0]
+    assert order['status'] == 'refund_rejected' and order['refund_reject_reason'] == '已拆封'
+    assert order['tracking_number'] == 'SF1' and order['completed_at']
+    assert _service_keys(db, buyer) == ['order.service_order_shipped', 'order.service_refund_rejected']
+    db.close()
+
+
+def test_bulk_ship():
+    """一次调用为多个订单各自填写物流单号;其他状态、不存在的订单被跳过"""
+    db, service, seller, buyer, _, ids = _setup(200)
+    assert service.transition_orders('pay', ids[:-1]) == ids[:-1]
+    tracking = {order_id: f'SF{order_id:05d}' for order_id in ids}
+    tracking[99999] = 'SF-missing'
+    items = {order_id: {'tracking_number': number} for order_id, number in tracking.items()}
+    assert service.transition_orders('ship', items, buyer) == []
+    assert service.transition_orders('ship', items, seller) == ids[:-1]
+    rows = db.execute_query("SELECT order_id, status, tracking_number FROM orders")
+    shipped = {r['order_id']: r['tracking_number'] for r in rows if r['status'] == 'shipped'}
+    assert shipped == {order_id: tracking[order_id] for order_id in ids[:-1]}
+    params = [json.loads(c)['params'] for c in (
+        r['content'] for r in db.execute_query(
+            "SELECT content FROM messages WHERE receiver_id = ? ORDER BY msg_id", (buyer,)
+        )
+    )]
+    assert params[0] == {'order_id': ids[0], 'tracking_number': tracking[ids[0]]} and len(params) == 199
+    db.close()
+
+
+def test_approve_cancel_restores_stock():
+    """同意取消时在同一事务中归还库存,售罄的商品恢复可售"""
+    db, service, seller, buyer, product, ids = _setup(2, stock=2)
+    assert db.execute_query("SELECT status FROM products WHERE product_id = ?", (product,))[0]['status'] == 'sold_out'
+    for order_id in ids:
+        assert service.request_cancel_order(order_id, buyer, '拍错了')
+    assert service.transition_orders('approve_cancel', ids + ids, seller) == ids
+    assert service.approve_cancel(ids[0], seller) is False  # 不会重复归还库存
+    row = db.execute_query("SELECT stock, status FROM products WHERE product_id = ?", (product,))[0]
+    assert (row['stock'], row['status']) == (2, 'available')
+    assert set(_statuses(db, ids).values()) == {'cancelled'}
+    db.close()
+
+
+if __name__ == "__main__":
+    test_transition_table()
+    test_guards()
+    test_bulk_ship()
+    test_approve_cancel_restores_stock()
+    print("✅ 订单状态流转测试通过")
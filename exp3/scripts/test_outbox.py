@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+测试服务消息发件箱
+Test transactional outbox writes and batched delivery into messages
+"""
+
+import json
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import OrderService, UnitOfWork
+from services.outbox import OutboxDispatcher, ENQUEUE_SQL
+from temp_paths import temp_path
+
+
+class _ManualDispatcher(OutboxDispatcher):
+    """提交后不自动投递,由测试调用 dispatch()"""
+
+    def notify(self) -> None:
+        self.notified = getattr(self, 'notified', 0) + 1
+
+
+def _setup(**dispatcher_options):
+    db = DatabaseManager(temp_path('outbox_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('ob_s', 'x', 'ob_s@x.com', 'seller')"
+    )
+    buyer = db.execute_insert("INSERT INTO users (username, password, email) VALUES ('ob_b', 'x', 'ob_b@x.com')")
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, stock, category) VALUES (?, '手办', 10.0, 5, '原神')",
+        (seller,)
+    )
+    dispatcher = _ManualDispatcher(db, **dispatcher_options)
+    return db, OrderService(db, outbox=dispatcher), dispatcher, seller, buyer, product
+
+
+def _count(db, table):
+    return db.execute_query(f"SELECT COUNT(*) AS c FROM {table}")[0]['c']
+
+
+def test_written_with_state_change():
+    """服务消息与订单状态变化同一事务写入 outbox;回滚时一并撤销;提交后投递到 messages 与会话"""
+    db, service, dispatcher, seller, buyer, product = _setup()
+    with UnitOfWork(db) as uow:
+        order_id = OrderService(uow, outbox=dispatcher).create_order(buyer, product, 1, 'addr')
+        uow.rollback()
+    assert _count(db, 'outbox') == 0 and _count(db, 'orders') == 0
+    assert getattr(dispatcher, 'notified', 0) == 0
+
+    order_id = service.create_order(buyer, product, 1, 'addr')
+    assert service.pay_order(order_id, 'alipay')
+    assert dispatcher.notified == 2
+    assert _count(db, 'outbox') == 2 and _count(db, 'messages') == 0
+
+    assert dispatcher.dispatch() == 2
+    assert _count(db, 'outbox') == 0
+    rows = db.execute_query("SELECT receiver_id, content, msg_type FROM messages ORDER BY msg_id")
+    assert [json.loads(r['content'])['key'] for r in rows] == ['order.service_order_created', 'order.service_order_paid']
+    assert all(r['receiver_id'] == seller and r['msg_type'] == 'service' for r in rows)
+    unread = db.execute_query(
+        "SELECT unread_count FROM conversations WHERE user_id = ? AND peer_id = ?", (seller, buyer)
+    )[0]['unread_count']
+    assert unread == 2
+    db.close()
+
+
+def test_batched_delivery_and_poison_rows():
+    """按批投递并保持顺序;无法投递的行累计次数后不再重试,不阻塞其他消息"""
+    db, service, dispatcher, seller, buyer, _ = _setup(batch_size=100, max_attempts=2)
+    rows = [(buyer, seller, f'm{i}', 'service') for i in range(250)]
+    rows.insert(120, (buyer, 9999, 'orphan', 'service'))  # 接收者不存在,外键约束失败
+    db.execute_many(ENQUEUE_SQL, rows)
+
+    assert dispatcher.dispatch() == 199  # 第二批整批失败,逐条投递其余 99 条后本轮结束
+    assert dispatcher.dispatch() == 51   # 孤立消息再次失败,达到最大次数
+    assert dispatcher.dispatch() == 0
+    contents = [r['content'] for r in db.execute_query("SELECT content FROM messages ORDER BY msg_id")]
+    assert contents[:100] == [f'm{i}' for i in range(100)] and len(contents) == 250
+    assert sorted(contents) == sorted(f'm{i}' for i in range(250))
+    stats = dispatcher.stats()
+    assert (stats['pending'], stats['dead'], stats['delivered']) == (0, 1, 250)
+    orphan = db.execute_query("SELECT attempts, last_error FROM outbox")[0]
+    assert orphan['attempts'] == 2 and 'FOREIGN KEY' in orphan['last_error']
+    db.close()
+
+
+def test_background_dispatch_and_close():
+    """异步模式下提交后由后台线程投递;关闭数据库时投递剩余消息"""
+    db, _, _, seller, buyer, product = _setup()
+    dispatcher = OutboxDispatcher(db, synchronous=False, flush_interval=60)
+    service = OrderService(db, outbox=dispatcher)
+    order_id = service.create_order(buyer, product, 1, 'addr')
+    dispatcher.dispatch()  # 与后台线程共用投递锁,返回时已全部提交
+    assert _count(db, 'messages') == 1
+
+    db.execute_insert(ENQUEUE_SQL, (seller, buyer, 'late', 'service'))  # 未唤醒投递线程
+    dispatcher.close()
+    assert _count(db, 'messages') == 2 and _count(db, 'outbox') == 0
+    assert service.pay_order(order_id, 'alipay')  # 停止后同步投递
+    assert _count(db, 'messages') == 3
+    db.close()
+
+
+if __name__ == "__main__":
+    test_written_with_state_change()
+    test_batched_delivery_and_poison_rows()
+    test_background_dispatch_and_close()
+    print("✅ 发件箱测试通过")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+测试游标分页
+Test keyset (cursor) pagination for products, orders and messages
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService, OrderService, MessageService
+from utils.pagination import decode_cursor, encode_cursor
+from temp_paths import temp_path
+
+# 相同的时间戳用于制造排序键相同的行
+SAME_TIME = '2024-01-01 12:00:00'
+
+
+def _setup():
+    """创建测试数据库,一个买家和一个卖家"""
+    db = DatabaseManager(temp_path('pagination_test.db'))
+    buyer = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('pg_buyer', 'x', 'pg_b@x.com')"
+    )
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role, shop_name) "
+        "VALUES ('pg_seller', 'x', 'pg_s@x.com', 'seller', 'PG Shop')"
+    )
+    return db, buyer, seller
+
+
+def _add_products(db, seller, count):
+    """插入商品,部分商品的创建时间和价格相同"""
+    rows = [
+        (seller, f'商品{i}', 'desc', float(i % 3), '原神', 5, SAME_TIME if i % 2 else f'2024-01-0{1 + i % 5} 08:00:00')
+        for i in range(count)
+    ]
+    db.execute_many(
+        "INSERT INTO products (seller_id, title, description, price, category, stock, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+
+def _walk(fetch, **kwargs):
+    """沿 next_cursor 取完所有页"""
+    items, after, pages = [], None, 0
+    while True:
+        page = fetch(after=after, **kwargs)
+        items.extend(page['items'])
+        pages += 1
+        after = page['next_cursor']
+        if after is None:
+            return items, pages
+
+
+def test_cursor_roundtrip():
+    """游标可还原排序键,无效游标抛出 ValueError"""
+    assert decode_cursor(encode_cursor([SAME_TIME, 7]), 2) == [SAME_TIME, 7]
+    for bad in ('not-a-cursor', encode_cursor([1])):
+        try:
+            decode_cursor(bad, 2)
+        except ValueError:
+            continue
+        raise AssertionError(f"应拒绝无效游标: {bad}")
+
+
+def test_category_pages_match_offset_order():
+    """各种排序方式下,逐页结果与一次性排序结果一致(无重复、无遗漏)"""
+    db, _, seller = _setup()
+    _add_products(db, seller, 23)
+    service = ProductService(db)
+    for sort_by in ('newest', 'price_asc', 'price_desc', 'popular'):
+        items, pages = _walk(service.get_products_by_category_page,
+                             category='原神', limit=5, sort_by=sort_by)
+        full = service.get_products_by_category_page('原神', limit=100, sort_by=sort_by)['items']
+        assert [p['product_id'] for p in items] == [p['product_id'] for p in full], sort_by
+        assert len(items) == 23 and pages == 5
+    db.close()
+
+
+def test_search_pages_with_ties():
+    """创建时间相同的商品跨页时不重复也不遗漏"""
+    db, _, seller = _setup()
+    _add_products(db, seller, 17)
+    service = ProductService(db)
+    items, _ = _walk(service.search_products_page, limit=4)
+    ids = [p['product_id'] for p in items]
+    assert len(ids) == 17 and len(set(ids)) == 17
+    # 全文检索按 (相关度, 商品ID) 翻页,与一次性搜索的顺序一致
+    items, pages = _walk(service.search_products_page, keyword='商品1', limit=3)
+    assert sorted(p['title'] for p in items) == sorted(['商品1'] + [f'商品{i}' for i in range(10, 17)])
+    assert pages == 3
+    assert 'search_rank' not in items[0]
+    whole = service.search_products(keyword='商品1', limit=100)
+    assert [p['product_id'] for p in items] == [p['product_id'] for p in whole]
+    db.close()
+
+
+def test_order_pages():
+    """买家/卖家订单按创建时间降序分页"""
+    db, buyer, seller = _setup()
+    _add_products(db, seller, 1)
+    product = db.execute_query("SELECT product_id FROM products")[0]['product_id']
+    db.execute_many(
+        "INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, "
+        "shipping_address, status, created_at) VALUES (?, ?, ?, 1, 1.0, 'addr', ?, ?)",
+        [(buyer, seller, product, 'pending' if i % 2 else 'completed', SAME_TIME) for i in range(9)]
+    )
+    orders = OrderService(db)
+    items, _ = _walk(orders.get_orders_by_buyer_page, buyer_id=buyer, limit=2)
+    assert [o['order_id'] for o in items] == sorted((o['order_id'] for o in items), reverse=True)
+    assert len(items) == 9
+    items, _ = _walk(orders.get_orders_by_seller_page, seller_id=seller, status='pending', limit=3)
+    assert len(items) == 4 and all(o['status'] == 'pending' for o in items)
+    db.close()
+
+
+def test_conversation_pages_newest_first():
+    """会话从最新消息向前翻页,包含双方发送的消息"""
+    db, buyer, seller = _setup()
+    db.execute_many(
+        "INSERT INTO messages (sender_id, receiver_id, content, created_at) VALUES (?, ?, ?, ?)",
+        [((buyer, seller) if i % 3 else (seller, buyer)) + (f'msg{i}', SAME_TIME) for i in range(11)]
+    )
+    service = MessageService(db)
+    items, pages = _walk(service.get_conversation_page, user_id1=buyer, user_id2=seller, limit=4)
+    assert [m['content'] for m in items] == [f'msg{i}' for i in reversed(range(11))]
+    assert pages == 3
+    db.close()
+
+
+if __name__ == "__main__":
+    test_cursor_roundtrip()
+    test_category_pages_match_offset_order()
+    test_search_pages_with_ties()
+    test_order_pages()
+    test_conversation_pages_newest_first()
+    print("✅ 游标分页测试通过")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试平台统计汇总表
+Test trigger-maintained platform_counters / daily_counters and AdminService statistics
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services.admin_service import AdminService
+from temp_paths import temp_path
+
+
+def _setup():
+    """创建测试数据库;superadmin(user_id=1)由迁移创建"""
+    db = DatabaseManager(temp_path('counters_test.db'))
+    return db, AdminService(db), 1
+
+
+def _live_statistics(db):
+    """直接 COUNT 得到的统计,用于与汇总表对比"""
+    def count(sql):
+        return db.execute_query(sql)[0]['c']
+    return {
+        'total_users': count("SELECT COUNT(*) AS c FROM users"),
+        'total_products': count("SELECT COUNT(*) AS c FROM products"),
+        'total_orders': count("SELECT COUNT(*) AS c FROM orders"),
+        'pending_reports': count("SELECT COUNT(*) AS c FROM reports WHERE status = 'pending'"),
+        'today_new_users': count("SELECT COUNT(*) AS c FROM users WHERE DATE(created_at) = DATE('now')"),
+    }
+
+
+def test_statistics_match_live_counts():
+    """插入、状态变化、删除后,汇总结果与实时 COUNT 一致"""
+    db, admin, admin_id = _setup()
+    old_day = (datetime.now(timezone.utc) - timedelta(days=3)).strftime('%Y-%m-%d 10:00:00')
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, created_at) VALUES ('pc_s', 'x', 'pc_s@x.com', ?)",
+        (old_day,)
+    )
+    buyer = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('pc_b', 'x', 'pc_b@x.com')"
+    )
+    products = [
+        db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category) VALUES (?, ?, 1.0, '其他')",
+            (seller, f'p{i}')
+        )
+        for i in range(3)
+    ]
+    db.execute_insert(
+        "INSERT INTO orders (buyer_id, seller_id, product_id, total_price, shipping_address) "
+        "VALUES (?, ?, ?, 1.0, 'addr')",
+        (buyer, seller, products[0])
+    )
+    reports = [
+        db.execute_insert(
+            "INSERT INTO reports (reporter_id, target_id, target_type, report_type, reason) "
+            "VALUES (?, ?, 'product', 'fake', 'r')",
+            (buyer, product)
+        )
+        for product in products
+    ]
+    db.execute_update("UPDATE reports SET status = 'resolved' WHERE report_id = ?", (reports[0],))
+    db.execute_delete("DELETE FROM reports WHERE report_id = ?", (reports[1],))
+    db.execute_delete("DELETE FROM products WHERE product_id = ?", (products[2],))
+
+    stats = admin.get_statistics(admin_id)
+    assert stats == _live_statistics(db), stats
+    assert stats['total_users'] == 3 and stats['today_new_users'] == 2
+    assert stats['pending_reports'] == 1
+    db.close()
+
+
+def test_statistics_query_count():
+    """统计面板只执行权限校验和一次汇总查询"""
+    db, admin, admin_id = _setup()
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+        admin.get_statistics(admin_id)
+        conn.set_trace_callback(None)
+    assert len(statements) == 2, statements
+    db.close()
+
+
+def test_daily_counts_fill_missing_days():
+    """每日新增按天返回,没有新增的日期补0"""
+    db, admin, admin_id = _setup()
+    now = datetime.now(timezone.utc)
+    db.execute_many(
+        "INSERT INTO users (username, password, email, created_at) VALUES (?, 'x', ?, ?)",
+        [(f'd{i}', f'd{i}@x.com', (now - timedelta(days=i % 3 * 2)).strftime('%Y-%m-%d %H:%M:%S'))
+         for i in range(6)]
+    )
+    series = admin.get_daily_counts(admin_id, 'users', days=5)
+    assert [d['day'] for d in series] == [
+        (now - timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(4, -1, -1)
+    ]
+    # 今天: superadmin + 2;2天前、4天前各 2
+    assert [d['count'] for d in series] == [2, 0, 2, 0, 3]
+    assert len(admin.get_daily_counts(admin_id, 'orders', days=90)) == 90
+    db.close()
+
+
+if __name__ == "__main__":
+    test_statistics_match_live_counts()
+    test_statistics_query_count()
+    test_daily_counts_fill_missing_days()
+    print("✅ 平台统计汇总测试通过")
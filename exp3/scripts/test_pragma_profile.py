@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+测试 SQLite 性能参数配置
+Test SQLite PRAGMA performance profile
+"""
+
+import os
+import sys
+import threading
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from config.settings import DATABASE_CONFIG
+from temp_paths import temp_path
+
+
+def _temp_db():
+    """在临时目录中创建独立的测试数据库"""
+    return DatabaseManager(temp_path('pragma_test.db'))
+
+
+def test_profile_applied():
+    """连接应使用 WAL 及配置中的其它参数"""
+    db = _temp_db()
+    settings = db.get_pragma_settings()
+    print(f"pragma settings: {settings}")
+    assert str(settings['journal_mode']).lower() == 'wal'
+    assert settings['synchronous'] == 1  # NORMAL
+    assert settings['temp_store'] == 2   # MEMORY
+    assert settings['busy_timeout'] == DATABASE_CONFIG['timeout'] * 1000
+    assert settings['foreign_keys'] == 1
+    db.close()
+
+
+def test_reader_not_blocked_by_writer():
+    """写事务未提交时,其它线程仍可读取已提交的数据"""
+    db = _temp_db()
+    before = db.execute_query("SELECT COUNT(*) AS c FROM users")[0]['c']
+    writer_started = threading.Event()
+    release_writer = threading.Event()
+
+    def writer():
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO users (username, password, email) VALUES ('w', 'x', 'w@x.com')"
+            )
+            writer_started.set()
+            release_writer.wait(5)
+
+    th = threading.Thread(target=writer)
+    th.start()
+    writer_started.wait(5)
+    seen = db.execute_query("SELECT COUNT(*) AS c FROM users")[0]['c']
+    release_writer.set()
+    th.join()
+
+    assert seen == before, "读取方应看到写入前的快照"
+    after = db.execute_query("SELECT COUNT(*) AS c FROM users")[0]['c']
+    assert after == before + 1
+    db.close()
+
+
+if __name__ == "__main__":
+    test_profile_applied()
+    test_reader_not_blocked_by_writer()
+    print("✅ PRAGMA 配置测试通过")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+测试商品全文检索
+Test FTS5 product search (trigram/bigram index, BM25 ranking, LIKE fallback)
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService
+from temp_paths import temp_path
+
+
+def _setup():
+    """创建测试数据库和一个卖家"""
+    db = DatabaseManager(temp_path('search_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role, shop_name) "
+        "VALUES ('fts_seller', 'x', 'fts@x.com', 'seller', 'FTS Shop')"
+    )
+    return db, ProductService(db), seller
+
+
+def _add(db, seller, title, description, category='原神'):
+    return db.execute_insert(
+        "INSERT INTO products (seller_id, title, description, price, category, stock) "
+        "VALUES (?, ?, ?, 10.0, ?, 5)",
+        (seller, title, description, category)
+    )
+
+
+def _ids(results):
+    return [p['product_id'] for p in results]
+
+
+def test_title_match_ranks_first():
+    """标题命中的商品排在只有描述命中的商品之前"""
+    db, service, seller = _setup()
+    in_desc = _add(db, seller, '普通徽章', '附赠阿尔托莉雅色纸')
+    in_title = _add(db, seller, '阿尔托莉雅 手办', '正版')
+    _add(db, seller, '无关商品', '无关描述')
+    assert service._has_fulltext_index()
+    assert _ids(service.search_products(keyword='阿尔托莉雅')) == [in_title, in_desc]
+    db.close()
+
+
+def test_multiple_terms_and_short_terms():
+    """多个词按 AND 匹配;两字词与 trigram 词可以组合"""
+    db, service, seller = _setup()
+    hit = _add(db, seller, '原神 胡桃 亚克力立牌', 'acrylic stand')
+    _add(db, seller, '崩坏 亚克力立牌', 'acrylic stand', category='崩坏')
+    assert _ids(service.search_products(keyword='亚克力 胡桃')) == [hit]
+    assert _ids(service.search_products(keyword='原神')) == [hit]
+    assert _ids(service.search_products(keyword='ACRYLIC', category='原神')) == [hit]
+    db.close()
+
+
+def test_two_character_cjk_terms():
+    """两字中日韩词走二元索引(不用 LIKE),标点分隔的词不会误匹配;其他过短的词仍用 LIKE"""
+    db, service, seller = _setup()
+    in_title = _add(db, seller, '胡桃 亚克力立牌', '原神周边')
+    in_desc = _add(db, seller, '角色徽章', '附赠原神色纸')
+    kana = _add(db, seller, 'ねこ クッション', 'EX限定', category='其他')
+    _add(db, seller, '原，神 无关商品', '原。神')
+    assert service._has_bigram_index()
+    query = service._build_search_query('原神 胡桃', None, None, None)[0]
+    assert 'LIKE' not in query and 'products_bigram MATCH' in query
+    assert set(_ids(service.search_products(keyword='原神'))) == {in_title, in_desc}
+    assert _ids(service.search_products(keyword='原神 胡桃')) == [in_title]
+    assert _ids(service.search_products(keyword='亚克力 原神')) == [in_title]
+    assert _ids(service.search_products(keyword='ねこ')) == [kana]
+    assert _ids(service.search_products(keyword='EX')) == [kana]
+    db.execute_update("UPDATE products SET description = '正版' WHERE product_id = ?", (in_desc,))
+    assert _ids(service.search_products(keyword='原神')) == [in_title]
+    db.execute_delete("DELETE FROM products WHERE product_id = ?", (in_title,))
+    assert service.search_products(keyword='胡桃') == []
+    db.close()
+
+
+def test_index_follows_updates_and_deletes():
+    """触发器保持全文索引与商品表同步"""
+    db, service, seller = _setup()
+    product = _add(db, seller, '旧标题商品', '描述')
+    db.execute_update("UPDATE products SET title = '新标题商品' WHERE product_id = ?", (product,))
+    assert service.search_products(keyword='旧标题') == []
+    assert _ids(service.search_products(keyword='新标题')) == [product]
+    db.execute_delete("DELETE FROM products WHERE product_id = ?", (product,))
+    assert service.search_products(keyword='新标题') == []
+    db.close()
+
+
+def test_rank_over_all_matches():
+    """对全部匹配按相关度排序: 较早但更相关的商品排在前面,筛选不受匹配数量影响"""
+    db, service, seller = _setup()
+    best = _add(db, seller, '限定周边 限定周边 旧款', '限定周边', category='崩坏')
+    newer = [_add(db, seller, f'徽章 {i}', f'附赠限定周边 {i}') for i in range(30)]
+    results = service.search_products(keyword='限定周边', limit=5)
+    assert _ids(results)[0] == best
+    assert _ids(service.search_products(keyword='限定周边', category='崩坏')) == [best]
+    assert len(service.search_products(keyword='限定周边', limit=50)) == len(newer) + 1
+    db.close()
+
+
+def test_offset_pages_use_one_order():
+    """偏移量分页的每一页使用同一排序,跨页不重复也不遗漏"""
+    db, service, seller = _setup()
+    ids = [_add(db, seller, f'限定周边 {i}', '描述') for i in range(6)]
+    pages = [_ids(service.search_products(keyword='限定周边', limit=2, offset=o)) for o in (0, 2, 4)]
+    flat = [pid for page in pages for pid in page]
+    assert sorted(flat) == sorted(ids) and flat == _ids(service.search_products(keyword='限定周边'))
+    db.close()
+
+
+def test_like_fallback_without_index():
+    """没有全文索引时使用原有的 LIKE 查询"""
+    db, service, seller = _setup()
+    product = _add(db, seller, '明日方舟 挂画', '描述')
+    service._fts_available = False
+    assert _ids(service.search_products(keyword='方舟 挂画')) == [product]
+    db.close()
+
+
+if __name__ == "__main__":
+    test_title_match_ranks_first()
+    test_multiple_terms_and_short_terms()
+    test_two_character_cjk_terms()
+    test_index_follows_updates_and_deletes()
+    test_rank_over_all_matches()
+    test_offset_pages_use_one_order()
+    test_like_fallback_without_index()
+    print("✅ 商品全文检索测试通过")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+测试代理出价
+Test proxy (automatic) bidding: arithmetic resolution, preview and secrecy of max bids
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from models.auction import Auction, resolve_bid
+from services import AuctionService
+from temp_paths import temp_path
+
+
+def _setup(bidders=3):
+    """创建卖家、若干出价者与一个起拍价 10、加价幅度 1 的拍卖"""
+    db = DatabaseManager(temp_path('proxy_bid_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('pb_s', 'x', 'pb_s@x.com', 'seller')"
+    )
+    users = [
+        db.execute_insert(
+            "INSERT INTO users (username, password, email) VALUES (?, 'x', ?)", (f'pb_b{i}', f'pb_b{i}@x.com')
+        )
+        for i in range(bidders)
+    ]
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, auctionable) VALUES (?, '限定手办', 1.0, '原神', 1)",
+        (seller,)
+    )
+    service = AuctionService(db)
+    return db, service, seller, users, service.create_auction(seller, product, 10.0, 24, bid_increment=1.0)
+
+
+def _history(service, auction_id):
+    return [(h['bidder_id'], h['bid_amount'], h['is_proxy']) for h in reversed(service.get_bid_history(auction_id))]
+
+
+def test_resolve_bid_arithmetic():
+    """代理出价竞价直接比较最高出价: 相差再多加价幅度也只产生常数条记录"""
+    first = resolve_bid(10.0, 10.0, None, None, 1.0, 1, max_amount=100.0)
+    assert (first['leader_id'], first['current_bid'], first['leader_max']) == (1, 10.0, 100.0)
+    war = resolve_bid(10.0, 10.0, 1, 100.0, 1.0, 2, max_amount=1_000_000.0)
+    assert (war['leader_id'], war['current_bid'], war['outbid']) == (2, 101.0, False)
+    assert war['bids'] == [(2, 101.0, True)]
+    defended = resolve_bid(10.0, 10.0, 1, 100.0, 1.0, 2, bid_amount=60.0)
+    assert (defended['leader_id'], defended['current_bid'], defended['outbid']) == (1, 61.0, True)
+    assert defended['bids'] == [(2, 60.0, False), (1, 61.0, True)]
+    tie = resolve_bid(10.0, 10.0, 1, 100.0, 1.0, 2, max_amount=100.0)
+    assert (tie['leader_id'], tie['current_bid']) == (1, 100.0)  # 相同最高出价先出价者领先
+    assert resolve_bid(10.0, 50.0, 1, None, 1.0, 2, bid_amount=50.5) is None
+    assert resolve_bid(10.0, 50.0, 1, 80.0, 1.0, 1, max_amount=70.0) is None
+
+    auction = Auction(product_id=1, seller_id=9, start_price=10.0, duration_hours=1)
+    assert auction.place_bid(1, max_amount=50.0)
+    assert not auction.place_bid(2, 30.0)
+    assert not auction.place_bid(9, 60.0)
+    assert (auction.current_bidder_id, auction.current_bid) == (1, 31.0)
+    assert len(auction.get_bid_history()) == 3
+
+
+def test_proxy_bidding_war():
+    """普通出价被代理出价自动应对;代理出价之间一次得出结果;成交价为当前价而非最高出价"""
+    db, service, seller, (a, b, c), auction_id = _setup()
+    outcome = service.place_proxy_bid(auction_id, a, 100.0)
+    assert outcome['is_leading'] and outcome['current_bid'] == 10.0 and outcome['max_bid'] == 100.0
+
+    assert not service.place_bid(auction_id, b, 60.0)
+    assert not service.place_bid(auction_id, a, 70.0)  # 领先者不能普通出价
+    auction = service.get_auction_by_id(auction_id)
+    assert (auction.current_bidder_id, auction.current_bid) == (a, 61.0)
+
+    outcome = service.place_proxy_bid(auction_id, c, 10_000.0)
+    assert outcome['is_leading'] and outcome['current_bid'] == 101.0
+    assert service.place_proxy_bid(auction_id, c, 20_000.0)['current_bid'] == 101.0  # 提高自己的最高出价
+    outcome = service.place_proxy_bid(auction_id, b, 15_000.0)
+    assert outcome['outbid'] and not outcome['is_leading'] and outcome['max_bid'] is None
+    assert outcome['current_bid'] == 15_001.0
+    assert service.place_proxy_bid(auction_id, b, 500.0) is None  # 低于最低有效出价
+
+    assert _history(service, auction_id) == [
+        (a, 10.0, 1), (b, 60.0, 0), (a, 61.0, 1), (c, 101.0, 1), (b, 15_000.0, 1), (c, 15_001.0, 1)
+    ]
+    stats = service.get_bid_engine_stats()
+    assert stats['bid_rows'] == 6 and stats['outbid'] == 2
+
+    db.execute_update("UPDATE auctions SET end_time = DATETIME('now', '-1 second') WHERE auction_id = ?",
+                      (auction_id,))
+    assert service.end_auction(auction_id)
+    order = db.execute_query("SELECT buyer_id, total_price FROM orders")[0]
+    assert (order['buyer_id'], order['total_price']) == (c, 15_001.0)
+    db.close()
+
+
+def test_preview_writes_nothing_and_max_bid_stays_private():
+    """预览结果与实际出价一致且不写入;领先者的最高出价只对本人可见"""
+    db, service, seller, (a, b, c), auction_id = _setup()
+    service.place_proxy_bid(auction_id, a, 100.0)
+    preview = service.preview_bid(auction_id, b, bid_amount=40.0)
+    assert preview['outbid'] and preview['current_bid'] == 41.0 and preview['max_bid'] is None
+    assert service.preview_bid(auction_id, seller, bid_amount=40.0) is None
+    assert service.preview_bid(auction_id, b) is None
+    assert len(service.get_bid_history(auction_id)) == 1
+    assert service.get_auction_by_id(auction_id).current_bid == 10.0
+    assert not service.place_bid(auction_id, b, 40.0)
+    assert service.get_auction_by_id(auction_id).current_bid == preview['current_bid']
+
+    listing = service.get_active_auctions()[0]
+    assert 'max_bid' not in listing and listing['current_bid'] == 41.0
+    mine = {row['auction_id']: row for row in service.get_user_bids(a)}
+    theirs = {row['auction_id']: row for row in service.get_user_bids(b)}
+    assert mine[auction_id]['my_proxy_max'] == 100.0 and theirs[auction_id]['my_proxy_max'] is None
+    assert 'max_bid' not in service.get_auction_by_id(auction_id).to_dict()
+    db.close()
+
+
+if __name__ == "__main__":
+    test_resolve_bid_arithmetic()
+    test_proxy_bidding_war()
+    test_preview_writes_nothing_and_max_bid_stays_private()
+    print("✅ 代理出价测试通过")
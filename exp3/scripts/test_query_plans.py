@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+检查服务层查询的执行计划
+Check that service queries use indexes (no full table scans)
+
+运行各服务的读/写方法(含游标分页与后台写入器)并通过 trace 回调收集实际执行的 SQL,
+再对每条语句执行 EXPLAIN QUERY PLAN,出现全表扫描即判定失败。
+trace 回调挂在连接池交出的每个连接上,后台线程与连接池中其他连接执行的语句同样被检查。
+"""
+
+import os
+import re
+import sys
+from unittest import mock
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService, OrderService, MessageService, AuctionService
+from services.admin_service import AdminService
+from services.audit_log import get_audit_log_writer
+from services.flash_sale import start_flash_sale, end_flash_sale
+from services.outbox import get_outbox_dispatcher
+from temp_paths import temp_path
+
+# 只有 "SCAN <table>" 而没有 "USING ... INDEX" 即为全表扫描(系统表 sqlite_* 除外);
+# 兼容 SQLite 3.36 之前的 "SCAN TABLE <table> [AS <alias>]" 格式
+FULL_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?!sqlite_)\w+(?: AS \w+)?$')
+CHECKED_PREFIXES = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def _seed(db):
+    """准备少量测试数据,保证每个查询都有可走的分支"""
+    buyer = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('qp_buyer', 'x', 'qp_b@x.com')"
+    )
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role, shop_name) "
+        "VALUES ('qp_seller', 'x', 'qp_s@x.com', 'seller', 'QP Shop')"
+    )
+    product = db.execute_insert(
+        "INSERT INTO products (seller_id, title, description, price, category, stock) "
+        "VALUES (?, '原神 手办', 'desc', 99.0, '原神', 10)",
+        (seller,)
+    )
+    # 第二件商品与第二条消息,保证游标分页有下一页
+    db.execute_insert(
+        "INSERT INTO products (seller_id, title, description, price, category, stock) "
+        "VALUES (?, '原神 手办 限定', 'desc', 199.0, '原神', 5)",
+        (seller,)
+    )
+    db.execute_many(
+        "INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, shipping_address) "
+        "VALUES (?, ?, ?, 1, 99.0, 'addr')",
+        [(buyer, seller, product)] * 2
+    )
+    db.execute_many(
+        "INSERT INTO messages (sender_id, receiver_id, content) VALUES (?, ?, 'hello')",
+        [(buyer, seller), (seller, buyer)]
+    )
+    db.execute_insert("INSERT INTO favorites (user_id, product_id) VALUES (?, ?)", (buyer, product))
+    db.execute_insert(
+        "INSERT INTO reports (reporter_id, target_id, target_type, report_type, reason) "
+        "VALUES (?, ?, 'product', 'fake', 'counterfeit')",
+        (buyer, product)
+    )
+    return buyer, seller, product
+
+
+def _run_service_queries(db, buyer, seller, product):
+    """调用各服务的高频方法"""
+    products = ProductService(db)
+    orders = OrderService(db)
+    messages = MessageService(db)
+    admin = AdminService(db)
+
+    products.get_product_by_id(product, increment_view=False)
+    products.search_products()
+    products.search_products(keyword='原神', category='原神', min_price=1, max_price=500)
+    products.search_products(keyword='原神 手办 figure')
+    for sort_by in ('newest', 'price_asc', 'price_desc', 'popular'):
+        products.get_products_by_category('原神', sort_by=sort_by)
+    products.get_products_by_seller(seller)
+    products.get_products_by_seller(seller, include_removed=True)
+    products.get_favorite_products(buyer)
+    products.get_all_categories()
+
+    orders.get_orders_by_buyer(buyer)
+    orders.get_orders_by_buyer(buyer, status='pending')
+    orders.get_orders_by_seller(seller)
+    orders.get_orders_by_seller(seller, status='pending')
+    orders.get_order_statistics(buyer)
+    orders.get_order_statistics(seller, is_seller=True)
+
+    # 游标分页: 第一页与按游标继续的下一页
+    pages = [
+        lambda after: products.search_products_page(limit=1, after=after),
+        lambda after: products.search_products_page(keyword='原神 手办', limit=1, after=after),
+        lambda after: products.get_products_by_category_page('原神', limit=1, after=after),
+        lambda after: products.get_products_by_category_page('原神', limit=1, after=after, sort_by='price_asc'),
+        lambda after: orders.get_orders_by_buyer_page(buyer, limit=1, after=after),
+        lambda after: orders.get_orders_by_seller_page(seller, status='pending', limit=1, after=after),
+        lambda after: messages.get_conversation_page(buyer, seller, limit=1, after=after),
+    ]
+    for page in pages:
+        first = page(None)
+        assert first['next_cursor'], f"测试数据不足以产生下一页: {first}"
+        page(first['next_cursor'])
+
+    messages.get_conversation(buyer, seller)
+    messages.get_user_messages(buyer)
+    messages.get_contacts_overview(buyer)
+    messages.get_contacts_overview(seller)
+    messages.get_unread_count(seller)
+    messages.search_messages(buyer, 'hello')
+    messages.mark_conversation_as_read(seller, buyer)
+
+    admin.get_pending_reports(1)
+    admin.get_statistics(1)
+    admin.get_daily_counts(1)
+    admin.get_all_users(1)
+
+    auctions = AuctionService(db)
+    db.execute_update("UPDATE products SET auctionable = 1 WHERE product_id = ?", (product,))
+    auction = auctions.create_auction(seller, product, 50.0, 24)
+    auctions.place_bid(auction, buyer, 60.0)
+    auctions.get_auction_by_id(auction)
+    auctions.get_auction_by_product(product)
+    auctions.get_active_auctions()
+    auctions.get_bid_history(auction)
+    auctions.get_user_bids(buyer)
+    auctions.check_expired_auctions()
+    auctions.end_auction(auction)
+
+
+def _run_background_writers(db, buyer, seller, product):
+    """触发浏览计数、管理员日志、服务消息发件箱与限时抢购的批量写入"""
+    products = ProductService(db)
+    for _ in range(3):
+        products.get_product_by_id(product)
+    products.flush_view_counts()
+
+    admin = AdminService(db)
+    admin.remove_products(1, [product], 'query plan')
+    get_audit_log_writer(db).flush()
+
+    lot = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category, stock) VALUES (?, 'flash', 9.0, '原神', 5)",
+        (seller,)
+    )
+    OrderService(db).create_order(buyer, lot, 1, 'addr')
+    sale = start_flash_sale(db, lot)
+    sale.admit(buyer, 'addr')
+    sale.flush()
+    end_flash_sale(db, lot)
+    get_outbox_dispatcher(db).dispatch()
+
+
+def _trace_connections(db, statements):
+    """连接池交出的每个连接(包括后台线程取得的连接)都记录执行的 SQL"""
+    acquire = db.pool.acquire
+
+    def traced_acquire():
+        conn = acquire()
+        conn.set_trace_callback(statements.append)
+        return conn
+    return mock.patch.object(db.pool, 'acquire', traced_acquire)
+
+
+def collect_full_scans(db):
+    """
+    收集执行计划中出现全表扫描的语句
+
+    Returns:
+        List[tuple]: (SQL语句, 计划明细) 列表
+    """
+    buyer, seller, product = _seed(db)
+    statements = []
+    with _trace_connections(db, statements):
+        _run_service_queries(db, buyer, seller, product)
+        _run_background_writers(db, buyer, seller, product)
+    # 取快照: 之后执行的 EXPLAIN 仍会被连接上的 trace 回调记录
+    statements = list(statements)
+    # 后台写入器经连接池取得的连接同样被记录
+    for marker in ('SET view_count = view_count', 'INSERT INTO admin_logs', 'DELETE FROM outbox', 'SET sold = sold'):
+        assert any(marker in sql for sql in statements), f"未收集到语句: {marker}"
+
+    offenders = []
+    seen = set()
+    for sql in statements:
+        normalized = ' '.join(sql.split())
+        if not normalized.upper().startswith(CHECKED_PREFIXES) or normalized in seen:
+            continue
+        seen.add(normalized)
+        for detail in db.explain_query_plan(normalized):
+            if FULL_SCAN_RE.match(detail):
+                offenders.append((normalized, detail))
+    return offenders
+
+
+def test_service_queries_use_indexes():
+    """所有服务查询都不应出现全表扫描"""
+    db = DatabaseManager(temp_path('query_plan_test.db'))
+    offenders = collect_full_scans(db)
+    for sql, detail in offenders:
+        print(f"FULL SCAN: {detail}\n    {sql}")
+    db.close()
+    assert not offenders, f"{len(offenders)} 条查询出现全表扫描"
+
+
+if __name__ == "__main__":
+    test_service_queries_use_indexes()
+    print("✅ 所有服务查询均使用索引")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+测试批量写入、事务与工作单元
+Test execute_many, transaction() and UnitOfWork
+"""
+
+import os
+import sys
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import UnitOfWork, ProductService
+from temp_paths import temp_path
+
+
+def _temp_db():
+    """在临时目录中创建独立的测试数据库"""
+    db = DatabaseManager(temp_path('uow_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('uow_s', 'x', 'uow_s@x.com', 'seller')"
+    )
+    buyer = db.execute_insert(
+        "INSERT INTO users (username, password, email) VALUES ('uow_b', 'x', 'uow_b@x.com')"
+    )
+    return db, seller, buyer
+
+
+def _count(db, table):
+    return db.execute_query(f"SELECT COUNT(*) AS c FROM {table}")[0]['c']
+
+
+def test_execute_many_single_commit():
+    """execute_many 一次插入多行"""
+    db, seller, _ = _temp_db()
+    rows = [(seller, f"item {i}", 1.0 + i, '其他') for i in range(200)]
+    affected = db.execute_many(
+        "INSERT INTO products (seller_id, title, price, category) VALUES (?, ?, ?, ?)", rows
+    )
+    assert affected == 200
+    assert _count(db, 'products') == 200
+    db.close()
+
+
+def test_transaction_rollback_and_savepoint():
+    """外层事务整体回滚;嵌套事务异常只回滚嵌套部分"""
+    db, seller, _ = _temp_db()
+    try:
+        with db.transaction():
+            db.execute_insert(
+                "INSERT INTO products (seller_id, title, price, category) VALUES (?, 'a', 1, '其他')",
+                (seller,)
+            )
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert _count(db, 'products') == 0
+
+    with db.transaction():
+        db.execute_insert(
+            "INSERT INTO products (seller_id, title, price, category) VALUES (?, 'kept', 1, '其他')",
+            (seller,)
+        )
+        try:
+            with db.transaction():
+                db.execute_insert(
+                    "INSERT INTO products (seller_id, title, price, category) VALUES (?, 'dropped', 1, '其他')",
+                    (seller,)
+                )
+                raise RuntimeError("inner")
+        except RuntimeError:
+            pass
+    titles = [r['title'] for r in db.execute_query("SELECT title FROM products")]
+    assert titles == ['kept']
+    db.close()
+
+
+def test_savepoint_rollback_discards_callbacks():
+    """嵌套事务回滚时丢弃其中注册的提交后回调,外层的回调在提交后执行"""
+    db, _, _ = _temp_db()
+    fired = []
+    with db.transaction():
+        db.after_commit(lambda: fired.append('outer'))
+        try:
+            with db.transaction():
+                db.after_commit(lambda: fired.append('inner'))
+                with db.transaction():
+                    db.after_commit(lambda: fired.append('nested'))
+                raise RuntimeError("inner")
+        except RuntimeError:
+            pass
+        with db.transaction():
+            db.after_commit(lambda: fired.append('kept'))
+        assert fired == []
+    assert fired == ['outer', 'kept']
+    db.close()
+
+
+def test_unit_of_work_commits_across_services():
+    """多个服务的写操作在同一事务中提交"""
+    db, seller, buyer = _temp_db()
+    statements = []
+    with UnitOfWork(db) as uow:
+        uow.conn.set_trace_callback(statements.append)
+        product_id = uow.products.create_product(seller, {
+            'title': '明日方舟 立牌', 'description': 'd', 'price': 30.0, 'category': '明日方舟', 'stock': 3
+        })
+        order_id = uow.orders.create_order(buyer, product_id, 1, 'addr')
+        uow.messages.send_message(buyer, seller, 'hi')
+        uow.conn.set_trace_callback(None)
+    assert order_id is not None
+    assert statements.count('COMMIT') == 0, "工作单元内部不应单独提交"
+    assert _count(db, 'orders') == 1
+    db.close()
+
+
+def test_unit_of_work_rollback():
+    """rollback() 或异常时全部撤销"""
+    db, seller, _ = _temp_db()
+    with UnitOfWork(db) as uow:
+        ProductService(uow).create_product(seller, {
+            'title': 't', 'description': 'd', 'price': 1.0, 'category': '其他'
+        })
+        uow.rollback()
+    assert _count(db, 'products') == 0
+    assert db.get_pool_stats()['in_use'] == 0
+    db.close()
+
+
+if __name__ == "__main__":
+    test_execute_many_single_commit()
+    test_transaction_rollback_and_savepoint()
+    test_savepoint_rollback_discards_callbacks()
+    test_unit_of_work_commits_across_services()
+    test_unit_of_work_rollback()
+    print("✅ 事务/工作单元测试通过")
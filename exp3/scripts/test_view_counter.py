@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试商品浏览计数器(内存累计 + 批量写入)
+Test write-behind view counter
+"""
+
+import os
+import sys
+import threading
+
+# Ensure exp3 root is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXP3_ROOT = os.path.dirname(CURRENT_DIR)
+if EXP3_ROOT not in sys.path:
+    sys.path.insert(0, EXP3_ROOT)
+
+from database import DatabaseManager
+from services import ProductService
+from services.view_counter import ViewCounter
+from temp_paths import temp_path
+
+
+def _setup(counter_kwargs=None):
+    """创建测试数据库、商品和带独立计数器的商品服务"""
+    db = DatabaseManager(temp_path('views_test.db'))
+    seller = db.execute_insert(
+        "INSERT INTO users (username, password, email, role) VALUES ('v_s', 'x', 'v_s@x.com', 'seller')"
+    )
+    product_id = db.execute_insert(
+        "INSERT INTO products (seller_id, title, price, category) VALUES (?, 'Vtuber 亚克力', 20.0, 'Vtuber')",
+        (seller,)
+    )
+    counter = ViewCounter(db, **(counter_kwargs or {'flush_interval': 3600, 'flush_threshold': 10 ** 6}))
+    return db, ProductService(db, view_counter=counter), product_id
+
+
+def _db_views(db, product_id):
+    return db.execute_query("SELECT view_count FROM products WHERE product_id=?", (product_id,))[0]['view_count']
+
+
+def test_views_buffered_until_flush():
+    """浏览只记入内存,显示值包含未写入部分,刷新后一次写入"""
+    db, service, product_id = _setup()
+    for i in range(1, 6):
+        product = service.get_product_by_id(product_id)
+        assert product.view_count == i
+    assert _db_views(db, product_id) == 0
+    assert service.get_view_counter_stats()['pending_views'] == 5
+
+    assert service.flush_view_counts() == 5
+    assert _db_views(db, product_id) == 5
+    stats = service.get_view_counter_stats()
+    assert stats['pending_views'] == 0 and stats['flushes'] == 1
+    db.close()
+
+
+def test_concurrent_views_not_lost():
+    """多线程浏览计数不丢失"""
+    db, service, product_id = _setup()
+
+    def browse():
+        for _ in range(200):
+            service.view_counter.increment(product_id)
+
+    threads = [threading.Thread(target=browse) for _ in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    service.flush_view_counts()
+    assert _db_views(db, product_id) == 1600
+    db.close()
+
+
+def test_threshold_and_shutdown_flush():
+    """达到阈值时后台刷新;关闭时写入剩余计数"""
+    db, service, product_id = _setup({'flush_interval': 3600, 'flush_threshold': 16, 'shards': 1})
+    for _ in range(16):
+        service.view_counter.increment(product_id)
+    # 等待后台线程完成阈值触发的刷新
+    for _ in range(100):
+        if service.get_view_counter_stats()['flushes']:
+            break
+        threading.Event().wait(0.01)
+    assert _db_views(db, product_id) == 16
+
+    service.view_counter.increment(product_id, 3)
+    service.view_counter.close()
+    assert _db_views(db, product_id) == 19
+    db.close()
+
+
+def test_shared_counter_flushed_on_db_close():
+    """默认共享计数器在关闭数据库时写入"""
+    db, _, product_id = _setup()
+    service = ProductService(db)
+    service.get_product_by_id(product_id)
+    path = db.db_path
+    db.close()
+    db = DatabaseManager(path)
+    assert _db_views(db, product_id) == 1
+    db.close()
+
+
+if __name__ == "__main__":
+    test_views_buffered_until_flush()
+    test_concurrent_views_not_lost()
+    test_threshold_and_shutdown_flush()
+    test_shared_counter_flushed_on_db_close()
+    print("✅ 浏览计数器测试通过")
@@ -6,15 +6,19 @@ Services package for the Anime Shopping Mall System.
 from .user_service import UserService
 from .product_service import ProductService
 from .order_service import OrderService
+from .cart_service import CartService
 from .auction_service import AuctionService
 from .message_service import MessageService
 from .report_service import ReportService
+from .unit_of_work import UnitOfWork
 
 __all__ = [
     'UserService',
     'ProductService',
     'OrderService',
+    'CartService',
     'AuctionService',
     'MessageService',
-    'ReportService'
+    'ReportService',
+    'UnitOfWork'
 ]
@@ -3,13 +3,22 @@ Admin Service - 管理员服务层
 处理管理员相关的业务逻辑
 """
 
-from typing import Optional, List, Dict
-from datetime import datetime, timedelta
+import json
+from typing import Optional, List, Dict, Iterable
+from datetime import datetime, timedelta, timezone
 from utils.exceptions import (
     ProductNotFoundError,
     UserNotFoundError,
     PermissionDeniedError
 )
+from .audit_log import AuditLogWriter, get_audit_log_writer
+from .identity_cache import IdentityCache, get_identity_cache
+from .unit_of_work import UnitOfWork
+
+
+def _placeholders(ids: List[int]) -> str:
+    """生成 IN (...) 的参数占位符"""
+    return ', '.join('?' * len(ids))
 
 
 class AdminService:
@@ -18,19 +27,29 @@ class AdminService:
     提供管理员专用的管理功能
     """
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, audit_log: Optional[AuditLogWriter] = None,
+                 identity_cache: Optional[IdentityCache] = None):
         """
         初始化管理员服务
         
         Args:
             db_manager: 数据库管理器实例
+            audit_log: 操作日志写入器(默认使用数据库共享的写入器)
+            identity_cache: 管理员身份缓存(默认使用数据库共享的缓存)
         """
         self.db = db_manager
+        self.audit_log = audit_log or get_audit_log_writer(db_manager)
+        if identity_cache is None:
+            base_db = db_manager.db if isinstance(db_manager, UnitOfWork) else db_manager
+            identity_cache = get_identity_cache(base_db)
+        self.identity_cache = identity_cache
     
     def verify_admin(self, user_id: int) -> Dict:
         """
         验证用户是否是管理员
         
+        身份与角色在短时间内缓存,角色变更或封禁时失效。
+        
         Args:
             user_id: 用户ID
             
@@ -40,15 +59,20 @@ class AdminService:
         Raises:
             PermissionDeniedError: 如果不是管理员
         """
-        user = self.db.execute_query(
-            "SELECT user_id, username, role FROM users WHERE user_id = ?",
-            (user_id,)
-        )
-        
-        if not user:
-            raise UserNotFoundError(f"用户ID {user_id} 不存在")
+        user_data = self.identity_cache.get(user_id)
+        if user_data is None:
+            generation = self.identity_cache.generation()
+            user = self.db.execute_query(
+                "SELECT user_id, username, role FROM users WHERE user_id = ?",
+                (user_id,)
+            )
+            
+            if not user:
+                raise UserNotFoundError(f"用户ID {user_id} 不存在")
+            
+            user_data = user[0]
+            self.identity_cache.put(user_id, user_data, generation)
         
-        user_data = user[0]
         if user_data['role'] not in ['admin', 'superadmin']:
             raise PermissionDeniedError(f"用户 {user_data['username']} 不是管理员")
         
@@ -106,6 +130,67 @@ class AdminService:
             print(f"管理员下架商品失败: {str(e)}")
             return False
     
+    def remove_products(self, admin_id: int, product_ids: Iterable[int],
+                        reason: str = "") -> Dict[int, str]:
+        """
+        批量下架商品
+        
+        权限只校验一次,一条 IN 查询校验商品,在同一事务中一次性下架。
+        
+        Args:
+            admin_id: 管理员ID
+            product_ids: 商品ID列表
+            reason: 下架原因
+            
+        Returns:
+            Dict[int, str]: 每个商品ID的处理结果
+                (removed / already_removed / not_found),失败时返回空字典
+        """
+        admin = self.verify_admin(admin_id)
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return {}
+        
+        try:
+            with self.db.transaction():
+                rows = self.db.execute_query(
+                    f"SELECT product_id, title, status FROM products "
+                    f"WHERE product_id IN ({_placeholders(ids)})",
+                    tuple(ids)
+                )
+                products = {row['product_id']: row for row in rows}
+                to_remove = [
+                    pid for pid in ids
+                    if pid in products and products[pid]['status'] != 'removed'
+                ]
+                if to_remove:
+                    self.db.execute_update(
+                        f"""
+                        UPDATE products
+                        SET status = 'removed', updated_at = CURRENT_TIMESTAMP
+                        WHERE product_id IN ({_placeholders(to_remove)})
+                        """,
+                        tuple(to_remove)
+                    )
+        except Exception as e:
+            print(f"批量下架商品失败: {str(e)}")
+            return {}
+        
+        removed = set(to_remove)
+        outcomes = {}
+        for pid in ids:
+            if pid in removed:
+                outcomes[pid] = 'removed'
+                self._log_admin_action(
+                    admin_id,
+                    'remove_product',
+                    f"下架商品: {products[pid]['title']} (ID: {pid}), 原因: {reason}"
+                )
+            else:
+                outcomes[pid] = 'already_removed' if pid in products else 'not_found'
+        print(f"✓ 管理员 {admin['username']} 批量下架了 {len(removed)} 个商品")
+        return outcomes
+    
     def ban_user(self, admin_id: int, user_id: int, 
                  duration_days: int = 30, reason: str = "") -> bool:
         """
@@ -134,17 +219,11 @@ class AdminService:
                 raise UserNotFoundError(f"用户ID {user_id} 不存在")
             
             # 不能封禁管理员（除非是超级管理员操作）
-            if user[0]['role'] in ['admin', 'superadmin'] and admin['role'] != 'superadmin':
+            if self._is_protected(user[0], admin):
                 raise PermissionDeniedError("普通管理员无法封禁其他管理员")
             
-            # 计算封禁结束时间
-            if duration_days > 0:
-                ban_until = (datetime.now() + timedelta(days=duration_days)).isoformat()
-            else:
-                ban_until = None  # 永久封禁
-            
             # 更新用户状态（添加封禁信息到profile）
-            profile_update = f'{{"banned": true, "ban_until": "{ban_until}", "ban_reason": "{reason}"}}'
+            profile_update = self._ban_profile(duration_days, reason)
             
             query = """
                 UPDATE users 
@@ -153,6 +232,7 @@ class AdminService:
             """
             
             affected_rows = self.db.execute_update(query, (profile_update, user_id))
+            self.db.after_commit(lambda: self.identity_cache.invalidate(user_id))
             
             if affected_rows > 0:
                 # 记录管理操作日志
@@ -173,6 +253,71 @@ class AdminService:
             print(f"封禁用户失败: {str(e)}")
             return False
     
+    def ban_users(self, admin_id: int, user_ids: Iterable[int],
+                  duration_days: int = 30, reason: str = "") -> Dict[int, str]:
+        """
+        批量封禁用户
+        
+        权限只校验一次,一条 IN 查询校验用户,在同一事务中一次性封禁。
+        普通管理员无法封禁管理员,对应用户的结果为 forbidden。
+        
+        Args:
+            admin_id: 管理员ID
+            user_ids: 要封禁的用户ID列表
+            duration_days: 封禁天数（0表示永久封禁）
+            reason: 封禁原因
+            
+        Returns:
+            Dict[int, str]: 每个用户ID的处理结果
+                (banned / forbidden / not_found),失败时返回空字典
+        """
+        admin = self.verify_admin(admin_id)
+        ids = list(dict.fromkeys(user_ids))
+        if not ids:
+            return {}
+        
+        try:
+            with self.db.transaction():
+                rows = self.db.execute_query(
+                    f"SELECT user_id, username, role FROM users "
+                    f"WHERE user_id IN ({_placeholders(ids)})",
+                    tuple(ids)
+                )
+                users = {row['user_id']: row for row in rows}
+                to_ban = [
+                    uid for uid in ids
+                    if uid in users and not self._is_protected(users[uid], admin)
+                ]
+                if to_ban:
+                    self.db.execute_update(
+                        f"""
+                        UPDATE users
+                        SET profile = ?, updated_at = CURRENT_TIMESTAMP
+                        WHERE user_id IN ({_placeholders(to_ban)})
+                        """,
+                        (self._ban_profile(duration_days, reason), *to_ban)
+                    )
+                    self.db.after_commit(lambda: self.identity_cache.invalidate(*to_ban))
+        except Exception as e:
+            print(f"批量封禁用户失败: {str(e)}")
+            return {}
+        
+        banned = set(to_ban)
+        ban_type = f"{duration_days}天" if duration_days > 0 else "永久"
+        outcomes = {}
+        for uid in ids:
+            if uid in banned:
+                outcomes[uid] = 'banned'
+                self._log_admin_action(
+                    admin_id,
+                    'ban_user',
+                    f"封禁用户: {users[uid]['username']} (ID: {uid}), {ban_type}, 原因: {reason}"
+                )
+            else:
+                outcomes[uid] = 'forbidden' if uid in users else 'not_found'
+        print(f"✓ 管理员 {admin['username']} 批量封禁了 {len(banned)} 个用户")
+        return outcomes
+    
     def unban_user(self, admin_id: int, user_id: int) -> bool:
         """
         解封用户
@@ -205,6 +350,7 @@ class AdminService:
             """
             
             affected_rows = self.db.execute_update(query, (user_id,))
+            self.db.after_commit(lambda: self.identity_cache.invalidate(user_id))
             
             if affected_rows > 0:
                 # 记录管理操作日志
@@ -385,6 +531,73 @@ class AdminService:
             print(f"审核举报失败: {str(e)}")
             return False
     
+    def review_reports(self, admin_id: int, report_ids: Iterable[int],
+                       approved: bool, result: str = "") -> Dict[int, str]:
+        """
+        批量审核举报
+        
+        权限只校验一次,一条 IN 查询校验举报;举报状态更新与通过后的
+        商品下架/用户封禁在同一事务中按目标类型各执行一条 UPDATE。
+        只处理待审核的举报,避免重复审核。
+        
+        Args:
+            admin_id: 管理员ID
+            report_ids: 举报ID列表
+            approved: 是否通过
+            result: 审核结果说明
+            
+        Returns:
+            Dict[int, str]: 每个举报ID的处理结果
+                (approved / rejected / already_reviewed / not_found),失败时返回空字典
+        """
+        admin = self.verify_admin(admin_id)
+        ids = list(dict.fromkeys(report_ids))
+        if not ids:
+            return {}
+        
+        status = 'approved' if approved else 'rejected'
+        try:
+            with self.db.transaction():
+                rows = self.db.execute_query(
+                    f"SELECT * FROM reports WHERE report_id IN ({_placeholders(ids)})",
+                    tuple(ids)
+                )
+                reports = {row['report_id']: row for row in rows}
+                pending = [
+                    rid for rid in ids
+                    if rid in reports and reports[rid]['status'] == 'pending'
+                ]
+                if pending:
+                    self.db.execute_update(
+                        f"""
+                        UPDATE reports
+                        SET status = ?, admin_id = ?, result = ?,
+                            reviewed_at = CURRENT_TIMESTAMP
+                        WHERE report_id IN ({_placeholders(pending)})
+                        """,
+                        (status, admin_id, result, *pending)
+                    )
+                    if approved:
+                        self._apply_approved_reports([reports[rid] for rid in pending])
+        except Exception as e:
+            print(f"批量审核举报失败: {str(e)}")
+            return {}
+        
+        reviewed = set(pending)
+        outcomes = {}
+        for rid in ids:
+            if rid in reviewed:
+                outcomes[rid] = status
+                self._log_admin_action(
+                    admin_id,
+                    'review_report',
+                    f"审核举报ID {rid}: {status}, 结果: {result}"
+                )
+            else:
+                outcomes[rid] = 'already_reviewed' if rid in reports else 'not_found'
+        print(f"✓ 管理员 {admin['username']} 批量审核了 {len(reviewed)} 条举报")
+        return outcomes
+    
     def get_statistics(self, admin_id: int) -> Dict:
         """
         获取平台统计数据
@@ -399,31 +612,23 @@ class AdminService:
             # 验证管理员权限
             self.verify_admin(admin_id)
             
-            stats = {}
-            
-            # 用户统计
-            user_count = self.db.execute_query("SELECT COUNT(*) as count FROM users")
-            stats['total_users'] = user_count[0]['count'] if user_count else 0
-            
-            # 商品统计
-            product_count = self.db.execute_query("SELECT COUNT(*) as count FROM products")
-            stats['total_products'] = product_count[0]['count'] if product_count else 0
-            
-            # 订单统计
-            order_count = self.db.execute_query("SELECT COUNT(*) as count FROM orders")
-            stats['total_orders'] = order_count[0]['count'] if order_count else 0
-            
-            # 待审核举报数
-            pending_reports = self.db.execute_query(
-                "SELECT COUNT(*) as count FROM reports WHERE status = 'pending'"
+            # 计数由触发器维护(platform_counters / daily_counters),这里只做主键查询
+            rows = self.db.execute_query(
+                "SELECT name, value FROM platform_counters "
+                "WHERE name IN ('users', 'products', 'orders', 'pending_reports') "
+                "UNION ALL "
+                "SELECT 'today_new_users', value FROM daily_counters "
+                "WHERE metric = 'users' AND day = DATE('now')"
             )
-            stats['pending_reports'] = pending_reports[0]['count'] if pending_reports else 0
+            counters = {row['name']: row['value'] for row in rows}
             
-            # 今日新增用户
-            today_users = self.db.execute_query(
-                "SELECT COUNT(*) as count FROM users WHERE DATE(created_at) = DATE('now')"
-            )
-            stats['today_new_users'] = today_users[0]['count'] if today_users else 0
+            stats = {
+                'total_users': counters.get('users', 0),
+                'total_products': counters.get('products', 0),
+                'total_orders': counters.get('orders', 0),
+                'pending_reports': counters.get('pending_reports', 0),
+                'today_new_users': counters.get('today_new_users', 0)
+            }
             
             return stats
             
@@ -433,6 +638,45 @@ class AdminService:
             print(f"获取统计数据失败: {str(e)}")
             return {}
     
+    def get_daily_counts(self, admin_id: int, metric: str = 'users', days: int = 90) -> List[Dict]:
+        """
+        获取最近若干天每天的新增数量(包含当天,没有新增的日期为0)
+        
+        Args:
+            admin_id: 管理员ID
+            metric: 统计项 (users/products/orders)
+            days: 天数
+            
+        Returns:
+            List[Dict]: [{'day': 'YYYY-MM-DD', 'count': 数量}],按日期升序
+        """
+        try:
+            # 验证管理员权限
+            self.verify_admin(admin_id)
+            
+            if metric not in ('users', 'products', 'orders'):
+                raise ValueError(f"无效的统计项: {metric}")
+            
+            # daily_counters 按 UTC 日期分桶(与 CURRENT_TIMESTAMP 一致)
+            today = datetime.now(timezone.utc).date()
+            start = today - timedelta(days=days - 1)
+            rows = self.db.execute_query(
+                "SELECT day, value FROM daily_counters WHERE metric = ? AND day BETWEEN ? AND ?",
+                (metric, start.isoformat(), today.isoformat())
+            )
+            counts = {row['day']: row['value'] for row in rows}
+            series = []
+            for offset in range(days):
+                day = (start + timedelta(days=offset)).isoformat()
+                series.append({'day': day, 'count': counts.get(day, 0)})
+            return series
+            
+        except (UserNotFoundError, PermissionDeniedError):
+            raise
+        except Exception as e:
+            print(f"获取每日统计失败: {str(e)}")
+            return []
+    
     def set_user_role(self, admin_id: int, user_id: int, new_role: str) -> bool:
         """
         设置用户角色（超级管理员专用）
@@ -472,6 +716,7 @@ class AdminService:
             """
             
             affected_rows = self.db.execute_update(query, (new_role, user_id))
+            self.db.after_commit(lambda: self.identity_cache.invalidate(user_id))
             
             if affected_rows > 0:
                 # 记录管理操作日志
@@ -491,6 +736,15 @@ class AdminService:
             print(f"设置用户角色失败: {str(e)}")
             return False
     
+    def get_identity_cache_stats(self) -> Dict:
+        """
+        获取管理员身份缓存统计(命中/未命中次数、命中率、当前条数等)
+        
+        Returns:
+            Dict: 统计信息
+        """
+        return self.identity_cache.stats()
+    
     def _handle_approved_report(self, report: Dict) -> None:
         """
         处理通过的举报
@@ -498,27 +752,68 @@ class AdminService:
         Args:
             report: 举报信息
         """
-        report_type = report.get('report_type')
-        target_id = report.get('target_id')
+        self._apply_approved_reports([report])
+    
+    def _apply_approved_reports(self, reports: List[Dict]) -> None:
+        """
+        处理通过的举报:按目标类型分组,下架被举报商品、封禁被举报用户
         
-        # 根据举报类型执行相应操作
-        if report_type == 'product' and target_id:
+        Args:
+            reports: 举报信息列表
+        """
+        targets = {'product': [], 'user': []}
+        for report in reports:
+            target_id = report.get('target_id')
+            if report.get('target_type') in targets and target_id:
+                targets[report['target_type']].append(target_id)
+        
+        product_ids = list(dict.fromkeys(targets['product']))
+        if product_ids:
             # 下架商品
             self.db.execute_update(
-                "UPDATE products SET status = 'removed' WHERE product_id = ?",
-                (target_id,)
+                f"UPDATE products SET status = 'removed', updated_at = CURRENT_TIMESTAMP "
+                f"WHERE product_id IN ({_placeholders(product_ids)})",
+                tuple(product_ids)
             )
-        elif report_type == 'user' and target_id:
+        user_ids = list(dict.fromkeys(targets['user']))
+        if user_ids:
             # 封禁用户
-            profile_update = '{"banned": true, "ban_reason": "违规行为"}'
             self.db.execute_update(
-                "UPDATE users SET profile = ? WHERE user_id = ?",
-                (profile_update, target_id)
+                f"UPDATE users SET profile = ?, updated_at = CURRENT_TIMESTAMP "
+                f"WHERE user_id IN ({_placeholders(user_ids)})",
+                (self._ban_profile(0, "违规行为"), *user_ids)
             )
+            self.db.after_commit(lambda: self.identity_cache.invalidate(*user_ids))
+    
+    @staticmethod
+    def _ban_profile(duration_days: int, reason: str) -> str:
+        """
+        生成封禁信息 profile JSON
+        
+        Args:
+            duration_days: 封禁天数（0表示永久封禁）
+            reason: 封禁原因
+            
+        Returns:
+            str: profile JSON 字符串
+        """
+        if duration_days > 0:
+            ban_until = (datetime.now() + timedelta(days=duration_days)).isoformat()
+        else:
+            ban_until = None  # 永久封禁
+        return json.dumps(
+            {'banned': True, 'ban_until': ban_until, 'ban_reason': reason},
+            ensure_ascii=False
+        )
+    
+    @staticmethod
+    def _is_protected(user: Dict, admin: Dict) -> bool:
+        """普通管理员不能封禁管理员"""
+        return user['role'] in ['admin', 'superadmin'] and admin['role'] != 'superadmin'
     
     def _log_admin_action(self, admin_id: int, action_type: str, details: str) -> None:
         """
-        记录管理员操作日志
+        记录管理员操作日志(交给日志写入器批量写入)
         
         Args:
             admin_id: 管理员ID
@@ -526,24 +821,6 @@ class AdminService:
             details: 操作详情
         """
         try:
-            # 创建日志表（如果不存在）
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS admin_logs (
-                        log_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        admin_id INTEGER NOT NULL,
-                        action_type TEXT NOT NULL,
-                        details TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (admin_id) REFERENCES users(user_id)
-                    )
-                """)
-            
-            # 插入日志
-            self.db.execute_insert(
-                "INSERT INTO admin_logs (admin_id, action_type, details) VALUES (?, ?, ?)",
-                (admin_id, action_type, details)
-            )
+            self.audit_log.record(admin_id, action_type, details)
         except Exception as e:
             print(f"记录管理员日志失败: {str(e)}")
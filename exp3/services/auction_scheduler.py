@@ -0,0 +1,253 @@
+"""
+Auction Expiry Scheduler - 拍卖到期调度器
+按结束时间维护最小堆,由后台线程在拍卖到期时批量结束,代替定时轮询 auctions 表
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import AUCTION_CONFIG
+
+
+def _to_epoch(end_time) -> float:
+    """将 UTC 时间字符串转换为时间戳"""
+    parsed = datetime.fromisoformat(str(end_time))
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+
+class AuctionExpiryScheduler:
+    """
+    拍卖到期调度器
+
+    - 启动时从数据库加载所有进行中的拍卖,按结束时间建堆(O(n))
+    - 新建拍卖通过 schedule() 入堆(O(log n));结束时间早于堆顶时唤醒后台线程
+    - 后台线程睡眠到堆顶拍卖的结束时间,弹出所有已到期的拍卖,
+      每批最多 batch_size 个,通过 AuctionService.end_auctions 在一个事务中结束
+    - 已取消/已结束的拍卖无需出堆,到期时条件 UPDATE 不会命中;
+      仍在进行中但未结束的拍卖(提前唤醒或结束失败)重新入堆
+    """
+
+    def __init__(self, db_manager, auction_service=None, batch_size: int = None,
+                 retry_delay: float = None):
+        """
+        初始化调度器
+
+        Args:
+            db_manager: 数据库管理器实例
+            auction_service: 拍卖服务(默认基于 db_manager 创建)
+            batch_size: 每批结束的拍卖数量
+            retry_delay: 结束失败后的重试间隔(秒)
+        """
+        if auction_service is None:
+            from .auction_service import AuctionService
+            auction_service = AuctionService(db_manager)
+        self.db = db_manager
+        self.auction_service = auction_service
+        self.batch_size = batch_size or AUCTION_CONFIG.get('expiry_batch_size', 200)
+        self.retry_delay = retry_delay or AUCTION_CONFIG.get('expiry_retry_delay', 5.0)
+        self._heap: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        # 统计信息
+        self._ended = 0
+        self._batches = 0
+        self._rescheduled = 0
+        self._max_lag = 0.0
+
+    def load(self) -> int:
+        """
+        从数据库加载进行中的拍卖(替换当前堆)
+
+        Returns:
+            int: 加载的拍卖数量
+        """
+        rows = self.db.execute_query(
+            "SELECT auction_id, end_time FROM auctions WHERE status = 'active'"
+        )
+        heap = [(_to_epoch(row['end_time']), row['auction_id']) for row in rows]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+        self._wake.set()
+        return len(heap)
+
+    def schedule(self, auction_id: int, end_time) -> None:
+        """
+        登记拍卖的结束时间
+
+        Args:
+            auction_id: 拍卖ID
+            end_time: 结束时间(UTC 字符串)
+        """
+        self._push(_to_epoch(end_time), auction_id)
+
+    def _push(self, due: float, auction_id: int) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (due, auction_id))
+            earliest = self._heap[0][1] == auction_id
+        if earliest:
+            self._wake.set()
+
+    def next_due(self) -> Optional[float]:
+        """
+        最早到期时间
+
+        Returns:
+            Optional[float]: 堆顶拍卖的结束时间戳,堆为空时返回None
+        """
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: float = None) -> int:
+        """
+        结束所有已到期的拍卖(按批)
+
+        Args:
+            now: 当前时间戳(默认 time.time())
+
+        Returns:
+            int: 本次结束的拍卖数量
+        """
+        now = time.time() if now is None else now
+        total = 0
+        not_ended = []
+        while True:
+            with self._lock:
+                due = []
+                while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                    due.append(heapq.heappop(self._heap))
+            if not due:
+                break
+            ended = set(self.auction_service.end_auctions([auction_id for _, auction_id in due]))
+            self._batches += 1
+            self._ended += len(ended)
+            total += len(ended)
+            finished = time.time()
+            for end_at, auction_id in due:
+                if auction_id in ended:
+                    self._max_lag = max(self._max_lag, finished - end_at)
+                else:
+                    not_ended.append(auction_id)
+        # 全部批次处理完后再重新入堆,避免同一次调用中反复弹出
+        self._reschedule(not_ended)
+        return total
+
+    def _reschedule(self, auction_ids: List[int]) -> None:
+        """未结束但仍在进行中的拍卖重新入堆;已到期却未能结束的稍后重试"""
+        if not auction_ids:
+            return
+        rows = self.db.execute_query(
+            f"SELECT auction_id, end_time FROM auctions "
+            f"WHERE auction_id IN ({', '.join('?' * len(auction_ids))}) AND status = 'active'",
+            tuple(auction_ids)
+        )
+        retry_at = time.time() + self.retry_delay
+        for row in rows:
+            due = _to_epoch(row['end_time'])
+            self._push(due if due > time.time() else retry_at, row['auction_id'])
+            self._rescheduled += 1
+
+    def start(self) -> 'AuctionExpiryScheduler':
+        """
+        加载进行中的拍卖并启动后台线程
+
+        Returns:
+            AuctionExpiryScheduler: 调度器本身
+        """
+        self.load()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='auction-expiry', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stopped:
+            due = self.next_due()
+            delay = None if due is None else due - time.time()
+            if delay is None or delay > 0:
+                self._wake.wait(delay)
+                self._wake.clear()
+                continue
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"结束到期拍卖失败: {str(e)}")
+                self._wake.wait(self.retry_delay)
+                self._wake.clear()
+
+    def close(self) -> None:
+        """停止后台线程"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict:
+        """
+        获取调度器统计
+
+        Returns:
+            Dict: 待到期数量、已结束数量、批次数、重新入堆次数、最大结束延迟等
+        """
+        with self._lock:
+            scheduled = len(self._heap)
+            next_due = self._heap[0][0] if self._heap else None
+        return {
+            'scheduled': scheduled,
+            'next_due_in': None if next_due is None else max(0.0, next_due - time.time()),
+            'ended': self._ended,
+            'batches': self._batches,
+            'rescheduled': self._rescheduled,
+            'max_lag': self._max_lag,
+            'batch_size': self.batch_size
+        }
+
+
+# 每个数据库管理器最多运行一个调度器
+_schedulers: Dict[object, AuctionExpiryScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def start_expiry_scheduler(db_manager) -> AuctionExpiryScheduler:
+    """
+    启动(或获取已启动的)数据库对应的拍卖到期调度器,关闭数据库时自动停止
+
+    Args:
+        db_manager: 数据库管理器实例
+
+    Returns:
+        AuctionExpiryScheduler: 调度器
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(db_manager)
+        if scheduler is None:
+            scheduler = AuctionExpiryScheduler(db_manager)
+            _schedulers[db_manager] = scheduler
+
+            def _close():
+                with _schedulers_lock:
+                    _schedulers.pop(db_manager, None)
+                scheduler.close()
+            db_manager.on_close(_close)
+    scheduler.start()
+    return scheduler
+
+
+def get_expiry_scheduler(db_manager) -> Optional[AuctionExpiryScheduler]:
+    """
+    获取数据库对应的已启动调度器
+
+    Args:
+        db_manager: 数据库管理器实例
+
+    Returns:
+        Optional[AuctionExpiryScheduler]: 未启动时返回None
+    """
+    with _schedulers_lock:
+        return _schedulers.get(db_manager)
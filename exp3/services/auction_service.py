@@ -3,9 +3,39 @@ Auction Service - 拍卖服务层
 处理拍卖相关的业务逻辑
 """
 
+import json
+import sqlite3
 from typing import Optional, List, Dict
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from models.auction import Auction, AuctionStatus
+from config.settings import AUCTION_CONFIG
+from .bid_engine import BidEngine, get_bid_engine, NOW_SQL
+from .auction_scheduler import get_expiry_scheduler
+from .event_bus import EventBus, get_event_bus, publish_after_commit, auction_topic, user_topic
+from .outbox import OutboxDispatcher, get_outbox_dispatcher
+from .unit_of_work import UnitOfWork
+
+# 拍卖时间以 UTC 存储,格式与 CURRENT_TIMESTAMP 一致
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 拍卖列表对外公开的字段(领先者的最高出价 max_bid 不公开)
+PUBLIC_COLUMNS = ', '.join(
+    f'a.{column}' for column in (
+        'auction_id', 'product_id', 'seller_id', 'start_price', 'current_bid', 'current_bidder_id',
+        'bid_increment', 'start_time', 'end_time', 'status'
+    )
+)
+
+
+def _parse_utc(value) -> Optional[datetime]:
+    """将数据库中的 UTC 时间转换为本地时间(与 Auction 模型使用的 datetime.now() 一致)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
 
 
 class AuctionService:
@@ -13,165 +43,433 @@ class AuctionService:
     拍卖服务类
     提供拍卖创建、出价、结束等功能
     """
-    
-    def __init__(self, db_manager):
+
+    def __init__(self, db_manager, bid_engine: Optional[BidEngine] = None,
+                 event_bus: Optional[EventBus] = None, outbox: Optional[OutboxDispatcher] = None):
         """
         初始化拍卖服务
-        
+
         Args:
             db_manager: 数据库管理器实例
+            bid_engine: 出价引擎(默认使用数据库共享的引擎)
+            event_bus: 事件总线(默认使用数据库共享的总线)
+            outbox: 服务消息发件箱(默认使用数据库共享的投递器)
         """
         self.db = db_manager
-    
+        # 工作单元内的服务共享底层数据库的引擎与调度器(同一线程内出价仍在工作单元事务中)
+        self._base_db = db_manager.db if isinstance(db_manager, UnitOfWork) else db_manager
+        if bid_engine is None:
+            bid_engine = get_bid_engine(self._base_db)
+        self.bid_engine = bid_engine
+        self.event_bus = event_bus or get_event_bus(self._base_db)
+        self.outbox = outbox or get_outbox_dispatcher(self._base_db)
+
     def create_auction(self, seller_id: int, product_id: int,
                       start_price: float, duration_hours: int,
                       bid_increment: float = 1.0) -> Optional[int]:
         """
         创建拍卖
-        
+
         Args:
             seller_id: 卖家ID
             product_id: 商品ID
             start_price: 起拍价
             duration_hours: 拍卖持续时间(小时)
             bid_increment: 最小加价幅度
-            
+
         Returns:
             Optional[int]: 成功返回拍卖ID,失败返回None
         """
-        # TODO: 实现创建拍卖逻辑
-        # 1. 验证商品是否存在且未被拍卖
-        # 2. 创建拍卖记录
-        # 3. 更新商品状态为IN_AUCTION
-        pass
-    
-    def place_bid(self, auction_id: int, bidder_id: int, 
+        min_hours = AUCTION_CONFIG.get('min_duration_hours', 1)
+        max_hours = AUCTION_CONFIG.get('max_duration_hours', 168)
+        if not min_hours <= duration_hours <= max_hours:
+            return None
+        if start_price <= 0 or bid_increment <= 0:
+            return None
+        end_time = (datetime.now(timezone.utc) + timedelta(hours=duration_hours)).strftime(TIME_FORMAT)
+        try:
+            with self.db.transaction() as conn:
+                # 1. 商品属于该卖家、可售且支持拍卖时才转为拍卖中
+                product = conn.execute("""
+                    UPDATE products
+                    SET status = 'in_auction', updated_at = CURRENT_TIMESTAMP
+                    WHERE product_id = ? AND seller_id = ? AND status = 'available' AND auctionable = 1
+                    RETURNING product_id
+                """, (product_id, seller_id)).fetchone()
+                if product is None:
+                    return None
+                # 2. 创建拍卖记录
+                auction_id = conn.execute("""
+                    INSERT INTO auctions (product_id, seller_id, start_price, current_bid,
+                                          bid_increment, end_time)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    product_id, seller_id, round(start_price, 2), round(start_price, 2),
+                    round(bid_increment, 2), end_time
+                )).lastrowid
+        except sqlite3.IntegrityError:
+            return None  # 该商品已有拍卖记录
+        except Exception as e:
+            print(f"创建拍卖失败: {str(e)}")
+            return None
+        # 3. 登记到期时间(调度器运行时在结束时间自动结束拍卖)
+        scheduler = get_expiry_scheduler(self._base_db)
+        if scheduler is not None:
+            scheduler.schedule(auction_id, end_time)
+        return auction_id
+
+    def place_bid(self, auction_id: int, bidder_id: int,
                  bid_amount: float) -> bool:
         """
         出价
-        
+
+        同一拍卖的出价由出价引擎串行处理: 在写事务中校验拍卖进行中且
+        金额不低于当前价格+最小加价幅度(首次出价不低于起拍价),
+        出价历史在同一事务中写入。领先者设置了代理出价且最高出价不低于本次出价时,
+        出价仍被记录,但领先者自动加价,本次出价不成功。
+
         Args:
             auction_id: 拍卖ID
             bidder_id: 出价者ID
             bid_amount: 出价金额
-            
+
+        Returns:
+            bool: 出价是否成功(出价后是否领先)
+        """
+        outcome = self.bid_engine.place_bid(auction_id, bidder_id, bid_amount)
+        self._publish_bid(auction_id, outcome)
+        return outcome is not None and not outcome['outbid']
+
+    def place_proxy_bid(self, auction_id: int, bidder_id: int,
+                        max_amount: float) -> Optional[Dict]:
+        """
+        代理出价(自动出价)
+
+        设置最高出价后由系统按最小加价幅度代为出价: 与领先者的代理出价竞价时
+        直接比较双方最高出价得出结果,不逐次加价,也不逐次写入出价历史。
+        领先者再次调用时提高自己的最高出价,当前价格不变。
+
+        Args:
+            auction_id: 拍卖ID
+            bidder_id: 出价者ID
+            max_amount: 最高出价
+
+        Returns:
+            Optional[Dict]: 出价结果(leader_id、current_bid、outbid 等),出价无效时返回None
+        """
+        outcome = self.bid_engine.place_bid(auction_id, bidder_id, max_amount=max_amount)
+        self._publish_bid(auction_id, outcome)
+        return self._public_outcome(outcome, bidder_id)
+
+    def _publish_bid(self, auction_id: int, outcome: Optional[Dict]) -> None:
+        """通知拍卖的实时信息流(不含领先者的最高出价)"""
+        if outcome is None or not outcome['bids']:
+            return
+        publish_after_commit(self.db, self.event_bus, 'bid', {
+            'auction_id': auction_id,
+            'current_bid': outcome['current_bid'],
+            'leader_id': outcome['leader_id'],
+            'bids': [{'bidder_id': bidder, 'bid_amount': amount, 'is_proxy': is_proxy}
+                     for bidder, amount, is_proxy in outcome['bids']]
+        }, auction_topic(auction_id))
+
+    def preview_bid(self, auction_id: int, bidder_id: int, bid_amount: float = None,
+                    max_amount: float = None) -> Optional[Dict]:
+        """
+        预览出价结果(不写入任何数据)
+
+        Args:
+            auction_id: 拍卖ID
+            bidder_id: 出价者ID
+            bid_amount: 出价金额(仅预览代理出价时为None)
+            max_amount: 代理出价的最高金额
+
+        Returns:
+            Optional[Dict]: 按当前状态出价的结果,出价无效时返回None
+        """
+        if bid_amount is None and max_amount is None:
+            return None
+        auction = self.get_auction_by_id(auction_id)
+        if auction is None:
+            return None
+        outcome = auction.resolve_bid(bidder_id, bid_amount, max_amount)
+        return self._public_outcome(outcome, bidder_id)
+
+    @staticmethod
+    def _public_outcome(outcome: Optional[Dict], bidder_id: int) -> Optional[Dict]:
+        """出价结果对出价者公开的部分(只有领先者本人能看到自己的最高出价)"""
+        if outcome is None:
+            return None
+        leading = outcome['leader_id'] == bidder_id
+        return {
+            'leader_id': outcome['leader_id'],
+            'current_bid': outcome['current_bid'],
+            'outbid': outcome['outbid'],
+            'is_leading': leading,
+            'max_bid': outcome['leader_max'] if leading else None,
+            'bids': [{'bidder_id': bidder, 'bid_amount': amount, 'is_proxy': is_proxy}
+                     for bidder, amount, is_proxy in outcome['bids']]
+        }
+
+    def get_bid_engine_stats(self) -> Dict:
+        """
+        获取出价引擎统计(成功/被拒/快速拒绝次数等)
+
         Returns:
-            bool: 出价是否成功
-        """
-        # TODO: 实现出价逻辑
-        # 1. 验证拍卖是否进行中
-        # 2. 验证出价是否有效(高于当前价格+最小加价幅度)
-        # 3. 记录出价历史
-        # 4. 更新当前最高出价
-        pass
-    
+            Dict: 统计信息
+        """
+        return self.bid_engine.stats()
+
     def get_auction_by_id(self, auction_id: int) -> Optional[Auction]:
         """
         根据ID获取拍卖
-        
+
         Args:
             auction_id: 拍卖ID
-            
+
         Returns:
             Optional[Auction]: 拍卖对象
         """
-        # TODO: 实现获取拍卖逻辑
-        pass
-    
+        rows = self.db.execute_query("SELECT * FROM auctions WHERE auction_id = ?", (auction_id,))
+        return self._to_auction(rows[0]) if rows else None
+
     def get_auction_by_product(self, product_id: int) -> Optional[Auction]:
         """
         根据商品ID获取拍卖
-        
+
         Args:
             product_id: 商品ID
-            
+
         Returns:
             Optional[Auction]: 拍卖对象
         """
-        # TODO: 实现获取商品拍卖逻辑
-        pass
-    
-    def get_active_auctions(self, limit: int = 20, 
+        rows = self.db.execute_query("SELECT * FROM auctions WHERE product_id = ?", (product_id,))
+        return self._to_auction(rows[0]) if rows else None
+
+    def get_active_auctions(self, limit: int = 20,
                            offset: int = 0) -> List[Dict]:
         """
-        获取进行中的拍卖列表
-        
+        获取进行中的拍卖列表(即将结束的在前)
+
         Args:
             limit: 返回数量限制
             offset: 偏移量
-            
+
         Returns:
             List[Dict]: 拍卖列表
         """
-        # TODO: 实现获取进行中拍卖逻辑
-        pass
-    
+        return self.db.execute_query(f"""
+            SELECT {PUBLIC_COLUMNS}, p.title, p.category, p.images
+            FROM auctions a
+            JOIN products p ON a.product_id = p.product_id
+            WHERE a.status = 'active' AND a.end_time > {NOW_SQL}
+            ORDER BY a.end_time
+            LIMIT ? OFFSET ?
+        """, (limit, offset))
+
     def get_bid_history(self, auction_id: int) -> List[Dict]:
         """
-        获取拍卖的出价历史
-        
+        获取拍卖的出价历史(最新的在前)
+
         Args:
             auction_id: 拍卖ID
-            
+
         Returns:
             List[Dict]: 出价历史列表
         """
-        # TODO: 实现获取出价历史逻辑
-        pass
-    
+        return self.db.execute_query("""
+            SELECT b.bid_id, b.auction_id, b.bidder_id, u.username AS bidder_name,
+                   b.bid_amount, b.is_proxy, b.bid_time
+            FROM bid_history b
+            JOIN users u ON b.bidder_id = u.user_id
+            WHERE b.auction_id = ?
+            ORDER BY b.bid_time DESC, b.bid_id DESC
+        """, (auction_id,))
+
     def get_user_bids(self, user_id: int) -> List[Dict]:
         """
         获取用户参与的拍卖
-        
+
         Args:
             user_id: 用户ID
-            
+
         Returns:
-            List[Dict]: 拍卖列表
+            List[Dict]: 拍卖列表(含用户的最高出价、是否领先,领先时含代理出价上限)
         """
-        # TODO: 实现获取用户拍卖逻辑
-        pass
-    
+        return self.db.execute_query(f"""
+            SELECT {PUBLIC_COLUMNS}, p.title, MAX(b.bid_amount) AS my_max_bid, COUNT(*) AS my_bid_count,
+                   a.current_bidder_id = ? AS is_leading,
+                   CASE WHEN a.current_bidder_id = ? THEN a.max_bid END AS my_proxy_max
+            FROM bid_history b
+            JOIN auctions a ON a.auction_id = b.auction_id
+            JOIN products p ON a.product_id = p.product_id
+            WHERE b.bidder_id = ?
+            GROUP BY b.auction_id
+            ORDER BY a.end_time DESC
+        """, (user_id, user_id, user_id))
+
     def end_auction(self, auction_id: int) -> bool:
         """
         结束拍卖
-        
+
+        拍卖到期后: 有出价时为中标者创建订单并通知,商品扣减库存;
+        无出价时商品恢复可售。
+
         Args:
             auction_id: 拍卖ID
-            
+
         Returns:
-            bool: 结束是否成功
-        """
-        # TODO: 实现结束拍卖逻辑
-        # 1. 检查拍卖是否已到结束时间
-        # 2. 如果有出价,创建订单给中标者
-        # 3. 更新拍卖状态为ENDED
-        # 4. 更新商品状态
-        pass
-    
-    def cancel_auction(self, auction_id: int, seller_id: int, 
+            bool: 结束是否成功(拍卖不存在、未到结束时间或已结束时返回False)
+        """
+        return bool(self.end_auctions([auction_id]))
+
+    def end_auctions(self, auction_ids: List[int]) -> List[int]:
+        """
+        批量结束到期的拍卖(同一事务)
+
+        只结束已到结束时间且仍在进行中的拍卖;到期判断与出价校验
+        使用同一时间基准,因此结束后到达的出价一定被拒绝。
+
+        Args:
+            auction_ids: 拍卖ID列表
+
+        Returns:
+            List[int]: 实际结束的拍卖ID(失败时返回空列表)
+        """
+        ids = list(dict.fromkeys(auction_ids))
+        if not ids:
+            return []
+        try:
+            with self.db.transaction() as conn:
+                # 1. 条件结束: 未到期、已结束或已取消的拍卖不受影响
+                ended = conn.execute(f"""
+                    UPDATE auctions SET status = 'ended'
+                    WHERE auction_id IN ({', '.join('?' * len(ids))})
+                      AND status = 'active' AND end_time <= {NOW_SQL}
+                    RETURNING auction_id, product_id, seller_id, current_bid, current_bidder_id
+                """, ids).fetchall()
+                # 2a. 流拍: 商品恢复可售
+                unsold = [row['product_id'] for row in ended if row['current_bidder_id'] is None]
+                if unsold:
+                    conn.execute(f"""
+                        UPDATE products SET status = 'available', updated_at = CURRENT_TIMESTAMP
+                        WHERE product_id IN ({', '.join('?' * len(unsold))}) AND status = 'in_auction'
+                    """, unsold)
+                # 2b. 成交: 为中标者创建订单,商品扣减库存
+                for row in ended:
+                    if row['current_bidder_id'] is not None:
+                        self._settle_winner(conn, row['auction_id'], row)
+        except Exception as e:
+            print(f"结束拍卖失败: {str(e)}")
+            return []
+        for row in ended:
+            self.bid_engine.forget(row['auction_id'])
+            winner = row['current_bidder_id']
+            topics = [auction_topic(row['auction_id'])] + ([user_topic(winner)] if winner else [])
+            publish_after_commit(self.db, self.event_bus, 'auction_ended', {
+                'auction_id': row['auction_id'],
+                'winner_id': winner,
+                'final_price': row['current_bid'] if winner else None
+            }, *topics)
+        return [row['auction_id'] for row in ended]
+
+    def _settle_winner(self, conn, auction_id: int, auction) -> int:
+        """为中标者创建订单并将服务消息写入发件箱(在调用方事务中执行)"""
+        conn.execute("""
+            UPDATE products
+            SET stock = MAX(stock - 1, 0),
+                status = CASE WHEN stock <= 1 THEN 'sold_out' ELSE 'available' END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE product_id = ?
+        """, (auction['product_id'],))
+        # 收货地址由中标者支付时确认
+        order_id = conn.execute("""
+            INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, status, shipping_address)
+            VALUES (?, ?, ?, 1, ?, 'pending', '')
+        """, (
+            auction['current_bidder_id'], auction['seller_id'], auction['product_id'], auction['current_bid']
+        )).lastrowid
+        content = json.dumps({
+            'key': 'auction.service_auction_won',
+            'params': {'auction_id': auction_id, 'order_id': order_id, 'price': auction['current_bid']}
+        }, ensure_ascii=False)
+        # 与订单处于同一事务写入发件箱,提交后投递并发布到会话/用户主题
+        self.outbox.enqueue(auction['seller_id'], auction['current_bidder_id'], content)
+        return order_id
+
+    def cancel_auction(self, auction_id: int, seller_id: int,
                       reason: str) -> bool:
         """
-        取消拍卖
-        
+        取消拍卖(仅限尚无出价的进行中拍卖)
+
         Args:
             auction_id: 拍卖ID
             seller_id: 卖家ID(验证权限)
             reason: 取消原因
-            
+
         Returns:
             bool: 取消是否成功
         """
-        # TODO: 实现取消拍卖逻辑
-        pass
-    
-    def check_expired_auctions(self) -> int:
+        try:
+            with self.bid_engine.lock_for(auction_id), self.db.transaction() as conn:
+                auction = conn.execute("""
+                    UPDATE auctions SET status = 'cancelled'
+                    WHERE auction_id = ? AND seller_id = ? AND status = 'active'
+                      AND current_bidder_id IS NULL
+                    RETURNING product_id
+                """, (auction_id, seller_id)).fetchone()
+                if auction is None:
+                    return False
+                conn.execute("""
+                    UPDATE products SET status = 'available', updated_at = CURRENT_TIMESTAMP
+                    WHERE product_id = ? AND status = 'in_auction'
+                """, (auction['product_id'],))
+        except Exception as e:
+            print(f"取消拍卖失败: {str(e)}")
+            return False
+        self.bid_engine.forget(auction_id)
+        print(f"✓ 拍卖ID {auction_id} 已取消, 原因: {reason}")
+        return True
+
+    def check_expired_auctions(self, batch_size: int = None) -> int:
         """
-        检查并自动结束过期的拍卖
-        
+        检查并自动结束过期的拍卖(按批结束)
+
+        进程内由拍卖到期调度器按结束时间触发;本方法用于补偿调度器未运行期间到期的拍卖。
+
+        Args:
+            batch_size: 每批结束的拍卖数量
+
         Returns:
             int: 结束的拍卖数量
         """
-        # TODO: 实现检查过期拍卖逻辑
-        # 可以作为定时任务运行
-        pass
+        batch_size = batch_size or AUCTION_CONFIG.get('expiry_batch_size', 200)
+        rows = self.db.execute_query(f"""
+            SELECT auction_id FROM auctions
+            WHERE status = 'active' AND end_time <= {NOW_SQL}
+            ORDER BY end_time
+        """)
+        ids = [row['auction_id'] for row in rows]
+        return sum(
+            len(self.end_auctions(ids[i:i + batch_size]))
+            for i in range(0, len(ids), batch_size)
+        )
+
+    @staticmethod
+    def _to_auction(row: Dict) -> Auction:
+        """将数据库记录转换为 Auction 对象"""
+        auction = Auction(
+            product_id=row['product_id'],
+            seller_id=row['seller_id'],
+            start_price=row['start_price'],
+            duration_hours=0,
+            bid_increment=row['bid_increment']
+        )
+        auction.auction_id = row['auction_id']
+        auction.current_bid = row['current_bid']
+        auction.current_bidder_id = row['current_bidder_id']
+        auction.max_bid = row['max_bid']
+        auction.start_time = _parse_utc(row['start_time']) or auction.start_time
+        auction.end_time = _parse_utc(row['end_time']) or auction.end_time
+        auction.status = AuctionStatus(row['status']) if row['status'] else AuctionStatus.ACTIVE
+        return auction
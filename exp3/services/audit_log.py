@@ -0,0 +1,194 @@
+"""
+Audit Log Writer - 管理员操作日志写入器
+日志先进入有界队列,由后台线程合并为批量 executemany 写入 admin_logs
+"""
+
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import AUDIT_LOG_CONFIG
+
+INSERT_SQL = (
+    "INSERT INTO admin_logs (admin_id, action_type, details, created_at) VALUES (?, ?, ?, ?)"
+)
+
+
+class AuditLogWriter:
+    """
+    管理员操作日志写入器(异步批量)
+
+    - record() 只把日志放入有界队列;队列已满时阻塞调用方(背压),不丢弃日志
+    - 后台线程按时间间隔写入;队列积压达到 batch_size 时提前唤醒
+    - 每批最多 batch_size 条,一次 executemany 提交;整批失败时逐条重试,只跳过本身无法写入的日志
+    - flush() 等待此前记录的日志全部写入;close() 停止线程并写入剩余日志
+    - synchronous=True 时 record() 直接写库,便于测试
+    """
+
+    def __init__(self, db_manager, batch_size: int = None, flush_interval: float = None,
+                 max_queue: int = None, synchronous: Optional[bool] = None):
+        """
+        初始化日志写入器
+
+        Args:
+            db_manager: 数据库管理器实例
+            batch_size: 每批写入的最大条数
+            flush_interval: 定时写入间隔(秒)
+            max_queue: 队列容量
+            synchronous: 是否同步写入(默认取配置 AUDIT_LOG_CONFIG['async'] 的反值)
+        """
+        self.db = db_manager
+        self.batch_size = batch_size or AUDIT_LOG_CONFIG.get('batch_size', 200)
+        self.flush_interval = flush_interval or AUDIT_LOG_CONFIG.get('flush_interval', 1.0)
+        if synchronous is None:
+            synchronous = not AUDIT_LOG_CONFIG.get('async', True)
+        self.synchronous = synchronous
+        self._queue: queue.Queue = queue.Queue(
+            maxsize=max_queue or AUDIT_LOG_CONFIG.get('max_queue', 10000)
+        )
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # 统计信息
+        self._written = 0
+        self._batches = 0
+        self._failures = 0
+
+    def record(self, admin_id: int, action_type: str, details: str) -> None:
+        """
+        记录一条管理员操作
+
+        Args:
+            admin_id: 管理员ID
+            action_type: 操作类型
+            details: 操作详情
+        """
+        # 记录操作发生的时间(UTC,与 CURRENT_TIMESTAMP 格式一致),而不是写入时间
+        created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        entry = (admin_id, action_type, details, created_at)
+        if self.synchronous or self._stopped:
+            with self._write_lock:
+                self._write([entry])
+            return
+        self._ensure_worker()
+        self._queue.put(entry)
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def _write(self, batch: List[Tuple]) -> None:
+        """写入一批日志(调用方持有 _write_lock)"""
+        self.db.execute_many(INSERT_SQL, batch)
+        self._written += len(batch)
+        self._batches += 1
+
+    def _take_batch(self) -> List[Tuple]:
+        """从队列中取出最多 batch_size 条日志"""
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_pending(self) -> None:
+        """在写锁内按记录顺序写入队列中的全部日志;失败时打印错误,不影响业务操作"""
+        with self._write_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return
+                try:
+                    self._write(batch)
+                except Exception:
+                    self._write_one_by_one(batch)
+
+    def _write_one_by_one(self, batch: List[Tuple]) -> None:
+        """整批写入失败时逐条写入,失败的日志打印错误并计入失败数(调用方持有 _write_lock)"""
+        for entry in batch:
+            try:
+                self.db.execute_insert(INSERT_SQL, entry)
+                self._written += 1
+            except Exception as e:
+                self._failures += 1
+                print(f"记录管理员日志失败: {str(e)}")
+
+    def flush(self) -> None:
+        """写入此前记录的全部日志(与后台线程共用写锁,返回时已全部提交)"""
+        self._write_pending()
+
+    def _ensure_worker(self) -> None:
+        """首次记录日志时启动后台写入线程"""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='audit-log-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._write_pending()
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余日志"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def stats(self) -> Dict:
+        """
+        获取写入器统计信息
+
+        Returns:
+            Dict: 待写入条数、已写入条数、批次数、写入失败条数等
+        """
+        return {
+            'pending': self._queue.qsize(),
+            'written': self._written,
+            'batches': self._batches,
+            'failures': self._failures,
+            'synchronous': self.synchronous,
+            'batch_size': self.batch_size
+        }
+
+
+# 每个数据库管理器共享一个写入器,关闭数据库时自动写入剩余日志并移除
+_writers: Dict[object, AuditLogWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_audit_log_writer(db_manager) -> AuditLogWriter:
+    """
+    获取数据库管理器对应的共享日志写入器
+
+    Args:
+        db_manager: 数据库管理器实例(工作单元使用其底层数据库的写入器)
+
+    Returns:
+        AuditLogWriter: 日志写入器
+    """
+    from .unit_of_work import UnitOfWork
+    if isinstance(db_manager, UnitOfWork):
+        db_manager = db_manager.db
+    with _writers_lock:
+        writer = _writers.get(db_manager)
+        if writer is None:
+            writer = AuditLogWriter(db_manager)
+            _writers[db_manager] = writer
+
+            def _close():
+                with _writers_lock:
+                    _writers.pop(db_manager, None)
+                writer.close()
+            db_manager.on_close(_close)
+        return writer
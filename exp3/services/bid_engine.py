@@ -0,0 +1,181 @@
+"""
+Bid Engine - 拍卖出价引擎
+按拍卖串行化出价: 同一拍卖的出价在进程内排队,在写事务中校验并计算结果,与出价历史同一事务提交
+"""
+
+import threading
+from typing import Dict, Optional
+
+from config.settings import AUCTION_CONFIG
+from models.auction import resolve_bid
+
+# 当前 UTC 时间(毫秒精度),与 'YYYY-MM-DD HH:MM:SS' 格式的 end_time 按字符串比较
+NOW_SQL = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+# 进行中且未到结束时间、出价者不是卖家的拍卖(在写事务中读取,读取到提交之间价格不会变化)
+BIDDABLE_SQL = f"""
+    SELECT start_price, current_bid, current_bidder_id, max_bid, bid_increment
+    FROM auctions
+    WHERE auction_id = ? AND status = 'active' AND end_time > {NOW_SQL} AND seller_id <> ?
+"""
+
+
+class BidEngine:
+    """
+    拍卖出价引擎
+
+    - 按 auction_id 分段加锁,同一拍卖的出价依次处理,不同拍卖的出价互不等待
+    - 记录每个拍卖的最低有效出价与当前领先者: 当前价只增不减,缓存值只会偏低,
+      低于缓存值的出价、领先者自己的普通出价一定无效,直接拒绝而不占用数据库写锁
+    - 出价在写事务(BEGIN IMMEDIATE)中读取拍卖并按 resolve_bid 计算结果,
+      代理出价之间的竞价一次算出,最多写入两条 bid_history;
+      多进程部署时仍由数据库写锁保证正确性
+    - SQLite 同一时间只允许一个写事务: 写事务在进程内排队,
+      避免多个连接同时抢写锁时的忙等重试
+    """
+
+    def __init__(self, db_manager, lock_stripes: int = None):
+        """
+        初始化出价引擎
+
+        Args:
+            db_manager: 数据库管理器实例
+            lock_stripes: 分段锁数量
+        """
+        self.db = db_manager
+        stripes = lock_stripes or AUCTION_CONFIG.get('bid_lock_stripes', 64)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._write_lock = threading.Lock()  # 出价写事务在进程内排队
+        self._leading: Dict[int, tuple] = {}  # auction_id -> (最低有效出价(下界), 领先者ID)
+        # 统计信息(在分段锁内更新,读取时为近似值)
+        self._accepted = 0
+        self._rejected = 0
+        self._fast_rejected = 0
+        self._outbid = 0
+        self._bid_rows = 0
+
+    def lock_for(self, auction_id: int) -> threading.Lock:
+        """
+        获取拍卖对应的分段锁(结束/取消拍卖时与出价串行)
+
+        Args:
+            auction_id: 拍卖ID
+
+        Returns:
+            threading.Lock: 分段锁
+        """
+        return self._locks[auction_id % len(self._locks)]
+
+    def place_bid(self, auction_id: int, bidder_id: int, bid_amount: Optional[float] = None,
+                  max_amount: Optional[float] = None) -> Optional[Dict]:
+        """
+        出价(普通出价或代理出价)
+
+        Args:
+            auction_id: 拍卖ID
+            bidder_id: 出价者ID
+            bid_amount: 出价金额(仅设置代理出价时为None)
+            max_amount: 代理出价的最高金额
+
+        Returns:
+            Optional[Dict]: 出价结果(见 resolve_bid),出价无效时返回None
+        """
+        if bid_amount is None and max_amount is None:
+            return None
+        lowest = round(float(bid_amount if bid_amount is not None else max_amount), 2)
+        if lowest <= 0:
+            return None
+        with self.lock_for(auction_id):
+            min_next, leader = self._leading.get(auction_id, (0.0, None))
+            if lowest < min_next or (bidder_id == leader and bid_amount is not None):
+                self._fast_rejected += 1
+                return None
+            try:
+                with self._write_lock, self.db.transaction() as conn:
+                    row = conn.execute(BIDDABLE_SQL, (auction_id, bidder_id)).fetchone()
+                    outcome = row and resolve_bid(
+                        row['start_price'], row['current_bid'], row['current_bidder_id'], row['max_bid'],
+                        row['bid_increment'], bidder_id, bid_amount, max_amount
+                    )
+                    if outcome:
+                        conn.execute(
+                            "UPDATE auctions SET current_bid = ?, current_bidder_id = ?, max_bid = ? "
+                            "WHERE auction_id = ?",
+                            (outcome['current_bid'], outcome['leader_id'], outcome['leader_max'], auction_id)
+                        )
+                        conn.executemany(
+                            "INSERT INTO bid_history (auction_id, bidder_id, bid_amount, is_proxy) "
+                            "VALUES (?, ?, ?, ?)",
+                            [(auction_id, bidder, amount, int(is_proxy))
+                             for bidder, amount, is_proxy in outcome['bids']]
+                        )
+            except Exception as e:
+                print(f"出价失败: {str(e)}")
+                return None
+            if not outcome:
+                self._rejected += 1
+                return None
+            self._leading[auction_id] = (
+                round(outcome['current_bid'] + row['bid_increment'], 2), outcome['leader_id']
+            )
+            if outcome['outbid']:
+                self._outbid += 1
+            else:
+                self._accepted += 1
+            self._bid_rows += len(outcome['bids'])
+            return outcome
+
+    def forget(self, auction_id: int) -> None:
+        """
+        移除拍卖的缓存(拍卖结束或取消后调用)
+
+        Args:
+            auction_id: 拍卖ID
+        """
+        with self.lock_for(auction_id):
+            self._leading.pop(auction_id, None)
+
+    def stats(self) -> Dict:
+        """
+        获取出价统计
+
+        Returns:
+            Dict: 成功/被代理出价超过/被拒(数据库校验)/快速拒绝次数、写入的出价记录数、跟踪的拍卖数
+        """
+        return {
+            'accepted': self._accepted,
+            'outbid': self._outbid,
+            'rejected': self._rejected,
+            'fast_rejected': self._fast_rejected,
+            'bid_rows': self._bid_rows,
+            'tracked_auctions': len(self._leading),
+            'lock_stripes': len(self._locks)
+        }
+
+
+# 每个数据库管理器共享一个出价引擎,保证同一进程内对同一拍卖的出价串行
+_engines: Dict[object, BidEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_bid_engine(db_manager) -> BidEngine:
+    """
+    获取数据库管理器对应的共享出价引擎
+
+    Args:
+        db_manager: 数据库管理器实例
+
+    Returns:
+        BidEngine: 出价引擎
+    """
+    with _engines_lock:
+        engine = _engines.get(db_manager)
+        if engine is None:
+            engine = BidEngine(db_manager)
+            _engines[db_manager] = engine
+
+            def _close():
+                with _engines_lock:
+                    _engines.pop(db_manager, None)
+            db_manager.on_close(_close)
+        return engine
@@ -0,0 +1,162 @@
+"""
+Cart Service - 购物车服务层
+多商品加入购物车,一次结算: 同一事务中扣减全部库存、按商品创建订单并清空购物车
+"""
+
+from typing import Optional, List, Dict
+
+from .order_service import OrderService
+
+
+class CartService:
+    """
+    购物车服务类
+    提供加入/修改/移除购物车商品与结算功能
+    """
+    
+    def __init__(self, db_manager, order_service: Optional[OrderService] = None):
+        """
+        初始化购物车服务
+        
+        Args:
+            db_manager: 数据库管理器实例
+            order_service: 订单服务(默认基于 db_manager 创建)
+        """
+        self.db = db_manager
+        self.order_service = order_service or OrderService(db_manager)
+    
+    def add_item(self, user_id: int, product_id: int, quantity: int = 1) -> bool:
+        """
+        加入购物车(已在购物车中时累加数量)
+        
+        Args:
+            user_id: 用户ID
+            product_id: 商品ID
+            quantity: 数量
+            
+        Returns:
+            bool: 是否加入成功(商品不存在、不可售或是自己的商品时失败)
+        """
+        if quantity <= 0:
+            return False
+        try:
+            return self.db.execute_update("""
+                INSERT INTO cart_items (user_id, product_id, quantity)
+                SELECT ?, product_id, ? FROM products
+                WHERE product_id = ? AND status = 'available' AND seller_id <> ?
+                ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            """, (user_id, quantity, product_id, user_id)) > 0
+        except Exception as e:
+            print(f"加入购物车失败: {str(e)}")
+            return False
+    
+    def update_quantity(self, user_id: int, product_id: int, quantity: int) -> bool:
+        """
+        修改购物车中商品的数量(0 表示移除)
+        
+        Args:
+            user_id: 用户ID
+            product_id: 商品ID
+            quantity: 新的数量
+            
+        Returns:
+            bool: 是否修改成功
+        """
+        if quantity <= 0:
+            return self.remove_item(user_id, product_id)
+        return self.db.execute_update(
+            "UPDATE cart_items SET quantity = ? WHERE user_id = ? AND product_id = ?",
+            (quantity, user_id, product_id)
+        ) > 0
+    
+    def remove_item(self, user_id: int, product_id: int) -> bool:
+        """
+        从购物车移除商品
+        
+        Args:
+            user_id: 用户ID
+            product_id: 商品ID
+            
+        Returns:
+            bool: 是否移除成功
+        """
+        return self.db.execute_delete(
+            "DELETE FROM cart_items WHERE user_id = ? AND product_id = ?", (user_id, product_id)
+        ) > 0
+    
+    def clear(self, user_id: int) -> int:
+        """
+        清空购物车
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            int: 移除的商品数
+        """
+        return self.db.execute_delete("DELETE FROM cart_items WHERE user_id = ?", (user_id,))
+    
+    def get_cart(self, user_id: int) -> Dict:
+        """
+        获取购物车(按加入时间排序)
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            Dict: items(商品信息、数量、小计、是否可结算)、total_price(可结算商品合计)、
+                count(商品种类数)
+        """
+        rows = self.db.execute_query("""
+            SELECT c.product_id, c.quantity, c.added_at, p.title, p.price, p.stock, p.status, p.seller_id
+            FROM cart_items c JOIN products p ON p.product_id = c.product_id
+            WHERE c.user_id = ?
+            ORDER BY c.added_at, c.product_id
+        """, (user_id,))
+        items: List[Dict] = []
+        for row in rows:
+            item = dict(row)
+            item['subtotal'] = item['price'] * item['quantity']
+            item['available'] = item['status'] == 'available' and item['stock'] >= item['quantity']
+            items.append(item)
+        return {
+            'items': items,
+            'total_price': sum(item['subtotal'] for item in items if item['available']),
+            'count': len(items)
+        }
+    
+    def checkout(self, buyer_id: int, shipping_address: str) -> Optional[Dict]:
+        """
+        结算购物车
+        
+        在一个事务中为购物车中的全部商品下单(每个商品一个订单,每个卖家一条服务消息)并清空购物车;
+        任一商品不可售或库存不足时不创建任何订单,购物车保持不变。
+        
+        Args:
+            buyer_id: 买家ID
+            shipping_address: 收货地址
+            
+        Returns:
+            Optional[Dict]: 成功返回 order_ids 与 total_price,购物车为空或结算失败返回None
+        """
+        if not shipping_address:
+            return None
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT product_id, quantity FROM cart_items WHERE user_id = ? ORDER BY added_at, product_id",
+                (buyer_id,)
+            ).fetchall()
+            if not rows:
+                return None
+            order_ids = self.order_service.create_orders(
+                buyer_id, {row['product_id']: row['quantity'] for row in rows}, shipping_address
+            )
+            if not order_ids:
+                return None
+            conn.execute("DELETE FROM cart_items WHERE user_id = ?", (buyer_id,))
+            total = conn.execute(
+                f"SELECT SUM(total_price) AS total FROM orders "
+                f"WHERE order_id IN ({', '.join('?' * len(order_ids))})",
+                order_ids
+            ).fetchone()['total']
+        return {'order_ids': order_ids, 'total_price': total}
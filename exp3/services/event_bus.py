@@ -0,0 +1,337 @@
+"""
+Event Bus - 进程内事件总线
+消息发送、服务消息、拍卖出价提交后发布事件,订阅者(命令行实时查看、HTTP 推送等)
+通过 asyncio 异步迭代接收,无需轮询数据库
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from config.settings import EVENT_BUS_CONFIG
+
+# 队列已满时的处理策略
+DROP_OLDEST = 'drop_oldest'    # 丢弃最早的未读事件(实时信息流只关心最新状态)
+DROP_NEWEST = 'drop_newest'    # 丢弃新到达的事件
+DISCONNECT = 'disconnect'      # 关闭订阅,由订阅者重新从数据库加载后再订阅
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, DISCONNECT)
+
+
+def auction_topic(auction_id: int) -> str:
+    """拍卖的出价信息流"""
+    return f'auction:{auction_id}'
+
+
+def conversation_topic(user_id1: int, user_id2: int) -> str:
+    """两个用户之间的会话(与双方顺序无关)"""
+    low, high = sorted((user_id1, user_id2))
+    return f'conversation:{low}:{high}'
+
+
+def user_topic(user_id: int) -> str:
+    """用户收到的全部消息(含服务消息)"""
+    return f'user:{user_id}'
+
+
+class Subscription:
+    """
+    订阅
+
+    - 每个订阅有独立的有界队列,发布方在任意线程中入队,不会因订阅者处理慢而阻塞
+    - 队列已满时按 policy 丢弃事件或关闭订阅,dropped 记录丢弃数量;
+      事件带有全局递增的 seq,订阅者发现序号不连续时可从数据库补齐
+    - 在事件循环中通过 await get() 或 async for 接收事件
+    """
+
+    def __init__(self, bus: 'EventBus', topics: Iterable[str], loop: asyncio.AbstractEventLoop,
+                 maxsize: int, policy: str):
+        """
+        初始化订阅(由 EventBus.subscribe 创建)
+
+        Args:
+            bus: 事件总线
+            topics: 订阅的主题
+            loop: 接收事件的事件循环
+            maxsize: 队列容量
+            policy: 队列已满时的处理策略
+        """
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"未知的丢弃策略: {policy}")
+        self.bus = bus
+        self.topics = tuple(dict.fromkeys(topics))
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self._loop = loop
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+
+    def _offer(self, event: Dict) -> bool:
+        """发布方调用(任意线程): 按策略入队,返回是否入队"""
+        with self._lock:
+            if self.closed:
+                return False
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return False
+                if self.policy == DISCONNECT:
+                    self.closed = True
+                    wake = True
+                else:
+                    self._items.popleft()
+                    wake = False
+            else:
+                wake = not self._items
+            if not self.closed:
+                self._items.append(event)
+        if wake:
+            self._wake()
+        if self.closed:
+            self.bus.unsubscribe(self)
+        return not self.closed
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # 事件循环已关闭: 订阅者已不存在
+            with self._lock:
+                self.closed = True
+
+    def get_nowait(self) -> Optional[Dict]:
+        """
+        取出一个事件(不等待)
+
+        Returns:
+            Optional[Dict]: 事件,队列为空时返回None
+        """
+        with self._lock:
+            return self._items.popleft() if self._items else None
+
+    async def get(self, timeout: float = None) -> Optional[Dict]:
+        """
+        等待下一个事件
+
+        Args:
+            timeout: 最长等待时间(秒),None 表示一直等待
+
+        Returns:
+            Optional[Dict]: 事件;超时或订阅已关闭且队列为空时返回None
+        """
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._items.popleft()
+                if self.closed:
+                    return None
+                self._ready.clear()
+            remaining = None if deadline is None else deadline - self._loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Dict:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def pending(self) -> int:
+        """队列中未读事件数"""
+        with self._lock:
+            return len(self._items)
+
+    def close(self) -> None:
+        """取消订阅;队列中剩余的事件仍可读取"""
+        with self._lock:
+            self.closed = True
+        self.bus.unsubscribe(self)
+        self._wake()
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class EventBus:
+    """
+    进程内事件总线
+
+    - publish() 可在任意线程调用;没有订阅者的主题只需一次字典查找,出价等热路径几乎无开销
+    - 同一事件发布到多个主题时,同时订阅这些主题的订阅者只收到一次
+    - 事件只在数据库事务提交后发布(见 publish_after_commit),订阅者看到的状态一定已持久化
+    """
+
+    def __init__(self, max_queue: int = None, policy: str = None):
+        """
+        初始化事件总线
+
+        Args:
+            max_queue: 订阅者队列的默认容量
+            policy: 默认的队列已满处理策略
+        """
+        self.max_queue = max_queue or EVENT_BUS_CONFIG.get('max_queue', 256)
+        self.policy = policy or EVENT_BUS_CONFIG.get('drop_policy', DROP_OLDEST)
+        self._subscribers: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        # 统计信息
+        self._published = 0
+        self._delivered = 0
+
+    def subscribe(self, *topics: str, maxsize: int = None, policy: str = None,
+                  loop: asyncio.AbstractEventLoop = None) -> Subscription:
+        """
+        订阅主题
+
+        Args:
+            *topics: 主题(见 auction_topic / conversation_topic / user_topic)
+            maxsize: 队列容量(默认取总线配置)
+            policy: 队列已满时的处理策略(drop_oldest / drop_newest / disconnect)
+            loop: 接收事件的事件循环(默认当前运行中的事件循环)
+
+        Returns:
+            Subscription: 订阅
+        """
+        if not topics:
+            raise ValueError("至少订阅一个主题")
+        subscription = Subscription(
+            self, topics, loop or asyncio.get_running_loop(),
+            maxsize or self.max_queue, policy or self.policy
+        )
+        with self._lock:
+            for topic in subscription.topics:
+                # 复制后替换,发布方无需加锁即可遍历
+                self._subscribers[topic] = self._subscribers.get(topic, []) + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        取消订阅
+
+        Args:
+            subscription: 订阅
+        """
+        with self._lock:
+            for topic in subscription.topics:
+                remaining = [s for s in self._subscribers.get(topic, []) if s is not subscription]
+                if remaining:
+                    self._subscribers[topic] = remaining
+                else:
+                    self._subscribers.pop(topic, None)
+
+    def publish(self, event_type: str, data: Dict, *topics: str) -> int:
+        """
+        发布事件
+
+        Args:
+            event_type: 事件类型(如 message / bid / auction_ended)
+            data: 事件内容
+            *topics: 发布到的主题
+
+        Returns:
+            int: 接收到事件的订阅者数量
+        """
+        targets = {}
+        for topic in topics:
+            for subscription in self._subscribers.get(topic, ()):
+                targets[id(subscription)] = subscription
+        self._published += 1
+        if not targets:
+            return 0
+        event = {
+            'seq': next(self._seq),
+            'type': event_type,
+            'topics': list(topics),
+            'data': data,
+            'published_at': time.time()
+        }
+        delivered = sum(1 for subscription in targets.values() if subscription._offer(event))
+        self._delivered += delivered
+        return delivered
+
+    def close(self) -> None:
+        """关闭所有订阅(订阅者的 async for 随之结束)"""
+        with self._lock:
+            subscriptions = {id(s): s for subs in self._subscribers.values() for s in subs}
+        for subscription in subscriptions.values():
+            subscription.close()
+
+    def stats(self) -> Dict:
+        """
+        获取事件总线统计
+
+        Returns:
+            Dict: 主题数、订阅数、发布/送达事件数、各订阅丢弃的事件总数
+        """
+        with self._lock:
+            subscriptions = {id(s): s for subs in self._subscribers.values() for s in subs}
+        return {
+            'topics': len(self._subscribers),
+            'subscriptions': len(subscriptions),
+            'published': self._published,
+            'delivered': self._delivered,
+            'dropped': sum(s.dropped for s in subscriptions.values())
+        }
+
+
+def publish_after_commit(db_manager, bus: EventBus, event_type: str, data: Dict, *topics: str) -> None:
+    """
+    在当前事务提交后发布事件(不在事务中时立即发布,回滚时不发布)
+
+    Args:
+        db_manager: 数据库管理器或工作单元
+        bus: 事件总线
+        event_type: 事件类型
+        data: 事件内容
+        *topics: 发布到的主题
+    """
+    db_manager.after_commit(lambda: bus.publish(event_type, data, *topics))
+
+
+# 每个数据库管理器共享一个事件总线
+_buses: Dict[object, EventBus] = {}
+_buses_lock = threading.Lock()
+
+
+def get_event_bus(db_manager) -> EventBus:
+    """
+    获取数据库管理器对应的共享事件总线,关闭数据库时关闭所有订阅
+
+    Args:
+        db_manager: 数据库管理器实例(工作单元使用其底层数据库的总线)
+
+    Returns:
+        EventBus: 事件总线
+    """
+    from .unit_of_work import UnitOfWork
+    if isinstance(db_manager, UnitOfWork):
+        db_manager = db_manager.db
+    with _buses_lock:
+        bus = _buses.get(db_manager)
+        if bus is None:
+            bus = EventBus()
+            _buses[db_manager] = bus
+
+            def _close():
+                with _buses_lock:
+                    _buses.pop(db_manager, None)
+                bus.close()
+            db_manager.on_close(_close)
+        return bus
@@ -0,0 +1,373 @@
+"""
+Flash Sale - 限时抢购
+开始时把商品库存转入内存名额,抢购请求只在内存中判定是否抢到,不访问数据库;
+抢到的订单由后台线程批量写入,避免大量买家同时下单时在 SQLite 写锁上排队
+"""
+
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import FLASH_SALE_CONFIG
+from .outbox import OutboxDispatcher, get_outbox_dispatcher
+
+
+class FlashSale:
+    """
+    限时抢购
+
+    - start() 在一个事务中创建 flash_sales 记录并把商品库存全部转入 reserved
+      (products.stock 清零,普通下单无法再购买该商品);已有进行中的抢购时按 reserved - sold 恢复
+    - admit() 在进程内加锁判定: 剩余名额与每人限购数量都满足时立即扣减名额并排队写入,
+      名额扣减与判定在同一把锁内完成,抢到的总数不会超过 reserved
+    - 后台线程按批(batch_size)写入: 一条 INSERT 创建整批订单,同一事务中累加 sold
+      并写入给买家的服务消息;整批失败时逐条写入,仍失败的订单撤销并归还名额
+    - end() 停止抢购,写入剩余订单后把未售出的名额归还商品库存
+    - 进程退出前未写入的订单会丢失,名额仍按 reserved - sold 计算,不会超卖
+    """
+
+    def __init__(self, db_manager, product_id: int, per_buyer_limit: int = None,
+                 batch_size: int = None, flush_interval: float = None,
+                 outbox: Optional[OutboxDispatcher] = None):
+        """
+        初始化抢购(调用 start() 后开始接受抢购)
+
+        Args:
+            db_manager: 数据库管理器实例
+            product_id: 商品ID
+            per_buyer_limit: 每个买家最多抢购的数量
+            batch_size: 每批写入的订单数
+            flush_interval: 定时写入间隔(秒)
+            outbox: 服务消息发件箱(默认使用数据库共享的投递器)
+        """
+        self.db = db_manager
+        self.product_id = product_id
+        self.per_buyer_limit = per_buyer_limit or FLASH_SALE_CONFIG.get('per_buyer_limit', 1)
+        self.batch_size = batch_size or FLASH_SALE_CONFIG.get('batch_size', 200)
+        self.flush_interval = flush_interval or FLASH_SALE_CONFIG.get('flush_interval', 0.2)
+        self.outbox = outbox or get_outbox_dispatcher(db_manager)
+        self.sale_id = None
+        self.seller_id = None
+        self.price = None
+        self.reserved = 0
+        self._remaining = 0
+        self._bought: Dict[int, int] = {}
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._open = False
+        self._stopped = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # 统计信息
+        self._admitted = 0
+        self._rejected = 0
+        self._persisted = 0
+        self._batches = 0
+        self._failures = 0
+        self._released = 0
+
+    def start(self) -> bool:
+        """
+        开始(或恢复)抢购
+
+        Returns:
+            bool: 是否开始成功(商品不存在、不可售或无库存时失败)
+        """
+        with self.db.transaction() as conn:
+            sale = conn.execute(
+                "SELECT * FROM flash_sales WHERE product_id = ? AND status = 'active'", (self.product_id,)
+            ).fetchone()
+            if sale is None:
+                sale = conn.execute("""
+                    INSERT INTO flash_sales (product_id, price, reserved, per_buyer_limit)
+                    SELECT product_id, price, stock, ? FROM products
+                    WHERE product_id = ? AND status = 'available' AND stock > 0
+                    RETURNING *
+                """, (self.per_buyer_limit, self.product_id)).fetchone()
+                if sale is None:
+                    return False
+                conn.execute("""
+                    UPDATE products SET stock = 0, status = 'sold_out', updated_at = CURRENT_TIMESTAMP
+                    WHERE product_id = ?
+                """, (self.product_id,))
+                bought = []
+            else:
+                # 恢复: 抢购开始后该商品的订单都来自本次抢购(普通下单已无库存),已取消的不计入
+                bought = conn.execute("""
+                    SELECT buyer_id, SUM(quantity) AS quantity FROM orders
+                    WHERE product_id = ? AND created_at >= ? AND status != 'cancelled'
+                    GROUP BY buyer_id
+                """, (self.product_id, sale['started_at'])).fetchall()
+            self.seller_id = conn.execute(
+                "SELECT seller_id FROM products WHERE product_id = ?", (self.product_id,)
+            ).fetchone()['seller_id']
+        with self._lock:
+            self.sale_id = sale['sale_id']
+            self.price = sale['price']
+            self.per_buyer_limit = sale['per_buyer_limit']
+            self.reserved = sale['reserved']
+            self._remaining = sale['reserved'] - sale['sold']
+            self._bought = {row['buyer_id']: row['quantity'] for row in bought}
+            # close() 之后再次 start() 时允许重新启动后台写入线程
+            self._stopped = False
+            self._open = True
+        return True
+
+    def admit(self, buyer_id: int, shipping_address: str, quantity: int = 1) -> bool:
+        """
+        抢购(只在内存中判定,订单稍后批量写入)
+
+        Args:
+            buyer_id: 买家ID
+            shipping_address: 收货地址
+            quantity: 购买数量
+
+        Returns:
+            bool: 是否抢到(名额不足、超过限购数量或抢购已结束时返回False)
+        """
+        with self._lock:
+            bought = self._bought.get(buyer_id, 0)
+            if (not self._open or quantity <= 0 or not shipping_address or buyer_id == self.seller_id
+                    or quantity > self._remaining or bought + quantity > self.per_buyer_limit):
+                self._rejected += 1
+                return False
+            self._remaining -= quantity
+            self._bought[buyer_id] = bought + quantity
+            self._pending.append((buyer_id, quantity, shipping_address))
+            self._admitted += 1
+            full = len(self._pending) >= self.batch_size
+        self._ensure_worker()
+        if full:
+            self._wake.set()
+        return True
+
+    def remaining(self) -> int:
+        """剩余名额"""
+        with self._lock:
+            return self._remaining
+
+    def release(self, buyer_id: int, quantity: int, counted: bool) -> None:
+        """
+        归还已取消订单的名额(订单服务在取消提交后调用,数据库中已累加 reserved)
+
+        Args:
+            buyer_id: 买家ID
+            quantity: 归还数量
+            counted: 该订单是否计入买家的已购数量(抢购期间下的订单)
+        """
+        with self._lock:
+            self.reserved += quantity
+            self._remaining += quantity
+            if counted and buyer_id in self._bought:
+                self._bought[buyer_id] = max(self._bought[buyer_id] - quantity, 0)
+
+    def flush(self) -> List[int]:
+        """
+        写入全部待写入的抢购订单
+
+        Returns:
+            List[int]: 创建的订单ID
+        """
+        created = []
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch:
+                    return created
+                try:
+                    created += self._persist(batch)
+                except Exception as e:
+                    self._failures += 1
+                    print(f"写入抢购订单失败: {str(e)}")
+                    created += self._persist_one_by_one(batch)
+
+    def _persist(self, batch: List[Tuple[int, int, str]]) -> List[int]:
+        """一个事务写入一批订单、累加 sold 并通知买家"""
+        with self.db.transaction() as conn:
+            rows = conn.execute(f"""
+                INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, status, shipping_address)
+                VALUES {', '.join(['(?, ?, ?, ?, ?, ?, ?)'] * len(batch))}
+                RETURNING order_id, buyer_id
+            """, [
+                v for buyer_id, quantity, address in batch
+                for v in (buyer_id, self.seller_id, self.product_id, quantity, self.price * quantity,
+                          'pending', address)
+            ]).fetchall()
+            conn.execute(
+                "UPDATE flash_sales SET sold = sold + ? WHERE sale_id = ?",
+                (sum(quantity for _, quantity, _ in batch), self.sale_id)
+            )
+            self.outbox.enqueue_many([
+                (self.seller_id, row['buyer_id'], json.dumps({
+                    'key': 'order.service_flash_sale_won', 'params': {'order_id': row['order_id']}
+                }, ensure_ascii=False), 'service')
+                for row in rows
+            ])
+        self._persisted += len(rows)
+        self._batches += 1
+        return sorted(row['order_id'] for row in rows)
+
+    def _persist_one_by_one(self, batch: List[Tuple[int, int, str]]) -> List[int]:
+        """整批失败时逐条写入;仍失败的订单撤销并归还名额"""
+        created = []
+        for item in batch:
+            try:
+                created += self._persist([item])
+            except Exception as e:
+                buyer_id, quantity, _ = item
+                print(f"撤销抢购订单(买家 {buyer_id}): {str(e)}")
+                with self._lock:
+                    self._remaining += quantity
+                    self._bought[buyer_id] -= quantity
+                    self._released += 1
+        return created
+
+    def _ensure_worker(self) -> None:
+        """首次抢到时启动后台写入线程"""
+        if self._thread is not None or self._stopped:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='flash-sale-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """停止接受抢购、停止后台线程并写入剩余订单(抢购仍为进行中,可再次 start() 恢复)"""
+        with self._lock:
+            self._open = False
+        self._stopped = True
+        self._wake.set()
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def end(self) -> int:
+        """
+        结束抢购: 写入剩余订单,未售出的名额归还商品库存
+
+        Returns:
+            int: 归还的库存数量
+        """
+        self.close()
+        with self.db.transaction() as conn:
+            sale = conn.execute("""
+                UPDATE flash_sales SET status = 'ended', ended_at = CURRENT_TIMESTAMP
+                WHERE sale_id = ? AND status = 'active'
+                RETURNING reserved - sold AS unsold
+            """, (self.sale_id,)).fetchone()
+            if sale is None:
+                return 0
+            conn.execute("""
+                UPDATE products
+                SET stock = stock + ?,
+                    status = CASE WHEN status = 'sold_out' AND stock + ? > 0 THEN 'available' ELSE status END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE product_id = ?
+            """, (sale['unsold'], sale['unsold'], self.product_id))
+        return sale['unsold']
+
+    def stats(self) -> Dict:
+        """
+        获取抢购统计
+
+        Returns:
+            Dict: 名额、剩余名额、抢到/未抢到次数、待写入与已写入订单数、批次数、撤销数等
+        """
+        with self._lock:
+            return {
+                'sale_id': self.sale_id,
+                'product_id': self.product_id,
+                'reserved': self.reserved,
+                'remaining': self._remaining,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'pending': len(self._pending),
+                'persisted': self._persisted,
+                'batches': self._batches,
+                'failures': self._failures,
+                'released': self._released,
+                'open': self._open
+            }
+
+
+# 每个数据库管理器、每个商品一场抢购;关闭数据库时写入剩余订单
+_sales: Dict[Tuple[object, int], FlashSale] = {}
+_sales_lock = threading.Lock()
+
+
+def start_flash_sale(db_manager, product_id: int, per_buyer_limit: int = None) -> Optional[FlashSale]:
+    """
+    开始(或获取已开始的)商品抢购
+
+    Args:
+        db_manager: 数据库管理器实例
+        product_id: 商品ID
+        per_buyer_limit: 每个买家最多抢购的数量
+
+    Returns:
+        Optional[FlashSale]: 抢购,商品不可售或无库存时返回None
+    """
+    from .unit_of_work import UnitOfWork
+    if isinstance(db_manager, UnitOfWork):
+        db_manager = db_manager.db
+    with _sales_lock:
+        sale = _sales.get((db_manager, product_id))
+        if sale is not None:
+            return sale
+        sale = FlashSale(db_manager, product_id, per_buyer_limit)
+        if not sale.start():
+            return None
+        _sales[(db_manager, product_id)] = sale
+
+        def _close():
+            with _sales_lock:
+                _sales.pop((db_manager, product_id), None)
+            sale.close()
+        db_manager.on_close(_close)
+        return sale
+
+
+def get_flash_sale(db_manager, product_id: int) -> Optional[FlashSale]:
+    """
+    获取商品进行中的抢购
+
+    Args:
+        db_manager: 数据库管理器实例(工作单元使用其底层数据库)
+        product_id: 商品ID
+
+    Returns:
+        Optional[FlashSale]: 未开始抢购时返回None
+    """
+    from .unit_of_work import UnitOfWork
+    if isinstance(db_manager, UnitOfWork):
+        db_manager = db_manager.db
+    with _sales_lock:
+        return _sales.get((db_manager, product_id))
+
+
+def end_flash_sale(db_manager, product_id: int) -> Optional[int]:
+    """
+    结束商品抢购
+
+    Args:
+        db_manager: 数据库管理器实例
+        product_id: 商品ID
+
+    Returns:
+        Optional[int]: 归还的库存数量,没有进行中的抢购时返回None
+    """
+    with _sales_lock:
+        sale = _sales.pop((db_manager, product_id), None)
+    return None if sale is None else sale.end()
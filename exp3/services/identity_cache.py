@@ -0,0 +1,161 @@
+"""
+Identity Cache - 管理员身份缓存
+缓存 verify_admin 查询到的用户身份与角色,短 TTL、容量有限(LRU 淘汰)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config.settings import ADMIN_CACHE_CONFIG
+
+
+class IdentityCache:
+    """
+    用户身份缓存
+
+    - get() 命中且未过期时返回缓存的身份,否则返回 None
+    - 超过 max_size 时淘汰最久未使用的条目
+    - 角色/封禁状态变化时调用 invalidate();查询期间发生的失效会使该次 put() 作废,
+      避免把失效前读到的旧角色写回缓存
+    - ttl 为 0 时不缓存
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None):
+        """
+        初始化身份缓存
+
+        Args:
+            ttl: 缓存有效期(秒)
+            max_size: 最大缓存条数
+        """
+        self.ttl = ADMIN_CACHE_CONFIG.get('ttl', 30.0) if ttl is None else ttl
+        self.max_size = max_size or ADMIN_CACHE_CONFIG.get('max_size', 1024)
+        self._entries: OrderedDict = OrderedDict()  # user_id -> (过期时间, 身份)
+        self._lock = threading.Lock()
+        self._generation = 0
+        # 统计信息
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, user_id: int) -> Optional[Dict]:
+        """
+        读取缓存的身份
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            Optional[Dict]: 身份信息副本,未命中或已过期时返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self._hits += 1
+                return dict(entry[1])
+            if entry is not None:
+                del self._entries[user_id]
+            self._misses += 1
+            return None
+
+    def generation(self) -> int:
+        """
+        当前失效代数,查询数据库前获取,写回缓存时传给 put()
+
+        Returns:
+            int: 失效代数
+        """
+        with self._lock:
+            return self._generation
+
+    def put(self, user_id: int, identity: Dict, generation: int) -> None:
+        """
+        写入身份
+
+        Args:
+            user_id: 用户ID
+            identity: 身份信息
+            generation: 查询前通过 generation() 获取的失效代数
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # 查询期间有失效发生,读到的可能是旧数据
+            self._entries[user_id] = (time.monotonic() + self.ttl, dict(identity))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, *user_ids: int) -> None:
+        """
+        使指定用户的缓存失效
+
+        Args:
+            user_ids: 用户ID
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: 命中/未命中次数、命中率、淘汰与失效次数、当前条数等
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl
+            }
+
+
+# 每个数据库管理器共享一个缓存,使不同服务实例上的失效对彼此可见
+_caches: Dict[object, IdentityCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_identity_cache(db_manager) -> IdentityCache:
+    """
+    获取数据库管理器对应的共享身份缓存
+
+    Args:
+        db_manager: 数据库管理器实例
+
+    Returns:
+        IdentityCache: 身份缓存
+    """
+    with _caches_lock:
+        cache = _caches.get(db_manager)
+        if cache is None:
+            cache = IdentityCache()
+            _caches[db_manager] = cache
+
+            def _close():
+                with _caches_lock:
+                    _caches.pop(db_manager, None)
+            db_manager.on_close(_close)
+        return cache
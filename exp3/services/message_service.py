@@ -9,7 +9,12 @@ from utils.exceptions import UserNotFoundError, PermissionDeniedError
 from config.settings import MESSAGE_CONFIG
 from config.i18n import t
 from utils.helpers import Helper
+from utils.pagination import build_page, decode_cursor, keyset_condition, order_clause
 from datetime import datetime
+from .event_bus import EventBus, get_event_bus, publish_after_commit, conversation_topic, user_topic
+
+# 会话记录游标排序列(按时间降序,msg_id 保证排序键唯一)
+CONVERSATION_PAGE_KEY = ('created_at', 'msg_id')
 
 
 class MessageService:
@@ -18,14 +23,16 @@ class MessageService:
     提供消息发送、接收、查看等功能
     """
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, event_bus: Optional[EventBus] = None):
         """
         初始化消息服务
         
         Args:
             db_manager: 数据库管理器实例
+            event_bus: 事件总线(默认使用数据库共享的总线)
         """
         self.db = db_manager
+        self.event_bus = event_bus or get_event_bus(db_manager)
     
     def send_message(self, sender_id: int, receiver_id: int, 
                     content: str, msg_type: str = "text") -> Optional[int]:
@@ -75,6 +82,13 @@ class MessageService:
             "VALUES (?, ?, ?, ?, 'sent')"
         )
         msg_id = self.db.execute_insert(query, (sender_id, receiver_id, content, msg_type))
+        # 4. 通知会话与接收者的实时信息流
+        publish_after_commit(
+            self.db, self.event_bus, 'message',
+            {'msg_id': msg_id, 'sender_id': sender_id, 'receiver_id': receiver_id,
+             'content': content, 'msg_type': msg_type},
+            conversation_topic(sender_id, receiver_id), user_topic(receiver_id)
+        )
         return msg_id
     
     def get_message_by_id(self, msg_id: int) -> Optional[Message]:
@@ -140,6 +154,40 @@ class MessageService:
         rows = self.db.execute_query(query, (user_id1, user_id2, user_id2, user_id1, limit, offset))
         return rows
     
+    def get_conversation_page(self, user_id1: int, user_id2: int,
+                              limit: int = 50, after: str = None) -> Dict:
+        """
+        游标分页获取两个用户之间的对话记录(从最新消息向前翻页)
+        
+        Args:
+            user_id1: 用户1的ID
+            user_id2: 用户2的ID
+            limit: 每页数量
+            after: 上一页返回的 next_cursor,为空表示最新一页
+            
+        Returns:
+            Dict: {'items': 消息列表(时间降序), 'next_cursor': 更早消息的游标(没有更多时为 None)}
+        """
+        # 两个方向各自沿索引取一页再合并,避免对整个会话排序
+        condition = ''
+        cursor = []
+        if after:
+            condition = " AND " + keyset_condition(CONVERSATION_PAGE_KEY, descending=True)
+            cursor = decode_cursor(after, len(CONVERSATION_PAGE_KEY))
+        order = order_clause(CONVERSATION_PAGE_KEY, descending=True)
+        direction = f"SELECT * FROM messages WHERE sender_id=? AND receiver_id=?{condition}{order} LIMIT ?"
+        query = (
+            f"SELECT * FROM ({direction}) UNION ALL SELECT * FROM ({direction})"
+            f"{order} LIMIT ?"
+        )
+        params = (
+            [user_id1, user_id2, *cursor, limit + 1]
+            + [user_id2, user_id1, *cursor, limit + 1]
+            + [limit + 1]
+        )
+        rows = self.db.execute_query(query, tuple(params))
+        return build_page(rows, limit, CONVERSATION_PAGE_KEY)
+    
     def get_user_messages(self, user_id: int, limit: int = 20) -> List[Dict]:
         """
         获取用户的所有消息(最近联系人)
@@ -149,23 +197,51 @@ class MessageService:
             limit: 返回数量限制
             
         Returns:
-            List[Dict]: 消息列表
+            List[Dict]: 每个联系人的最后一条消息(时间降序),附带 peer_id 与 unread_count
+        """
+        # conversations 由消息触发器维护,沿 (user_id, last_at) 索引直接取 limit 行
+        rows = self.db.execute_query(
+            "SELECT m.*, c.peer_id, c.unread_count FROM conversations c "
+            "JOIN messages m ON m.msg_id = c.last_msg_id "
+            "WHERE c.user_id=? ORDER BY c.last_at DESC, c.last_msg_id DESC LIMIT ?",
+            (user_id, limit)
+        )
+        return rows
+    
+    def get_contacts_overview(self, user_id: int, limit: int = 50) -> List[Dict]:
+        """
+        获取联系人列表(一次查询返回联系人名称、店铺名、未读数和最后一条消息)
+        
+        Args:
+            user_id: 用户ID
+            limit: 返回数量限制
+            
+        Returns:
+            List[Dict]: 按最后消息时间降序的联系人,
+                包含 peer_id/peer_name/shop_name/is_seller/unread/last
         """
-        # 拉取用户相关的较多消息后在内存中按对方用户聚合，取每个会话的最新一条
         rows = self.db.execute_query(
-            "SELECT * FROM messages WHERE sender_id=? OR receiver_id=? ORDER BY created_at DESC LIMIT 1000",
-            (user_id, user_id)
+            "SELECT c.peer_id, c.unread_count, u.username AS peer_name, u.shop_name, "
+            "m.msg_id, m.sender_id, m.receiver_id, m.content, m.msg_type, m.status, m.created_at "
+            "FROM conversations c "
+            "JOIN users u ON u.user_id = c.peer_id "
+            "JOIN messages m ON m.msg_id = c.last_msg_id "
+            "WHERE c.user_id=? ORDER BY c.last_at DESC, c.last_msg_id DESC LIMIT ?",
+            (user_id, limit)
         )
-        latest_by_peer: Dict[int, Dict] = {}
-        for row in rows:
-            peer = row['receiver_id'] if row['sender_id'] == user_id else row['sender_id']
-            if peer not in latest_by_peer:
-                latest_by_peer[peer] = row
-            if len(latest_by_peer) >= limit:
-                break
-        # 返回按时间降序
-        result = sorted(latest_by_peer.values(), key=lambda r: r['created_at'], reverse=True)
-        return result[:limit]
+        message_columns = ('msg_id', 'sender_id', 'receiver_id', 'content',
+                           'msg_type', 'status', 'created_at')
+        return [
+            {
+                'peer_id': row['peer_id'],
+                'peer_name': row['peer_name'],
+                'shop_name': row['shop_name'],
+                'is_seller': bool(row['shop_name']),
+                'unread': row['unread_count'],
+                'last': {col: row[col] for col in message_columns},
+            }
+            for row in rows
+        ]
     
     def mark_as_read(self, msg_id: int, user_id: int) -> bool:
         """
@@ -233,7 +309,7 @@ class MessageService:
             int: 未读消息数量
         """
         rows = self.db.execute_query(
-            "SELECT COUNT(*) AS cnt FROM messages WHERE receiver_id=? AND status <> 'read'",
+            "SELECT COALESCE(SUM(unread_count), 0) AS cnt FROM conversations WHERE user_id=?",
             (user_id,)
         )
         return int(rows[0]['cnt']) if rows else 0
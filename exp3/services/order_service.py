@@ -3,9 +3,31 @@ Order Service - 订单服务层
 处理订单相关的业务逻辑
 """
 
-from typing import Optional, List, Dict
-from models.order import Order, OrderStatus
+import csv
+import json
+from typing import Optional, List, Dict, Iterable, Tuple, Union, TextIO
+from models.order import Order, OrderStatus, ORDER_TRANSITIONS
 from datetime import datetime
+from config.settings import ORDER_STATS_CONFIG
+from utils.pagination import build_page, decode_cursor, keyset_condition, order_clause
+from .outbox import OutboxDispatcher, get_outbox_dispatcher
+from .flash_sale import get_flash_sale
+
+# 订单列表游标排序列(按创建时间降序,order_id 保证排序键唯一)
+ORDER_PAGE_KEY = ('created_at', 'order_id')
+
+# 批量状态流转每条 UPDATE 包含的订单数
+TRANSITION_BATCH_SIZE = 500
+
+# 批量发货结果(ship_orders_bulk / import_shipments_csv)
+SHIP_SHIPPED = 'shipped'
+SHIP_NOT_FOUND = 'not_found'              # 订单不存在
+SHIP_NOT_OWNER = 'not_owner'              # 不是该卖家的订单
+SHIP_INVALID_STATUS = 'invalid_status'    # 订单不是已支付状态
+SHIP_MISSING_TRACKING = 'missing_tracking'
+SHIP_INVALID_ROW = 'invalid_row'          # CSV 行格式错误(列数不足或订单号不是整数)
+SHIP_DUPLICATE = 'duplicate'              # 同一订单在文件中重复出现
+SHIP_FAILED = 'failed'                    # 数据库错误,整批未发货
 
 
 class OrderService:
@@ -14,14 +36,16 @@ class OrderService:
     提供订单创建、支付、发货、完成等功能
     """
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, outbox: Optional[OutboxDispatcher] = None):
         """
         初始化订单服务
         
         Args:
             db_manager: 数据库管理器实例
+            outbox: 服务消息发件箱(默认使用数据库共享的投递器)
         """
         self.db = db_manager
+        self.outbox = outbox or get_outbox_dispatcher(db_manager)
     
     def create_order(self, buyer_id: int, product_id: int, quantity: int,
                     shipping_address: str) -> Optional[int]:
@@ -37,36 +61,106 @@ class OrderService:
         Returns:
             Optional[int]: 成功返回订单ID,失败返回None
         """
-        # 1. 查询商品信息
-        product_query = "SELECT * FROM products WHERE product_id=? AND status='available'"
-        products = self.db.execute_query(product_query, (product_id,))
-        if not products:
-            return None  # 商品不存在或不可售
-        product = products[0]
-        if product['stock'] < quantity:
-            return None  # 库存不足
-        # 2. 计算总价
-        total_price = product['price'] * quantity
-        seller_id = product['seller_id']
-        # 3. 创建订单
-        order_insert = """
-            INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, status, shipping_address)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """
-        order_id = self.db.execute_insert(order_insert, (
-            buyer_id, seller_id, product_id, quantity, total_price, OrderStatus.PENDING.value, shipping_address
-        ))
-        if not order_id:
+        if quantity <= 0:
             return None
-        # 4. 减少商品库存
-        new_stock = product['stock'] - quantity
-        product_update = "UPDATE products SET stock=?, status=? WHERE product_id=?"
-        new_status = 'sold_out' if new_stock == 0 else 'available'
-        self.db.execute_update(product_update, (new_stock, new_status, product_id))
-        # 5. 发送服务消息给卖家
-        self._send_service_message(buyer_id, seller_id, 'order.service_order_created', order_id=order_id)
+        with self.db.transaction() as conn:
+            # 1. 条件扣减库存: 商品可售且库存充足时才会更新(并发下不会超卖)
+            product = conn.execute("""
+                UPDATE products
+                SET stock = stock - ?,
+                    status = CASE WHEN stock - ? = 0 THEN 'sold_out' ELSE status END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE product_id = ? AND stock >= ? AND status = 'available'
+                RETURNING seller_id, price
+            """, (quantity, quantity, product_id, quantity)).fetchone()
+            if product is None:
+                return None  # 商品不存在、不可售或库存不足
+            # 2. 计算总价并创建订单
+            total_price = product['price'] * quantity
+            seller_id = product['seller_id']
+            order_id = conn.execute("""
+                INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, status, shipping_address)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                buyer_id, seller_id, product_id, quantity, total_price, OrderStatus.PENDING.value, shipping_address
+            )).lastrowid
+            # 3. 发送服务消息给卖家
+            self._send_service_message(buyer_id, seller_id, 'order.service_order_created', order_id=order_id)
         return order_id
     
+    def create_orders(self, buyer_id: int, items: Dict[int, int],
+                      shipping_address: str) -> Optional[List[int]]:
+        """
+        一次创建多个订单(购物车结算)
+        
+        在一个事务中: 一条条件 UPDATE 扣减全部商品库存,任一商品不可售或库存不足时整体回滚;
+        一条 INSERT 创建全部订单(每个商品一个订单);每个卖家只收到一条汇总的服务消息。
+        
+        Args:
+            buyer_id: 买家ID
+            items: {商品ID: 购买数量}
+            shipping_address: 收货地址
+            
+        Returns:
+            Optional[List[int]]: 成功返回订单ID列表(与 items 顺序一致),失败返回None
+        """
+        if not items or any(quantity <= 0 for quantity in items.values()):
+            return None
+        try:
+            with self.db.transaction() as conn:
+                values = ', '.join(['(?, ?)'] * len(items))
+                params = [v for item in items.items() for v in item]
+                # 1. 条件扣减全部库存(与 create_order 的单商品条件相同)
+                products = conn.execute(f"""
+                    UPDATE products
+                    SET stock = stock - v.column2,
+                        status = CASE WHEN stock - v.column2 = 0 THEN 'sold_out' ELSE status END,
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM (VALUES {values}) AS v
+                    WHERE products.product_id = v.column1 AND products.stock >= v.column2
+                      AND products.status = 'available'
+                    RETURNING products.product_id, products.seller_id, products.price
+                """, params).fetchall()
+                if len(products) != len(items):
+                    unavailable = set(items) - {row['product_id'] for row in products}
+                    raise ValueError(f"商品不可售或库存不足: {sorted(unavailable)}")
+                # 2. 创建全部订单
+                products = {row['product_id']: row for row in products}
+                rows = [
+                    (buyer_id, products[pid]['seller_id'], pid, quantity, products[pid]['price'] * quantity,
+                     OrderStatus.PENDING.value, shipping_address)
+                    for pid, quantity in items.items()
+                ]
+                created = conn.execute(f"""
+                    INSERT INTO orders (buyer_id, seller_id, product_id, quantity, total_price, status, shipping_address)
+                    VALUES {', '.join(['(?, ?, ?, ?, ?, ?, ?)'] * len(rows))}
+                    RETURNING order_id, seller_id, product_id
+                """, [v for row in rows for v in row]).fetchall()
+                # 3. 每个卖家一条服务消息
+                by_seller: Dict[int, List[int]] = {}
+                for row in sorted(created, key=lambda r: r['order_id']):
+                    by_seller.setdefault(row['seller_id'], []).append(row['order_id'])
+                self.outbox.enqueue_many([
+                    (buyer_id, seller_id, self._orders_created_message(order_ids), 'service')
+                    for seller_id, order_ids in by_seller.items()
+                ])
+        except Exception as e:
+            print(f"创建订单失败: {str(e)}")
+            return None
+        order_ids = {row['product_id']: row['order_id'] for row in created}
+        return [order_ids[pid] for pid in items]
+    
+    @staticmethod
+    def _orders_created_message(order_ids: List[int]) -> str:
+        """新订单服务消息: 多个订单时汇总为一条"""
+        if len(order_ids) == 1:
+            message = {'key': 'order.service_order_created', 'params': {'order_id': order_ids[0]}}
+        else:
+            message = {'key': 'order.service_orders_created', 'params': {
+                'count': len(order_ids), 'order_ids': ', '.join(f'#{oid}' for oid in order_ids)
+            }}
+        return json.dumps(message, ensure_ascii=False)
+    
     def pay_order(self, order_id: int, payment_method: str) -> bool:
         """
         支付订单
@@ -78,22 +172,8 @@ class OrderService:
         Returns:
             bool: 支付是否成功
         """
-        # 1. 查询订单
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False  # 订单不存在
-        order = orders[0]
-        if order['status'] != OrderStatus.PENDING.value:
-            return False  # 订单状态异常
-        # 2. 支付逻辑（买家确认即支付成功）
-        paid_at = datetime.now().isoformat()
-        update_query = "UPDATE orders SET status=?, paid_at=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.PAID.value, paid_at, order_id))
-        if updated > 0:
-            # 3. 发送服务消息给卖家
-            self._send_service_message(order['buyer_id'], order['seller_id'], 'order.service_order_paid', order_id=order_id)
-        return updated > 0
+        # 买家确认即支付成功
+        return bool(self.transition_orders('pay', [order_id]))
     
     def ship_order(self, order_id: int, seller_id: int,
                   tracking_number: str) -> bool:
@@ -108,24 +188,9 @@ class OrderService:
         Returns:
             bool: 发货是否成功
         """
-        # 查询订单
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['seller_id'] != seller_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.PAID.value:
-            return False  # 仅已支付订单可发货
-        shipped_at = datetime.now().isoformat()
-        update_query = "UPDATE orders SET status=?, tracking_number=?, shipped_at=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.SHIPPED.value, tracking_number, shipped_at, order_id))
-        if updated > 0:
-            # 发送服务消息给买家
-            self._send_service_message(seller_id, order['buyer_id'], 'order.service_order_shipped', 
-                                      order_id=order_id, tracking_number=tracking_number)
-        return updated > 0
+        return bool(self.transition_orders(
+            'ship', {order_id: {'tracking_number': tracking_number}}, seller_id
+        ))
     
     def confirm_receipt(self, order_id: int, buyer_id: int) -> bool:
         """
@@ -138,28 +203,14 @@ class OrderService:
         Returns:
             bool: 确认收货是否成功
         """
-        # 查询订单
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['buyer_id'] != buyer_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.SHIPPED.value:
-            return False  # 仅已发货订单可确认收货
-        completed_at = datetime.now().isoformat()
-        update_query = "UPDATE orders SET status=?, completed_at=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.COMPLETED.value, completed_at, order_id))
-        if updated > 0:
-            # 发送服务消息给卖家
-            self._send_service_message(buyer_id, order['seller_id'], 'order.service_order_completed', order_id=order_id)
-        return updated > 0
+        return bool(self.transition_orders('confirm_receipt', [order_id], buyer_id))
     
     def request_cancel_order(self, order_id: int, buyer_id: int, reason: str) -> bool:
         """
         买家申请取消订单（状态改为 cancel_requested，待卖家审批）
         
+        仅待支付/已支付/已发货状态可申请取消
+        
         Args:
             order_id: 订单ID
             buyer_id: 买家ID
@@ -168,34 +219,11 @@ class OrderService:
         Returns:
             bool: 申请是否成功
         """
-        # 查询订单
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        
-        # 权限校验：必须是买家
-        if order['buyer_id'] != buyer_id:
-            return False
-            
-        # 仅待支付/已支付/已发货状态可申请取消
-        if order['status'] not in [OrderStatus.PENDING.value, OrderStatus.PAID.value, OrderStatus.SHIPPED.value]:
-            return False
-        
-        # 状态改为 cancel_requested（待卖家审批）
-        update_query = "UPDATE orders SET status=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.CANCEL_REQUESTED.value, order_id))
-        
-        if updated > 0:
-            # 发送服务消息给卖家
-            self._send_service_message(buyer_id, order['seller_id'], 'order.service_cancel_requested', 
-                                     order_id=order_id, reason=reason)
-        return updated > 0
+        return bool(self.transition_orders('request_cancel', {order_id: {'reason': reason}}, buyer_id))
     
     def approve_cancel(self, order_id: int, seller_id: int) -> bool:
         """
-        卖家同意取消订单（状态从 cancel_requested 改为 cancelled）
+        卖家同意取消订单（状态从 cancel_requested 改为 cancelled，恢复商品库存）
         
         Args:
             order_id: 订单ID
@@ -204,37 +232,11 @@ class OrderService:
         Returns:
             bool: 审批是否成功
         """
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['seller_id'] != seller_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.CANCEL_REQUESTED.value:
-            return False  # 仅待审批状态可审批
-        
-        # 更新订单状态为已取消
-        update_query = "UPDATE orders SET status=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.CANCELLED.value, order_id))
-        
-        if updated > 0:
-            # 恢复商品库存
-            product_query = "SELECT stock FROM products WHERE product_id=?"
-            products = self.db.execute_query(product_query, (order['product_id'],))
-            if products:
-                new_stock = products[0]['stock'] + order['quantity']
-                product_update = "UPDATE products SET stock=?, status=? WHERE product_id=?"
-                self.db.execute_update(product_update, (new_stock, 'available', order['product_id']))
-            
-            # 发送服务消息给买家
-            self._send_service_message(seller_id, order['buyer_id'], 'order.service_cancel_approved', 
-                                     order_id=order_id)
-        return updated > 0
+        return bool(self.transition_orders('approve_cancel', [order_id], seller_id))
     
     def reject_cancel(self, order_id: int, seller_id: int, reason: str = "") -> bool:
         """
-        卖家拒绝取消订单（状态从 cancel_requested 改为原状态或 cancel_rejected）
+        卖家拒绝取消订单（状态从 cancel_requested 改为 cancel_rejected）
         
         Args:
             order_id: 订单ID
@@ -244,32 +246,17 @@ class OrderService:
         Returns:
             bool: 是否拒绝成功
         """
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['seller_id'] != seller_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.CANCEL_REQUESTED.value:
-            return False  # 仅待审批状态可审批
-        
-        # 更新状态和拒绝原因
-        update_query = "UPDATE orders SET status=?, cancel_reject_reason=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.CANCEL_REJECTED.value, reason, order_id))
-        
-        if updated > 0:
-            # 发送服务消息给买家
-            reason_text = f" 原因: {reason}" if reason else ""
-            self._send_service_message(seller_id, order['buyer_id'], 'order.service_cancel_rejected', 
-                                     order_id=order_id, reason_text=reason_text)
-        return updated > 0
+        return bool(self.transition_orders(
+            'reject_cancel', {order_id: self._reject_params(reason)}, seller_id
+        ))
     
     def request_refund(self, order_id: int, buyer_id: int, 
                       reason: str) -> bool:
         """
         申请退款（买家发起，状态变为 refund_requested，需卖家审批）
         
+        仅已支付/已发货/已完成状态可申请退款
+        
         Args:
             order_id: 订单ID
             buyer_id: 买家ID
@@ -278,24 +265,7 @@ class OrderService:
         Returns:
             bool: 申请是否成功
         """
-        # 查询订单
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['buyer_id'] != buyer_id:
-            return False  # 权限校验
-        # 仅已支付/已发货/已完成状态可申请退款
-        if order['status'] not in [OrderStatus.PAID.value, OrderStatus.SHIPPED.value, OrderStatus.COMPLETED.value]:
-            return False
-        # 状态改为 refund_requested（待卖家审批）
-        update_query = "UPDATE orders SET status=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.REFUND_REQUESTED.value, order_id))
-        if updated > 0:
-            # 发送服务消息给卖家
-            self._send_service_message(buyer_id, order['seller_id'], 'order.service_refund_requested', order_id=order_id, reason=reason)
-        return updated > 0
+        return bool(self.transition_orders('request_refund', {order_id: {'reason': reason}}, buyer_id))
     
     def approve_refund(self, order_id: int, seller_id: int) -> bool:
         """
@@ -308,21 +278,7 @@ class OrderService:
         Returns:
             bool: 审批是否成功
         """
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['seller_id'] != seller_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.REFUND_REQUESTED.value:
-            return False  # 仅待审批状态可审批
-        update_query = "UPDATE orders SET status=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.REFUNDED.value, order_id))
-        if updated > 0:
-            # 发送服务消息给买家
-            self._send_service_message(seller_id, order['buyer_id'], 'order.service_refund_approved', order_id=order_id)
-        return updated > 0
+        return bool(self.transition_orders('approve_refund', [order_id], seller_id))
     
     def reject_refund(self, order_id: int, seller_id: int, reason: str = "") -> bool:
         """
@@ -336,53 +292,244 @@ class OrderService:
         Returns:
             bool: 是否拒绝成功
         """
-        order_query = "SELECT * FROM orders WHERE order_id=?"
-        orders = self.db.execute_query(order_query, (order_id,))
-        if not orders:
-            return False
-        order = orders[0]
-        if order['seller_id'] != seller_id:
-            return False  # 权限校验
-        if order['status'] != OrderStatus.REFUND_REQUESTED.value:
-            return False  # 仅待审批状态可审批
-        # 更新状态和拒绝原因
-        update_query = "UPDATE orders SET status=?, refund_reject_reason=? WHERE order_id=?"
-        updated = self.db.execute_update(update_query, (OrderStatus.REFUND_REJECTED.value, reason, order_id))
-        if updated > 0:
-            # 发送服务消息给买家
-            reason_text = f" 原因: {reason}" if reason else ""
-            self._send_service_message(seller_id, order['buyer_id'], 'order.service_refund_rejected', 
-                                     order_id=order_id, reason_text=reason_text)
-        return updated > 0
+        return bool(self.transition_orders(
+            'reject_refund', {order_id: self._reject_params(reason)}, seller_id
+        ))
+    
+    @staticmethod
+    def _reject_params(reason: str) -> Dict:
+        """拒绝原因: 保存到订单,服务消息中附加说明"""
+        return {'reason': reason, 'reason_text': f" 原因: {reason}" if reason else ""}
+    
+    def ship_orders_bulk(self, seller_id: int,
+                         shipments: Iterable[Tuple[int, str]]) -> Dict[int, str]:
+        """
+        批量发货(如导入快递公司的发货清单)
+        
+        一条查询校验全部订单的归属与状态,在同一事务中按流转表批量更新并写入服务消息。
+        同一订单出现多次时以第一次为准。
+        
+        Args:
+            seller_id: 卖家ID
+            shipments: (订单ID, 物流单号) 列表
+            
+        Returns:
+            Dict[int, str]: 每个订单ID的处理结果
+                (shipped / not_found / not_owner / invalid_status / missing_tracking),
+                失败时返回空字典
+        """
+        tracking = {}
+        for order_id, tracking_number in shipments:
+            tracking.setdefault(order_id, (tracking_number or '').strip())
+        if not tracking:
+            return {}
+        outcomes = {order_id: SHIP_MISSING_TRACKING for order_id, number in tracking.items() if not number}
+        try:
+            with self.db.transaction() as conn:
+                ids = [order_id for order_id in tracking if order_id not in outcomes]
+                # 订单ID以 JSON 数组传入,不受参数个数限制
+                rows = conn.execute("""
+                    SELECT order_id, seller_id, status FROM orders
+                    WHERE order_id IN (SELECT value FROM json_each(?))
+                """, (json.dumps(ids),)).fetchall()
+                orders = {row['order_id']: row for row in rows}
+                ship = {}
+                for order_id in ids:
+                    order = orders.get(order_id)
+                    if order is None:
+                        outcomes[order_id] = SHIP_NOT_FOUND
+                    elif order['seller_id'] != seller_id:
+                        outcomes[order_id] = SHIP_NOT_OWNER
+                    elif order['status'] not in ORDER_TRANSITIONS['ship'].source_values():
+                        outcomes[order_id] = SHIP_INVALID_STATUS
+                    else:
+                        ship[order_id] = {'tracking_number': tracking[order_id]}
+                shipped = set(self.transition_orders('ship', ship, seller_id))
+        except Exception as e:
+            print(f"批量发货失败: {str(e)}")
+            return {}
+        for order_id in ship:
+            outcomes[order_id] = SHIP_SHIPPED if order_id in shipped else SHIP_INVALID_STATUS
+        return {order_id: outcomes[order_id] for order_id in tracking}
+    
+    def import_shipments_csv(self, seller_id: int, source: Union[str, TextIO]) -> Dict:
+        """
+        从 CSV 导入发货清单(每行: 订单号,物流单号;可带表头)
+        
+        逐行读取文件并记录每行的错误,全部有效行通过 ship_orders_bulk 在一个事务中发货。
+        
+        Args:
+            seller_id: 卖家ID
+            source: CSV 文件路径或已打开的文本文件
+            
+        Returns:
+            Dict: total(数据行数)、shipped(发货数量)、
+                errors([{'line', 'order_id', 'error'}],按行号排序)
+        """
+        if isinstance(source, str):
+            with open(source, newline='', encoding='utf-8-sig') as f:
+                return self.import_shipments_csv(seller_id, f)
+        errors = []
+        shipments = []
+        lines = {}
+        total = 0
+        reader = csv.reader(source)
+        for row in reader:
+            if not any(field.strip() for field in row):
+                continue
+            raw_id = row[0].strip().lstrip('#')
+            if reader.line_num == 1 and not raw_id.isdigit():
+                continue  # 表头
+            total += 1
+            if len(row) < 2 or not raw_id.isdigit():
+                errors.append({'line': reader.line_num, 'order_id': row[0].strip(), 'error': SHIP_INVALID_ROW})
+                continue
+            order_id = int(raw_id)
+            if order_id in lines:
+                errors.append({'line': reader.line_num, 'order_id': order_id, 'error': SHIP_DUPLICATE})
+                continue
+            lines[order_id] = reader.line_num
+            shipments.append((order_id, row[1]))
+        outcomes = self.ship_orders_bulk(seller_id, shipments) if shipments else {}
+        for order_id, line in lines.items():
+            outcome = outcomes.get(order_id, SHIP_FAILED)
+            if outcome != SHIP_SHIPPED:
+                errors.append({'line': line, 'order_id': order_id, 'error': outcome})
+        errors.sort(key=lambda e: e['line'])
+        return {
+            'total': total,
+            'shipped': sum(1 for outcome in outcomes.values() if outcome == SHIP_SHIPPED),
+            'errors': errors
+        }
+    
+    def transition_orders(self, action: str, orders, actor_id: Optional[int] = None) -> List[int]:
+        """
+        执行订单状态流转(支持批量)
+        
+        按 ORDER_TRANSITIONS 中的定义生成一条带条件的 UPDATE ... FROM (VALUES ...) ... RETURNING:
+        只有状态在允许的原状态中、且属于执行者的订单才会更新,读取与校验不再分两步,
+        并发下同一订单只会流转一次。库存归还与服务消息(写入发件箱)在同一事务中完成。
+        
+        Args:
+            action: 流转名称(如 pay / ship / approve_refund)
+            orders: 订单ID列表,或 {订单ID: 参数} 字典(如 {订单ID: {'tracking_number': ...}})
+            actor_id: 执行者ID(流转定义了执行者角色时必填,用于校验订单归属)
+            
+        Returns:
+            List[int]: 完成流转的订单ID(不存在、状态不符或无权限的订单被跳过)
+        """
+        transition = ORDER_TRANSITIONS[action]
+        if not isinstance(orders, dict):
+            orders = {order_id: {} for order_id in orders}
+        if not orders or (transition.actor and actor_id is None):
+            return []
+        items = list(orders.items())
+        done = []
+        with self.db.transaction() as conn:
+            for i in range(0, len(items), TRANSITION_BATCH_SIZE):
+                chunk = dict(items[i:i + TRANSITION_BATCH_SIZE])
+                rows = self._apply_transition(conn, transition, chunk, actor_id)
+                if transition.restock:
+                    self._restock(conn, rows)
+                if transition.message:
+                    self.outbox.enqueue_many([
+                        self._transition_message(transition, row, chunk[row['order_id']]) for row in rows
+                    ])
+                done.extend(row['order_id'] for row in rows)
+        return sorted(done)
+    
+    @staticmethod
+    def _apply_transition(conn, transition, orders: Dict[int, Dict], actor_id: Optional[int]) -> List[Dict]:
+        """一条 UPDATE 完成一批订单的流转,返回实际更新的订单"""
+        columns = list(transition.columns.items())
+        assignments = ['status = ?']
+        params = [transition.target.value]
+        if transition.timestamp:
+            assignments.append(f'{transition.timestamp} = ?')
+            params.append(datetime.now().isoformat())
+        assignments += [f'{column} = v.column{n}' for n, (_, column) in enumerate(columns, start=2)]
+        row_sql = '(' + ', '.join('?' * (len(columns) + 1)) + ')'
+        for order_id, values in orders.items():
+            params.append(order_id)
+            params.extend(values.get(param) for param, _ in columns)
+        sources = transition.source_values()
+        params.extend(sources)
+        owner = ''
+        if transition.actor:
+            owner = f'AND orders.{transition.actor}_id = ?'
+            params.append(actor_id)
+        return conn.execute(f"""
+            UPDATE orders SET {', '.join(assignments)}
+            FROM (VALUES {', '.join([row_sql] * len(orders))}) AS v
+            WHERE orders.order_id = v.column1
+              AND orders.status IN ({', '.join('?' * len(sources))}) {owner}
+            RETURNING orders.order_id, orders.buyer_id, orders.seller_id, orders.product_id, orders.quantity,
+                      orders.created_at
+        """, params).fetchall()
+    
+    def _restock(self, conn, orders: List[Dict]) -> None:
+        """
+        归还已取消订单的库存(在调用方事务中执行)
+        
+        商品正在限时抢购时商品库存必须保持为 0,数量改为归还到抢购名额(累加 reserved),
+        提交后同步到内存中的抢购。
+        
+        Args:
+            conn: 数据库连接
+            orders: 已取消的订单(含 product_id / quantity / buyer_id / created_at)
+        """
+        product_ids = list(dict.fromkeys(order['product_id'] for order in orders))
+        sales = {sale['product_id']: sale for sale in conn.execute(f"""
+            SELECT sale_id, product_id, started_at FROM flash_sales
+            WHERE status = 'active' AND product_id IN ({', '.join('?' * len(product_ids))})
+        """, product_ids)}
+        conn.executemany(
+            "UPDATE products SET stock = stock + ?, status = 'available' WHERE product_id = ?",
+            [(order['quantity'], order['product_id']) for order in orders if order['product_id'] not in sales]
+        )
+        returned = [order for order in orders if order['product_id'] in sales]
+        if not returned:
+            return
+        conn.executemany(
+            "UPDATE flash_sales SET reserved = reserved + ? WHERE sale_id = ?",
+            [(order['quantity'], sales[order['product_id']]['sale_id']) for order in returned]
+        )
+        
+        def _release():
+            for order in returned:
+                sale_row = sales[order['product_id']]
+                sale = get_flash_sale(self.db, order['product_id'])
+                if sale is not None and sale.sale_id == sale_row['sale_id']:
+                    sale.release(order['buyer_id'], order['quantity'],
+                                 order['created_at'] >= sale_row['started_at'])
+        self.db.after_commit(_release)
+    
+    @staticmethod
+    def _transition_message(transition, order, values: Dict):
+        """流转对应的服务消息(发件箱记录): 由执行方发给另一方"""
+        receiver = order[f'{transition.notify}_id']
+        sender = order['buyer_id'] if transition.notify == 'seller' else order['seller_id']
+        params = {'order_id': order['order_id']}
+        params.update((name, values.get(name, '')) for name in transition.message_params)
+        content = json.dumps({'key': transition.message, 'params': params}, ensure_ascii=False)
+        return sender, receiver, content, 'service'
     
     def _send_service_message(self, sender_id: int, receiver_id: int, translation_key: str, **params):
         """
         发送服务消息（内部辅助方法）
         
+        消息写入 outbox 表,与调用方的订单状态变化处于同一事务(回滚时一并撤销),
+        提交后由发件箱投递器批量写入 messages。
+        
         Args:
             sender_id: 发送者user_id
             receiver_id: 接收者user_id
             translation_key: 翻译键（如 'order.service_order_created'）
             **params: 翻译参数（如 order_id=123）
         """
-        try:
-            import json
-            # 将翻译键和参数存储为 JSON
-            content_data = {
-                'key': translation_key,
-                'params': params
-            }
-            content = json.dumps(content_data, ensure_ascii=False)
-            
-            # 插入消息表，msg_type 为 'service'
-            insert_query = """
-                INSERT INTO messages (sender_id, receiver_id, content, msg_type, status)
-                VALUES (?, ?, ?, 'service', 'sent')
-            """
-            self.db.execute_insert(insert_query, (sender_id, receiver_id, content))
-        except Exception as e:
-            # 静默失败，不影响订单主流程
-            pass
+        # 将翻译键和参数存储为 JSON,显示时按接收者的语言翻译
+        content = json.dumps({'key': translation_key, 'params': params}, ensure_ascii=False)
+        self.outbox.enqueue(sender_id, receiver_id, content)
     
     def get_order_by_id(self, order_id: int) -> Optional[Order]:
         """
@@ -480,42 +627,94 @@ class OrderService:
             """
             return self.db.execute_query(query, (seller_id,))
     
+    def get_orders_by_buyer_page(self, buyer_id: int, status: str = None,
+                                 limit: int = 20, after: str = None) -> Dict:
+        """
+        游标分页获取买家的订单列表
+        
+        Args:
+            buyer_id: 买家ID
+            status: 订单状态筛选
+            limit: 每页数量
+            after: 上一页返回的 next_cursor,为空表示第一页
+            
+        Returns:
+            Dict: {'items': 订单列表, 'next_cursor': 下一页游标(没有更多时为 None)}
+        """
+        return self._orders_page('buyer_id', buyer_id, status, limit, after)
+    
+    def get_orders_by_seller_page(self, seller_id: int, status: str = None,
+                                  limit: int = 20, after: str = None) -> Dict:
+        """
+        游标分页获取卖家的订单列表
+        
+        Args:
+            seller_id: 卖家ID
+            status: 订单状态筛选
+            limit: 每页数量
+            after: 上一页返回的 next_cursor,为空表示第一页
+            
+        Returns:
+            Dict: {'items': 订单列表, 'next_cursor': 下一页游标(没有更多时为 None)}
+        """
+        return self._orders_page('seller_id', seller_id, status, limit, after)
+    
+    def _orders_page(self, owner_column: str, owner_id: int, status: Optional[str],
+                     limit: int, after: Optional[str]) -> Dict:
+        """按买家或卖家查询一页订单"""
+        query = f"SELECT * FROM orders WHERE {owner_column}=?"
+        params = [owner_id]
+        if status:
+            query += " AND status=?"
+            params.append(status)
+        if after:
+            query += " AND " + keyset_condition(ORDER_PAGE_KEY, descending=True)
+            params.extend(decode_cursor(after, len(ORDER_PAGE_KEY)))
+        query += order_clause(ORDER_PAGE_KEY, descending=True) + " LIMIT ?"
+        params.append(limit + 1)
+        rows = self.db.execute_query(query, tuple(params))
+        return build_page(rows, limit, ORDER_PAGE_KEY)
+    
     def get_order_statistics(self, user_id: int, 
                             is_seller: bool = False) -> Dict:
         """
         获取订单统计信息
         
+        金额按分(两位小数)取整: 汇总表由触发器逐笔累加,与实时 SUM 的浮点累加顺序不同,
+        取整后两种方式的结果一致(如 0.1 + 0.2 返回 0.3)。
+        
         Args:
             user_id: 用户ID
             is_seller: 是否为卖家
             
         Returns:
-            Dict: 统计信息
-        """
-        role_field = 'seller_id' if is_seller else 'buyer_id'
-        base_params = (user_id,)
-        # 总数
-        total = self.db.execute_query(
-            f"SELECT COUNT(*) AS c FROM orders WHERE {role_field}=?",
-            base_params
-        )[0]['c']
-        # 各状态计数
-        stats = {}
-        for st in [s.value for s in OrderStatus]:
+            Dict: 统计信息(total_orders、by_status,以及 total_revenue 或 total_spent)
+        """
+        if ORDER_STATS_CONFIG.get('use_stats_table', True):
+            # 读取触发器维护的汇总行(每个状态一行),与历史订单量无关
+            rows = self.db.execute_query(
+                "SELECT status, order_count AS c, total_amount AS s FROM order_stats "
+                "WHERE user_id=? AND role=?",
+                (user_id, 'seller' if is_seller else 'buyer')
+            )
+        else:
+            role_field = 'seller_id' if is_seller else 'buyer_id'
             rows = self.db.execute_query(
-                f"SELECT COUNT(*) AS c FROM orders WHERE {role_field}=? AND status=?",
-                (user_id, st)
+                f"SELECT status, COUNT(*) AS c, COALESCE(SUM(total_price), 0) AS s "
+                f"FROM orders WHERE {role_field}=? GROUP BY status",
+                (user_id,)
             )
-            stats[st] = rows[0]['c']
-        # 金额统计
-        sum_field = 'total_price'
-        amount_row = self.db.execute_query(
-            f"SELECT COALESCE(SUM({sum_field}), 0) AS s FROM orders WHERE {role_field}=?",
-            base_params
-        )[0]
-        total_amount = amount_row['s']
+        # 各状态计数(没有订单的状态为0)
+        stats = {st.value: 0 for st in OrderStatus}
+        total = 0
+        total_amount = 0
+        for row in rows:
+            if row['status'] in stats:
+                stats[row['status']] = row['c']
+            total += row['c']
+            total_amount += row['s']
         return {
             'total_orders': total,
             'by_status': stats,
-            ('total_revenue' if is_seller else 'total_spent'): total_amount
+            ('total_revenue' if is_seller else 'total_spent'): round(total_amount, 2)
         }
@@ -0,0 +1,258 @@
+"""
+Outbox Dispatcher - 服务消息发件箱
+订单状态变化与服务消息写入 outbox 表处于同一事务,由后台线程批量投递到 messages
+"""
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import OUTBOX_CONFIG
+from .event_bus import EventBus, get_event_bus, conversation_topic, user_topic
+
+ENQUEUE_SQL = "INSERT INTO outbox (sender_id, receiver_id, content, msg_type) VALUES (?, ?, ?, ?)"
+
+
+class OutboxDispatcher:
+    """
+    发件箱投递器
+
+    - 业务方在自己的事务中 INSERT outbox,提交后调用 notify() 唤醒投递线程,
+      业务操作的耗时不包含投递消息的开销;事务回滚时消息随之撤销
+    - 每批最多 batch_size 条: 一条 INSERT ... SELECT 按 outbox_id 顺序写入 messages
+      (conversations 汇总由 messages 触发器同步维护),并在同一事务中删除已投递的行
+    - 投递失败时保留在 outbox 中重试(至少投递一次);整批失败时逐条投递,
+      累计失败 max_attempts 次的行不再自动重试,留待人工处理
+    - 进程重启或其他进程写入的待投递行由定时轮询(flush_interval)补投
+    - 投递提交后向事件总线发布 message 事件
+    - synchronous=True 时 notify() 直接投递,便于测试
+    """
+
+    def __init__(self, db_manager, batch_size: int = None, flush_interval: float = None,
+                 max_attempts: int = None, synchronous: Optional[bool] = None,
+                 event_bus: Optional[EventBus] = None):
+        """
+        初始化投递器
+
+        Args:
+            db_manager: 数据库管理器实例
+            batch_size: 每批投递的最大条数
+            flush_interval: 定时投递间隔(秒)
+            max_attempts: 单条消息的最大投递次数
+            synchronous: 是否同步投递(默认取配置 OUTBOX_CONFIG['async'] 的反值)
+            event_bus: 事件总线(默认使用数据库共享的总线)
+        """
+        self.db = db_manager
+        self.batch_size = batch_size or OUTBOX_CONFIG.get('batch_size', 200)
+        self.flush_interval = flush_interval or OUTBOX_CONFIG.get('flush_interval', 1.0)
+        self.max_attempts = max_attempts or OUTBOX_CONFIG.get('max_attempts', 5)
+        if synchronous is None:
+            synchronous = not OUTBOX_CONFIG.get('async', True)
+        self.synchronous = synchronous
+        self.event_bus = event_bus or get_event_bus(db_manager)
+        self._dispatch_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # 统计信息
+        self._delivered = 0
+        self._batches = 0
+        self._failures = 0
+
+    def enqueue(self, sender_id: int, receiver_id: int, content: str,
+                msg_type: str = 'service') -> int:
+        """
+        写入发件箱(在调用方的事务中执行),提交后自动唤醒投递
+
+        Args:
+            sender_id: 发送者ID
+            receiver_id: 接收者ID
+            content: 消息内容
+            msg_type: 消息类型
+
+        Returns:
+            int: 发件箱记录ID
+        """
+        outbox_id = self.db.execute_insert(ENQUEUE_SQL, (sender_id, receiver_id, content, msg_type))
+        self.db.after_commit(self.notify)
+        return outbox_id
+
+    def enqueue_many(self, messages: List[Tuple[int, int, str, str]]) -> int:
+        """
+        批量写入发件箱(在调用方的事务中执行),提交后自动唤醒投递
+
+        Args:
+            messages: (发送者ID, 接收者ID, 消息内容, 消息类型) 列表
+
+        Returns:
+            int: 写入的条数
+        """
+        if not messages:
+            return 0
+        count = self.db.execute_many(ENQUEUE_SQL, messages)
+        self.db.after_commit(self.notify)
+        return count
+
+    def notify(self) -> None:
+        """有新的待投递消息: 同步模式下直接投递,否则唤醒投递线程"""
+        if self.synchronous or self._stopped:
+            self.dispatch()
+            return
+        self._ensure_worker()
+        self._wake.set()
+
+    def dispatch(self) -> int:
+        """
+        投递全部待投递消息(与后台线程共用投递锁,返回时已全部提交)
+
+        Returns:
+            int: 本次投递的消息数
+        """
+        total = 0
+        with self._dispatch_lock:
+            while True:
+                try:
+                    delivered, pending = self._deliver_batch()
+                except Exception as e:
+                    self._failures += 1
+                    print(f"投递服务消息失败: {str(e)}")
+                    delivered, pending = self._deliver_one_by_one(), False
+                total += delivered
+                if not pending:
+                    return total
+
+    def _pending_ids(self) -> List[int]:
+        rows = self.db.execute_query(
+            # +outbox_id: 走 attempts 索引只读取待投递行,而不是按主键顺序扫描整张表
+            "SELECT outbox_id FROM outbox WHERE attempts < ? ORDER BY +outbox_id LIMIT ?",
+            (self.max_attempts, self.batch_size)
+        )
+        return [row['outbox_id'] for row in rows]
+
+    def _deliver(self, conn, ids: List[int]) -> List[Dict]:
+        """将指定的发件箱记录写入 messages 并删除(在调用方事务中执行)"""
+        placeholders = ', '.join('?' * len(ids))
+        messages = conn.execute(f"""
+            INSERT INTO messages (sender_id, receiver_id, content, msg_type, status, created_at)
+            SELECT sender_id, receiver_id, content, msg_type, 'sent', created_at
+            FROM outbox WHERE outbox_id IN ({placeholders})
+            ORDER BY outbox_id
+            RETURNING msg_id, sender_id, receiver_id, content, msg_type
+        """, ids).fetchall()
+        conn.execute(f"DELETE FROM outbox WHERE outbox_id IN ({placeholders})", ids)
+        return [dict(row) for row in messages]
+
+    def _deliver_batch(self):
+        """投递一批,返回 (投递数量, 是否可能还有待投递消息)"""
+        with self.db.transaction() as conn:
+            ids = self._pending_ids()
+            messages = self._deliver(conn, ids) if ids else []
+        self._record(messages)
+        return len(messages), len(ids) == self.batch_size
+
+    def _deliver_one_by_one(self) -> int:
+        """整批失败时逐条投递,失败的记录累计投递次数"""
+        ids = self._pending_ids()
+        delivered = 0
+        for outbox_id in ids:
+            try:
+                with self.db.transaction() as conn:
+                    messages = self._deliver(conn, [outbox_id])
+            except Exception as e:
+                self.db.execute_update(
+                    "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE outbox_id = ?",
+                    (str(e), outbox_id)
+                )
+                continue
+            self._record(messages)
+            delivered += len(messages)
+        return delivered
+
+    def _record(self, messages: List[Dict]) -> None:
+        """更新统计并向事件总线发布已投递的消息"""
+        if not messages:
+            return
+        self._delivered += len(messages)
+        self._batches += 1
+        for message in sorted(messages, key=lambda m: m['msg_id']):
+            self.event_bus.publish(
+                'message', message,
+                conversation_topic(message['sender_id'], message['receiver_id']),
+                user_topic(message['receiver_id'])
+            )
+
+    def _ensure_worker(self) -> None:
+        """首次唤醒时启动后台投递线程"""
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self.dispatch()
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def close(self) -> None:
+        """停止后台线程并投递剩余消息"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.dispatch()
+
+    def stats(self) -> Dict:
+        """
+        获取投递统计
+
+        Returns:
+            Dict: 待投递条数、已投递条数、批次数、失败次数、超过重试次数的条数等
+        """
+        row = self.db.execute_query(
+            "SELECT COUNT(*) AS total, COALESCE(SUM(attempts >= ?), 0) AS dead FROM outbox",
+            (self.max_attempts,)
+        )[0]
+        return {
+            'pending': row['total'] - row['dead'],
+            'dead': row['dead'],
+            'delivered': self._delivered,
+            'batches': self._batches,
+            'failures': self._failures,
+            'synchronous': self.synchronous,
+            'batch_size': self.batch_size
+        }
+
+
+# 每个数据库管理器共享一个投递器,关闭数据库时投递剩余消息
+_dispatchers: Dict[object, OutboxDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_outbox_dispatcher(db_manager) -> OutboxDispatcher:
+    """
+    获取数据库管理器对应的共享发件箱投递器
+
+    Args:
+        db_manager: 数据库管理器实例(工作单元使用其底层数据库的投递器)
+
+    Returns:
+        OutboxDispatcher: 投递器
+    """
+    from .unit_of_work import UnitOfWork
+    if isinstance(db_manager, UnitOfWork):
+        db_manager = db_manager.db
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(db_manager)
+        if dispatcher is None:
+            dispatcher = OutboxDispatcher(db_manager)
+            _dispatchers[db_manager] = dispatcher
+
+            def _close():
+                with _dispatchers_lock:
+                    _dispatchers.pop(db_manager, None)
+                dispatcher.close()
+            db_manager.on_close(_close)
+        return dispatcher
@@ -3,13 +3,44 @@ Product Service - 商品服务层
 处理商品相关的业务逻辑
 """
 
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple
 from models.product import Product, ProductStatus
+from config.settings import VIEW_COUNTER_CONFIG
+from .view_counter import ViewCounter, get_view_counter
+from .unit_of_work import UnitOfWork
 
 from utils.exceptions import (
     ProductNotFoundError,
     InsufficientStockError
 )
+from utils.pagination import (
+    build_page, decode_cursor, encode_cursor, keyset_condition, order_clause
+)
+
+# trigram 全文索引只能匹配不少于3个字符的词;两个中日韩字符的词走二元索引(products_bigram)
+FTS_MIN_TERM_LENGTH = 3
+# 中日韩字符范围(与二元索引迁移 m0017 一致)
+CJK_RANGES = ((0x3040, 0x9FFF), (0xAC00, 0xD7AF), (0xF900, 0xFAFF))
+# 全文检索的排序: BM25 相关度(对全部匹配计算),相同时新商品在前;每页使用同一排序
+FTS_ORDER = " ORDER BY m.rank, p.product_id DESC"
+
+# 分类列表排序方式 -> (游标排序列, 是否降序);末列 product_id 保证排序键唯一
+CATEGORY_PAGE_KEYS = {
+    'newest': (('created_at', 'product_id'), True),
+    'price_asc': (('price', 'product_id'), False),
+    'price_desc': (('price', 'product_id'), True),
+    'popular': (('view_count', 'favorite_count', 'product_id'), True),
+}
+
+
+def _is_cjk(ch: str) -> bool:
+    """是否为中日韩字符"""
+    return any(low <= ord(ch) <= high for low, high in CJK_RANGES)
+
+
+def _match_expression(terms: List[str]) -> str:
+    """多个词的 FTS5 MATCH 表达式(各词作为短语,AND)"""
+    return ' '.join('"' + w.replace('"', '""') + '"' for w in terms)
 
 
 class ProductService:
@@ -18,14 +49,22 @@ class ProductService:
     提供商品发布、编辑、搜索、浏览等功能
     """
     
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, view_counter: Optional[ViewCounter] = None):
         """
         初始化商品服务
         
         Args:
             db_manager: 数据库管理器实例
+            view_counter: 浏览计数器(默认使用数据库共享的计数器;配置关闭时同步写库)
         """
         self.db = db_manager
+        if view_counter is None and VIEW_COUNTER_CONFIG.get('enabled', True):
+            # 工作单元内的服务共享底层数据库的计数器(浏览次数不参与事务)
+            base_db = db_manager.db if isinstance(db_manager, UnitOfWork) else db_manager
+            view_counter = get_view_counter(base_db)
+        self.view_counter = view_counter
+        self._fts_available = None
+        self._bigram_available = None
     
     def create_product(self, seller_id: int, product_data: dict) -> Optional[int]:
         """
@@ -205,12 +244,19 @@ class ProductService:
             
             product_data = products[0]
             
-            # 增加浏览次数
+            # 增加浏览次数(有计数器时只记入内存,由后台批量写入)
+            pending_views = 0
             if increment_view:
-                self.db.execute_update(
-                    "UPDATE products SET view_count = view_count + 1 WHERE product_id = ?",
-                    (product_id,)
-                )
+                if self.view_counter is not None:
+                    self.view_counter.increment(product_id)
+                else:
+                    self.db.execute_update(
+                        "UPDATE products SET view_count = view_count + 1 WHERE product_id = ?",
+                        (product_id,)
+                    )
+                    pending_views = 1
+            if self.view_counter is not None:
+                pending_views = self.view_counter.pending(product_id)
             
             # 创建 Product 对象
             product = Product(
@@ -227,7 +273,7 @@ class ProductService:
             product.images = eval(product_data['images']) if product_data['images'] else []
             product.status = ProductStatus(product_data['status'])
             product.auctionable = bool(product_data['auctionable'])
-            product.view_count = product_data['view_count'] + (1 if increment_view else 0)
+            product.view_count = product_data['view_count'] + pending_views
             product.favorite_count = product_data['favorite_count']
             
             return product
@@ -238,6 +284,24 @@ class ProductService:
             print(f"获取商品失败: {str(e)}")
             return None
 
+    def get_view_counter_stats(self) -> Dict:
+        """
+        获取浏览计数器统计(未刷新次数、刷新间隔、写入延迟等)
+        
+        Returns:
+            Dict: 统计信息,未启用计数器时返回空字典
+        """
+        return self.view_counter.stats() if self.view_counter is not None else {}
+    
+    def flush_view_counts(self) -> int:
+        """
+        立即将缓冲的浏览次数写入数据库
+        
+        Returns:
+            int: 写入的浏览次数
+        """
+        return self.view_counter.flush() if self.view_counter is not None else 0
+    
     def search_products(self, keyword: str = None, category: str = None,
                        min_price: float = None, max_price: float = None,
                        limit: int = 20, offset: int = 0) -> List[Dict]:
@@ -256,32 +320,15 @@ class ProductService:
             List[Dict]: 商品列表
         """
         try:
-            # 构建基础查询（只搜索可售商品）
-            query = "SELECT * FROM products WHERE status = 'available'"
-            params = []
-            
-            # 添加关键词搜索（标题或描述中包含）
-            if keyword:
-                query += " AND (title LIKE ? OR description LIKE ?)"
-                keyword_pattern = f"%{keyword}%"
-                params.extend([keyword_pattern, keyword_pattern])
-            
-            # 添加分类筛选
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-            
-            # 添加价格范围筛选
-            if min_price is not None:
-                query += " AND price >= ?"
-                params.append(min_price)
-            
-            if max_price is not None:
-                query += " AND price <= ?"
-                params.append(max_price)
+            query, params, fts_terms = self._build_search_query(
+                keyword, category, min_price, max_price
+            )
             
-            # 按创建时间降序排序
-            query += " ORDER BY created_at DESC"
+            # 排序: 全文检索按相关度,其余按创建时间降序
+            if fts_terms:
+                query += FTS_ORDER
+            else:
+                query += " ORDER BY created_at DESC"
             
             # 添加分页
             query += " LIMIT ? OFFSET ?"
@@ -297,6 +344,161 @@ class ProductService:
             print(f"搜索商品失败: {str(e)}")
             return []
     
+    def search_products_page(self, keyword: str = None, category: str = None,
+                             min_price: float = None, max_price: float = None,
+                             limit: int = 20, after: str = None) -> Dict:
+        """
+        游标分页搜索商品(翻页深度不影响查询耗时)
+        
+        无关键词时按 (created_at, product_id) 降序翻页;全文检索时按
+        (相关度, product_id) 翻页,顺序与 search_products 相同
+        
+        Args:
+            keyword: 搜索关键词
+            category: 商品分类(IP)
+            min_price: 最低价格
+            max_price: 最高价格
+            limit: 每页数量
+            after: 上一页返回的 next_cursor,为空表示第一页
+            
+        Returns:
+            Dict: {'items': 商品列表, 'next_cursor': 下一页游标(没有更多时为 None)}
+        """
+        try:
+            query, params, fts_terms = self._build_search_query(
+                keyword, category, min_price, max_price, select_rank=True
+            )
+            if fts_terms:
+                # 相关度排序: 游标为上一页最后一行的 (相关度, 商品ID),与 FTS_ORDER 一致
+                if after:
+                    rank, product_id = decode_cursor(after, 2)
+                    query += " AND (m.rank > ? OR (m.rank = ? AND p.product_id < ?))"
+                    params.extend([rank, rank, product_id])
+                query += FTS_ORDER + " LIMIT ?"
+                params.append(limit + 1)
+                rows = [dict(row) for row in self.db.execute_query(query, tuple(params))]
+                page = build_page(rows, limit, ('search_rank', 'product_id'))
+                for item in page['items']:
+                    del item['search_rank']
+                return page
+            
+            key = ('created_at', 'product_id')
+            if after:
+                query += " AND " + keyset_condition(key, descending=True)
+                params.extend(decode_cursor(after, len(key)))
+            query += order_clause(key, descending=True) + " LIMIT ?"
+            params.append(limit + 1)
+            rows = self.db.execute_query(query, tuple(params))
+            return build_page(rows, limit, key)
+            
+        except Exception as e:
+            print(f"搜索商品失败: {str(e)}")
+            return {'items': [], 'next_cursor': None}
+    
+    def _build_search_query(self, keyword: str, category: str, min_price: float,
+                            max_price: float, select_rank: bool = False) -> Tuple[str, List, List[str]]:
+        """
+        构建搜索的 SELECT 和 WHERE 部分(不含排序与分页)
+        
+        Args:
+            keyword: 搜索关键词
+            category: 商品分类(IP)
+            min_price: 最低价格
+            max_price: 最高价格
+            select_rank: 全文检索时是否同时返回相关度(search_rank 列)
+            
+        Returns:
+            Tuple[str, List, List[str]]: SQL、参数列表、走全文索引的词
+            (有全文检索词时 SQL 中匹配结果的别名为 m,相关度列为 m.rank)
+        """
+        # 关键词按空白拆分为多个词(AND);不少于3个字符的词走 trigram 索引,
+        # 两个中日韩字符的词走二元索引,其余过短的词使用 LIKE
+        use_fts = bool(keyword) and self._has_fulltext_index()
+        terms = keyword.split() if keyword else []
+        fts_terms, bigram_terms, like_terms = [], [], []
+        if use_fts:
+            use_bigram = self._has_bigram_index()
+            for w in terms:
+                if len(w) >= FTS_MIN_TERM_LENGTH:
+                    fts_terms.append(w)
+                elif use_bigram and len(w) == 2 and all(_is_cjk(ch) for ch in w):
+                    bigram_terms.append(w)
+                else:
+                    like_terms.append(w)
+        elif keyword:
+            like_terms = [keyword]
+        
+        if fts_terms or bigram_terms:
+            # 全文检索: 按 BM25 相关度排序(标题权重高于描述);只有两字词时按二元索引的相关度
+            ranked = 'products_fts' if fts_terms else 'products_bigram'
+            query = (
+                f"SELECT p.*{', m.rank AS search_rank' if select_rank else ''} FROM ("
+                f"SELECT rowid, bm25({ranked}, 10.0, 1.0) AS rank FROM {ranked} "
+                f"WHERE {ranked} MATCH ?"
+                ") m JOIN products p ON p.product_id = m.rowid "
+                "WHERE p.status = 'available'"
+            )
+            params = [_match_expression(fts_terms or bigram_terms)]
+            if fts_terms and bigram_terms:
+                query += " AND p.product_id IN (SELECT rowid FROM products_bigram WHERE products_bigram MATCH ?)"
+                params.append(_match_expression(bigram_terms))
+            col = 'p.'
+        else:
+            # 构建基础查询（只搜索可售商品）
+            query = "SELECT * FROM products WHERE status = 'available'"
+            params = []
+            col = ''
+        
+        # 过短的词(或无全文索引时)使用 LIKE 匹配标题或描述
+        for term in like_terms:
+            query += f" AND ({col}title LIKE ? OR {col}description LIKE ?)"
+            keyword_pattern = f"%{term}%"
+            params.extend([keyword_pattern, keyword_pattern])
+        
+        # 添加分类筛选
+        if category:
+            query += f" AND {col}category = ?"
+            params.append(category)
+        
+        # 添加价格范围筛选
+        if min_price is not None:
+            query += f" AND {col}price >= ?"
+            params.append(min_price)
+        
+        if max_price is not None:
+            query += f" AND {col}price <= ?"
+            params.append(max_price)
+        
+        return query, params, fts_terms + bigram_terms
+    
+    def _has_fulltext_index(self) -> bool:
+        """
+        检查商品全文索引(products_fts)是否可用,结果缓存在实例上
+        
+        Returns:
+            bool: 是否可用
+        """
+        if self._fts_available is None:
+            rows = self.db.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+            )
+            self._fts_available = bool(rows)
+        return self._fts_available
+    
+    def _has_bigram_index(self) -> bool:
+        """
+        检查两字词二元索引(products_bigram)是否可用,结果缓存在实例上
+        
+        Returns:
+            bool: 是否可用
+        """
+        if self._bigram_available is None:
+            rows = self.db.execute_query(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_bigram'"
+            )
+            self._bigram_available = bool(rows)
+        return self._bigram_available
+    
     def get_products_by_seller(self, seller_id: int, include_removed: bool = False) -> List[Dict]:
         """
         获取卖家的所有商品
@@ -380,6 +582,37 @@ class ProductService:
             print(f"获取分类商品失败: {str(e)}")
             return []
     
+    def get_products_by_category_page(self, category: str, limit: int = 20,
+                                      after: str = None, sort_by: str = 'newest') -> Dict:
+        """
+        游标分页获取分类商品(翻页深度不影响查询耗时)
+        
+        Args:
+            category: 商品分类(IP)
+            limit: 每页数量
+            after: 上一页返回的 next_cursor,为空表示第一页
+            sort_by: 排序方式,同 get_products_by_category
+            
+        Returns:
+            Dict: {'items': 商品列表, 'next_cursor': 下一页游标(没有更多时为 None)}
+        """
+        try:
+            key, descending = CATEGORY_PAGE_KEYS.get(sort_by, CATEGORY_PAGE_KEYS['newest'])
+            query = "SELECT * FROM products WHERE category = ? AND status = 'available'"
+            params = [category]
+            if after:
+                query += " AND " + keyset_condition(key, descending)
+                params.extend(decode_cursor(after, len(key)))
+            query += order_clause(key, descending) + " LIMIT ?"
+            params.append(limit + 1)
+            
+            rows = self.db.execute_query(query, tuple(params))
+            return build_page(rows, limit, key)
+            
+        except Exception as e:
+            print(f"获取分类商品失败: {str(e)}")
+            return {'items': [], 'next_cursor': None}
+    
     def favorite_product(self, user_id: int, product_id: int) -> bool:
         """
         收藏商品
@@ -0,0 +1,94 @@
+"""
+Unit of Work - 工作单元
+让多个服务的写操作共享同一个事务,一次提交
+"""
+
+import threading
+
+
+class _RollbackRequested(Exception):
+    """内部使用: 触发工作单元回滚"""
+
+
+class UnitOfWork:
+    """
+    工作单元
+
+    在 with 块内,通过本对象(或以本对象构造的服务)执行的所有语句
+    都在同一个数据库事务中,正常退出时一次提交,出现异常或调用
+    rollback() 时整体回滚。
+
+    可以直接作为 db_manager 传给服务:
+        with UnitOfWork(db) as uow:
+            order_id = OrderService(uow).create_order(...)
+            MessageService(uow).send_message(...)
+
+    也可以使用内置的服务实例: uow.products / uow.orders / uow.messages
+    """
+
+    def __init__(self, db_manager):
+        """
+        初始化工作单元
+
+        Args:
+            db_manager: 数据库管理器实例
+        """
+        self.db = db_manager
+        self.conn = None
+        self._cm = None
+        self._thread = None
+        self._rollback_only = False
+        self._services = {}
+
+    def __enter__(self) -> 'UnitOfWork':
+        if self._cm is not None:
+            raise RuntimeError("工作单元已在使用中")
+        self._cm = self.db.transaction()
+        self.conn = self._cm.__enter__()
+        self._thread = threading.get_ident()
+        self._rollback_only = False
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        cm, self._cm, self.conn = self._cm, None, None
+        if exc_type is None and self._rollback_only:
+            cm.__exit__(_RollbackRequested, _RollbackRequested(), None)
+            return False
+        return cm.__exit__(exc_type, exc, tb)
+
+    def rollback(self) -> None:
+        """标记回滚: 退出 with 块时撤销本工作单元内的全部写操作"""
+        self._rollback_only = True
+
+    def __getattr__(self, name):
+        """将 execute_* / get_connection 等调用转发给数据库管理器"""
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._cm is None:
+            raise RuntimeError("工作单元未开启,请在 with 块中使用")
+        if threading.get_ident() != self._thread:
+            raise RuntimeError("工作单元只能在开启它的线程中使用")
+        return getattr(self.db, name)
+
+    def _service(self, name: str, cls):
+        if name not in self._services:
+            self._services[name] = cls(self)
+        return self._services[name]
+
+    @property
+    def products(self):
+        """绑定到本工作单元的 ProductService"""
+        from .product_service import ProductService
+        return self._service('products', ProductService)
+
+    @property
+    def orders(self):
+        """绑定到本工作单元的 OrderService"""
+        from .order_service import OrderService
+        return self._service('orders', OrderService)
+
+    @property
+    def messages(self):
+        """绑定到本工作单元的 MessageService"""
+        from .message_service import MessageService
+        return self._service('messages', MessageService)
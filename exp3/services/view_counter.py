@@ -0,0 +1,230 @@
+"""
+View Counter - 商品浏览计数器
+在内存中分片累计浏览次数,由后台线程批量写入数据库
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from config.settings import VIEW_COUNTER_CONFIG
+
+
+class ViewCounter:
+    """
+    分片浏览计数器(写后缓冲)
+
+    - increment() 只修改内存中的分片计数,不访问数据库
+    - 后台线程按时间间隔刷新;某个分片累计达到阈值时提前唤醒刷新
+    - 刷新使用一次 executemany 批量更新 products.view_count
+    - close() 时执行最后一次刷新
+    """
+
+    def __init__(self, db_manager, shards: int = None, flush_interval: float = None,
+                 flush_threshold: int = None):
+        """
+        初始化浏览计数器
+
+        Args:
+            db_manager: 数据库管理器实例
+            shards: 分片数
+            flush_interval: 定时刷新间隔(秒)
+            flush_threshold: 提前刷新的累计次数阈值
+        """
+        self.db = db_manager
+        shards = shards or VIEW_COUNTER_CONFIG.get('shards', 16)
+        self.flush_interval = flush_interval or VIEW_COUNTER_CONFIG.get('flush_interval', 5.0)
+        self.flush_threshold = flush_threshold or VIEW_COUNTER_CONFIG.get('flush_threshold', 1000)
+        self._shard_threshold = max(1, self.flush_threshold // shards)
+        # 每个分片: 锁、{product_id: 次数}、最早未刷新时间
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._counts = [{} for _ in range(shards)]
+        self._totals = [0] * shards
+        self._oldest = [None] * shards
+
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        # 统计信息
+        self._flushes = 0
+        self._flushed_views = 0
+        self._last_flush_at = None
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+
+    def _shard(self, product_id: int) -> int:
+        return product_id % len(self._locks)
+
+    def increment(self, product_id: int, count: int = 1) -> None:
+        """
+        记录浏览(只写内存)
+
+        Args:
+            product_id: 商品ID
+            count: 增加的次数
+        """
+        idx = self._shard(product_id)
+        with self._locks[idx]:
+            counts = self._counts[idx]
+            counts[product_id] = counts.get(product_id, 0) + count
+            self._totals[idx] += count
+            if self._oldest[idx] is None:
+                self._oldest[idx] = time.monotonic()
+            over_threshold = self._totals[idx] >= self._shard_threshold
+        self._ensure_worker()
+        if over_threshold:
+            self._wake.set()
+
+    def pending(self, product_id: int) -> int:
+        """
+        获取尚未写入数据库的浏览次数
+
+        Args:
+            product_id: 商品ID
+
+        Returns:
+            int: 未刷新的次数
+        """
+        idx = self._shard(product_id)
+        with self._locks[idx]:
+            return self._counts[idx].get(product_id, 0)
+
+    def flush(self) -> int:
+        """
+        将累计的浏览次数批量写入数据库
+
+        Returns:
+            int: 写入的浏览次数
+        """
+        with self._flush_lock:
+            merged: Dict[int, int] = {}
+            oldest = None
+            for idx, lock in enumerate(self._locks):
+                with lock:
+                    counts = self._counts[idx]
+                    if not counts:
+                        continue
+                    self._counts[idx] = {}
+                    self._totals[idx] = 0
+                    if oldest is None or self._oldest[idx] < oldest:
+                        oldest = self._oldest[idx]
+                    self._oldest[idx] = None
+                for product_id, count in counts.items():
+                    merged[product_id] = merged.get(product_id, 0) + count
+            if not merged:
+                return 0
+
+            try:
+                self.db.execute_many(
+                    "UPDATE products SET view_count = view_count + ? WHERE product_id = ?",
+                    [(count, product_id) for product_id, count in merged.items()]
+                )
+            except Exception:
+                # 写入失败时放回缓冲,等待下一次刷新
+                for product_id, count in merged.items():
+                    self._restore(product_id, count, oldest)
+                raise
+
+            flushed = sum(merged.values())
+            lag = time.monotonic() - oldest
+            self._flushes += 1
+            self._flushed_views += flushed
+            self._last_flush_at = time.time()
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            return flushed
+
+    def _restore(self, product_id: int, count: int, oldest: Optional[float]) -> None:
+        idx = self._shard(product_id)
+        with self._locks[idx]:
+            counts = self._counts[idx]
+            counts[product_id] = counts.get(product_id, 0) + count
+            self._totals[idx] += count
+            if self._oldest[idx] is None or (oldest is not None and oldest < self._oldest[idx]):
+                self._oldest[idx] = oldest
+
+    def _ensure_worker(self) -> None:
+        """首次记录浏览时启动后台刷新线程"""
+        if self._thread is not None or self._stopped:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='view-counter-flusher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"浏览次数写入失败: {str(e)}")
+
+    def close(self) -> None:
+        """停止后台线程并写入剩余的浏览次数"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def stats(self) -> Dict:
+        """
+        获取计数器统计信息
+
+        Returns:
+            Dict: 未刷新次数、当前延迟、刷新次数/间隔、历史最大延迟等
+        """
+        now = time.monotonic()
+        pending = 0
+        oldest = None
+        for idx, lock in enumerate(self._locks):
+            with lock:
+                pending += self._totals[idx]
+                if self._oldest[idx] is not None and (oldest is None or self._oldest[idx] < oldest):
+                    oldest = self._oldest[idx]
+        return {
+            'pending_views': pending,
+            'current_lag': (now - oldest) if oldest is not None else 0.0,
+            'flush_interval': self.flush_interval,
+            'flush_threshold': self.flush_threshold,
+            'flushes': self._flushes,
+            'flushed_views': self._flushed_views,
+            'last_flush_at': self._last_flush_at,
+            'last_lag': self._last_lag,
+            'max_lag': self._max_lag
+        }
+
+
+# 每个数据库管理器共享一个计数器,关闭数据库时自动刷新并移除
+_counters: Dict[object, ViewCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def get_view_counter(db_manager) -> ViewCounter:
+    """
+    获取数据库管理器对应的共享浏览计数器
+
+    Args:
+        db_manager: 数据库管理器实例
+
+    Returns:
+        ViewCounter: 浏览计数器
+    """
+    with _counters_lock:
+        counter = _counters.get(db_manager)
+        if counter is None:
+            counter = ViewCounter(db_manager)
+            _counters[db_manager] = counter
+
+            def _close():
+                with _counters_lock:
+                    _counters.pop(db_manager, None)
+                counter.close()
+            db_manager.on_close(_close)
+        return counter
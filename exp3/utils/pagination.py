@@ -0,0 +1,97 @@
+"""
+Pagination - 游标分页工具
+将上一页最后一行的排序键编码为不透明游标,下一页从该键之后继续(keyset 分页),
+深翻页时不需要像 OFFSET 那样先扫描并丢弃前面所有行
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    将排序键编码为游标字符串
+
+    Args:
+        values: 排序键的值(如 [created_at, product_id])
+
+    Returns:
+        str: URL 安全的游标字符串
+    """
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    解析游标字符串
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        size: 期望的排序键个数
+
+    Returns:
+        List[Any]: 排序键的值
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return values
+
+
+def keyset_condition(columns: Sequence[str], descending: bool) -> str:
+    """
+    生成"位于游标之后"的行值比较条件
+
+    Args:
+        columns: 排序列(最后一列必须唯一,如主键)
+        descending: 是否降序
+
+    Returns:
+        str: 如 "(created_at, product_id) < (?, ?)"
+    """
+    op = '<' if descending else '>'
+    placeholders = ', '.join('?' for _ in columns)
+    return f"({', '.join(columns)}) {op} ({placeholders})"
+
+
+def order_clause(columns: Sequence[str], descending: bool) -> str:
+    """
+    生成与 keyset_condition 对应的 ORDER BY 子句
+
+    Args:
+        columns: 排序列
+        descending: 是否降序
+
+    Returns:
+        str: 如 " ORDER BY created_at DESC, product_id DESC"
+    """
+    direction = 'DESC' if descending else 'ASC'
+    return " ORDER BY " + ', '.join(f"{col} {direction}" for col in columns)
+
+
+def build_page(rows: List[Dict], limit: int, key: Sequence[str]) -> Dict:
+    """
+    根据多取一行的查询结果构造分页结果
+
+    Args:
+        rows: 查询结果(最多 limit + 1 行)
+        limit: 每页数量
+        key: 游标使用的列名(结果行中的键)
+
+    Returns:
+        Dict: {'items': 本页数据, 'next_cursor': 下一页游标,没有更多时为 None}
+    """
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor: Optional[str] = None
+    if len(rows) > limit and items:
+        next_cursor = encode_cursor([items[-1][col] for col in key])
+    return {'items': items, 'next_cursor': next_cursor}